@@ -0,0 +1,73 @@
+"""Drive the FastAPI app over ASGI in-process (no server, no HTTP client buffering), so benchmarks
+see the time of every response body chunk."""
+
+import asyncio
+import json
+import time
+from collections.abc import Iterable
+
+
+async def request(
+    app,
+    method: str,
+    path: str,
+    token: str,
+    payload: dict | None = None,
+    *,
+    chunks: Iterable[bytes] | None = None,
+    content_type: str = "application/json",
+    content_length: int | None = None,
+) -> tuple[float, float, bytes]:
+    """(seconds to first body byte, seconds to end, body) of one request (JSON payload, or a body
+    sent as chunks, one per receive() like a server reading the socket) through the ASGI app,
+    authenticated with Bearer token."""
+    body = json.dumps(payload).encode() if payload is not None else b""
+    pending = iter(chunks if chunks is not None else [body])
+    next_chunk: bytes | None = next(pending, b"")
+    length = content_length if chunks is not None else len(body)
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [
+            (b"authorization", f"Bearer {token}".encode()),
+            (b"content-type", content_type.encode()),
+            *([(b"content-length", str(length).encode())] if length is not None else []),
+        ],
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+    }
+    sent = False
+    done = asyncio.Event()
+    received: list[bytes] = []
+    first: float | None = None
+
+    async def receive() -> dict:
+        nonlocal sent, next_chunk
+        if not sent:
+            chunk, next_chunk = next_chunk, next(pending, None)
+            sent = next_chunk is None
+            await asyncio.sleep(0)  # let other requests run between chunks
+            return {"type": "http.request", "body": chunk, "more_body": not sent}
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: dict) -> None:
+        nonlocal first
+        if message["type"] == "http.response.body":
+            if message.get("body") and first is None:
+                first = time.perf_counter()
+            received.append(message.get("body", b""))
+            if not message.get("more_body"):
+                done.set()
+
+    start = time.perf_counter()
+    await app(scope, receive, send)
+    end = time.perf_counter()
+    return (first or end) - start, end - start, b"".join(received)
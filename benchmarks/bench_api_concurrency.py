@@ -0,0 +1,111 @@
+"""Benchmark: API requests/s by in-flight requests, inline vs. executor-offloaded service calls.
+
+Processes --documents Markdown documents against offline fakes, then makes the fake backends slow
+(--bedrock-latency per Bedrock call, --storage-latency per DynamoDB metadata call) and sends
+--requests requests through the FastAPI app in one event loop (driven over ASGI), a --rag-share
+fraction of them POST /rag/query and the rest GET /documents, keeping --in-flight requests open
+at once. With API_*_WORKERS=0 every service call runs inline and blocks the loop (the previous
+behaviour); with the executors it runs on the bounded per-backend pools. Reports requests/s and
+latency percentiles per configuration.
+
+Usage: python -m benchmarks.bench_api_concurrency [--in-flight 1 4 16 32] [--requests 128]
+"""
+
+import argparse
+import asyncio
+import time
+from io import BytesIO
+
+from src.api.config import get_settings
+from src.services import executors, process_service, upload_service
+from src.storage import metadata
+
+from benchmarks.asgi import request
+from benchmarks.documents import legal_paragraphs
+from benchmarks.fakes import FakeBackends
+
+# Dev tokens ("Bearer dev-...") authenticate as the token itself.
+OWNER = "dev-bench-owner"
+
+
+def _percentile(values: list[float], p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(p / 100 * len(ordered)) - 1))]
+
+
+async def _load(app, requests: int, in_flight: int, rag_share: float) -> tuple[float, list]:
+    gate = asyncio.Semaphore(in_flight)
+    rag_every = max(1, round(1 / rag_share)) if rag_share > 0 else 0
+
+    async def one(i: int) -> float:
+        async with gate:
+            if rag_every and i % rag_every == 0:
+                payload = {"question": f"What does clause {i} say about termination?"}
+                _, total, body = await request(app, "POST", "/api/v1/rag/query", OWNER, payload)
+            else:
+                _, total, body = await request(app, "GET", "/api/v1/documents", OWNER)
+            if not body.startswith(b'{"'):
+                raise RuntimeError(f"Unexpected response: {body[:200]!r}")
+            return total
+
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(one(i) for i in range(requests)))
+    return time.perf_counter() - start, latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--documents", type=int, default=10, help="Processed documents")
+    parser.add_argument("--requests", type=int, default=128, help="Requests per configuration")
+    parser.add_argument("--in-flight", type=int, nargs="+", default=[1, 4, 16, 32])
+    parser.add_argument("--rag-share", type=float, default=0.5, help="Fraction of RAG queries")
+    parser.add_argument("--bedrock-latency", type=float, default=0.1, help="s per Bedrock call")
+    parser.add_argument("--storage-latency", type=float, default=0.02, help="s per metadata call")
+    args = parser.parse_args()
+
+    settings = get_settings()
+    settings.dedup_enabled = False
+    settings.checkpoint_path = ""
+    settings.rag_question_cache_max_entries = 0
+    settings.rag_answer_cache_max_entries = 0
+    settings.rate_limit_requests = 1_000_000
+    fakes = FakeBackends(bedrock_latency_seconds=0.0).install()
+    paragraphs = legal_paragraphs(args.documents * 6, seed=3)
+    for n in range(args.documents):
+        body = "\n\n".join(paragraphs[n * 6 : (n + 1) * 6]).encode()
+        name = f"doc-{n}.md"
+        upload_service.upload_document(
+            OWNER, name, BytesIO(body), "text/markdown", len(body), "upload_and_queue"
+        )
+        process_service.process_document(OWNER, name)
+    fakes.bedrock.latency_seconds = args.bedrock_latency
+    list_by_owner, get_corpus_version = metadata.list_by_owner, metadata.get_corpus_version
+
+    def slow(fn):
+        def call(*a, **kw):
+            time.sleep(args.storage_latency)
+            return fn(*a, **kw)
+
+        return call
+
+    metadata.list_by_owner = slow(list_by_owner)
+    metadata.get_corpus_version = slow(get_corpus_version)
+
+    from src.api.main import app
+
+    bedrock_workers, storage_workers = settings.api_bedrock_workers, settings.api_storage_workers
+    for label, workers in (("inline", (0, 0)), ("executors", (bedrock_workers, storage_workers))):
+        executors.shutdown()
+        settings.api_bedrock_workers, settings.api_storage_workers = workers
+        for in_flight in args.in_flight:
+            elapsed, latencies = asyncio.run(_load(app, args.requests, in_flight, args.rag_share))
+            print(
+                f"{label:<10} in_flight={in_flight:>3}  req/s={args.requests / elapsed:>7.1f}  "
+                f"p50={_percentile(latencies, 50) * 1000:>7.0f}ms  "
+                f"p99={_percentile(latencies, 99) * 1000:>7.0f}ms"
+            )
+    executors.shutdown()
+
+
+if __name__ == "__main__":
+    main()
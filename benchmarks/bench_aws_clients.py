@@ -0,0 +1,86 @@
+"""Benchmark: per-call AWS latency, a new boto3 client per call vs. the shared client registry.
+
+Starts a local stub endpoint (benchmarks.stub_endpoint: HTTP/1.1 with keep-alive, every request
+answered with an empty success after --server-latency seconds) and points AWS_ENDPOINT_URL at it.
+Then makes --calls S3 HeadObject and DynamoDB GetItem calls from --threads threads, each call
+either building its client (S3) / Table resource (DynamoDB) first (the previous behaviour) or
+using the shared clients.get_client client. Reports per-call latency percentiles, calls/s and TCP connections the stub accepted.
+
+Usage: python -m benchmarks.bench_aws_clients [--calls 400] [--threads 1 8]
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+from src.api.config import get_settings
+from src.storage import clients
+
+from benchmarks.stub_endpoint import StubEndpoint
+
+
+def _percentile(values: list[float], p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(p / 100 * len(ordered)) - 1))]
+
+
+def _per_call(service: str):
+    settings = get_settings()
+    kwargs = {"region_name": settings.aws_region, "endpoint_url": settings.aws_endpoint_url}
+    if service == "s3":
+        return boto3.client("s3", **kwargs)
+    return boto3.resource("dynamodb", **kwargs)
+
+
+def _call(service: str, reuse: bool) -> float:
+    start = time.perf_counter()
+    if service == "s3":
+        client = clients.get_client(clients.S3) if reuse else _per_call("s3")
+        client.head_object(Bucket="bench", Key="owner/doc.md")
+    else:
+        key = {"owner_id": "owner", "filename": "doc.md"}
+        if reuse:
+            clients.get_client(clients.DYNAMODB).get_item(
+                TableName="bench", Key={k: {"S": v} for k, v in key.items()}
+            )
+        else:
+            _per_call("dynamodb").Table("bench").get_item(Key=key)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=400, help="Calls per configuration")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 8])
+    parser.add_argument("--server-latency", type=float, default=0.002, help="Stub s per request")
+    args = parser.parse_args()
+
+    stub = StubEndpoint(latency=args.server_latency)
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "bench")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "bench")
+    get_settings().aws_endpoint_url = stub.url
+
+    for service in ("s3", "dynamodb"):
+        for threads in args.threads:
+            for label, reuse in (("per-call", False), ("shared", True)):
+                clients.reset()
+                _call(service, reuse)  # first call (shared: client creation) not measured
+                stub.reset_counts()
+                start = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=threads) as pool:
+                    calls = [pool.submit(_call, service, reuse) for _ in range(args.calls)]
+                    latencies = [f.result() for f in calls]
+                elapsed = time.perf_counter() - start
+                print(
+                    f"{service:<9} threads={threads:>3}  {label:<9} "
+                    f"p50={_percentile(latencies, 50) * 1000:>7.2f}ms  "
+                    f"p99={_percentile(latencies, 99) * 1000:>7.2f}ms  "
+                    f"calls/s={args.calls / elapsed:>7.0f}  connections={stub.connections:>4}"
+                )
+    stub.close()
+
+
+if __name__ == "__main__":
+    main()
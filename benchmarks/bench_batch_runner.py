@@ -0,0 +1,77 @@
+"""Benchmark: batch runner throughput and latency percentiles by worker count and scan shards.
+
+Queues --documents small Markdown documents (upload_and_queue) against offline fakes with a fixed
+Bedrock latency, then runs run_pending_batch with thread workers: 1 worker (the previous one at a
+time behaviour), more workers, two parallel-scan segments run one after the other (as two ECS
+tasks would split the table), and a --max-runtime cutoff that leaves documents pending.
+
+Usage: python -m benchmarks.bench_batch_runner [--documents 200] [--latency 0.02]
+"""
+
+import argparse
+from io import BytesIO
+
+from src.models.document import ProcessingStatus
+from src.services import batch_process, upload_service
+
+from benchmarks.documents import legal_paragraphs
+from benchmarks.fakes import FakeBackends
+
+
+def _queue_documents(args) -> FakeBackends:
+    fakes = FakeBackends(bedrock_latency_seconds=args.latency).install()
+    paragraphs = legal_paragraphs(args.documents * args.paragraphs, seed=11)
+    for n in range(args.documents):
+        text = "\n\n".join(paragraphs[n * args.paragraphs : (n + 1) * args.paragraphs])
+        body = text.encode("utf-8")
+        upload_service.upload_document(
+            "bench-owner",
+            f"doc-{n}.md",
+            BytesIO(body),
+            "text/markdown",
+            len(body),
+            "upload_and_queue",
+        )
+    return fakes
+
+
+def _print(label: str, report: batch_process.BatchReport, fakes: FakeBackends) -> None:
+    s = report.summary()
+    left = sum(
+        1 for d in fakes.documents.values() if d.processing_status == ProcessingStatus.PENDING
+    )
+    print(
+        f"{label:<22} processed={s['processed']:>4}  failed={s['failed']:>2}  left={left:>4}  "
+        f"docs/s={s['documents_per_second']:>7.1f}  p50={s['latency_p50_seconds']:.3f}s  "
+        f"p90={s['latency_p90_seconds']:.3f}s  p99={s['latency_p99_seconds']:.3f}s  "
+        f"{s['elapsed_seconds']:.2f}s"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--documents", type=int, default=200, help="Queued documents")
+    parser.add_argument("--paragraphs", type=int, default=12, help="Paragraphs per document")
+    parser.add_argument("--latency", type=float, default=0.02, help="Fake InvokeModel latency (s)")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    args = parser.parse_args()
+
+    for workers in args.workers:
+        fakes = _queue_documents(args)
+        report = batch_process.run_pending_batch(workers=workers, executor="thread")
+        _print(f"workers={workers}", report, fakes)
+
+    fakes = _queue_documents(args)
+    for segment in range(2):
+        report = batch_process.run_pending_batch(
+            workers=max(args.workers), executor="thread", segment=segment, total_segments=2
+        )
+        _print(f"segment {segment}/2 workers={max(args.workers)}", report, fakes)
+
+    fakes = _queue_documents(args)
+    report = batch_process.run_pending_batch(workers=1, executor="thread", max_runtime_seconds=1.0)
+    _print("workers=1 max-runtime=1s", report, fakes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""Benchmark: deleting many documents of one owner, one delete_document call each vs. bulk delete.
+
+Builds --documents documents of --chunks vectors each for one owner (--legacy-percent of them
+without a vector manifest) in a shared fake S3 Vectors index that also holds --other-vectors of
+other owners, with in-memory S3 objects and metadata. Every S3, DynamoDB and S3 Vectors call costs
+--latency seconds; batch calls count (and cost) one call per wire request (DeleteObjects 1,000
+keys, BatchGetItem 100, BatchWriteItem 25). Deletes them one by one
+(upload_service.delete_document, as N DELETE /documents/{id} requests would), by list and by owner
+purge (upload_service.iter_bulk_delete, as DELETE /documents). Reports calls per service and wall
+time, then a purge with --fail-rate of DeleteVectors calls failing, resumed by a second run.
+
+Usage: python -m benchmarks.bench_bulk_delete [--documents 1000] [--chunks 20] [--latency 0.005]
+"""
+
+import argparse
+import bisect
+import math
+import random
+import threading
+import time
+from datetime import UTC, datetime
+
+from src.models.document import Document, DocumentFormat, ProcessingStatus
+from src.services import upload_service
+from src.storage import metadata, s3, vectors
+
+from benchmarks.fakes import FakeBackends
+
+OWNER = "bench-owner"
+
+
+class Calls:
+    """Per-service call counter; each counted call sleeps the latency in the calling thread."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.counts: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def charge(self, service: str, calls: int = 1) -> None:
+        with self._lock:
+            self.counts[service] = self.counts.get(service, 0) + calls
+        time.sleep(self.latency * calls)
+
+    def wrap(self, service: str, fn, per: int | None = None, arg: int = 1):
+        """fn charging one call, or ceil(len(args[arg]) / per) calls for batch APIs."""
+
+        def wrapped(*args, **kwargs):
+            self.charge(service, math.ceil(len(args[arg]) / per) if per else 1)
+            return fn(*args, **kwargs)
+
+        return wrapped
+
+
+class SharedIndex:
+    """s3vectors list/delete over a sorted key list; DeleteVectors fails at fail_rate."""
+
+    def __init__(self, keys: list[str], calls: Calls, fail_rate: float = 0.0):
+        self.keys = sorted(keys)
+        self.deleted: set[str] = set()
+        self.calls = calls
+        self.fail_rate = fail_rate
+        self._rng = random.Random(0)
+        self._lock = threading.Lock()
+
+    def list_vectors(self, maxResults: int = 500, nextToken: str | None = None, **kwargs) -> dict:  # noqa: N803
+        self.calls.charge("s3vectors")
+        start = int(nextToken or 0)
+        with self._lock:
+            page = [k for k in self.keys[start : start + maxResults] if k not in self.deleted]
+        resp = {"vectors": [{"key": k} for k in page]}
+        if start + maxResults < len(self.keys):
+            resp["nextToken"] = str(start + maxResults)
+        return resp
+
+    def delete_vectors(self, keys: list[str], **kwargs) -> dict:
+        self.calls.charge("s3vectors")
+        with self._lock:
+            if self._rng.random() < self.fail_rate:
+                raise RuntimeError("Injected DeleteVectors failure")
+            for k in keys:
+                i = bisect.bisect_left(self.keys, k)
+                if i < len(self.keys) and self.keys[i] == k:
+                    self.deleted.add(k)
+        return {}
+
+    def remaining(self, prefix: str) -> int:
+        start = bisect.bisect_left(self.keys, prefix)
+        end = bisect.bisect_left(self.keys, prefix + "\U0010ffff")
+        return sum(1 for k in self.keys[start:end] if k not in self.deleted)
+
+
+def _populate(fakes: FakeBackends, args, calls: Calls, fail_rate: float = 0.0) -> list[str]:
+    fakes.documents.clear()
+    fakes.objects.clear()
+    filenames = [f"doc-{d:05d}.md" for d in range(args.documents)]
+    legacy = set(
+        filenames[:: max(1, round(100 / args.legacy_percent))] if args.legacy_percent else []
+    )
+    now = datetime.now(UTC)
+    for filename in filenames:
+        manifest = filename not in legacy
+        fakes.objects[(OWNER, filename)] = b"# doc\n"
+        fakes.documents[(OWNER, filename)] = Document(
+            filename=filename,
+            owner_id=OWNER,
+            format=DocumentFormat.MARKDOWN,
+            size_bytes=6,
+            uploaded_at=now,
+            processing_status=ProcessingStatus.PROCESSED,
+            chunk_count=args.chunks if manifest else None,
+            vector_key_scheme=vectors.VECTOR_KEY_SCHEME if manifest else None,
+        )
+    keys = [f"{OWNER}/{f}/{i}" for f in filenames for i in range(args.chunks)]
+    keys += [f"other-{n % 997}/doc-{n}.pdf/0" for n in range(args.other_vectors)]
+    index = SharedIndex(keys, calls, fail_rate)
+    vectors.get_vectors_client = lambda: index
+    return filenames
+
+
+def _instrument(calls: Calls) -> None:
+    s3.delete_document = calls.wrap("s3", s3.delete_document)
+    s3.delete_documents = calls.wrap("s3", s3.delete_documents, per=1000)
+    list_filenames = s3.list_document_filenames
+    s3.list_document_filenames = lambda o, prefix="", **kwargs: (
+        calls.charge(
+            "s3", max(1, math.ceil(len(names := list_filenames(o, prefix, **kwargs)) / 1000))
+        )
+        or names
+    )
+    metadata.get_metadata = calls.wrap("dynamodb", metadata.get_metadata)
+    metadata.get_metadata_batch = calls.wrap("dynamodb", metadata.get_metadata_batch, per=100)
+    metadata.get_vector_generations = calls.wrap(
+        "dynamodb", metadata.get_vector_generations, per=100
+    )
+    metadata.delete_metadata = calls.wrap("dynamodb", metadata.delete_metadata)
+    metadata.delete_metadata_batch = calls.wrap("dynamodb", metadata.delete_metadata_batch, per=25)
+    metadata.bump_corpus_version = calls.wrap("dynamodb", metadata.bump_corpus_version)
+    metadata.list_by_owner = calls.wrap("dynamodb", metadata.list_by_owner)
+
+
+def _report(label: str, calls: Calls, elapsed: float, fakes: FakeBackends, extra: str = "") -> None:
+    left = sum(1 for o, _ in fakes.documents if o == OWNER)
+    index = vectors.get_vectors_client()
+    print(
+        f"{label:<20} S3={calls.counts.get('s3', 0):>5}  DynamoDB={calls.counts.get('dynamodb', 0):>5}"
+        f"  S3 Vectors={calls.counts.get('s3vectors', 0):>6}  time={elapsed:>7.2f}s"
+        f"  left: documents={left} objects={sum(1 for o, _ in fakes.objects if o == OWNER)}"
+        f" vectors={index.remaining(OWNER + '/')}{extra}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--documents", type=int, default=1000)
+    parser.add_argument("--chunks", type=int, default=20, help="Vectors per document")
+    parser.add_argument("--legacy-percent", type=float, default=5, help="Documents w/o manifest")
+    parser.add_argument("--other-vectors", type=int, default=100_000, help="Other owners' vectors")
+    parser.add_argument("--latency", type=float, default=0.005, help="Fake per-call latency (s)")
+    parser.add_argument("--fail-rate", type=float, default=0.2, help="DeleteVectors failure rate")
+    args = parser.parse_args()
+
+    fakes = FakeBackends().install()
+    calls = Calls(args.latency)
+    _instrument(calls)
+    print(
+        f"owner: {args.documents} documents x {args.chunks} vectors "
+        f"({args.legacy_percent:g}% without manifest), index: +{args.other_vectors:,} other vectors"
+    )
+
+    filenames = _populate(fakes, args, calls)
+    calls.counts.clear()
+    start = time.perf_counter()
+    for filename in filenames:
+        upload_service.delete_document(OWNER, filename)
+    _report("one by one", calls, time.perf_counter() - start, fakes)
+
+    for label, selection in (("bulk (list)", "list"), ("bulk (owner purge)", None)):
+        filenames = _populate(fakes, args, calls)
+        calls.counts.clear()
+        start = time.perf_counter()
+        *_, summary = upload_service.iter_bulk_delete(
+            OWNER, filenames if selection == "list" else None
+        )
+        _report(label, calls, time.perf_counter() - start, fakes)
+
+    _populate(fakes, args, calls, fail_rate=args.fail_rate)
+    for attempt in ("purge, failing", "purge, resumed"):
+        calls.counts.clear()
+        start = time.perf_counter()
+        progress = list(upload_service.iter_bulk_delete(OWNER))
+        summary = progress[-1]
+        vectors.get_vectors_client().fail_rate = 0.0
+        _report(
+            attempt,
+            calls,
+            time.perf_counter() - start,
+            fakes,
+            f"  progress events={len(progress) - 1} deleted={summary['deleted']}"
+            f" failed={summary['failed']} complete={summary['complete']}",
+        )
+
+
+if __name__ == "__main__":
+    main()
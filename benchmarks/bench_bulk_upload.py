@@ -0,0 +1,141 @@
+"""Benchmark: onboarding many documents, one POST /documents each vs. POST /documents/bulk.
+
+Uploads --files Markdown files of --size-kb each through the FastAPI app (driven over ASGI) with
+S3 and DynamoDB on a local stub endpoint (benchmarks.stub_endpoint, real boto3 clients, --latency-ms
+per call): "individual" sends one request per file (--concurrency at a time), "bulk files" one
+bulk request carrying every file, "bulk zip" one bulk request with a zip archive of them. Each bulk
+request also carries two invalid entries (a .txt file and a "PDF" without a PDF header) to show
+per-file rejection. Reports API requests, rate-limit units charged, S3 and DynamoDB calls by
+operation, and wall time.
+
+Usage: python -m benchmarks.bench_bulk_upload [--files 1000] [--size-kb 20] [--latency-ms 5]
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import time
+import uuid
+import zipfile
+
+from src.api.config import get_settings
+from src.api.rate_limit import get_limiter
+
+from benchmarks.asgi import request
+from benchmarks.stub_endpoint import StubEndpoint
+
+# Dev tokens ("Bearer dev-...") authenticate as the token itself.
+OWNER = "dev-bench-owner"
+INVALID = [("notes.txt", b"plain text"), ("scan.pdf", b"not a pdf")]
+DYNAMODB_OPERATIONS = ("GetItem", "PutItem", "UpdateItem", "BatchGetItem", "BatchWriteItem")
+
+
+def _multipart(
+    fields: dict[str, str], files: list[tuple[str, bytes]], field_name: str = "files"
+) -> tuple[bytes, str]:
+    boundary = uuid.uuid4().hex
+    parts = [
+        f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+        for name, value in fields.items()
+    ]
+    for filename, data in files:
+        parts.append(
+            f"--{boundary}\r\nContent-Disposition: form-data; "
+            f'name="{field_name}"; filename="{filename}"\r\n'
+            "Content-Type: application/octet-stream\r\n\r\n".encode()
+        )
+        parts.append(data + b"\r\n")
+    parts.append(f"--{boundary}--\r\n".encode())
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+
+
+async def _post(app, path: str, body: bytes, content_type: str) -> bytes:
+    _, _, resp = await request(
+        app,
+        "POST",
+        path,
+        OWNER,
+        chunks=(body[i : i + 65536] for i in range(0, len(body), 65536)),
+        content_type=content_type,
+        content_length=len(body),
+    )
+    return resp
+
+
+async def _individual(app, files: list[tuple[str, bytes]], concurrency: int) -> tuple[int, str]:
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one(filename: str, data: bytes) -> None:
+        body, content_type = _multipart({"mode": "upload_and_queue"}, [(filename, data)], "file")
+        async with slots:
+            resp = await _post(app, "/api/v1/documents", body, content_type)
+        if not resp.startswith(b'{"document_id"'):
+            raise RuntimeError(f"Unexpected response: {resp[:200]!r}")
+
+    await asyncio.gather(*(one(f, d) for f, d in files))
+    return len(files), f"stored={len(files)}"
+
+
+async def _bulk(app, files: list[tuple[str, bytes]]) -> tuple[int, str]:
+    body, content_type = _multipart({"mode": "upload_and_queue"}, files)
+    result = json.loads(await _post(app, "/api/v1/documents/bulk", body, content_type))
+    return 1, f"stored={result['stored']} rejected={result['rejected']} failed={result['failed']}"
+
+
+async def _bulk_zip(app, files: list[tuple[str, bytes]]) -> tuple[int, str]:
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zf:
+        for filename, data in files + INVALID:
+            zf.writestr(f"contracts/{filename}", data)
+    return await _bulk(app, [("contracts.zip", archive.getvalue())])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=1000)
+    parser.add_argument("--size-kb", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="Stub latency per AWS call")
+    parser.add_argument("--concurrency", type=int, default=8, help="Individual requests in flight")
+    args = parser.parse_args()
+
+    stub = StubEndpoint(latency=args.latency_ms / 1000)
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "bench")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "bench")
+    settings = get_settings()
+    settings.aws_endpoint_url = stub.url
+    settings.s3_bucket_documents = "bench"
+    settings.dynamodb_table_metadata = "bench"
+    settings.rate_limit_requests = 1_000_000
+
+    from src.api.main import app
+
+    text = b"# Clause\n\nThe parties agree to the terms set out below.\n"
+    data = (text * (args.size_kb * 1024 // len(text) + 1))[: args.size_kb * 1024]
+    files = [(f"doc-{n:05d}.md", data) for n in range(args.files)]
+    asyncio.run(_individual(app, files[:2], 1))  # warm-up: imports, clients, executors
+    runs = (
+        ("individual", lambda: _individual(app, files, args.concurrency)),
+        ("bulk files", lambda: _bulk(app, files + INVALID)),
+        ("bulk zip", lambda: _bulk_zip(app, files)),
+    )
+    limiter = get_limiter()
+    for label, run in runs:
+        stub.reset_counts()
+        units_before = len(limiter._counts[OWNER])
+        start = time.perf_counter()
+        requests, outcome = asyncio.run(run())
+        elapsed = time.perf_counter() - start
+        units = len(limiter._counts[OWNER]) - units_before
+        dynamodb = "  ".join(f"{op}={stub.operations[op]}" for op in DYNAMODB_OPERATIONS)
+        print(
+            f"{label:<11} files={args.files}  API requests={requests:>5}  rate-limit units={units:>5}"
+            f"  S3 PUT={stub.operations['PUT']:>5}  {dynamodb}  time={elapsed:>6.2f}s"
+            f"  ({args.files / elapsed:>6.0f} docs/s)  {outcome}"
+        )
+    stub.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Benchmark: chunk count and bytes per chunk by chunking strategy over a corpus.
+
+Pass PDF/Markdown files or directories to measure a real corpus; without paths a synthetic
+legal-style corpus (Markdown with headings plus a text PDF) is generated. Fewer chunks means
+fewer embedding calls and vectors stored.
+
+Usage: python -m benchmarks.bench_chunking [PATH ...] [--strategies fixed structured]
+"""
+
+import argparse
+import os
+import tempfile
+
+from src.models.document import DocumentFormat
+from src.services import chunk_service, extract_service, upload_service
+
+from benchmarks.documents import legal_paragraphs, write_text_pdf
+
+
+def _corpus(paths: list[str]) -> list[tuple[str, DocumentFormat]]:
+    files = []
+    for path in paths:
+        walk = os.walk(path) if os.path.isdir(path) else [("", [], [path])]
+        for root, _, names in walk:
+            for name in names:
+                fmt = upload_service.ALLOWED_EXTENSIONS.get(os.path.splitext(name)[1].lower())
+                if fmt is not None:
+                    files.append((os.path.join(root, name), fmt))
+    return files
+
+
+def _synthetic(tmp: str) -> list[tuple[str, DocumentFormat]]:
+    md_path = os.path.join(tmp, "agreement.md")
+    paragraphs = legal_paragraphs(1500)
+    with open(md_path, "w", encoding="utf-8") as f:
+        for i, paragraph in enumerate(paragraphs):
+            if i % 12 == 0:
+                f.write(f"\n## Article {i // 12 + 1}\n\n")
+            f.write(paragraph + "\n\n\n")
+    pdf_path = os.path.join(tmp, "exhibits.pdf")
+    write_text_pdf(pdf_path, 2 * 1024 * 1024)
+    return [(md_path, DocumentFormat.MARKDOWN), (pdf_path, DocumentFormat.PDF)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="*", help="Files or directories (default: synthetic)")
+    parser.add_argument("--strategies", nargs="+", default=["fixed", "structured"])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        files = _corpus(args.paths) if args.paths else _synthetic(tmp)
+        print(f"{len(files)} documents")
+        print(
+            f"{'strategy':<12} {'chunks':>8} {'mean B/chunk':>13} {'max B/chunk':>12} "
+            f"{'est tokens':>11} {'vs first':>9}"
+        )
+        baseline = None
+        for strategy in args.strategies:
+            totals = {
+                "chunks": 0,
+                "total_bytes": 0,
+                "max_bytes_per_chunk": 0,
+                "estimated_tokens": 0,
+            }
+            for path, fmt in files:
+                with open(path, "rb") as f:
+                    chunker = chunk_service.get_chunker(fmt, strategy)
+                    report = chunk_service.chunk_report(
+                        chunker.chunks(extract_service.iter_text(f, fmt))
+                    )
+                totals["chunks"] += report["chunks"]
+                totals["total_bytes"] += report["total_bytes"]
+                totals["estimated_tokens"] += report["estimated_tokens"]
+                totals["max_bytes_per_chunk"] = max(
+                    totals["max_bytes_per_chunk"], report["max_bytes_per_chunk"]
+                )
+            baseline = baseline or totals["chunks"]
+            mean = totals["total_bytes"] / totals["chunks"] if totals["chunks"] else 0
+            print(
+                f"{strategy:<12} {totals['chunks']:>8} {mean:>13.0f} "
+                f"{totals['max_bytes_per_chunk']:>12} {totals['estimated_tokens']:>11} "
+                f"{(totals['chunks'] - baseline) / baseline:>+8.1%}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Benchmark: RAG prompt context size, verbatim join vs. context packing.
+
+Chunks --documents synthetic legal documents with each --strategies chunker, then simulates
+--queries retrievals of --top-k chunks: a run of --adjacent consecutive chunks around a random
+chunk (answers tend to sit in one region of a document) plus random chunks of other documents,
+with decreasing relevance scores. Reports mean estimated context tokens for the previous verbatim
+join of every chunk and for context_service.pack_context per --budgets token budget (0 =
+unlimited: merging and overlap removal only), chunks kept and packing time.
+
+Usage: python -m benchmarks.bench_context_packing [--queries 500] [--budgets 0 4000 2000]
+"""
+
+import argparse
+import random
+import time
+
+from src.models.document import DocumentFormat
+from src.services import chunk_service, context_service
+from src.storage.vectors import RetrievedChunk
+
+from benchmarks.documents import legal_paragraphs
+
+
+def _documents(args, strategy: str) -> list[list[str]]:
+    chunker = chunk_service.get_chunker(DocumentFormat.MARKDOWN, strategy)
+    paragraphs = legal_paragraphs(args.documents * args.paragraphs, seed=8)
+    return [
+        list(
+            chunker.chunks(
+                ["\n\n".join(paragraphs[d * args.paragraphs : (d + 1) * args.paragraphs])]
+            )
+        )
+        for d in range(args.documents)
+    ]
+
+
+def _retrievals(args, documents: list[list[str]]) -> list[list[RetrievedChunk]]:
+    rng = random.Random(2)
+    out = []
+    for _ in range(args.queries):
+        d = rng.randrange(len(documents))
+        chunks = documents[d]
+        start = rng.randrange(max(1, len(chunks) - args.adjacent + 1))
+        picked = [(d, i) for i in range(start, min(start + args.adjacent, len(chunks)))]
+        while len(picked) < args.top_k:
+            other = rng.randrange(len(documents))
+            pick = (other, rng.randrange(len(documents[other])))
+            if pick not in picked:
+                picked.append(pick)
+        rng.shuffle(picked)
+        out.append(
+            [
+                RetrievedChunk(documents[o][i], f"doc-{o}.md", i, 1.0 - rank * 0.05)
+                for rank, (o, i) in enumerate(picked)
+            ]
+        )
+    return out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--documents", type=int, default=50)
+    parser.add_argument("--paragraphs", type=int, default=120, help="Paragraphs per document")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--adjacent", type=int, default=4, help="Consecutive chunks per retrieval")
+    parser.add_argument("--strategies", nargs="+", default=["fixed", "structured"])
+    parser.add_argument("--budgets", type=int, nargs="+", default=[0, 4000, 2000])
+    args = parser.parse_args()
+
+    for strategy in args.strategies:
+        retrievals = _retrievals(args, _documents(args, strategy))
+        verbatim = sum(
+            chunk_service.estimate_tokens(context_service.SEPARATOR.join(c.text for c in r))
+            for r in retrievals
+        )
+        print(
+            f"{strategy:<11} {'verbatim':<14} tokens/query={verbatim / len(retrievals):>7.0f}  "
+            f"chunks/query={args.top_k:>5.1f}"
+        )
+        for budget in args.budgets:
+            tokens = used = 0
+            start = time.perf_counter()
+            for retrieved in retrievals:
+                packed = context_service.pack_context(retrieved, budget)
+                tokens += packed.tokens
+                used += packed.chunks_used
+            elapsed = time.perf_counter() - start
+            label = f"budget={budget}" if budget else "merge only"
+            print(
+                f"{strategy:<11} {label:<14} tokens/query={tokens / len(retrievals):>7.0f}  "
+                f"chunks/query={used / len(retrievals):>5.1f}  "
+                f"vs verbatim={tokens / verbatim - 1:>+6.1%}  "
+                f"us/query={elapsed / len(retrievals) * 1e6:>6.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
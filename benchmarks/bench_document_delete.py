@@ -0,0 +1,94 @@
+"""Benchmark: deleting one document from a large shared vector index, scan vs. chunk manifest.
+
+Builds a fake S3 Vectors index with --keys vectors across many documents, then deletes one
+document through upload_service.delete_document twice: without a vector manifest (legacy metadata:
+list_vectors over the whole index, prefix filter on the client) and with one (exact keys from
+chunk_count). Reports API calls and wall time including a fixed per-call latency.
+
+Usage: python -m benchmarks.bench_document_delete [--keys 1000000] [--chunks 100] [--latency 0.002]
+"""
+
+import argparse
+import bisect
+import time
+from datetime import UTC, datetime
+
+from src.models.document import Document, DocumentFormat, ProcessingStatus
+from src.services import upload_service
+from src.storage import vectors
+
+from benchmarks.fakes import FakeBackends
+
+OWNER = "bench-owner"
+
+
+class LargeIndex:
+    """Minimal s3vectors list/delete over a sorted key list (no per-call sort of 1M keys)."""
+
+    def __init__(self, keys: list[str], latency_seconds: float):
+        self.keys = sorted(keys)
+        self.deleted: set[str] = set()
+        self.latency_seconds = latency_seconds
+        self.calls: dict[str, int] = {}
+
+    def _call(self, op: str) -> None:
+        self.calls[op] = self.calls.get(op, 0) + 1
+        time.sleep(self.latency_seconds)
+
+    def list_vectors(self, maxResults: int = 500, nextToken: str | None = None, **kwargs) -> dict:  # noqa: N803
+        self._call("list_vectors")
+        start = int(nextToken or 0)
+        page = [k for k in self.keys[start : start + maxResults] if k not in self.deleted]
+        resp = {"vectors": [{"key": k} for k in page]}
+        if start + maxResults < len(self.keys):
+            resp["nextToken"] = str(start + maxResults)
+        return resp
+
+    def delete_vectors(self, keys: list[str], **kwargs) -> dict:
+        self._call("delete_vectors")
+        for k in keys:
+            i = bisect.bisect_left(self.keys, k)
+            if i < len(self.keys) and self.keys[i] == k:
+                self.deleted.add(k)
+        return {}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--keys", type=int, default=1_000_000, help="Vectors in the shared index")
+    parser.add_argument("--chunks", type=int, default=100, help="Chunks per document")
+    parser.add_argument("--latency", type=float, default=0.002, help="Fake per-call latency (s)")
+    args = parser.parse_args()
+
+    documents = args.keys // args.chunks
+    keys = [
+        f"owner-{d % 997}/doc-{d}.pdf/{i}" for d in range(documents) for i in range(args.chunks)
+    ]
+    target_owner, target = "owner-0", "doc-0.pdf"
+    print(f"index: {len(keys):,} vectors, {documents:,} documents of {args.chunks} chunks")
+    fakes = FakeBackends().install()
+    for label, chunk_count in (("scan (no manifest)", None), ("chunk manifest", args.chunks)):
+        index = LargeIndex(keys, args.latency)
+        vectors.get_vectors_client = lambda index=index: index
+        fakes.documents[(target_owner, target)] = Document(
+            filename=target,
+            owner_id=target_owner,
+            format=DocumentFormat.PDF,
+            size_bytes=1,
+            uploaded_at=datetime.now(UTC),
+            processing_status=ProcessingStatus.PROCESSED,
+            chunk_count=chunk_count,
+            vector_key_scheme=vectors.VECTOR_KEY_SCHEME if chunk_count is not None else None,
+        )
+        start = time.perf_counter()
+        upload_service.delete_document(target_owner, target)
+        elapsed = time.perf_counter() - start
+        print(
+            f"{label:<20} list_calls={index.calls.get('list_vectors', 0):>5}  "
+            f"delete_calls={index.calls.get('delete_vectors', 0):>2}  "
+            f"deleted={len(index.deleted):>4}  {elapsed:>8.3f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
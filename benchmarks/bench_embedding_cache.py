@@ -0,0 +1,58 @@
+"""Benchmark: Bedrock calls and latency when re-embedding an edited document through the cache.
+
+Simulates the replace-on-same-filename flow: embed a document, edit a few chunks, re-embed
+(warm memory tier), then re-embed again from a fresh process-like cache (disk tier only).
+
+Usage: python -m benchmarks.bench_embedding_cache [--chunks 200] [--edited 3] [--latency 0.02]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from src.services import embedding_service
+from src.storage.embedding_cache import EmbeddingCache
+
+from benchmarks.fakes import FakeBedrockClient
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=200, help="Chunks per document")
+    parser.add_argument("--edited", type=int, default=3, help="Chunks changed between uploads")
+    parser.add_argument("--latency", type=float, default=0.02, help="Fake InvokeModel latency (s)")
+    parser.add_argument("--memory-entries", type=int, default=4096, help="LRU tier size")
+    args = parser.parse_args()
+
+    fake = FakeBedrockClient(latency_seconds=args.latency)
+    embedding_service.get_bedrock_client = lambda: fake
+    original = [f"clause {i}: the parties agree to term {i}. " * 30 for i in range(args.chunks)]
+    edited = list(original)
+    for i in range(args.edited):
+        edited[i * (args.chunks // max(args.edited, 1))] += " (amended)"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "embeddings.sqlite3")
+        cache = EmbeddingCache(max_entries=args.memory_entries, path=path)
+        embedding_service.get_embedding_cache = lambda: cache
+
+        def run(label: str, chunks: list[str]) -> None:
+            calls_before = fake.calls
+            start = time.perf_counter()
+            embedding_service.embed_texts(chunks)
+            elapsed = time.perf_counter() - start
+            print(f"{label:<28} {fake.calls - calls_before:>6} calls  {elapsed * 1000:>9.1f} ms")
+
+        run("initial upload (cold)", original)
+        run("edited re-upload (memory)", edited)
+        print(f"  stats: {cache.stats()}")
+        cache.close()
+        cache = EmbeddingCache(max_entries=args.memory_entries, path=path)
+        run("edited re-upload (disk)", edited)
+        print(f"  stats: {cache.stats()}")
+        cache.close()
+
+
+if __name__ == "__main__":
+    main()
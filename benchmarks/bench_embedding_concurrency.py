@@ -0,0 +1,49 @@
+"""Benchmark: documents/s for embed_texts at increasing max_concurrency against a fake Bedrock.
+
+Usage: python -m benchmarks.bench_embedding_concurrency [--docs 4] [--chunks 64] [--latency 0.05]
+"""
+
+import argparse
+import time
+
+from src.services import embedding_service
+from src.storage.embedding_cache import EmbeddingCache
+
+from benchmarks.fakes import FakeBedrockClient
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--docs", type=int, default=4, help="Documents per run")
+    parser.add_argument("--chunks", type=int, default=64, help="Chunks per document")
+    parser.add_argument("--latency", type=float, default=0.05, help="Fake InvokeModel latency (s)")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction throttled")
+    parser.add_argument(
+        "--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32], help="Levels to test"
+    )
+    args = parser.parse_args()
+
+    embedding_service.EMBED_BACKOFF_BASE_SECONDS = args.latency
+    docs = [[f"document {d} chunk {c} " * 20 for c in range(args.chunks)] for d in range(args.docs)]
+    print(f"{'concurrency':>11}  {'docs/s':>8}  {'chunks/s':>9}  {'speedup':>7}  throttled")
+    baseline = None
+    for concurrency in args.concurrency:
+        fake = FakeBedrockClient(latency_seconds=args.latency, throttle_rate=args.throttle_rate)
+        embedding_service.get_bedrock_client = lambda fake=fake: fake
+        # Fresh, memory-only cache per level so every chunk reaches the fake Bedrock.
+        cache = EmbeddingCache(max_entries=0)
+        embedding_service.get_embedding_cache = lambda cache=cache: cache
+        start = time.perf_counter()
+        for chunks in docs:
+            embedding_service.embed_texts(chunks, max_concurrency=concurrency)
+        elapsed = time.perf_counter() - start
+        docs_per_s = args.docs / elapsed
+        baseline = baseline or docs_per_s
+        print(
+            f"{concurrency:>11}  {docs_per_s:>8.2f}  {args.docs * args.chunks / elapsed:>9.1f}"
+            f"  {docs_per_s / baseline:>6.1f}x  {fake.throttled}"
+        )
+
+
+if __name__ == "__main__":
+    main()
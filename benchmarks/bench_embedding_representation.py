@@ -0,0 +1,101 @@
+"""Benchmark: cost per 1,000 embeddings of list[float] vs. packed float32 (array("f")) handling.
+
+Replays the embedding path with pre-built Bedrock response bodies: decode the response, round-trip
+through the embedding cache's memory tier, hold the batch until it is stored, and build the
+put_vectors payload. "list" is the previous representation (list(...) on decode, .tolist() out of
+the cache, [float(x) ...] per payload); "float32" is the current one (array("f") on decode, array
+copies in the cache, a single .tolist() at the payload boundary). Reports time per stage and the
+Python memory blocks/bytes kept alive by a batch of decoded embeddings (tracemalloc).
+
+Usage: python -m benchmarks.bench_embedding_representation [--vectors 1000] [--dimensions 1024]
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+from array import array
+
+from benchmarks.fakes import fake_embedding
+
+
+def _list_decode(body: bytes) -> list[float]:
+    return list(json.loads(body)["embedding"])
+
+
+def _list_cache_round_trip(embedding: list[float]) -> list[float]:
+    stored = array("f", embedding)  # put
+    return stored.tolist()  # get
+
+
+def _list_payload(embedding: list[float]) -> dict:
+    return {"float32": [float(x) for x in embedding]}
+
+
+def _float32_decode(body: bytes) -> array:
+    return array("f", json.loads(body)["embedding"])
+
+
+def _float32_cache_round_trip(embedding: array) -> array:
+    stored = embedding[:]  # put
+    return stored[:]  # get
+
+
+def _float32_payload(embedding: array) -> dict:
+    return {"float32": embedding.tolist()}
+
+
+VARIANTS = {
+    "list": (_list_decode, _list_cache_round_trip, _list_payload),
+    "float32": (_float32_decode, _float32_cache_round_trip, _float32_payload),
+}
+
+
+def _timed(fn, items, repeats: int) -> tuple[float, list]:
+    best = float("inf")
+    out: list = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        out = [fn(x) for x in items]
+        best = min(best, time.perf_counter() - start)
+    return best, out
+
+
+def _retained(fn, items) -> tuple[int, int]:
+    """(blocks, bytes) allocated by fn over items that are still alive afterwards."""
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    kept = [fn(x) for x in items]
+    stats = tracemalloc.take_snapshot().compare_to(before, "filename")
+    tracemalloc.stop()
+    del kept
+    return sum(s.count_diff for s in stats), sum(s.size_diff for s in stats)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vectors", type=int, default=1000, help="Embeddings per run")
+    parser.add_argument("--dimensions", type=int, default=1024, help="Embedding dimensions")
+    parser.add_argument("--repeats", type=int, default=5, help="Runs per stage (best is reported)")
+    args = parser.parse_args()
+
+    bodies = [
+        json.dumps({"embedding": fake_embedding(f"chunk {i}", args.dimensions)}).encode("utf-8")
+        for i in range(args.vectors)
+    ]
+    scale = 1000 / args.vectors
+    print(f"per 1,000 vectors of {args.dimensions} dimensions")
+    for name, (decode, cache_round_trip, payload) in VARIANTS.items():
+        decode_s, embeddings = _timed(decode, bodies, args.repeats)
+        cache_s, embeddings = _timed(cache_round_trip, embeddings, args.repeats)
+        payload_s, _ = _timed(payload, embeddings, args.repeats)
+        blocks, size = _retained(decode, bodies)
+        print(
+            f"{name:<8} decode={decode_s * scale * 1000:>7.1f}ms  "
+            f"cache={cache_s * scale * 1000:>6.1f}ms  payload={payload_s * scale * 1000:>6.1f}ms  "
+            f"held_blocks={blocks * scale:>9,.0f}  held_mb={size * scale / 1e6:>6.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
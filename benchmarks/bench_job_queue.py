@@ -0,0 +1,110 @@
+"""Benchmark: API-side cost of upload_and_analyze with in-process processing vs. the job queue,
+worker throughput by concurrency, and recovery of jobs leased by a worker that died.
+
+Uploads --documents small Markdown documents against offline fakes with a fixed Bedrock latency.
+"background" processes each document in the API process (the previous BackgroundTasks path);
+"queue" only enqueues (SQLite queue in a temporary file) and a worker drains the queue with
+--concurrency threads. Reports API seconds per upload, worker docs/s and job age (enqueue to
+lease) percentiles; then leases jobs without acking them and counts how many a second worker
+recovers after the lease expires.
+
+Usage: python -m benchmarks.bench_job_queue [--documents 100] [--concurrency 1 2 4]
+"""
+
+import argparse
+import tempfile
+import time
+from io import BytesIO
+
+from src.models.document import ProcessingStatus
+from src.services import process_service, upload_service, worker
+from src.storage.job_queue import SQLiteJobQueue
+
+from benchmarks.documents import legal_paragraphs
+from benchmarks.fakes import FakeBackends
+
+OWNER = "bench-owner"
+
+
+def _percentile(values: list[float], p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(p / 100 * len(ordered)) - 1))]
+
+
+def _upload_all(args, job_queue: SQLiteJobQueue | None) -> tuple[FakeBackends, float]:
+    """Upload every document as upload_and_analyze; returns the API seconds per upload."""
+    fakes = FakeBackends(bedrock_latency_seconds=args.latency).install()
+    upload_service.get_job_queue = lambda: job_queue
+    paragraphs = legal_paragraphs(args.documents * args.paragraphs, seed=13)
+    start = time.perf_counter()
+    for n in range(args.documents):
+        text = "\n\n".join(paragraphs[n * args.paragraphs : (n + 1) * args.paragraphs])
+        body = text.encode("utf-8")
+        filename = f"doc-{n}.md"
+        upload_service.upload_document(
+            OWNER, filename, BytesIO(body), "text/markdown", len(body), "upload_and_analyze"
+        )
+        if not upload_service.enqueue_processing(OWNER, filename):
+            process_service.process_document(OWNER, filename)  # BackgroundTasks, same process
+    return fakes, (time.perf_counter() - start) / args.documents
+
+
+def _processed(fakes: FakeBackends) -> int:
+    return sum(
+        1 for d in fakes.documents.values() if d.processing_status == ProcessingStatus.PROCESSED
+    )
+
+
+class _AgeRecorder(SQLiteJobQueue):
+    """SQLite queue that keeps the age of every leased job."""
+
+    ages: list[float]
+
+    def lease(self, max_jobs: int = 1, wait_seconds: float = 0.0):
+        jobs = super().lease(max_jobs, wait_seconds)
+        self.ages.extend(job.age_seconds for job in jobs)
+        return jobs
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--documents", type=int, default=100, help="Uploaded documents")
+    parser.add_argument("--paragraphs", type=int, default=12, help="Paragraphs per document")
+    parser.add_argument("--latency", type=float, default=0.02, help="Fake InvokeModel latency (s)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    fakes, api_seconds = _upload_all(args, None)
+    print(
+        f"{'background':<16} api_ms/upload={api_seconds * 1000:>7.2f}  "
+        f"processed={_processed(fakes):>4}"
+    )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for concurrency in args.concurrency:
+            job_queue = _AgeRecorder(f"{tmp}/jobs-{concurrency}.sqlite3", 60.0)
+            job_queue.ages = []
+            fakes, api_seconds = _upload_all(args, job_queue)
+            start = time.perf_counter()
+            handled = worker.run_worker(concurrency, job_queue, drain=True)
+            elapsed = time.perf_counter() - start
+            print(
+                f"queue workers={concurrency:<2} api_ms/upload={api_seconds * 1000:>7.2f}  "
+                f"processed={_processed(fakes):>4}  jobs={handled:>4}  "
+                f"docs/s={handled / elapsed:>6.1f}  age_p50={_percentile(job_queue.ages, 50):.2f}s  "
+                f"age_p99={_percentile(job_queue.ages, 99):.2f}s"
+            )
+
+        job_queue = SQLiteJobQueue(f"{tmp}/jobs-crash.sqlite3", 0.5)
+        fakes, _ = _upload_all(args, job_queue)
+        lost = job_queue.lease(args.documents // 2)  # worker dies before acking these
+        time.sleep(0.6)
+        handled = worker.run_worker(max(args.concurrency), job_queue, drain=True)
+        print(
+            f"{'crash recovery':<16} leased_unacked={len(lost):>4}  "
+            f"processed={_processed(fakes):>4}  jobs={handled:>4}  left={job_queue.stats()}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""Benchmark: lexical (BM25) index build, postings size and query latency.
+
+Indexes --chunks pseudo-legal chunks for one owner (--chunks-per-document per document) into a
+LexicalIndex in a temporary directory; every chunk also carries a unique section reference
+("Section 12.7") and party name. Reports build time, postings bytes per posting, and for
+common-term queries (vocabulary words found in most chunks) and exact-term queries (a section
+reference and party name plus common words) the query latency percentiles and, for exact-term
+queries, how often the chunk carrying the term is in the top k. Then deletes --delete-fraction
+of the documents (tombstones, compaction) and measures again.
+
+Usage: python -m benchmarks.bench_lexical_search [--chunks 20000] [--queries 200]
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from src.storage.lexical_index import LexicalIndex, decode_postings
+
+from benchmarks.documents import legal_paragraphs
+
+OWNER = "bench-owner"
+_NAMES = ["Acme", "Globex", "Initech", "Umbrella", "Hooli", "Vandelay", "Soylent", "Wonka"]
+
+
+def _percentile(values: list[float], p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(p / 100 * len(ordered)) - 1))]
+
+
+def _section(i: int) -> str:
+    return f"Section {i // 10 + 1}.{i % 10 + 1}"
+
+
+def _party(i: int) -> str:
+    return f"{_NAMES[i % len(_NAMES)]}-{i // len(_NAMES)} Ltd"
+
+
+def _postings_size(index: LexicalIndex) -> tuple[int, int]:
+    """(postings bytes, term rows) of the owner."""
+    return index._db.execute(
+        "SELECT COALESCE(SUM(LENGTH(data)), 0), COUNT(*) FROM postings WHERE owner_id = ?",
+        (OWNER,),
+    ).fetchone()
+
+
+def _run(label: str, index: LexicalIndex, queries: list[tuple[str, tuple | None]], k: int):
+    latencies, found, targeted = [], 0, 0
+    for query, target in queries:
+        start = time.perf_counter()
+        matches = index.search(OWNER, query, k)
+        latencies.append(time.perf_counter() - start)
+        if target is not None:
+            targeted += 1
+            found += target in {(m.document_filename, m.chunk_index) for m in matches}
+    hit = f"  hit@{k}={found / targeted:>5.0%}" if targeted else ""
+    print(
+        f"{label:<28} p50={_percentile(latencies, 50) * 1000:>6.2f}ms  "
+        f"p99={_percentile(latencies, 99) * 1000:>6.2f}ms{hit}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=20000, help="Indexed chunks of the owner")
+    parser.add_argument("--chunks-per-document", type=int, default=50)
+    parser.add_argument("--queries", type=int, default=200, help="Queries per kind")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--delete-fraction", type=float, default=0.6)
+    args = parser.parse_args()
+
+    per_doc = args.chunks_per_document
+    paragraphs = legal_paragraphs(args.chunks, seed=4)
+    rng = random.Random(9)
+    common = [
+        (" ".join(rng.sample(paragraphs[rng.randrange(args.chunks)].split()[1:], 3)), None)
+        for _ in range(args.queries)
+    ]
+
+    def exact(alive: list[int]) -> list[tuple[str, tuple]]:
+        out = []
+        for i in (alive[rng.randrange(len(alive))] for _ in range(args.queries)):
+            words = " ".join(paragraphs[i].split()[1:3])
+            query = f"What does {_section(i)} say about {_party(i)} and {words}?"
+            out.append((query, (f"doc-{i // per_doc}.md", i % per_doc)))
+        return out
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "lexical.sqlite3")
+        index = LexicalIndex(path)
+        start = time.perf_counter()
+        for d in range(0, args.chunks, per_doc):
+            index.add_many(
+                OWNER,
+                f"doc-{d // per_doc}.md",
+                [
+                    (i - d, f"{_section(i)}. {_party(i)} agrees: {paragraphs[i]}")
+                    for i in range(d, min(d + per_doc, args.chunks))
+                ],
+            )
+        elapsed = time.perf_counter() - start
+        size, terms = _postings_size(index)
+        postings = sum(
+            len(decode_postings(data)[0])
+            for (data,) in index._db.execute("SELECT data FROM postings")
+        )
+        print(
+            f"{'build':<28} chunks={args.chunks}  {elapsed:.2f}s  terms={terms}  "
+            f"postings={postings}  bytes/posting={size / postings:.2f}  "
+            f"file={os.path.getsize(path) / 1e6:.1f}MB"
+        )
+        _run("common terms", index, common, args.top_k)
+        _run("exact terms", index, exact(list(range(args.chunks))), args.top_k)
+
+        documents = args.chunks // per_doc
+        deleted = set(rng.sample(range(documents), int(documents * args.delete_fraction)))
+        start = time.perf_counter()
+        for d in deleted:
+            index.delete_document(OWNER, f"doc-{d}.md")
+        size, terms = _postings_size(index)
+        print(
+            f"{'delete':<28} documents={len(deleted)}  {time.perf_counter() - start:.2f}s  "
+            f"terms={terms}  postings_bytes={size}"
+        )
+        alive = [i for i in range(args.chunks) if i // per_doc not in deleted]
+        _run("common terms, after delete", index, common, args.top_k)
+        _run("exact terms, after delete", index, exact(alive), args.top_k)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""Benchmark: PDF text extraction throughput (pages/s) in-process vs. the extraction process pool.
+
+Usage: python -m benchmarks.bench_pdf_extraction [--size-mb 10] [--pool-sizes 0 1 2 4]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from src.api.config import get_settings
+from src.models.document import DocumentFormat
+from src.services import extract_service
+
+from benchmarks.documents import write_text_pdf
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=float, default=10, help="Synthetic PDF size")
+    parser.add_argument("--pool-sizes", type=int, nargs="+", default=[0, 1, 2, 4])
+    args = parser.parse_args()
+
+    settings = get_settings()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.pdf")
+        pages = write_text_pdf(path, int(args.size_mb * 1024 * 1024))
+        print(f"{pages} pages, {os.path.getsize(path) / 1e6:.1f} MB, {os.cpu_count()} CPUs")
+        print(f"{'pool':>4}  {'seconds':>8}  {'pages/s':>8}")
+        for size in args.pool_sizes:
+            settings.extract_pool_size = size
+            with open(path, "rb") as f:
+                start = time.perf_counter()
+                for _ in extract_service.iter_text(f, DocumentFormat.PDF):
+                    pass
+                elapsed = time.perf_counter() - start
+            print(f"{size:>4}  {elapsed:>8.2f}  {pages / elapsed:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Benchmark: peak RSS per document for the streaming pipeline vs. the previous in-memory pipeline.
+
+Each (size, pipeline) pair runs in a fresh subprocess against offline fakes (Bedrock, S3, metadata,
+S3 Vectors that discards writes; checkpoint, fingerprint and lexical stores in SQLite files next to
+the PDF); the reported figure is peak RSS growth over the process baseline.
+
+Usage: python -m benchmarks.bench_pipeline_memory [--sizes-mb 1 10 25]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+OWNER = "bench-owner"
+FILENAME = "bench.pdf"
+
+
+def _peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+
+
+def _child(pipeline: str, path: str) -> None:
+    from datetime import UTC, datetime
+
+    from src.models.document import Document, DocumentFormat
+    from src.services import chunk_service, embedding_service, extract_service, process_service
+    from src.storage import s3
+    from src.storage import vectors as vectors_storage
+    from src.storage.checkpoints import CheckpointStore
+    from src.storage.fingerprints import FingerprintIndex
+    from src.storage.lexical_index import LexicalIndex
+
+    from benchmarks.fakes import FakeBackends, FakeVectorsClient
+
+    fakes = FakeBackends()
+    fakes.vectors = FakeVectorsClient(retain=False)
+    fakes.install()
+    # Local indexes on disk, as deployed (the fakes' in-memory SQLite would count as pipeline RSS)
+    scratch = os.path.dirname(path)
+    fakes.checkpoints = CheckpointStore(os.path.join(scratch, f"{pipeline}-checkpoints.sqlite3"))
+    fakes.fingerprints = FingerprintIndex(os.path.join(scratch, f"{pipeline}-fingerprints.sqlite3"))
+    fakes.lexical = LexicalIndex(os.path.join(scratch, f"{pipeline}-lexical.sqlite3"))
+
+    def download(owner_id, filename, fileobj):
+        with open(path, "rb") as f:
+            shutil.copyfileobj(f, fileobj)
+        return True
+
+    def get_document(owner_id, filename):
+        with open(path, "rb") as f:
+            return f.read()
+
+    with open(path, "rb") as f:
+        etag = hashlib.file_digest(f, "md5").hexdigest()
+    head = {"etag": etag, "size": os.path.getsize(path), "content_type": "application/pdf"}
+
+    s3.download_document = download
+    s3.get_document = get_document
+    s3.head_document = lambda owner_id, filename: head  # the object is the file at path
+    fakes.documents[(OWNER, FILENAME)] = Document(
+        filename=FILENAME,
+        owner_id=OWNER,
+        format=DocumentFormat.PDF,
+        size_bytes=os.path.getsize(path),
+        uploaded_at=datetime.now(UTC),
+    )
+    baseline = _peak_rss_mb()
+    start = time.perf_counter()
+    if pipeline == "streaming":
+        process_service.process_document(OWNER, FILENAME)
+    else:
+        # Pre-streaming pipeline: whole object, whole text, all chunks and embeddings, one put.
+        content = get_document(OWNER, FILENAME)
+        text = extract_service.extract_text(content, DocumentFormat.PDF)
+        chunks = list(chunk_service.FixedWindowChunker().chunks([text]))
+        embeddings = embedding_service.embed_texts(chunks)
+        vectors_storage.store_vectors(OWNER, FILENAME, list(zip(embeddings, chunks, strict=True)))
+    elapsed = time.perf_counter() - start
+    print(
+        json.dumps(
+            {
+                "peak_delta_mb": _peak_rss_mb() - baseline,
+                "seconds": elapsed,
+                "chunks": fakes.bedrock.calls,
+            }
+        )
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes-mb", type=float, nargs="+", default=[1, 10, 25])
+    parser.add_argument("--pipelines", nargs="+", default=["legacy", "streaming"])
+    parser.add_argument("--child", nargs=2, metavar=("PIPELINE", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        _child(*args.child)
+        return
+
+    from benchmarks.documents import write_text_pdf
+
+    print(f"{'size':>7}  {'pipeline':<10} {'chunks':>6}  {'peak RSS +MB':>12}  {'seconds':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size_mb in args.sizes_mb:
+            path = os.path.join(tmp, f"{size_mb}mb.pdf")
+            write_text_pdf(path, int(size_mb * 1024 * 1024))
+            for pipeline in args.pipelines:
+                out = subprocess.run(
+                    [
+                        sys.executable,
+                        "-m",
+                        "benchmarks.bench_pipeline_memory",
+                        "--child",
+                        pipeline,
+                        path,
+                    ],
+                    capture_output=True,
+                    text=True,
+                    check=True,
+                )
+                result = json.loads(out.stdout.strip().splitlines()[-1])
+                print(
+                    f"{size_mb:>5.0f}MB  {pipeline:<10} {result['chunks']:>6}  "
+                    f"{result['peak_delta_mb']:>12.1f}  {result['seconds']:>8.2f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
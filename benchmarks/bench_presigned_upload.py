@@ -0,0 +1,171 @@
+"""Benchmark: bytes and time in the API per upload, proxied POST /documents vs. presigned direct upload.
+
+End to end against a local S3 stub (benchmarks.stub_endpoint with retain=True: real boto3 client,
+presigned POST policy conditions enforced) and in-memory metadata. Uploads --uploads Markdown files
+of --size-mb each through the FastAPI app (driven over ASGI) either proxied (streamed through the
+API to S3) or presigned (POST /documents/upload-url, the file posted straight to the bucket, then
+POST /documents/{id}/complete). Reports request bytes the API received and time spent in API
+requests per upload, then checks that the presigned POST refuses a larger file than declared and
+another key, and that completion rejects content that does not match the format.
+
+Usage: python -m benchmarks.bench_presigned_upload [--uploads 20] [--size-mb 10]
+"""
+
+import argparse
+import asyncio
+import http.client
+import json
+import os
+import time
+import uuid
+from urllib.parse import urlsplit
+
+from src.api.config import get_settings
+from src.storage import s3
+
+from benchmarks.asgi import request
+from benchmarks.fakes import FakeBackends
+from benchmarks.stub_endpoint import StubEndpoint
+
+# Dev tokens ("Bearer dev-...") authenticate as the token itself.
+OWNER = "dev-bench-owner"
+S3_FUNCTIONS = (
+    "upload_document",
+    "DocumentUpload",
+    "get_document",
+    "read_document_head",
+    "head_document",
+    "download_document",
+    "delete_document",
+)
+
+
+def _percentile(values: list[float], p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(p / 100 * len(ordered)) - 1))]
+
+
+def _multipart(fields: dict[str, str], file: bytes, filename: str) -> tuple[bytes, str]:
+    boundary = uuid.uuid4().hex
+    body = b"".join(
+        f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+        for name, value in fields.items()
+    )
+    body += (
+        f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        "Content-Type: application/octet-stream\r\n\r\n"
+    ).encode()
+    body += file + f"\r\n--{boundary}--\r\n".encode()
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+def _post_to_bucket(upload: dict, file: bytes, filename: str, **overrides) -> int:
+    """Browser-style POST of file with the presigned fields; the HTTP status."""
+    url = urlsplit(upload["url"])
+    body, content_type = _multipart({**upload["fields"], **overrides}, file, filename)
+    conn = http.client.HTTPConnection(url.hostname, url.port)
+    conn.request("POST", url.path or "/", body, {"Content-Type": content_type})
+    status = conn.getresponse().status
+    conn.close()
+    return status
+
+
+async def _proxied(app, name: str, data: bytes) -> tuple[int, float]:
+    body, content_type = _multipart({"mode": "upload_and_queue"}, data, name)
+    _, total, resp = await request(
+        app,
+        "POST",
+        "/api/v1/documents",
+        OWNER,
+        chunks=(body[i : i + 65536] for i in range(0, len(body), 65536)),
+        content_type=content_type,
+        content_length=len(body),
+    )
+    if not resp.startswith(b'{"document_id"'):
+        raise RuntimeError(f"Unexpected response: {resp[:200]!r}")
+    return len(body), total
+
+
+async def _presigned(app, name: str, data: bytes) -> tuple[int, float]:
+    step1 = {"filename": name, "size_bytes": len(data), "content_type": "text/markdown"}
+    _, first, resp = await request(app, "POST", "/api/v1/documents/upload-url", OWNER, step1)
+    upload = json.loads(resp)
+    if _post_to_bucket(upload, data, name) != 204:
+        raise RuntimeError("Direct upload refused")
+    step2 = {"mode": "upload_and_queue"}
+    _, second, resp = await request(app, "POST", f"/api/v1/documents/{name}/complete", OWNER, step2)
+    if not resp.startswith(b'{"document_id"'):
+        raise RuntimeError(f"Unexpected response: {resp[:200]!r}")
+    return len(json.dumps(step1)) + len(json.dumps(step2)), first + second
+
+
+async def _checks(app, data: bytes) -> dict[str, bool]:
+    step1 = {"filename": "check.md", "size_bytes": len(data), "content_type": "text/markdown"}
+    _, _, resp = await request(app, "POST", "/api/v1/documents/upload-url", OWNER, step1)
+    upload = json.loads(resp)
+    larger = _post_to_bucket(upload, data + b"x", "check.md")
+    other_key = _post_to_bucket(upload, data, "check.md", key=f"{OWNER}/other.md")
+    pdf = {"filename": "fake.pdf", "size_bytes": len(data), "content_type": "application/pdf"}
+    _, _, resp = await request(app, "POST", "/api/v1/documents/upload-url", OWNER, pdf)
+    _post_to_bucket(json.loads(resp), data, "fake.pdf")
+    _, _, resp = await request(
+        app, "POST", "/api/v1/documents/fake.pdf/complete", OWNER, {"mode": "upload_and_queue"}
+    )
+    _, _, missing = await request(
+        app, "POST", "/api/v1/documents/never.md/complete", OWNER, {"mode": "upload_and_queue"}
+    )
+    return {
+        "larger file refused": larger == 400,
+        "other key refused": other_key == 403,
+        "non-PDF content rejected": b"does not match" in resp,
+        "missing upload 404": b"No uploaded file" in missing,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--uploads", type=int, default=20)
+    parser.add_argument("--size-mb", type=float, default=10, help="File size (max 25)")
+    args = parser.parse_args()
+
+    stub = StubEndpoint(retain=True)
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "bench")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "bench")
+    settings = get_settings()
+    settings.aws_endpoint_url = stub.url
+    settings.s3_bucket_documents = "bench"
+    settings.rate_limit_requests = 1_000_000
+    real_s3 = {name: getattr(s3, name) for name in S3_FUNCTIONS}
+    fakes = FakeBackends().install()  # metadata in memory
+    for name, fn in real_s3.items():  # S3 through boto3 to the stub
+        setattr(s3, name, fn)
+
+    from src.api.main import app
+
+    size = min(int(args.size_mb * 1024 * 1024), 25 * 1024 * 1024)
+    data = (b"# Clause\n\nThe parties agree to the terms set out below.\n" * (size // 50 + 1))[
+        :size
+    ]
+    for label, flow in (("proxied", _proxied), ("presigned", _presigned)):
+        api_bytes, api_seconds = [], []
+        start = time.perf_counter()
+        for n in range(args.uploads):
+            received, seconds = asyncio.run(flow(app, f"{label}-{n}.md", data))
+            api_bytes.append(received)
+            api_seconds.append(seconds)
+        elapsed = time.perf_counter() - start
+        stored = sum(1 for k in fakes.documents if k[1].startswith(label))
+        print(
+            f"{label:<10} uploads={args.uploads} x {size / 1024 / 1024:.0f} MB  "
+            f"API bytes/upload={sum(api_bytes) / len(api_bytes):>12,.0f}  "
+            f"API ms/upload p50={_percentile(api_seconds, 50) * 1000:>7.1f} "
+            f"p99={_percentile(api_seconds, 99) * 1000:>7.1f}  "
+            f"total={elapsed:>5.1f}s  recorded={stored}"
+        )
+    for check, ok in asyncio.run(_checks(app, data[:4096])).items():
+        print(f"check: {check:<26} {'ok' if ok else 'FAILED'}")
+    stub.close()
+
+
+if __name__ == "__main__":
+    main()
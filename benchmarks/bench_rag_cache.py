@@ -0,0 +1,104 @@
+"""Benchmark: repeated RAG questions with and without the question / answer caches.
+
+Processes --documents Markdown documents against offline fakes (fixed Bedrock latency, exact
+S3 Vectors query), then asks --questions distinct questions --repeats times each, every repeat
+in a different case / whitespace variant. Reports Bedrock embedding and answer calls, S3 Vectors
+queries, cache hit rates and mean latency per question. Then uploads and processes one more
+document and asks the same questions again: every answer is recomputed once for the new corpus
+version and cached again.
+
+Usage: python -m benchmarks.bench_rag_cache [--documents 20] [--questions 20] [--repeats 5]
+"""
+
+import argparse
+import random
+import time
+from io import BytesIO
+
+from src.api.config import get_settings
+from src.services import process_service, rag_service, upload_service
+
+from benchmarks.documents import legal_paragraphs
+from benchmarks.fakes import FakeBackends
+
+OWNER = "bench-owner"
+
+
+def _variant(question: str, rng: random.Random) -> str:
+    """The same question with different case and spacing."""
+    words = [w.upper() if rng.random() < 0.2 else w for w in question.split()]
+    return "  ".join(words) if rng.random() < 0.5 else " ".join(words).capitalize()
+
+
+def _add_document(name: str, text: str) -> None:
+    body = text.encode("utf-8")
+    upload_service.upload_document(
+        OWNER, name, BytesIO(body), "text/markdown", len(body), "upload_and_queue"
+    )
+    process_service.process_document(OWNER, name)
+
+
+def _ask(fakes: FakeBackends, questions: list[str], repeats: int, label: str) -> None:
+    rng = random.Random(7)
+    embed_calls = fakes.bedrock.calls - fakes.bedrock.answers
+    answers = fakes.bedrock.answers
+    queries = fakes.vectors.calls.get("query_vectors", 0)
+    question_stats = fakes.question_cache.stats()
+    answer_stats = fakes.answer_cache.stats()
+    asked = 0
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for question in questions:
+            rag_service.rag_query(OWNER, _variant(question, rng))
+            asked += 1
+    elapsed = time.perf_counter() - start
+
+    def rate(before: dict, after: dict, hits: str) -> str:
+        hit = sum(after[h] - before[h] for h in hits.split())
+        total = hit + after["misses"] - before["misses"]
+        return f"{hit / total:>5.0%}" if total else "  n/a"
+
+    question_after = fakes.question_cache.stats()
+    answer_after = fakes.answer_cache.stats()
+    print(
+        f"{label:<26} asked={asked:>4}  "
+        f"embed_calls={fakes.bedrock.calls - fakes.bedrock.answers - embed_calls:>4}  "
+        f"answer_calls={fakes.bedrock.answers - answers:>4}  "
+        f"queries={fakes.vectors.calls.get('query_vectors', 0) - queries:>4}  "
+        f"question_hits={rate(question_stats, question_after, 'memory_hits disk_hits')}  "
+        f"answer_hits={rate(answer_stats, answer_after, 'hits')}  "
+        f"ms/question={elapsed / asked * 1000:>6.1f}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--documents", type=int, default=20, help="Processed documents")
+    parser.add_argument("--paragraphs", type=int, default=6, help="Paragraphs per document")
+    parser.add_argument("--questions", type=int, default=20, help="Distinct questions")
+    parser.add_argument("--repeats", type=int, default=5, help="Times each question is asked")
+    parser.add_argument("--latency", type=float, default=0.01, help="Fake InvokeModel latency (s)")
+    args = parser.parse_args()
+
+    settings = get_settings()
+    settings.dedup_enabled = False
+    settings.checkpoint_path = ""
+    paragraphs = legal_paragraphs((args.documents + 1) * args.paragraphs, seed=3)
+    questions = [
+        f"What does the {p.split()[1]} {p.split()[2]} clause say?"
+        for p in legal_paragraphs(args.questions, seed=11)
+    ]
+    for label, entries in (("no cache", 0), ("cache", 1024)):
+        settings.rag_question_cache_max_entries = entries
+        settings.rag_answer_cache_max_entries = entries
+        fakes = FakeBackends(bedrock_latency_seconds=args.latency).install()
+        for n in range(args.documents):
+            text = "\n\n".join(paragraphs[n * args.paragraphs : (n + 1) * args.paragraphs])
+            _add_document(f"doc-{n}.md", text)
+        _ask(fakes, questions, args.repeats, label)
+        _add_document("new.md", "\n\n".join(paragraphs[-args.paragraphs :]))
+        _ask(fakes, questions, args.repeats, f"{label}, after new upload")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Benchmark: RAG time to first byte and total time, POST /rag/query vs. /rag/query/stream.
+
+Processes --documents Markdown documents against offline fakes, then asks --questions distinct
+questions through the FastAPI app (driven directly over ASGI, RAG caches off) with a fake Claude
+that takes --latency seconds before the first token and --token-latency seconds per token of a
+--answer-tokens answer. Reports time to the first response body byte (first token event when
+streaming) and to the end of the response, as percentiles.
+
+Usage: python -m benchmarks.bench_rag_stream [--questions 20] [--answer-tokens 200]
+"""
+
+import argparse
+import asyncio
+from io import BytesIO
+
+from src.api.config import get_settings
+from src.services import process_service, upload_service
+
+from benchmarks.asgi import request
+from benchmarks.documents import legal_paragraphs
+from benchmarks.fakes import FakeBackends
+
+# Dev tokens ("Bearer dev-...") authenticate as the token itself.
+OWNER = "dev-bench-owner"
+
+
+def _percentile(values: list[float], p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(p / 100 * len(ordered)) - 1))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--documents", type=int, default=10, help="Processed documents")
+    parser.add_argument("--questions", type=int, default=20, help="Distinct questions")
+    parser.add_argument("--latency", type=float, default=0.3, help="Fake time to first token (s)")
+    parser.add_argument("--token-latency", type=float, default=0.01, help="Fake s per token")
+    parser.add_argument("--answer-tokens", type=int, default=200, help="Answer length in tokens")
+    args = parser.parse_args()
+
+    settings = get_settings()
+    settings.dedup_enabled = False
+    settings.checkpoint_path = ""
+    settings.rag_question_cache_max_entries = 0
+    settings.rag_answer_cache_max_entries = 0
+    settings.rate_limit_requests = 1_000_000
+    fakes = FakeBackends(bedrock_latency_seconds=0.0).install()
+    paragraphs = legal_paragraphs(args.documents * 6, seed=3)
+    for n in range(args.documents):
+        body = "\n\n".join(paragraphs[n * 6 : (n + 1) * 6]).encode()
+        name = f"doc-{n}.md"
+        upload_service.upload_document(
+            OWNER, name, BytesIO(body), "text/markdown", len(body), "upload_and_queue"
+        )
+        process_service.process_document(OWNER, name)
+    fakes.bedrock.latency_seconds = args.latency
+    fakes.bedrock.token_latency_seconds = args.token_latency
+    fakes.bedrock.answer_tokens = args.answer_tokens
+
+    from src.api.main import app
+
+    questions = [
+        f"What does the {p.split()[1]} {p.split()[2]} clause say?"
+        for p in legal_paragraphs(args.questions, seed=11)
+    ]
+    for path in ("/api/v1/rag/query", "/api/v1/rag/query/stream"):
+        ttfb, total = [], []
+        for question in questions:
+            first, end, body = asyncio.run(
+                request(app, "POST", path, OWNER, {"question": question})
+            )
+            if b"source_document_ids" not in body:
+                raise RuntimeError(f"Unexpected response from {path}: {body[:200]!r}")
+            ttfb.append(first)
+            total.append(end)
+        print(
+            f"{path:<26} ttfb p50={_percentile(ttfb, 50) * 1000:>7.0f}ms "
+            f"p99={_percentile(ttfb, 99) * 1000:>7.0f}ms  "
+            f"total p50={_percentile(total, 50) * 1000:>7.0f}ms "
+            f"p99={_percentile(total, 99) * 1000:>7.0f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Benchmark: retrying a document whose first run failed near the end, with and without checkpoints.
+
+Uploads a synthetic PDF and processes it while one dependency fails, then retries it: "embed"
+has a fake Bedrock start throttling (retries exhausted) after --fail-at of the chunks were
+embedded, mid-extraction; "store" fails the PutVectors call after every chunk was embedded.
+Without checkpoints the retry downloads and extracts the PDF again and re-embeds every chunk; with
+them it reuses the recorded embeddings (and, when extraction had finished, the chunk list instead
+of the download). Reports per run the Bedrock calls, whether the object was downloaded, and time.
+
+Usage: python -m benchmarks.bench_resume [--size-mb 1] [--fail-at 0.9]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from botocore.exceptions import ClientError
+from src.api.config import get_settings
+from src.services import embedding_service, process_service, upload_service
+from src.storage import s3, vector_writer
+
+from benchmarks.documents import write_text_pdf
+from benchmarks.fakes import FakeBackends, FakeBedrockClient
+
+OWNER = "bench-owner"
+FILENAME = "contract.pdf"
+
+
+class FailingBedrock(FakeBedrockClient):
+    """Throttles every call once fail_after calls succeeded (fail_after=None: never)."""
+
+    fail_after: int | None = None
+
+    def invoke_model(self, modelId: str, body: str, **kwargs) -> dict:  # noqa: N803
+        if self.fail_after is not None and self.calls >= self.fail_after:
+            raise ClientError(
+                {"Error": {"Code": "ThrottlingException", "Message": "Rate exceeded"}},
+                "InvokeModel",
+            )
+        return super().invoke_model(modelId, body, **kwargs)
+
+
+def _upload(path: str, filename: str, size: int) -> None:
+    with open(path, "rb") as f:
+        upload_service.upload_document(
+            OWNER, filename, f, "application/pdf", size, "upload_and_analyze"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=float, default=1, help="Synthetic PDF size")
+    parser.add_argument("--fail-at", type=float, default=0.9, help="Share of chunks embedded first")
+    parser.add_argument("--latency", type=float, default=0.005, help="Fake InvokeModel latency (s)")
+    args = parser.parse_args()
+
+    settings = get_settings()
+    settings.dedup_enabled = False
+    # A throttled call fails the run at once.
+    embedding_service.EMBED_MAX_ATTEMPTS = 1
+    vector_writer.PUT_MAX_ATTEMPTS = 1
+    checkpoint_path = settings.checkpoint_path or ".cache/checkpoints.sqlite3"
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.pdf")
+        write_text_pdf(path, int(args.size_mb * 1024 * 1024))
+        with open(path, "rb") as f:
+            body = f.read()
+
+        chunks = None
+        for failure in ("embed", "store"):
+            for label, enabled in (("no checkpoint", False), ("checkpoint", True)):
+                settings.checkpoint_path = checkpoint_path if enabled else ""
+                fakes = FakeBackends().install()
+                bedrock = FailingBedrock(latency_seconds=args.latency)
+                fakes.bedrock = bedrock
+                embedding_service.get_bedrock_client = lambda bedrock=bedrock: bedrock
+                downloads: list[str] = []
+                download = s3.download_document
+                s3.download_document = lambda o, f, out, d=downloads, get=download: (
+                    d.append(f) or get(o, f, out)
+                )
+                if chunks is None:  # size the failure point from a clean run of a copy
+                    _upload(path, "sizing.pdf", len(body))
+                    process_service.process_document(OWNER, "sizing.pdf")
+                    chunks, bedrock.calls = bedrock.calls, 0
+                _upload(path, FILENAME, len(body))
+                downloads.clear()
+                if failure == "embed":
+                    bedrock.fail_after = int(chunks * args.fail_at)
+                else:
+                    fakes.vectors.put_throttle_rate = 1.0
+                for run in ("first run", "retry"):
+                    calls, fetched = bedrock.calls, len(downloads)
+                    start = time.perf_counter()
+                    try:
+                        process_service.process_document(OWNER, FILENAME)
+                        outcome = "processed"
+                    except ClientError:
+                        outcome = "failed"
+                    elapsed = time.perf_counter() - start
+                    print(
+                        f"fail={failure:<6} {label:<14} {run:<9} {outcome:<9} chunks={chunks:>4}  "
+                        f"embed_calls={bedrock.calls - calls:>4}  "
+                        f"downloaded={'yes' if len(downloads) > fetched else 'no':<3}  "
+                        f"{elapsed:>6.2f}s"
+                    )
+                    bedrock.fail_after = None
+                    fakes.vectors.put_throttle_rate = 0.0
+                s3.download_document = download
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""Benchmark: finding pending documents, filtered table scan vs. sparse status index.
+
+Fills a fake DynamoDB table with --documents metadata items (via the real item mapping, so only
+pending/processing/failed items carry status_shard) of which --pending are pending, then pages
+through list_by_status(PENDING) with the status index disabled (scan + filter) and enabled (query
+per shard). Reports calls, items read (what DynamoDB bills) and wall time including a fixed
+per-call latency.
+
+Usage: python -m benchmarks.bench_status_index [--documents 100000] [--pending 100]
+"""
+
+import argparse
+import time
+from datetime import UTC, datetime, timedelta
+
+from botocore.exceptions import ClientError
+from src.api.config import get_settings
+from src.models.document import Document, DocumentFormat, ProcessingStatus
+from src.storage import metadata
+
+
+class FakeTable:
+    """DynamoDB Table subset: scan (Limit counts evaluated items, then the filter) and query on
+    one GSI keyed by status_shard / uploaded_at."""
+
+    def __init__(self, items: list[dict], index: str | None, latency_seconds: float):
+        self.items = sorted(items, key=lambda i: (i["owner_id"], i["filename"]))
+        self.index_name = index
+        self.latency_seconds = latency_seconds
+        self.calls = 0
+        self.items_read = 0
+        self.partitions: dict[str, list[dict]] = {}
+        for item in self.items:
+            if "status_shard" in item:
+                self.partitions.setdefault(item["status_shard"], []).append(item)
+        for partition in self.partitions.values():
+            partition.sort(key=lambda i: (i["uploaded_at"], i["owner_id"], i["filename"]))
+
+    def _page(self, items: list[dict], limit: int, start: dict | None, key) -> tuple[list, dict]:
+        self.calls += 1
+        time.sleep(self.latency_seconds)
+        first = 0
+        if start:
+            first = next(n for n, i in enumerate(items) if key(i) == key(start)) + 1
+        page = items[first : first + limit]
+        self.items_read += len(page)
+        resp: dict = {}
+        if first + limit < len(items):
+            resp["LastEvaluatedKey"] = {
+                k: page[-1][k]
+                for k in ("owner_id", "filename", "status_shard", "uploaded_at")
+                if k in page[-1]
+            }
+        return page, resp
+
+    def scan(self, Limit: int = 100, ExclusiveStartKey: dict | None = None, **params) -> dict:  # noqa: N803
+        items = self.items
+        if params.get("TotalSegments"):
+            total, segment = params["TotalSegments"], params["Segment"]
+            items = [i for i in items if int(i["filename"][4:-4]) % total == segment]
+        page, resp = self._page(items, Limit, ExclusiveStartKey, _table_key)
+        status = params["ExpressionAttributeValues"][":s"]
+        resp["Items"] = [i for i in page if i["processing_status"] == status]
+        return resp
+
+    def query(
+        self,
+        IndexName: str,  # noqa: N803
+        Limit: int = 100,  # noqa: N803
+        ExclusiveStartKey: dict | None = None,  # noqa: N803
+        **params,
+    ) -> dict:
+        if IndexName != self.index_name:
+            raise ClientError(
+                {"Error": {"Code": "ValidationException", "Message": "no such index"}}, "Query"
+            )
+        partition = self.partitions.get(params["ExpressionAttributeValues"][":k"], [])
+        page, resp = self._page(partition, Limit, ExclusiveStartKey, _index_key)
+        resp["Items"] = page
+        return resp
+
+
+def _table_key(item: dict) -> tuple:
+    return item["owner_id"], item["filename"]
+
+
+def _index_key(item: dict) -> tuple:
+    return item["uploaded_at"], item["owner_id"], item["filename"]
+
+
+def _items(documents: int, pending: int) -> list[dict]:
+    every = max(1, documents // max(1, pending))
+    base = datetime(2026, 1, 1, tzinfo=UTC)
+    items = []
+    for n in range(documents):
+        status = ProcessingStatus.PENDING if n % every == 0 and n // every < pending else None
+        doc = Document(
+            filename=f"doc-{n}.pdf",
+            owner_id=f"owner-{n % 997}",
+            format=DocumentFormat.PDF,
+            size_bytes=1,
+            uploaded_at=base + timedelta(seconds=n),
+            processing_status=status or ProcessingStatus.PROCESSED,
+        )
+        items.append(metadata._doc_to_item(doc))
+    return items
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--documents", type=int, default=100_000, help="Items in the table")
+    parser.add_argument("--pending", type=int, default=100, help="Pending documents")
+    parser.add_argument("--page-size", type=int, default=500, help="list_by_status limit")
+    parser.add_argument("--latency", type=float, default=0.005, help="Fake per-call latency (s)")
+    args = parser.parse_args()
+
+    items = _items(args.documents, args.pending)
+    print(f"table: {len(items):,} documents, {args.pending} pending")
+    settings = get_settings()
+    for label, index, configured in (
+        ("scan (no index)", None, ""),
+        ("status index", "status-index", "status-index"),
+        ("index missing", None, "status-index"),
+    ):
+        table = FakeTable(items, index, args.latency)
+        metadata._get_table = lambda table=table: table
+        settings.dynamodb_status_index = configured
+        start = time.perf_counter()
+        found, next_token = 0, None
+        while True:
+            docs, next_token = metadata.list_by_status(
+                ProcessingStatus.PENDING, limit=args.page_size, next_token=next_token
+            )
+            found += len(docs)
+            if not next_token:
+                break
+        elapsed = time.perf_counter() - start
+        print(
+            f"{label:<16} found={found:>5}  calls={table.calls:>5}  "
+            f"items_read={table.items_read:>8,}  {elapsed:>7.3f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""Benchmark: API peak RSS for concurrent large uploads, streamed vs. the previous buffered handler.
+
+Each handler runs in a fresh subprocess: --uploads concurrent POST /documents requests of a
+--size-mb Markdown file each, driven over ASGI with the body arriving in --chunk-kb chunks. S3 is
+a local stub endpoint (benchmarks.stub_endpoint, real boto3 client: multipart uploads, bodies
+discarded) and metadata an in-memory fake. "streaming" is the current route (body parsed as it
+arrives, S3 multipart part by part); "buffered" reproduces the previous one (Starlette form
+parsing, await file.read(), BytesIO, upload_fileobj). Reports peak RSS growth over the process
+baseline, per upload, and wall time.
+
+Usage: python -m benchmarks.bench_upload_memory [--uploads 50] [--size-mb 25]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from collections.abc import Iterator
+
+# Dev tokens ("Bearer dev-...") authenticate as the token itself.
+OWNER = "dev-bench-owner"
+BOUNDARY = "bench-boundary-7f3a"
+
+
+def _peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+
+
+def _form(filename: str, size: int, chunk: int) -> tuple[Iterator[bytes], int]:
+    """multipart/form-data body (mode field, then a size-byte Markdown file) as chunks, generated
+    lazily from one shared block, and its length."""
+    head = (
+        f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="mode"\r\n\r\n'
+        f"upload_and_queue\r\n--{BOUNDARY}\r\nContent-Disposition: form-data; "
+        f'name="file"; filename="{filename}"\r\nContent-Type: text/markdown\r\n\r\n'
+    ).encode()
+    tail = f"\r\n--{BOUNDARY}--\r\n".encode()
+    block = (b"# Clause\n\nThe parties agree to the terms set out below.\n" * chunk)[:chunk]
+
+    def chunks() -> Iterator[bytes]:
+        yield head
+        remaining = size
+        while remaining > 0:
+            yield block[: min(chunk, remaining)]
+            remaining -= chunk
+        yield tail
+
+    return chunks(), len(head) + size + len(tail)
+
+
+def _buffered_app():
+    """The upload route as it was before streaming (buffered body), on a minimal app."""
+    from io import BytesIO
+    from typing import Annotated
+
+    from fastapi import FastAPI, File, Form, UploadFile
+    from src.services import executors, upload_service
+
+    app = FastAPI()
+
+    @app.post("/api/v1/documents", status_code=201)
+    async def upload(file: Annotated[UploadFile, File()], mode: Annotated[str, Form()]):
+        body = await file.read()
+        doc = await executors.run(
+            executors.STORAGE,
+            upload_service.upload_document,
+            owner_id=OWNER,
+            filename=file.filename,
+            body=BytesIO(body),
+            content_type=file.content_type,
+            size=len(body),
+            mode=mode,
+        )
+        return {"document_id": doc.filename, "size_bytes": doc.size_bytes}
+
+    return app
+
+
+def _child(handler: str, uploads: int, size: int, chunk: int) -> None:
+    from src.api.config import get_settings
+    from src.storage import s3
+
+    from benchmarks.asgi import request
+    from benchmarks.fakes import FakeBackends
+    from benchmarks.stub_endpoint import StubEndpoint
+
+    stub = StubEndpoint()
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "bench")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "bench")
+    settings = get_settings()
+    settings.aws_endpoint_url = stub.url
+    settings.s3_bucket_documents = "bench"
+    settings.rate_limit_requests = 1_000_000
+    real_s3 = s3.upload_document, s3.DocumentUpload
+    FakeBackends().install()  # metadata in memory
+    s3.upload_document, s3.DocumentUpload = real_s3  # S3 through boto3 to the stub
+
+    if handler == "streaming":
+        from src.api.main import app
+    else:
+        app = _buffered_app()
+
+    async def one(n: int, size: int) -> None:
+        chunks, length = _form(f"doc-{n}.md", size, chunk)
+        _, _, body = await request(
+            app,
+            "POST",
+            "/api/v1/documents",
+            OWNER,
+            chunks=chunks,
+            content_type=f"multipart/form-data; boundary={BOUNDARY}",
+            content_length=length,
+        )
+        if not body.startswith(b'{"document_id"'):
+            raise RuntimeError(f"Unexpected response: {body[:200]!r}")
+
+    async def run(count: int, size: int) -> None:
+        await asyncio.gather(*(one(n, size) for n in range(count)))
+
+    asyncio.run(run(1, chunk))  # warm-up (small file): imports, clients, executors
+    stub.reset_counts()
+    baseline = _peak_rss_mb()
+    start = time.perf_counter()
+    asyncio.run(run(uploads, size))
+    elapsed = time.perf_counter() - start
+    print(
+        json.dumps(
+            {
+                "peak_delta_mb": _peak_rss_mb() - baseline,
+                "seconds": elapsed,
+                "s3_mb": stub.body_bytes / 1024 / 1024,
+            }
+        )
+    )
+    stub.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--uploads", type=int, default=50, help="Concurrent uploads")
+    parser.add_argument("--size-mb", type=float, default=25, help="File size (max 25)")
+    parser.add_argument("--chunk-kb", type=int, default=64, help="Request body chunk size")
+    parser.add_argument("--handlers", nargs="+", default=["buffered", "streaming"])
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    size = min(int(args.size_mb * 1024 * 1024), 25 * 1024 * 1024)
+    if args.child:
+        _child(args.child, args.uploads, size, args.chunk_kb * 1024)
+        return
+    for handler in args.handlers:
+        out = subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "benchmarks.bench_upload_memory",
+                "--child",
+                handler,
+                "--uploads",
+                str(args.uploads),
+                "--size-mb",
+                str(args.size_mb),
+                "--chunk-kb",
+                str(args.chunk_kb),
+            ],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        print(
+            f"{handler:<10} uploads={args.uploads:>3} x {size / 1024 / 1024:.0f} MB  "
+            f"peak RSS +{result['peak_delta_mb']:>7.0f} MB  "
+            f"({result['peak_delta_mb'] / args.uploads:>5.1f} MB/upload)  "
+            f"time={result['seconds']:>6.1f}s  S3 received={result['s3_mb']:>6.0f} MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Benchmark: local vector store search, exact vs. HNSW, against a brute-force ground truth.
+
+Writes --vectors clustered random vectors for one owner into a LocalVectorStore in a temporary
+directory (memory-mapped files), then runs --queries queries (perturbed stored vectors). Reports
+write time, HNSW graph build time, and for the exact backend and the HNSW graph at each --ef:
+recall@k against brute-force cosine search (full sort) and query latency percentiles.
+
+Usage: python -m benchmarks.bench_vector_search [--vectors 10000] [--dimensions 256] [--ef 16 64]
+"""
+
+import argparse
+import tempfile
+import time
+from array import array
+
+import numpy as np
+from src.storage.local_vectors import LocalVectorStore
+from src.storage.vector_store import VectorEntry
+
+OWNER = "bench-owner"
+
+
+def _percentile(values: list[float], p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(p / 100 * len(ordered)) - 1))]
+
+
+def _dataset(args) -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(5)
+    centers = rng.normal(size=(args.clusters, args.dimensions))
+    data = centers[rng.integers(args.clusters, size=args.vectors)]
+    data = (data + rng.normal(scale=0.6, size=data.shape)).astype(np.float32)
+    picks = data[rng.integers(args.vectors, size=args.queries)]
+    queries = (picks + rng.normal(scale=0.3, size=picks.shape)).astype(np.float32)
+    return data, queries
+
+
+def _fill(path: str, data: np.ndarray, hnsw_threshold: int, ef: int) -> LocalVectorStore:
+    store = LocalVectorStore(path, hnsw_threshold=hnsw_threshold, ef_search=ef)
+    for start in range(0, len(data), 500):
+        store.put(
+            [
+                VectorEntry(
+                    f"{OWNER}/doc-{i // 100}.pdf/{i % 100}",
+                    array("f", data[i].tobytes()),
+                    {"owner_id": OWNER, "document_filename": f"doc-{i // 100}.pdf", "text": ""},
+                )
+                for i in range(start, min(start + 500, len(data)))
+            ]
+        )
+    return store
+
+
+def _run(label: str, store: LocalVectorStore, queries: np.ndarray, truth: list[set], k: int):
+    latencies, hits = [], 0
+    for q, expected in zip(queries, truth, strict=True):
+        start = time.perf_counter()
+        matches = store.query(OWNER, array("f", q.tobytes()), k)
+        latencies.append(time.perf_counter() - start)
+        hits += len({m.key for m in matches} & expected)
+    print(
+        f"{label:<14} recall@{k}={hits / (k * len(queries)):>6.3f}  "
+        f"p50={_percentile(latencies, 50) * 1000:>6.2f}ms  "
+        f"p99={_percentile(latencies, 99) * 1000:>6.2f}ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vectors", type=int, default=10000, help="Vectors of the owner")
+    parser.add_argument("--dimensions", type=int, default=256, help="Embedding dimensions")
+    parser.add_argument("--clusters", type=int, default=50, help="Clusters in the synthetic data")
+    parser.add_argument("--queries", type=int, default=200, help="Queries per configuration")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--ef", type=int, nargs="+", default=[16, 64, 128], help="HNSW ef_search")
+    args = parser.parse_args()
+
+    data, queries = _dataset(args)
+    unit = data / np.linalg.norm(data, axis=1, keepdims=True)
+    keys = [f"{OWNER}/doc-{i // 100}.pdf/{i % 100}" for i in range(len(data))]
+    truth = []
+    for q in queries:  # brute force: every cosine similarity, full sort
+        order = np.argsort(-(unit @ (q / np.linalg.norm(q))))[: args.top_k]
+        truth.append({keys[i] for i in order})
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        store = _fill(f"{tmp}/exact", data, hnsw_threshold=len(data), ef=0)
+        print(f"{'write':<14} vectors={len(data)}  {time.perf_counter() - start:.2f}s")
+        _run("exact", store, queries, truth, args.top_k)
+        store = _fill(f"{tmp}/hnsw", data, hnsw_threshold=0, ef=args.ef[0])
+        start = time.perf_counter()
+        store.build_graph(OWNER)
+        print(f"{'hnsw build':<14} vectors={len(data)}  {time.perf_counter() - start:.2f}s")
+        for ef in args.ef:
+            store.ef_search = ef
+            _run(f"hnsw ef={ef}", store, queries, truth, args.top_k)
+
+
+if __name__ == "__main__":
+    main()
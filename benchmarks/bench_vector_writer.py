@@ -0,0 +1,96 @@
+"""Benchmark: PutVectors calls and wall time for the batched, parallel vector writer.
+
+Batch run: many small queued documents processed one store call per document (previous
+behaviour) vs. run_pending_batch with a shared writer that coalesces them into full batches.
+Large document: one document's vectors written with increasing writer concurrency, optionally
+with throttled puts to show that only failed batches are resent.
+
+Usage: python -m benchmarks.bench_vector_writer [--documents 200] [--put-latency 0.02]
+"""
+
+import argparse
+import time
+from array import array
+from io import BytesIO
+
+from src.services import batch_process, process_service, upload_service
+from src.storage import vectors
+from src.storage.vector_store import S3VectorsStore
+from src.storage.vector_writer import VectorWriter
+
+from benchmarks.documents import legal_paragraphs
+from benchmarks.fakes import FakeBackends, FakeVectorsClient
+
+OWNER = "bench-owner"
+
+
+def _batch_run(args, shared: bool) -> None:
+    fakes = FakeBackends(bedrock_latency_seconds=0.0).install()
+    fakes.vectors.put_latency_seconds = args.put_latency
+    paragraphs = legal_paragraphs(args.documents * args.chunks, seed=3)
+    for n in range(args.documents):
+        text = "\n\n".join(
+            f"## Part {i}\n\n{p}"
+            for i, p in enumerate(paragraphs[n * args.chunks :][: args.chunks])
+        )
+        body = text.encode("utf-8")
+        upload_service.upload_document(
+            OWNER, f"doc-{n}.md", BytesIO(body), "text/markdown", len(body), "upload_and_queue"
+        )
+    start = time.perf_counter()
+    if shared:
+        batch_process.run_pending_batch()
+    else:
+        for owner_id, filename in list(fakes.documents):
+            process_service.process_document(owner_id, filename)
+    elapsed = time.perf_counter() - start
+    label = "shared writer" if shared else "per document"
+    print(
+        f"batch run  {label:<14} documents={args.documents}  vectors={len(fakes.vectors.vectors):>5}  "
+        f"put_calls={fakes.vectors.calls.get('put_vectors', 0):>4}  {elapsed:>7.3f}s"
+    )
+
+
+def _large_document(args, concurrency: int, throttle_rate: float) -> None:
+    client = FakeVectorsClient(
+        put_latency_seconds=args.put_latency, put_throttle_rate=throttle_rate, seed=1
+    )
+    embedding = array("f", [0.5] * args.dimensions)
+    entries = vectors.vector_entries(
+        OWNER,
+        "large.pdf",
+        [(embedding, f"chunk {i}") for i in range(args.large_vectors)],
+    )
+    start = time.perf_counter()
+    store = S3VectorsStore(client, "bench", "default")
+    with VectorWriter(store, max_concurrency=concurrency) as writer:
+        writer.write(entries)
+    elapsed = time.perf_counter() - start
+    print(
+        f"large doc  concurrency={concurrency:<2} throttle={throttle_rate:.0%}  "
+        f"vectors={len(client.vectors):>5}  put_calls={client.calls.get('put_vectors', 0):>3}  "
+        f"vectors_sent={client.vectors_sent:>5}  {elapsed:>7.3f}s"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--documents", type=int, default=200, help="Small documents in the batch")
+    parser.add_argument("--chunks", type=int, default=3, help="Paragraphs per small document")
+    parser.add_argument("--large-vectors", type=int, default=5000, help="Vectors in the large doc")
+    parser.add_argument("--dimensions", type=int, default=1024, help="Embedding dimensions")
+    parser.add_argument(
+        "--put-latency", type=float, default=0.02, help="Fake PutVectors latency (s)"
+    )
+    parser.add_argument("--throttle", type=float, default=0.2, help="Throttled share of puts")
+    args = parser.parse_args()
+
+    _batch_run(args, shared=False)
+    _batch_run(args, shared=True)
+    for concurrency in (1, 4, 8):
+        _large_document(args, concurrency, 0.0)
+    _large_document(args, 4, args.throttle)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Synthetic legal-style documents (Markdown text and text-layer PDFs) for the benchmarks."""
+
+import random
+
+from pypdf import PdfWriter
+from pypdf.generic import DecodedStreamObject, DictionaryObject, NameObject
+
+_WORDS = [
+    "agreement",
+    "party",
+    "licensee",
+    "licensor",
+    "clause",
+    "section",
+    "term",
+    "termination",
+    "notice",
+    "breach",
+    "remedy",
+    "warranty",
+    "indemnify",
+    "liability",
+    "confidential",
+    "information",
+    "obligation",
+    "effective",
+    "date",
+    "governing",
+    "law",
+    "jurisdiction",
+    "assignment",
+    "consent",
+    "payment",
+    "fee",
+    "invoice",
+    "schedule",
+    "exhibit",
+    "amendment",
+    "waiver",
+]
+
+
+def legal_paragraphs(count: int, seed: int = 0) -> list[str]:
+    """count pseudo-legal paragraphs (deterministic for a seed)."""
+    rng = random.Random(seed)
+    out = []
+    for i in range(count):
+        sentences = [
+            " ".join(rng.choice(_WORDS) for _ in range(rng.randint(8, 20))).capitalize() + "."
+            for _ in range(rng.randint(2, 6))
+        ]
+        out.append(f"{i + 1}. " + " ".join(sentences))
+    return out
+
+
+def write_text_pdf(path: str, target_bytes: int, lines_per_page: int = 60, seed: int = 0) -> int:
+    """Write an uncompressed text PDF of roughly target_bytes; returns the page count."""
+    rng = random.Random(seed)
+    writer = PdfWriter()
+    font = DictionaryObject(
+        {
+            NameObject("/Type"): NameObject("/Font"),
+            NameObject("/Subtype"): NameObject("/Type1"),
+            NameObject("/BaseFont"): NameObject("/Helvetica"),
+        }
+    )
+    font_ref = writer._add_object(font)
+    resources = DictionaryObject(
+        {NameObject("/Font"): DictionaryObject({NameObject("/F1"): font_ref})}
+    )
+    written = 0
+    pages = 0
+    while written < target_bytes:
+        lines = [
+            " ".join(rng.choice(_WORDS) for _ in range(12)).encode("ascii")
+            for _ in range(lines_per_page)
+        ]
+        data = b"BT /F1 10 Tf 12 TL 72 760 Td " + b" ".join(b"(%s) '" % ln for ln in lines) + b" ET"
+        stream = DecodedStreamObject()
+        stream.set_data(data)
+        page = writer.add_blank_page(612, 792)
+        page[NameObject("/Contents")] = writer._add_object(stream)
+        page[NameObject("/Resources")] = resources
+        written += len(data) + 200  # page dictionary and xref overhead
+        pages += 1
+    with open(path, "wb") as f:
+        writer.write(f)
+    return pages
@@ -0,0 +1,423 @@
+"""Offline fakes for AWS clients used by the benchmarks (no network, deterministic output)."""
+
+# Fakes mirror boto3 keyword names (modelId, vectorBucketName, ...).
+# ruff: noqa: N803
+
+import hashlib
+import json
+import math
+import random
+import struct
+import threading
+import time
+from io import BytesIO
+
+from botocore.exceptions import ClientError
+from src.models.document import Document
+
+
+def fake_embedding(text: str, dimensions: int) -> list[float]:
+    """Deterministic pseudo-embedding for text (stable across runs, unit-ish scale)."""
+    seed = hashlib.sha256(text.encode("utf-8")).digest()
+    rng = random.Random(struct.unpack("<Q", seed[:8])[0])
+    return [rng.uniform(-1.0, 1.0) for _ in range(dimensions)]
+
+
+class FakeBedrockClient:
+    """bedrock-runtime stand-in: fixed latency per InvokeModel, optional throttling rate.
+    Embedding requests get fake_embedding; Claude (messages) requests a canned answer of at least
+    answer_tokens words, generated at token_latency_seconds per word: InvokeModel returns it after
+    the whole generation, InvokeModelWithResponseStream yields Anthropic stream events as it goes."""
+
+    def __init__(
+        self,
+        latency_seconds: float = 0.05,
+        throttle_rate: float = 0.0,
+        seed: int = 0,
+        answer_tokens: int = 0,
+        token_latency_seconds: float = 0.0,
+    ):
+        self.latency_seconds = latency_seconds
+        self.throttle_rate = throttle_rate
+        self.answer_tokens = answer_tokens
+        self.token_latency_seconds = token_latency_seconds
+        self.calls = 0
+        self.answers = 0
+        self.throttled = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _call(self, operation: str) -> None:
+        time.sleep(self.latency_seconds)
+        with self._lock:
+            self.calls += 1
+            throttle = self._rng.random() < self.throttle_rate
+            if throttle:
+                self.throttled += 1
+        if throttle:
+            raise ClientError(
+                {"Error": {"Code": "ThrottlingException", "Message": "Rate exceeded"}},
+                operation,
+            )
+
+    def _answer_words(self, request: dict) -> tuple[list[str], int]:
+        """Words of the canned answer (with their separating spaces) and prompt tokens."""
+        with self._lock:
+            self.answers += 1
+        prompt = request["messages"][-1]["content"]
+        words = f"Answer from {len(prompt)} characters of context.".split()
+        words += [f"w{i}" for i in range(len(words), self.answer_tokens)]
+        return [w if i == 0 else f" {w}" for i, w in enumerate(words)], len(prompt) // 4
+
+    def invoke_model(self, modelId: str, body: str, **kwargs) -> dict:
+        self._call("InvokeModel")
+        request = json.loads(body)
+        if "messages" in request:
+            words, prompt_tokens = self._answer_words(request)
+            time.sleep(self.token_latency_seconds * len(words))
+            usage = {"input_tokens": prompt_tokens, "output_tokens": len(words)}
+            answer = {"content": [{"type": "text", "text": "".join(words)}], "usage": usage}
+            return {"body": BytesIO(json.dumps(answer).encode())}
+        embedding = fake_embedding(request["inputText"], request.get("dimensions", 1024))
+        return {"body": BytesIO(json.dumps({"embedding": embedding}).encode("utf-8"))}
+
+    def invoke_model_with_response_stream(self, modelId: str, body: str, **kwargs) -> dict:
+        self._call("InvokeModelWithResponseStream")
+        words, prompt_tokens = self._answer_words(json.loads(body))
+
+        def event(payload: dict) -> dict:
+            return {"chunk": {"bytes": json.dumps(payload).encode()}}
+
+        def events():
+            yield event(
+                {"type": "message_start", "message": {"usage": {"input_tokens": prompt_tokens}}}
+            )
+            yield event({"type": "content_block_start", "index": 0})
+            for word in words:
+                time.sleep(self.token_latency_seconds)
+                yield event(
+                    {
+                        "type": "content_block_delta",
+                        "index": 0,
+                        "delta": {"type": "text_delta", "text": word},
+                    }
+                )
+            yield event({"type": "content_block_stop", "index": 0})
+            yield event({"type": "message_delta", "usage": {"output_tokens": len(words)}})
+            yield event({"type": "message_stop"})
+
+        return {"body": events()}
+
+
+class FakeVectorsClient:
+    """s3vectors stand-in: one in-memory index keyed by vector key; counts API calls.
+    With retain=False put_vectors only counts (memory benchmarks must not measure the fake).
+    put_vectors enforces the 500-vector limit and can add latency and random throttling."""
+
+    def __init__(
+        self,
+        retain: bool = True,
+        put_latency_seconds: float = 0.0,
+        put_throttle_rate: float = 0.0,
+        seed: int = 0,
+    ):
+        self.retain = retain
+        self.put_latency_seconds = put_latency_seconds
+        self.put_throttle_rate = put_throttle_rate
+        self.vectors: dict[str, dict] = {}
+        self.calls: dict[str, int] = {}
+        self.vectors_sent = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _count(self, op: str) -> None:
+        self.calls[op] = self.calls.get(op, 0) + 1
+
+    def put_vectors(self, vectorBucketName: str, indexName: str, vectors: list[dict]) -> dict:
+        if len(vectors) > 500:
+            raise ClientError(
+                {"Error": {"Code": "ValidationException", "Message": "Too many vectors"}},
+                "PutVectors",
+            )
+        time.sleep(self.put_latency_seconds)
+        with self._lock:
+            self._count("put_vectors")
+            self.vectors_sent += len(vectors)
+            throttle = self._rng.random() < self.put_throttle_rate
+        if throttle:
+            raise ClientError(
+                {"Error": {"Code": "ThrottlingException", "Message": "Rate exceeded"}},
+                "PutVectors",
+            )
+        with self._lock:
+            if not self.retain:
+                return {}
+            for v in vectors:
+                self.vectors[v["key"]] = v
+        return {}
+
+    def get_vectors(self, vectorBucketName: str, indexName: str, keys: list[str], **kwargs) -> dict:
+        if len(keys) > 100:
+            raise ClientError(
+                {"Error": {"Code": "ValidationException", "Message": "Too many keys"}},
+                "GetVectors",
+            )
+        with self._lock:
+            self._count("get_vectors")
+            found = [self.vectors[k] for k in keys if k in self.vectors]
+        return {"vectors": [{"key": v["key"], "data": v["data"]} for v in found]}
+
+    def delete_vectors(self, vectorBucketName: str, indexName: str, keys: list[str]) -> dict:
+        with self._lock:
+            self._count("delete_vectors")
+            for k in keys:
+                self.vectors.pop(k, None)
+        return {}
+
+    def query_vectors(
+        self,
+        vectorBucketName: str,
+        indexName: str,
+        topK: int,
+        queryVector: dict,
+        filter: dict | None = None,
+        **kwargs,
+    ) -> dict:
+        """Exact nearest neighbours by cosine distance; filter supports {"field": {"$eq": v}}."""
+        query = queryVector["float32"]
+        conditions = [(field, cond["$eq"]) for field, cond in (filter or {}).items()]
+        with self._lock:
+            self._count("query_vectors")
+            candidates = [
+                v
+                for v in self.vectors.values()
+                if all(v["metadata"].get(f) == value for f, value in conditions)
+            ]
+        scored = sorted(
+            ((_cosine_distance(query, v["data"]["float32"]), v) for v in candidates),
+            key=lambda pair: pair[0],
+        )
+        return {
+            "vectors": [
+                {"key": v["key"], "metadata": v["metadata"], "distance": d}
+                for d, v in scored[:topK]
+            ]
+        }
+
+    def list_vectors(
+        self,
+        vectorBucketName: str,
+        indexName: str,
+        maxResults: int = 500,
+        nextToken: str | None = None,
+        **kwargs,
+    ) -> dict:
+        with self._lock:
+            self._count("list_vectors")
+            keys = sorted(self.vectors)
+        start = int(nextToken or 0)
+        page = keys[start : start + maxResults]
+        resp = {"vectors": [{"key": k} for k in page]}
+        if start + maxResults < len(keys):
+            resp["nextToken"] = str(start + maxResults)
+        return resp
+
+
+class FakeDocumentUpload:
+    """s3.DocumentUpload into FakeBackends.objects (parts joined on complete; filename may be set
+    until then)."""
+
+    def __init__(self, objects: dict, owner_id: str, filename: str | None, content_type: str):
+        self.objects = objects
+        self.owner_id = owner_id
+        self.filename = filename
+        self.content_type = content_type
+        self.parts: list[bytes] = []
+
+    def upload_part(self, data: bytes) -> None:
+        self.parts.append(bytes(data))
+
+    def complete(self, data: bytes) -> None:
+        self.objects[(self.owner_id, self.filename)] = b"".join([*self.parts, data])
+        self.parts = []
+
+    def abort(self) -> None:
+        self.parts = []
+
+
+def _cosine_distance(a, b) -> float:
+    dot = sum(x * y for x, y in zip(a, b, strict=True))
+    norms = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return 1.0 - dot / norms if norms else 1.0
+
+
+def _shard(key: tuple[str, str], total_segments: int) -> int:
+    return (
+        int.from_bytes(hashlib.sha256("/".join(key).encode("utf-8")).digest()[:4]) % total_segments
+    )
+
+
+class FakeBackends:
+    """In-memory S3 documents, DynamoDB metadata, S3 Vectors and Bedrock for pipeline benchmarks.
+
+    install() patches the storage modules' functions/clients in place (benchmark processes only).
+    """
+
+    def __init__(self, bedrock_latency_seconds: float = 0.0):
+        self.objects: dict[tuple[str, str], bytes] = {}
+        self.documents: dict[tuple[str, str], Document] = {}
+        self.bedrock = FakeBedrockClient(latency_seconds=bedrock_latency_seconds)
+        self.vectors = FakeVectorsClient()
+        self.corpus_versions: dict[str, int] = {}
+
+    def install(self) -> "FakeBackends":
+        from src.api.config import get_settings
+        from src.services import (
+            dedup_service,
+            embedding_service,
+            process_service,
+            rag_service,
+            retrieval_service,
+            upload_service,
+        )
+        from src.storage import metadata, s3, vectors
+        from src.storage.checkpoints import CheckpointStore
+        from src.storage.embedding_cache import EmbeddingCache
+        from src.storage.fingerprints import FingerprintIndex
+        from src.storage.lexical_index import LexicalIndex
+        from src.storage.rag_cache import AnswerCache
+
+        settings = get_settings()
+        settings.s3_vectors_bucket_or_index = settings.s3_vectors_bucket_or_index or "bench-vectors"
+        cache = EmbeddingCache(max_entries=0)
+        embedding_service.get_bedrock_client = lambda: self.bedrock
+        embedding_service.get_embedding_cache = lambda: cache
+        self.question_cache = EmbeddingCache(
+            settings.rag_question_cache_max_entries, metric_prefix="rag_cache.question"
+        )
+        self.answer_cache = AnswerCache(settings.rag_answer_cache_max_entries)
+        embedding_service.get_question_cache = lambda: self.question_cache
+        rag_service.get_answer_cache = lambda: self.answer_cache
+        rag_service.get_bedrock_client = lambda: self.bedrock
+        self.fingerprints = FingerprintIndex(":memory:")
+        for module in (dedup_service, process_service, upload_service):
+            module.get_fingerprint_index = lambda: (
+                self.fingerprints
+                if settings.dedup_enabled and settings.fingerprint_index_path
+                else None
+            )
+        self.checkpoints = CheckpointStore(":memory:")
+        for module in (process_service, upload_service):
+            module.get_checkpoint_store = lambda: (
+                self.checkpoints if settings.checkpoint_path else None
+            )
+        self.lexical = LexicalIndex(":memory:")
+        for module in (process_service, retrieval_service, upload_service):
+            module.get_lexical_index = lambda: self.lexical if settings.lexical_index_path else None
+        vectors.get_vectors_client = lambda: self.vectors
+        s3.head_document = self._head_document
+        s3.upload_document = lambda o, f, body, ct: self.objects.__setitem__((o, f), body.read())
+        s3.put_document = lambda o, f, data, ct: self.objects.__setitem__((o, f), bytes(data))
+        s3.DocumentUpload = lambda o, f, ct: FakeDocumentUpload(self.objects, o, f, ct)
+        s3.get_document = lambda o, f: self.objects.get((o, f))
+        s3.read_document_head = lambda o, f, n: self.objects.get((o, f), b"")[:n]
+        s3.download_document = self._download_document
+        s3.delete_document = lambda o, f: self.objects.pop((o, f), None)
+        s3.delete_documents = lambda o, names: (
+            [self.objects.pop((o, f), None) for f in names] and {}
+        )
+        s3.list_document_filenames = lambda o, prefix="", modified_before=None: [
+            f for owner, f in list(self.objects) if owner == o and f.startswith(prefix)
+        ]
+        metadata.create_metadata = lambda doc: self.documents.__setitem__(
+            (doc.owner_id, doc.filename), doc.model_copy()
+        )
+        metadata.create_metadata_batch = lambda docs: [metadata.create_metadata(d) for d in docs]
+        metadata.get_metadata_batch = lambda o, names: {
+            f: self.documents[(o, f)].model_copy() for f in names if (o, f) in self.documents
+        }
+        metadata.get_vector_generations = lambda o, names: {
+            f: self.documents[(o, f)].vector_generation or 0
+            for f in names
+            if (o, f) in self.documents
+        }
+        metadata.get_metadata = lambda o, f: (
+            self.documents[(o, f)].model_copy() if (o, f) in self.documents else None
+        )
+        metadata.delete_metadata = lambda o, f: self.documents.pop((o, f), None)
+        metadata.delete_metadata_batch = lambda o, names: [
+            self.documents.pop((o, f), None) for f in names
+        ]
+        metadata.update_status = self._update_status
+        metadata.list_by_status = self._list_by_status
+        metadata.list_by_owner = self.list_by_owner
+        metadata.get_corpus_version = lambda o: self.corpus_versions.get(o, 0)
+        metadata.bump_corpus_version = self._bump_corpus_version
+        return self
+
+    def list_by_owner(
+        self,
+        owner_id: str,
+        limit: int = 100,
+        next_token: str | None = None,
+        prefix: str | None = None,
+    ):
+        # Like DynamoDB: next_token is the last filename returned (valid across deletes).
+        names = sorted(
+            f
+            for o, f in self.documents
+            if o == owner_id and f.startswith(prefix or "") and f > (next_token or "")
+        )
+        page = [self.documents[(owner_id, f)].model_copy() for f in names[:limit]]
+        return page, page[-1].filename if len(names) > limit else None
+
+    def _delete_documents(self, owner_id: str, filenames: list[str]) -> dict[str, str]:
+        for filename in filenames:
+            self.objects.pop((owner_id, filename), None)
+        return {}
+
+    def _bump_corpus_version(self, owner_id: str) -> int:
+        self.corpus_versions[owner_id] = self.corpus_versions.get(owner_id, 0) + 1
+        return self.corpus_versions[owner_id]
+
+    def _head_document(self, owner_id: str, filename: str) -> dict | None:
+        body = self.objects.get((owner_id, filename))
+        if body is None:
+            return None
+        return {"etag": hashlib.md5(body).hexdigest(), "size": len(body), "content_type": None}
+
+    def _download_document(self, owner_id: str, filename: str, fileobj) -> bool:
+        body = self.objects.get((owner_id, filename))
+        if body is None:
+            return False
+        fileobj.write(body)
+        return True
+
+    def _list_by_status(
+        self,
+        status,
+        limit: int = 100,
+        next_token: dict | None = None,
+        segment: int | None = None,
+        total_segments: int | None = None,
+    ):
+        # Like a DynamoDB scan: Limit counts evaluated items, the filter applies within the page;
+        # a parallel-scan segment sees a stable hash shard of the items.
+        keys = list(self.documents)
+        if total_segments and total_segments > 1:
+            keys = [k for k in keys if _shard(k, total_segments) == (segment or 0)]
+        start = (next_token or {}).get("offset", 0)
+        page = [self.documents[k] for k in keys[start : start + limit]]
+        docs = [d.model_copy() for d in page if d.processing_status == status]
+        return docs, {"offset": start + limit} if start + limit < len(keys) else None
+
+    def _update_status(self, owner_id: str, filename: str, status, **fields) -> None:
+        doc = self.documents[(owner_id, filename)]
+        doc.processing_status = status
+        if fields.pop("bump_corpus", False):
+            self._bump_corpus_version(owner_id)
+        if fields.pop("clear_processing_error", False):
+            doc.processing_error = None
+        for name, value in fields.items():
+            if value is not None:
+                setattr(doc, name, value)
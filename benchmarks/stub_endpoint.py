@@ -0,0 +1,251 @@
+"""Local stub AWS endpoint for benchmarks that exercise real boto3 clients.
+
+HTTP/1.1 with keep-alive on 127.0.0.1. Every request succeeds after the configured latency:
+- S3: HEAD; PutObject / UploadPart (an ETag); CreateMultipartUpload and CompleteMultipartUpload
+  (their XML results); DELETE.
+- JSON protocols (DynamoDB and others): "{}", or the minimal result boto3 reads back
+  (JSON_RESULTS: UpdateItem a corpus_version of 1, BatchWriteItem no unprocessed items).
+Request bodies are read and discarded, unless retain=True: then PutObject bodies and browser-style
+POST uploads (presigned POST forms: the policy's exact-match and content-length-range conditions
+are enforced, the signature is not checked) are kept in objects, and HEAD / GET (with Range) /
+DELETE act on them, answering 404 for missing keys.
+Counts accepted TCP connections, requests (also by operation: the X-Amz-Target action for JSON
+protocols, else the HTTP method) and body bytes received.
+"""
+
+import base64
+import io
+import json
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from python_multipart import parse_form
+
+
+def _policy_error(fields: dict[str, str], size: int) -> str | None:
+    """S3 error code for a POST upload that violates its policy (exact-match and
+    content-length-range conditions only), else None."""
+    policy = json.loads(base64.b64decode(fields.get("policy", "") or "e30="))
+    for condition in policy.get("conditions", []):
+        if isinstance(condition, dict):
+            for name, value in condition.items():
+                if name != "bucket" and fields.get(name) != value:
+                    return "AccessDenied"
+        elif condition[0] == "content-length-range":
+            if size < condition[1]:
+                return "EntityTooSmall"
+            if size > condition[2]:
+                return "EntityTooLarge"
+    return None
+
+
+# X-Amz-Target action -> JSON result, where "{}" is not enough.
+JSON_RESULTS = {
+    "UpdateItem": b'{"Attributes": {"corpus_version": {"N": "1"}}}',
+    "BatchWriteItem": b'{"UnprocessedItems": {}}',
+}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    endpoint: "StubEndpoint"
+
+    def setup(self) -> None:
+        super().setup()
+        self.endpoint.count(connections=1)
+
+    def _read_body(self) -> bytes:
+        """Request body; only kept (else counted and dropped) when the endpoint retains objects."""
+        keep = self.endpoint.retain
+        received = 0
+        blocks = []
+
+        def take(block: bytes) -> None:
+            nonlocal received
+            received += len(block)
+            if keep:
+                blocks.append(block)
+
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            while size := int(self.rfile.readline().split(b";")[0], 16):
+                take(self.rfile.read(size))
+                self.rfile.readline()
+            while self.rfile.readline() not in (b"\r\n", b""):
+                pass  # trailers
+        else:
+            remaining = int(self.headers.get("Content-Length") or 0)
+            while remaining:
+                block = self.rfile.read(min(remaining, 1 << 20))
+                if not block:
+                    break
+                remaining -= len(block)
+                take(block)
+        target = self.headers.get("X-Amz-Target", "")
+        operation = target.rpartition(".")[2] if target else self.command
+        self.endpoint.count(requests=1, body_bytes=received, operation=operation)
+        return b"".join(blocks)
+
+    def _reply(self, status: int, body: bytes = b"", headers: dict | None = None) -> None:
+        time.sleep(self.endpoint.latency)
+        self.send_response(status)
+        headers = {"Content-Length": str(len(body)), **(headers or {})}
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _key(self) -> str:
+        return unquote(urlsplit(self.path).path)
+
+    def _missing(self) -> None:
+        body = b"<Error><Code>NoSuchKey</Code><Message>Not found</Message></Error>"
+        self._reply(
+            404, b"" if self.command == "HEAD" else body, {"Content-Type": "application/xml"}
+        )
+
+    def do_HEAD(self) -> None:
+        self._read_body()
+        if not self.endpoint.retain:
+            self._reply(200, headers={"ETag": '"stub"'})
+            return
+        stored = self.endpoint.objects.get(self._key())
+        if stored is None:
+            self._missing()
+            return
+        data, content_type = stored
+        headers = {"ETag": '"stub"', "Content-Length": str(len(data))}
+        self._reply(200, headers={**headers, "Content-Type": content_type or "binary/octet-stream"})
+
+    def do_GET(self) -> None:
+        self._read_body()
+        stored = self.endpoint.objects.get(self._key())
+        if stored is None:
+            self._missing()
+            return
+        data, content_type = stored
+        headers = {"ETag": '"stub"', "Content-Type": content_type or "binary/octet-stream"}
+        ranged = self.headers.get("Range", "")
+        if ranged.startswith("bytes="):
+            first, _, last = ranged[len("bytes=") :].partition("-")
+            end = min(len(data), int(last) + 1 if last else len(data))
+            headers["Content-Range"] = f"bytes {first}-{end - 1}/{len(data)}"
+            self._reply(206, data[int(first) : end], headers)
+            return
+        self._reply(200, data, headers)
+
+    def do_PUT(self) -> None:
+        body = self._read_body()
+        query = parse_qs(urlsplit(self.path).query)
+        if self.endpoint.retain and "uploadId" not in query:
+            self.endpoint.objects[self._key()] = (body, self.headers.get("Content-Type"))
+        self._reply(200, headers={"ETag": f'"{uuid.uuid4().hex}"'})
+
+    def do_DELETE(self) -> None:
+        self._read_body()
+        self.endpoint.objects.pop(self._key(), None)
+        self._reply(204)
+
+    def do_POST(self) -> None:
+        body = self._read_body()
+        query = parse_qs(urlsplit(self.path).query, keep_blank_values=True)
+        if "uploads" in query:
+            upload_id = uuid.uuid4().hex
+            xml = (
+                "<InitiateMultipartUploadResult><Bucket>b</Bucket><Key>k</Key>"
+                f"<UploadId>{upload_id}</UploadId></InitiateMultipartUploadResult>"
+            )
+            self._reply(200, xml.encode(), {"Content-Type": "application/xml"})
+        elif "uploadId" in query:
+            xml = (
+                "<CompleteMultipartUploadResult><Bucket>b</Bucket><Key>k</Key>"
+                '<ETag>"stub"</ETag></CompleteMultipartUploadResult>'
+            )
+            self._reply(200, xml.encode(), {"Content-Type": "application/xml"})
+        elif self.headers.get("Content-Type", "").startswith("multipart/form-data"):
+            self._form_upload(body)
+        else:
+            action = self.headers.get("X-Amz-Target", "").rpartition(".")[2]
+            result = JSON_RESULTS.get(action, b"{}")
+            self._reply(200, result, {"Content-Type": "application/x-amz-json-1.0"})
+
+    def _form_upload(self, body: bytes) -> None:
+        """Browser-style POST upload: fields (key, Content-Type, ...) then file."""
+        fields: dict[str, str] = {}
+        files: list[bytes] = []
+
+        def on_file(f) -> None:
+            f.file_object.seek(0)  # in memory or spooled to disk, depending on size
+            files.append(f.file_object.read())
+
+        parse_form(
+            {
+                "Content-Type": self.headers["Content-Type"].encode(),
+                "Content-Length": str(len(body)).encode(),
+            },
+            io.BytesIO(body),
+            lambda f: fields.__setitem__(f.field_name.decode(), (f.value or b"").decode()),
+            on_file,
+        )
+        if not files or "key" not in fields:
+            self._reply(400, b"<Error><Code>InvalidArgument</Code></Error>")
+            return
+        error = _policy_error(fields, len(files[0]))
+        if error is not None:
+            self._reply(
+                400 if error == "EntityTooLarge" else 403,
+                f"<Error><Code>{error}</Code></Error>".encode(),
+            )
+            return
+        if self.endpoint.retain:
+            key = f"{self._key().rstrip('/')}/{fields['key']}"
+            self.endpoint.objects[key] = (files[0], fields.get("Content-Type"))
+        self._reply(204)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+class StubEndpoint:
+    """Stub endpoint serving on a background thread; url is the AWS_ENDPOINT_URL to use."""
+
+    def __init__(self, latency: float = 0.0, retain: bool = False):
+        self.latency = latency
+        self.retain = retain
+        # "/bucket/key" -> (body, content type), when retain
+        self.objects: dict[str, tuple[bytes, str | None]] = {}
+        self.connections = self.requests = self.body_bytes = 0
+        self.operations: Counter[str] = Counter()
+        self._lock = threading.Lock()
+        handler = type("Handler", (_Handler,), {"endpoint": self})
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self._server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._server.server_port}"
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def count(
+        self,
+        connections: int = 0,
+        requests: int = 0,
+        body_bytes: int = 0,
+        operation: str | None = None,
+    ) -> None:
+        with self._lock:
+            self.connections += connections
+            self.requests += requests
+            self.body_bytes += body_bytes
+            if operation:
+                self.operations[operation] += 1
+
+    def reset_counts(self) -> None:
+        with self._lock:
+            self.connections = self.requests = self.body_bytes = 0
+            self.operations.clear()
+
+    def close(self) -> None:
+        self._server.shutdown()
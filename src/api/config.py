@@ -27,10 +27,108 @@ class Settings(BaseSettings):
     aws_endpoint_url: str | None = Field(default=None, validation_alias="AWS_ENDPOINT_URL")
     s3_bucket_documents: str = Field(default="", validation_alias="S3_BUCKET_DOCUMENTS")
     dynamodb_table_metadata: str = Field(default="", validation_alias="DYNAMODB_TABLE_METADATA")
+    # Sparse GSI on status_shard for pending/processing/failed documents (empty = scan). Set it
+    # only after `python -m src.services.batch_process --backfill-status-index` ran on a table
+    # with items older than the index; the index does not return items without status_shard.
+    dynamodb_status_index: str = ""
     s3_vectors_bucket_or_index: str | None = None
     s3_vectors_index: str = Field(default="default", validation_alias="S3_VECTORS_INDEX")
     bedrock_model_id: str | None = None
     bedrock_rag_model_id: str | None = Field(default=None, validation_alias="BEDROCK_RAG_MODEL_ID")
+    # AWS clients: one shared client per service and process. Connection pool size per service
+    # (keep at or above the threads calling it), TCP keep-alive, botocore retry mode (adaptive =
+    # standard retries plus client-side throttling) and total attempts per call, connect/read
+    # timeouts (Bedrock read timeout separately: answer generation can take minutes)
+    aws_s3_max_pool_connections: int = 64
+    aws_dynamodb_max_pool_connections: int = 64
+    aws_s3vectors_max_pool_connections: int = 32
+    aws_bedrock_max_pool_connections: int = 32
+    aws_sqs_max_pool_connections: int = 10
+    aws_tcp_keepalive: bool = True
+    aws_retry_mode: str = "adaptive"
+    aws_max_attempts: int = 3
+    aws_connect_timeout_seconds: float = 5.0
+    aws_read_timeout_seconds: float = 60.0
+    aws_bedrock_read_timeout_seconds: float = 300.0
+
+    # Uploads: S3 multipart part size for streamed uploads (min 5 MiB; each upload in progress
+    # buffers at most one part) and lifetime of presigned direct-to-bucket upload URLs
+    upload_part_size_bytes: int = 5 * 1024 * 1024
+    upload_url_expires_seconds: int = 900
+    # Bulk uploads (POST /documents/bulk: several files or zip/tar archives): max request body,
+    # max documents per request, S3 writes in parallel per request
+    bulk_upload_max_bytes: int = 1024 * 1024 * 1024
+    bulk_upload_max_files: int = 5000
+    bulk_upload_concurrency: int = 16
+    # Bulk deletes (DELETE /documents: list, prefix or all): concurrent S3 / vector / DynamoDB
+    # delete calls per request
+    bulk_delete_concurrency: int = 8
+    # Prefix deletes and purges also remove stored objects without metadata, once older than this
+    # (uploads write the object before its metadata)
+    bulk_delete_orphan_grace_seconds: int = 900
+    # Processing: max concurrent Bedrock embedding calls per document
+    embedding_max_concurrency: int = 8
+    # Vector store: vectors per PutVectors call (max 500; each in-flight call holds its float
+    # payload, ~32 KB per 1024-d vector) and max concurrent calls per writer
+    vector_write_batch_size: int = 200
+    vector_write_concurrency: int = 4
+    # Vector store backend: s3vectors | local (per-owner float32 files in LOCAL_VECTOR_STORE_PATH;
+    # exact search up to LOCAL_VECTOR_HNSW_THRESHOLD vectors per owner, HNSW graph above, with
+    # LOCAL_VECTOR_HNSW_EF_SEARCH candidates per query)
+    vector_store_backend: str = "s3vectors"
+    local_vector_store_path: str = ".cache/vectors"
+    local_vector_hnsw_threshold: int = 20000
+    local_vector_hnsw_ef_search: int = 64
+    # Batch runner: worker count, executor (thread | process), runtime budget (0 = no limit)
+    batch_workers: int = 4
+    batch_executor: str = "thread"
+    batch_max_runtime_seconds: float = 0.0
+    # Processing queue for upload_and_analyze: backend (background = in the API process via
+    # BackgroundTasks | sqlite = local file, worker on the same host | sqs; sqlite and sqs need
+    # python -m src.services.worker running), SQLite path, SQS queue URL, lease (visibility)
+    # timeout, leases before a job is dead-lettered, ready jobs at which uploads are refused
+    # (0 = unbounded)
+    job_queue_backend: str = "background"
+    job_queue_path: str = ".cache/jobs.sqlite3"
+    job_queue_url: str | None = None
+    job_visibility_timeout_seconds: float = 900.0
+    job_max_attempts: int = 3
+    job_queue_max_depth: int = 0
+    # Worker (python -m src.services.worker): documents processed concurrently
+    worker_concurrency: int = 2
+    # PDF extraction process pool (0 = extract in-process), per-document timeout, worker memory cap
+    extract_pool_size: int = 2
+    extract_timeout_seconds: float = 300.0
+    extract_memory_limit_mb: int = 1024
+    # Chunking: strategy name (structured | fixed) and token budget per structured chunk
+    chunking_strategy: str = "structured"
+    chunk_token_budget: int = 800
+    # Near-duplicate suppression: per-owner SimHash index and max Hamming distance. The index is a
+    # local SQLite file (unset = off): only for a single host running both API and processing, as
+    # other hosts or containers would each keep a diverging index
+    dedup_enabled: bool = True
+    dedup_max_hamming: int = 3
+    fingerprint_index_path: str | None = None
+    # Processing checkpoints: local SQLite scratch area for resuming failed runs (unset = off; a
+    # retry only resumes on the host that ran the document, so single-host deployments) and age
+    # after which unused checkpoints are pruned
+    checkpoint_path: str | None = None
+    checkpoint_max_age_seconds: float = 7 * 24 * 3600.0
+    # Embedding cache: in-process LRU size and local SQLite tier (unset = memory only; the file is
+    # per host and unbounded, so only for a single long-lived host)
+    embedding_cache_max_entries: int = 4096
+    embedding_cache_path: str | None = None
+    # RAG caches (in-process LRU sizes; 0 disables): normalized question -> query embedding, and
+    # (owner, question, corpus version) -> retrieved chunks and answer
+    rag_question_cache_max_entries: int = 1024
+    rag_answer_cache_max_entries: int = 1024
+    # Hybrid retrieval: per-owner BM25 index over chunk text (local SQLite; unset = vector search
+    # only; single host only, as every host would index only the documents it processed), fused
+    # with the vector results by reciprocal rank fusion (constant k)
+    lexical_index_path: str | None = None
+    hybrid_rrf_k: int = 60
+    # RAG prompt context: estimated-token budget for the packed retrieved chunks (0 = unlimited)
+    rag_context_token_budget: int = 4000
 
     # Cognito
     cognito_user_pool_id: str | None = None
@@ -43,9 +141,15 @@ class Settings(BaseSettings):
     # Logging (plan Logging: config file / .env; CLI overrides when using run entrypoint)
     log_level: str = Field(default="DEBUG", validation_alias="LOG_LEVEL")
 
-    # Rate limit (per-user requests per window)
+    # API executors: threads for blocking service calls per backend (0 = inline on the event loop)
+    api_bedrock_workers: int = 16
+    api_storage_workers: int = 32
+
+    # Rate limit (per-user requests per window). A bulk upload counts as one request per
+    # RATE_LIMIT_BULK_UNIT_BYTES of body (at least one, at most the whole window's allowance)
     rate_limit_requests: int = 60
     rate_limit_window_seconds: int = 60
+    rate_limit_bulk_unit_bytes: int = 25 * 1024 * 1024
 
 
 @lru_cache
@@ -10,6 +10,8 @@ from src.api.rate_limit import RateLimitMiddleware
 from src.api.routes import documents, rag
 from src.observability.logging import configure_logging
 from src.observability.telemetry import setup_telemetry
+from src.services import executors
+from src.storage import clients
 
 
 @asynccontextmanager
@@ -20,8 +22,9 @@ async def lifespan(app: FastAPI):
         service_name=settings.otel_service_name,
         otlp_endpoint=settings.otel_exporter_otlp_endpoint,
     )
+    clients.warm_up()
     yield
-    # shutdown if needed
+    executors.shutdown()
 
 
 app = FastAPI(
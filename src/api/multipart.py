@@ -0,0 +1,183 @@
+"""Streaming multipart/form-data reader: form fields and file parts straight from the request body.
+
+Unlike request.form() (Starlette spools every file to a temporary file before the route runs),
+StreamingForm parses the body as it arrives, so a route can validate and forward file bytes chunk
+by chunk while the client is still sending. Fields sent before a file part are in fields when
+next_file() returns it; later ones once read_rest() (or the next next_file()) has passed them.
+"""
+
+from collections import deque
+from typing import NamedTuple
+
+from python_multipart.exceptions import MultipartParseError
+from python_multipart.multipart import MultipartParser, parse_options_header
+from starlette.requests import Request
+
+# Limits for the non-file fields (they are held in memory).
+MAX_FIELD_BYTES = 64 * 1024
+MAX_FIELDS = 100
+
+
+class MultipartError(ValueError):
+    """Malformed or over-limit multipart body."""
+
+
+class FilePart(NamedTuple):
+    field_name: str
+    filename: str
+    content_type: str | None
+
+
+class StreamingForm:
+    """Reads a multipart/form-data request body of at most max_bytes incrementally (see module
+    docstring)."""
+
+    def __init__(self, request: Request, max_bytes: int):
+        _, params = parse_options_header(request.headers.get("content-type", ""))
+        boundary = params.get(b"boundary")
+        if not boundary:
+            raise MultipartError("Expected a multipart/form-data body")
+        # Refused up front when Content-Length says so, otherwise as soon as the count passes it.
+        declared = request.headers.get("content-length", "")
+        if declared.isdigit() and int(declared) > max_bytes:
+            raise MultipartError(f"Request body exceeds {max_bytes} bytes")
+        self._max_bytes = max_bytes
+        self._received = 0
+        self.fields: dict[str, str] = {}
+        self._stream = request.stream()
+        self._events: deque[tuple[str, object]] = deque()
+        self._done = False
+        self._in_file = False
+        self._headers: list[tuple[bytes, bytes]] = []
+        self._header_name = b""
+        self._header_value = b""
+        self._field: tuple[str, bytearray] | None = None
+        self._parser = MultipartParser(
+            boundary,
+            {
+                "on_part_begin": self._on_part_begin,
+                "on_header_field": self._on_header_field,
+                "on_header_value": self._on_header_value,
+                "on_header_end": self._on_header_end,
+                "on_headers_finished": self._on_headers_finished,
+                "on_part_data": self._on_part_data,
+                "on_part_end": self._on_part_end,
+            },
+        )
+
+    async def next_file(self) -> FilePart | None:
+        """Advance to the next file part (skipping unread data of the current one); None at the
+        end of the body. Fields passed on the way are added to fields."""
+        while True:
+            event = await self._next_event()
+            if event is None:
+                return None
+            kind, value = event
+            if kind == "file":
+                self._in_file = True
+                return value
+
+    async def read(self) -> bytes:
+        """Next chunk of the current file part's data; b"" at its end."""
+        if not self._in_file:
+            return b""
+        event = await self._next_event()
+        if event is None:
+            raise MultipartError("Incomplete multipart body")
+        kind, value = event
+        if kind == "data":
+            return value
+        self._in_file = False  # "file_end"
+        return b""
+
+    async def read_rest(self) -> None:
+        """Consume the rest of the body, collecting fields (file data is discarded)."""
+        while await self._next_event() is not None:
+            pass
+
+    async def _next_event(self) -> tuple[str, object] | None:
+        """Next "file" / "data" / "file_end" event; fields are stored on the way."""
+        while True:
+            while not self._events:
+                if self._done:
+                    return None
+                await self._pump()
+            kind, value = self._events.popleft()
+            if kind != "field":
+                return kind, value
+            name, text = value
+            if len(self.fields) >= MAX_FIELDS and name not in self.fields:
+                raise MultipartError(f"Too many form fields (max {MAX_FIELDS})")
+            self.fields[name] = text
+
+    async def _pump(self) -> None:
+        """Feed the next body chunk to the parser."""
+        try:
+            chunk = await anext(self._stream)
+        except StopAsyncIteration:
+            self._done = True
+            chunk = None
+        try:
+            if chunk is None:
+                self._parser.finalize()
+            elif chunk:
+                self._received += len(chunk)
+                if self._received > self._max_bytes:
+                    raise MultipartError(f"Request body exceeds {self._max_bytes} bytes")
+                self._parser.write(chunk)
+        except MultipartParseError as e:
+            raise MultipartError(f"Malformed multipart body: {e}") from e
+
+    # Parser callbacks (synchronous, called from write()/finalize()).
+
+    def _on_part_begin(self) -> None:
+        self._headers = []
+
+    def _on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_name += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def _on_header_end(self) -> None:
+        self._headers.append((self._header_name.lower(), self._header_value))
+        self._header_name = self._header_value = b""
+
+    def _on_headers_finished(self) -> None:
+        headers = dict(self._headers)
+        _, options = parse_options_header(headers.get(b"content-disposition", b""))
+        if b"name" not in options:
+            raise MultipartError('Multipart part without Content-Disposition "name"')
+        name = options[b"name"].decode("utf-8", "replace")
+        if b"filename" in options:
+            content_type = headers.get(b"content-type")
+            self._events.append(
+                (
+                    "file",
+                    FilePart(
+                        name,
+                        options[b"filename"].decode("utf-8", "replace"),
+                        content_type.decode("latin-1") if content_type else None,
+                    ),
+                )
+            )
+            self._field = None
+        else:
+            self._field = (name, bytearray())
+
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._field is None:
+            self._events.append(("data", data[start:end]))
+            return
+        value = self._field[1]
+        if len(value) + end - start > MAX_FIELD_BYTES:
+            raise MultipartError(f"Form field {self._field[0]!r} exceeds {MAX_FIELD_BYTES} bytes")
+        value += data[start:end]
+
+    def _on_part_end(self) -> None:
+        if self._field is None:
+            self._events.append(("file_end", None))
+        else:
+            name, value = self._field
+            self._events.append(("field", (name, value.decode("utf-8", "replace"))))
+            self._field = None
@@ -1,4 +1,5 @@
-"""Per-user rate limiter middleware (FR-013): throttle by owner_id; return 429 when exceeded."""
+"""Per-user rate limiter middleware (FR-013): throttle by owner_id; return 429 when exceeded.
+Every request counts as one unit, except bulk uploads, which are weighted by body size."""
 
 import time
 from collections import defaultdict
@@ -17,13 +18,14 @@ class InMemoryRateLimiter:
         self.window_seconds = window_seconds
         self._counts: dict[str, list] = defaultdict(list)
 
-    def is_allowed(self, key: str) -> bool:
+    def is_allowed(self, key: str, cost: int = 1) -> bool:
+        """Record cost units for key if they fit in the current window."""
         now = time.monotonic()
         window_start = now - self.window_seconds
         self._counts[key] = [t for t in self._counts[key] if t > window_start]
-        if len(self._counts[key]) >= self.requests:
+        if len(self._counts[key]) + cost > self.requests:
             return False
-        self._counts[key].append(now)
+        self._counts[key].extend([now] * cost)
         return True
 
 
@@ -41,6 +43,19 @@ def get_limiter() -> InMemoryRateLimiter:
     return _limiter
 
 
+def request_cost(request: Request) -> int:
+    """Rate-limit units for request: 1, or for POST /documents/bulk one per
+    RATE_LIMIT_BULK_UNIT_BYTES of declared body (Content-Length; the route requires it), capped
+    at RATE_LIMIT_REQUESTS so a maximal bulk upload fits an empty window."""
+    if request.method != "POST" or not request.url.path.rstrip("/").endswith("/documents/bulk"):
+        return 1
+    s = get_settings()
+    declared = request.headers.get("content-length", "")
+    size = int(declared) if declared.isdigit() else 0
+    units = -(-size // max(1, s.rate_limit_bulk_unit_bytes))
+    return max(1, min(units, s.rate_limit_requests))
+
+
 class RateLimitMiddleware(BaseHTTPMiddleware):
     """Middleware that returns 429 when per-user rate limit is exceeded."""
 
@@ -51,7 +66,7 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
             # Let the route handle 401; we only rate-limit when we have a user
             return await call_next(request)
         limiter = get_limiter()
-        if not limiter.is_allowed(owner_id):
+        if not limiter.is_allowed(owner_id, request_cost(request)):
             return Response(
                 content='{"error": "Rate limit exceeded"}',
                 status_code=429,
@@ -1,22 +1,26 @@
-"""POST/GET/DELETE /api/v1/documents. document_id = filename (user-scoped)."""
+"""POST/GET/DELETE /api/v1/documents. document_id = filename (user-scoped).
+Blocking storage calls run on the STORAGE executor (services.executors), not the event loop;
+uploads are streamed from the request body (api.multipart) to S3, or go to S3 directly through a
+presigned POST (POST /documents/upload-url, then POST /documents/{document_id}/complete).
+POST /documents/bulk takes many files or zip/tar archives in one request; DELETE /documents
+removes many documents (by list or prefix) or all of the user's, reporting progress."""
 
-from typing import Annotated
+import json
+import tempfile
+from collections.abc import AsyncIterator
+from typing import Annotated, Literal
 
 from botocore.exceptions import ClientError
-from fastapi import (
-    APIRouter,
-    BackgroundTasks,
-    Depends,
-    File,
-    Form,
-    HTTPException,
-    UploadFile,
-    status,
-)
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
 
 from src.api.auth import get_owner_id
+from src.api.config import get_settings
+from src.api.multipart import FilePart, StreamingForm
 from src.models.document import Document
-from src.services import process_service, upload_service
+from src.observability.logging import get_logger
+from src.services import executors, process_service, upload_service
 
 router = APIRouter(prefix="/documents", tags=["documents"])
 
@@ -34,73 +38,384 @@ def _doc_to_response(doc: Document) -> dict:
     }
 
 
+# Multipart framing allowance on top of the 25 MB file (boundaries, part headers, form fields).
+MAX_FORM_OVERHEAD_BYTES = 256 * 1024
+# Most document_ids in one DELETE /documents request (larger sets: by prefix, or several requests).
+MAX_DELETE_DOCUMENT_IDS = 10000
+
+_UPLOAD_FORM_SCHEMA = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file", "mode"],
+                    "properties": {
+                        "file": {
+                            "type": "string",
+                            "format": "binary",
+                            "description": "PDF or Markdown file, max 25 MB",
+                        },
+                        "mode": {
+                            "type": "string",
+                            "enum": ["upload_and_analyze", "upload_and_queue"],
+                        },
+                        "name": {
+                            "type": "string",
+                            "description": "Filename override (before or after file)",
+                        },
+                    },
+                }
+            }
+        },
+    }
+}
+
+
+_BULK_FORM_SCHEMA = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["mode", "files"],
+                    "properties": {
+                        "mode": {
+                            "type": "string",
+                            "enum": ["upload_and_analyze", "upload_and_queue"],
+                            "description": "Before or after the files (before: checked first)",
+                        },
+                        "files": {
+                            "type": "array",
+                            "items": {"type": "string", "format": "binary"},
+                            "description": "PDF/Markdown files (max 25 MB each) and/or zip/tar"
+                            " archives of them",
+                        },
+                    },
+                }
+            }
+        },
+    }
+}
+
+
+def _bad_request(error: str) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail={"error": error})
+
+
+def _storage_error(e: ClientError) -> HTTPException:
+    code = e.response.get("Error", {}).get("Code", "Unknown")
+    msg = e.response.get("Error", {}).get("Message", str(e))
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail={
+            "error": "Storage error (check S3 bucket and DynamoDB table exist, e.g. LocalStack setup)",
+            "code": code,
+            "message": msg,
+        },
+    )
+
+
+def _check_mode(mode: str | None) -> None:
+    if mode not in ("upload_and_analyze", "upload_and_queue"):
+        raise _bad_request("mode must be upload_and_analyze or upload_and_queue")
+
+
+async def _check_queue(mode: str) -> None:
+    if mode == "upload_and_analyze" and await executors.run(
+        executors.STORAGE, upload_service.processing_queue_full
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail={"error": "Processing queue is full; retry later or use upload_and_queue"},
+            headers={"Retry-After": "60"},
+        )
+
+
+async def _start_processing(
+    background_tasks: BackgroundTasks, owner_id: str, doc: Document, mode: str
+) -> None:
+    """upload_and_analyze: queue processing, or run it after the response when there is no queue."""
+    if mode == "upload_and_analyze" and not await executors.run(
+        executors.STORAGE, upload_service.enqueue_processing, owner_id, doc.filename
+    ):
+        background_tasks.add_task(process_service.process_document, owner_id, doc.filename)
+
+
+def _upload_filename(name: str | None, file: FilePart) -> str:
+    filename = (name or file.filename or "").strip()
+    if not filename:
+        raise _bad_request("Missing filename (provide file or name)")
+    return filename
+
+
+async def _stream_upload(owner_id: str, form: StreamingForm) -> tuple[Document, str]:
+    """Stream the form's file into S3; returns the stored document and the upload mode. mode and
+    name may come before or after the file part: sent after it, they are applied once the form
+    is read (the document is named then)."""
+    file = await form.next_file()
+    if file is None:
+        raise _bad_request("Missing file")
+    mode = form.fields.get("mode")
+    if mode is not None:
+        _check_mode(mode)
+        await _check_queue(mode)
+    name = form.fields.get("name")
+    upload = upload_service.StreamingUpload(
+        owner_id, _upload_filename(name, file) if name is not None else None, file.content_type
+    )
+    try:
+        while chunk := await form.read():
+            part = upload.write(chunk)
+            if part is not None:
+                await executors.run(executors.STORAGE, upload.upload_part, part)
+        await form.read_rest()
+        if upload.filename is None:
+            upload.set_filename(_upload_filename(form.fields.get("name"), file))
+        if mode is None:
+            mode = form.fields.get("mode")
+            _check_mode(mode)
+            await _check_queue(mode)
+        doc = await executors.run(executors.STORAGE, upload.complete, mode)
+    except BaseException:
+        await executors.run(executors.STORAGE, upload.abort)
+        raise
+    return doc, mode
+
+
 @router.post(
     "",
     status_code=status.HTTP_201_CREATED,
+    openapi_extra=_UPLOAD_FORM_SCHEMA,
     responses={
         201: {"description": "Document uploaded"},
         400: {"description": "Invalid format, missing file/mode, or file > 25 MB"},
         401: {"description": "Missing or invalid token"},
         429: {"description": "Rate limit exceeded"},
-        503: {"description": "S3/DynamoDB unavailable (e.g. bucket/table missing with LocalStack)"},
+        503: {
+            "description": "S3/DynamoDB unavailable (e.g. bucket/table missing with LocalStack),"
+            " or the processing queue is full (upload_and_analyze)"
+        },
     },
 )
 async def upload_document(
+    request: Request,
     background_tasks: BackgroundTasks,
     owner_id: Annotated[str, Depends(get_owner_id)],
-    file: Annotated[UploadFile, File(description="PDF or Markdown file, max 25 MB")],
-    mode: Annotated[str, Form(description="upload_and_analyze | upload_and_queue")],
-    name: Annotated[str | None, Form()] = None,
 ):
-    """Upload a PDF or Markdown file. document_id in response is the user-scoped filename."""
-    if mode not in ("upload_and_analyze", "upload_and_queue"):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail={"error": "mode must be upload_and_analyze or upload_and_queue"},
-        )
-    filename = (name or file.filename or "").strip()
-    if not filename:
+    """Upload a PDF or Markdown file (multipart/form-data: file, mode, optional name). document_id
+    in response is the user-scoped filename. The body is streamed: the size limit and format are
+    checked as bytes arrive and the file goes to S3 part by part, never whole in memory."""
+    try:
+        form = StreamingForm(request, upload_service.MAX_SIZE_BYTES + MAX_FORM_OVERHEAD_BYTES)
+        doc, mode = await _stream_upload(owner_id, form)
+    except ValueError as e:
+        raise _bad_request(str(e)) from e
+    except ClientError as e:
+        raise _storage_error(e) from e
+    await _start_processing(background_tasks, owner_id, doc, mode)
+    return _doc_to_response(doc)
+
+
+async def _read_bulk_entry(form: StreamingForm, file, bulk: upload_service.BulkUpload) -> None:
+    """Pass one file part to the bulk upload: a document is read into memory (at most 25 MB), an
+    archive is spooled to a temporary file (it is read by member, which needs seeking)."""
+    filename = (file.filename or "").strip()
+    if upload_service.is_archive(filename):
+        # Small archives stay in memory; larger ones roll over to local disk.
+        with tempfile.SpooledTemporaryFile(max_size=upload_service.MAX_SIZE_BYTES) as spool:
+            while chunk := await form.read():
+                spool.write(chunk)
+            spool.seek(0)
+            await executors.run(executors.STORAGE, bulk.add_archive, spool, filename)
+        return
+    data = bytearray()
+    while chunk := await form.read():
+        if len(data) + len(chunk) > upload_service.MAX_SIZE_BYTES:
+            bulk.reject(
+                filename,
+                f"File exceeds 25 MB limit (more than {upload_service.MAX_SIZE_BYTES} bytes)",
+            )
+            return  # the rest of the part is skipped by next_file()
+        data += chunk
+    await executors.run(executors.STORAGE, bulk.add, filename, file.content_type, data)
+
+
+def _bulk_result(result: dict) -> dict:
+    if "document" in result:
+        return {**_doc_to_response(result["document"]), "status": result["status"]}
+    return {k: result[k] for k in ("document_id", "status", "error")}
+
+
+@router.post(
+    "/bulk",
+    openapi_extra=_BULK_FORM_SCHEMA,
+    responses={
+        200: {"description": "Per-file results (stored, rejected or failed)"},
+        400: {"description": "Missing mode or files, malformed body"},
+        401: {"description": "Missing or invalid token"},
+        411: {"description": "Content-Length missing"},
+        429: {"description": "Rate limit exceeded (weighted by body size)"},
+        503: {"description": "S3/DynamoDB unavailable, or the processing queue is full"},
+    },
+)
+async def bulk_upload_documents(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    owner_id: Annotated[str, Depends(get_owner_id)],
+):
+    """Upload many documents in one request (multipart/form-data: mode and any number of files,
+    each a PDF/Markdown file or a zip/tar archive of them; mode is best sent first, so a bad one
+    is refused before the files are stored). Each file is validated on its own and
+    reported in documents, in request order; S3 objects are written in parallel and metadata in
+    batches. Counts against the rate limit by size (one request per RATE_LIMIT_BULK_UNIT_BYTES)."""
+    if not request.headers.get("content-length", "").isdigit():
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail={"error": "Missing filename (provide file or name)"},
+            status_code=status.HTTP_411_LENGTH_REQUIRED,
+            detail={"error": "Content-Length required (bulk uploads are rate-limited by size)"},
         )
-    content_type = file.content_type
-    body = await file.read()
-    size = len(body)
-    fmt, err = upload_service.validate_upload(filename, content_type, size)
-    if err:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail={"error": err},
+    bulk = None
+    try:
+        form = StreamingForm(request, get_settings().bulk_upload_max_bytes)
+        file = await form.next_file()
+        mode = form.fields.get("mode")
+        if mode is not None or file is None:
+            _check_mode(mode)
+        if file is None:
+            raise _bad_request("Missing files")
+        if mode is not None:
+            await _check_queue(mode)
+        bulk = upload_service.BulkUpload(owner_id, mode)
+        while file is not None:
+            await _read_bulk_entry(form, file, bulk)
+            file = await form.next_file()
+        if bulk.mode is None:
+            # Sent after the files: checked now, the stored objects are deleted if it fails.
+            mode = form.fields.get("mode")
+            try:
+                _check_mode(mode)
+                await _check_queue(mode)
+            except HTTPException:
+                await executors.run(executors.STORAGE, bulk.discard)
+                raise
+            bulk.mode = mode
+        docs = await executors.run(executors.STORAGE, bulk.finish)
+    except ValueError as e:
+        raise _bad_request(str(e)) from e
+    except ClientError as e:
+        raise _storage_error(e) from e
+    finally:
+        if bulk is not None:
+            await executors.run(executors.STORAGE, bulk.close)
+    if mode == "upload_and_analyze" and not await executors.run(
+        executors.STORAGE,
+        upload_service.enqueue_processing_many,
+        owner_id,
+        [doc.filename for doc in docs],
+    ):
+        for doc in docs:
+            background_tasks.add_task(process_service.process_document, owner_id, doc.filename)
+    results = [_bulk_result(r) for r in bulk.results]
+    return {
+        "documents": results,
+        **{
+            outcome: sum(1 for r in results if r["status"] == outcome)
+            for outcome in ("stored", "rejected", "failed")
+        },
+    }
+
+
+class UploadUrlRequest(BaseModel):
+    """Request body for POST /documents/upload-url per contracts/api-contract.md."""
+
+    filename: str = Field(..., min_length=1, description="Document identifier (user-scoped)")
+    size_bytes: int = Field(..., gt=0, description="File size; the upload may not exceed it")
+    content_type: str | None = Field(None, description="application/pdf or text/markdown")
+
+
+class CompleteUploadRequest(BaseModel):
+    """Request body for POST /documents/{document_id}/complete."""
+
+    mode: Literal["upload_and_analyze", "upload_and_queue"]
+
+
+@router.post(
+    "/upload-url",
+    status_code=status.HTTP_201_CREATED,
+    responses={
+        201: {"description": "Presigned POST (url, fields) for a direct upload to S3"},
+        400: {"description": "Invalid filename or format, or size > 25 MB"},
+        401: {"description": "Missing or invalid token"},
+        429: {"description": "Rate limit exceeded"},
+    },
+)
+async def create_upload_url(
+    owner_id: Annotated[str, Depends(get_owner_id)],
+    body: UploadUrlRequest,
+):
+    """Step 1 of a direct upload: a presigned POST restricted to this user's filename, its format
+    and the declared size. Post the file to url with fields (file last), then call complete."""
+    filename = body.filename.strip()
+    try:
+        upload = await executors.run(
+            executors.STORAGE,
+            upload_service.create_upload_url,
+            owner_id,
+            filename,
+            body.content_type,
+            body.size_bytes,
         )
+    except ValueError as e:
+        raise _bad_request(str(e)) from e
+    return {
+        "document_id": filename,
+        "url": upload["url"],
+        "fields": upload["fields"],
+        "max_size_bytes": upload["max_size_bytes"],
+        "expires_at": upload["expires_at"].isoformat(),
+    }
+
+
+@router.post(
+    "/{document_id}/complete",
+    status_code=status.HTTP_201_CREATED,
+    responses={
+        201: {"description": "Document recorded (same shape as POST /documents)"},
+        400: {"description": "Uploaded object is not a valid PDF/Markdown file <= 25 MB"},
+        401: {"description": "Missing or invalid token"},
+        404: {"description": "Nothing uploaded under that filename"},
+        429: {"description": "Rate limit exceeded"},
+        503: {"description": "S3/DynamoDB unavailable, or the processing queue is full"},
+    },
+)
+async def complete_upload(
+    background_tasks: BackgroundTasks,
+    owner_id: Annotated[str, Depends(get_owner_id)],
+    document_id: str,
+    body: CompleteUploadRequest,
+):
+    """Step 2 of a direct upload: check the uploaded object, record the document and start
+    processing per mode. document_id is the filename passed to upload-url (URL-encoded)."""
+    from urllib.parse import unquote
+
+    filename = unquote(document_id)
+    await _check_queue(body.mode)
     try:
-        from io import BytesIO
-
-        doc = upload_service.upload_document(
-            owner_id=owner_id,
-            filename=filename,
-            body=BytesIO(body),
-            content_type=content_type,
-            size=size,
-            mode=mode,
+        doc = await executors.run(
+            executors.STORAGE, upload_service.complete_upload, owner_id, filename, body.mode
         )
     except ValueError as e:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, detail={"error": str(e)}
-        ) from e
+        raise _bad_request(str(e)) from e
     except ClientError as e:
-        code = e.response.get("Error", {}).get("Code", "Unknown")
-        msg = e.response.get("Error", {}).get("Message", str(e))
+        raise _storage_error(e) from e
+    if doc is None:
         raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail={
-                "error": "Storage error (check S3 bucket and DynamoDB table exist, e.g. LocalStack setup)",
-                "code": code,
-                "message": msg,
-            },
-        ) from e
-    if mode == "upload_and_analyze":
-        background_tasks.add_task(process_service.process_document, owner_id, doc.filename)
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={"error": "No uploaded file with that filename for this user"},
+        )
+    await _start_processing(background_tasks, owner_id, doc, body.mode)
     return _doc_to_response(doc)
 
 
@@ -118,7 +433,13 @@ async def list_documents(
     next_token: str | None = None,
 ):
     """List the authenticated user's documents. document_id = filename."""
-    docs, next_tok = upload_service.list_documents(owner_id, limit=limit, next_token=next_token)
+    docs, next_tok = await executors.run(
+        executors.STORAGE,
+        upload_service.list_documents,
+        owner_id,
+        limit=limit,
+        next_token=next_token,
+    )
     items = [_doc_to_response(d) for d in docs]
     out = {"documents": items}
     if next_tok:
@@ -149,10 +470,76 @@ async def delete_document(
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail={"error": "Document not found"}
         )
-    found = upload_service.delete_document(owner_id, filename)
+    found = await executors.run(
+        executors.STORAGE, upload_service.delete_document, owner_id, filename
+    )
     if not found:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail={"error": "No document with that filename for this user"},
         )
     return None
+
+
+class BulkDeleteRequest(BaseModel):
+    """Request body for DELETE /documents: exactly one of document_ids, prefix or all."""
+
+    document_ids: list[str] | None = Field(
+        None, min_length=1, max_length=MAX_DELETE_DOCUMENT_IDS, description="Filenames to delete"
+    )
+    prefix: str | None = Field(None, min_length=1, description="Delete filenames starting with it")
+    all: bool = Field(False, description="Delete every document of the user (owner purge)")
+
+
+@router.delete(
+    "",
+    responses={
+        200: {
+            "description": "Summary (JSON), or progress and done events (text/event-stream)",
+            "content": {"application/json": {}, "text/event-stream": {}},
+        },
+        400: {"description": "Not exactly one of document_ids, prefix or all"},
+        401: {"description": "Missing or invalid token"},
+        429: {"description": "Rate limit exceeded"},
+        503: {"description": "S3/DynamoDB unavailable"},
+    },
+)
+async def bulk_delete_documents(
+    request: Request,
+    owner_id: Annotated[str, Depends(get_owner_id)],
+    body: BulkDeleteRequest,
+):
+    """Delete many documents and their embeddings: the listed document_ids, those whose filename
+    starts with prefix, or all of them (owner purge). Deletes run in batches (S3 DeleteObjects,
+    batched vector and DynamoDB deletes, in parallel). Returns a summary; with Accept:
+    text/event-stream, "progress" events after each batch, then "done" with the summary. When
+    complete is false, sending the same request again resumes with the documents that are left."""
+    if sum((body.document_ids is not None, body.prefix is not None, body.all)) != 1:
+        raise _bad_request("Provide exactly one of document_ids, prefix or all")
+    events = executors.iterate(
+        executors.STORAGE,
+        upload_service.iter_bulk_delete(owner_id, body.document_ids, body.prefix),
+    )
+    if "text/event-stream" in request.headers.get("accept", ""):
+        return StreamingResponse(
+            _bulk_delete_sse(events),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+    try:
+        progress = [event async for event in events]
+    except ClientError as e:
+        raise _storage_error(e) from e
+    return progress[-1]
+
+
+async def _bulk_delete_sse(events: AsyncIterator[dict]) -> AsyncIterator[str]:
+    """Format bulk delete progress as SSE frames."""
+    try:
+        async for event in events:
+            kind = "done" if event.get("done") else "progress"
+            yield f"event: {kind}\ndata: {json.dumps(event)}\n\n"
+    except Exception as e:
+        get_logger().warning("Bulk delete failed", error=str(e))
+        error = {"error": "Bulk delete failed; send the same request again to resume"}
+        yield f"event: error\ndata: {json.dumps(error)}\n\n"
@@ -1,12 +1,18 @@
-"""POST /api/v1/rag/query: natural-language question, answer grounded in user's processed documents."""
+"""POST /api/v1/rag/query: natural-language question, answer grounded in user's processed documents.
+POST /api/v1/rag/query/stream: the same answer streamed as Server-Sent Events.
+RAG calls run on the BEDROCK executor (services.executors), not the event loop."""
 
+import json
+from collections.abc import AsyncIterator
 from typing import Annotated
 
 from fastapi import APIRouter, Depends, status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 
 from src.api.auth import get_owner_id
-from src.services import rag_service
+from src.observability.logging import get_logger
+from src.services import executors, rag_service
 
 router = APIRouter(prefix="/rag", tags=["rag"])
 
@@ -35,5 +41,52 @@ async def rag_query(
     Submit a question; return an answer grounded in the user's processed documents.
     source_document_ids are filenames that contributed chunks. Empty store returns clear no-knowledge message.
     """
-    answer, source_document_ids = rag_service.rag_query(owner_id, body.question)
+    answer, source_document_ids = await executors.run(
+        executors.BEDROCK, rag_service.rag_query, owner_id, body.question
+    )
     return {"answer": answer, "source_document_ids": source_document_ids}
+
+
+@router.post(
+    "/query/stream",
+    status_code=status.HTTP_200_OK,
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "description": "text/event-stream: token events, then done (source_document_ids)",
+            "content": {"text/event-stream": {}},
+        },
+        400: {"description": "Missing question or invalid body"},
+        401: {"description": "Missing or invalid token"},
+        429: {"description": "Rate limit exceeded"},
+    },
+)
+async def rag_query_stream(
+    owner_id: Annotated[str, Depends(get_owner_id)],
+    body: RAGQueryRequest,
+):
+    """
+    Submit a question; stream the answer as Server-Sent Events while it is generated:
+    "token" events ({"text": ...}), then one "done" event ({"source_document_ids": [...]}).
+    A failure after the stream started is sent as an "error" event ({"error": ...}).
+    """
+    return StreamingResponse(
+        _sse(
+            executors.iterate(
+                executors.BEDROCK, rag_service.rag_query_stream(owner_id, body.question)
+            )
+        ),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _sse(events: AsyncIterator[rag_service.RagEvent]) -> AsyncIterator[str]:
+    """Format RAG events as SSE frames."""
+    try:
+        async for event in events:
+            key = "text" if event.kind == "token" else "source_document_ids"
+            yield f"event: {event.kind}\ndata: {json.dumps({key: event.data})}\n\n"
+    except Exception as e:
+        get_logger().warning("RAG stream failed", error=str(e))
+        yield f"event: error\ndata: {json.dumps({'error': 'Answer generation failed'})}\n\n"
@@ -38,6 +38,24 @@ class Document(BaseModel):
         default=None,
         description="When embedding completed (status processed)",
     )
+    chunk_hashes: list[str] | None = Field(
+        default=None,
+        description="Per-chunk content hashes from the last successful processing (index = chunk_index)",
+    )
+    chunk_count: int | None = Field(
+        default=None,
+        ge=0,
+        description="Vector manifest: keys 0..chunk_count-1 may exist; None = unknown (scan on delete)",
+    )
+    vector_key_scheme: str | None = Field(
+        default=None,
+        description="Vector manifest: key format the chunk_count applies to",
+    )
+    vector_generation: int | None = Field(
+        default=None,
+        ge=0,
+        description="Vector manifest: key generation queries read; None = 0 (unsuffixed keys)",
+    )
 
     class Config:
         use_enum_values = True
@@ -0,0 +1,44 @@
+"""OpenTelemetry metrics: shared meter and cached instruments (FR-012).
+
+Instruments are no-ops until setup_telemetry installs a MeterProvider, so services can record
+unconditionally."""
+
+from collections.abc import Callable, Iterable
+from functools import lru_cache
+
+from opentelemetry import metrics
+
+METER_NAME = "document-rag-api"
+
+
+def get_meter() -> metrics.Meter:
+    """Return the service meter (proxied until a MeterProvider is configured)."""
+    return metrics.get_meter(METER_NAME)
+
+
+@lru_cache
+def counter(name: str, unit: str = "1", description: str = "") -> metrics.Counter:
+    """Return the monotonic counter with this name (created once per process)."""
+    return get_meter().create_counter(name, unit=unit, description=description)
+
+
+@lru_cache
+def histogram(name: str, unit: str = "", description: str = "") -> metrics.Histogram:
+    """Return the histogram with this name (created once per process)."""
+    return get_meter().create_histogram(name, unit=unit, description=description)
+
+
+def observable_gauge(
+    name: str,
+    read: Callable[[], Iterable[tuple[float, dict]]],
+    unit: str = "1",
+    description: str = "",
+) -> metrics.ObservableGauge:
+    """Register a gauge whose (value, attributes) observations come from read() at each export."""
+
+    def callback(options: metrics.CallbackOptions) -> Iterable[metrics.Observation]:
+        return [metrics.Observation(value, attributes) for value, attributes in read()]
+
+    return get_meter().create_observable_gauge(
+        name, callbacks=[callback], unit=unit, description=description
+    )
@@ -2,7 +2,8 @@
 
 import os
 
-from opentelemetry import trace
+from opentelemetry import metrics, trace
+from opentelemetry.sdk.metrics import MeterProvider
 from opentelemetry.sdk.resources import Resource
 from opentelemetry.sdk.trace import TracerProvider
 from opentelemetry.sdk.trace.export import BatchSpanProcessor
@@ -12,9 +13,10 @@ def setup_telemetry(
     service_name: str = "document-rag-api",
     otlp_endpoint: str | None = None,
 ) -> None:
-    """Configure OpenTelemetry tracer; OTLP export if endpoint set."""
+    """Configure OpenTelemetry tracer and meter; OTLP export if endpoint set."""
     resource = Resource.create({"service.name": service_name})
     provider = TracerProvider(resource=resource)
+    metric_readers = []
     if otlp_endpoint:
         try:
             from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
@@ -26,4 +28,14 @@ def setup_telemetry(
             provider.add_span_processor(BatchSpanProcessor(exporter))
         except Exception:
             pass
+        try:
+            from opentelemetry.exporter.otlp.proto.http.metric_exporter import (
+                OTLPMetricExporter,
+            )
+            from opentelemetry.sdk.metrics.export import PeriodicExportingMetricReader
+
+            metric_readers.append(PeriodicExportingMetricReader(OTLPMetricExporter()))
+        except Exception:
+            pass
     trace.set_tracer_provider(provider)
+    metrics.set_meter_provider(MeterProvider(resource=resource, metric_readers=metric_readers))
@@ -1,30 +1,307 @@
-"""Scheduled batch job for pending documents (upload_and_queue). Invoke daily via ECS Scheduled Task or EventBridge."""
+"""Scheduled batch job for pending documents (upload_and_queue). Invoke daily via ECS Scheduled Task or EventBridge.
 
+Pending documents are read by a scanner thread (optionally one shard of a DynamoDB parallel scan,
+so several tasks can split the table) into a bounded queue ahead of a worker pool of threads or
+processes. Each run reports throughput, failures and per-document latency percentiles and can stop
+taking new documents after a runtime budget; unfinished documents stay pending for the next run.
+
+Usage: python -m src.services.batch_process [--workers 4] [--executor thread|process]
+       [--segment 0 --total-segments 4] [--max-runtime 3600]
+       python -m src.services.batch_process --backfill-status-index
+"""
+
+import argparse
+import contextlib
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+
+from src.api.config import get_settings
 from src.models.document import ProcessingStatus
-from src.observability.logging import configure_logging
+from src.observability import metrics
+from src.observability.logging import configure_logging, get_logger
 from src.services import process_service
 from src.storage import metadata as metadata_store
+from src.storage import vectors as vectors_storage
+
+# Scanned documents buffered ahead of the workers, per worker.
+PREFETCH_PER_WORKER = 4
 
 
-def run_pending_batch(limit: int = 500) -> int:
+@dataclass
+class BatchReport:
+    """Outcome of one run_pending_batch call."""
+
+    processed: int = 0
+    failed: int = 0
+    elapsed_seconds: float = 0.0
+    stopped_early: bool = False
+    latencies: list[float] = field(default_factory=list)
+
+    @property
+    def documents_per_second(self) -> float:
+        return (
+            (self.processed + self.failed) / self.elapsed_seconds if self.elapsed_seconds else 0.0
+        )
+
+    def percentile(self, p: float) -> float:
+        """Latency percentile in seconds (nearest rank); 0 when nothing finished."""
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, max(0, round(p / 100 * len(ordered)) - 1))]
+
+    def summary(self) -> dict:
+        return {
+            "processed": self.processed,
+            "failed": self.failed,
+            "elapsed_seconds": round(self.elapsed_seconds, 3),
+            "documents_per_second": round(self.documents_per_second, 3),
+            "latency_p50_seconds": round(self.percentile(50), 3),
+            "latency_p90_seconds": round(self.percentile(90), 3),
+            "latency_p99_seconds": round(self.percentile(99), 3),
+            "stopped_early": self.stopped_early,
+        }
+
+
+def run_pending_batch(
+    limit: int = 500,
+    workers: int | None = None,
+    executor: str | None = None,
+    segment: int | None = None,
+    total_segments: int | None = None,
+    max_runtime_seconds: float | None = None,
+) -> BatchReport:
     """
-    Process all documents with status pending (upload_and_queue). Returns count processed.
+    Process documents with status pending (upload_and_queue); returns the run's BatchReport.
     Schedule this daily (or configurable) via ECS Scheduled Task or EventBridge.
+    workers / executor default to BATCH_WORKERS / BATCH_EXECUTOR. With "thread" the workers share
+    one vector writer, so their vectors are coalesced into full PutVectors batches; "process" runs
+    each document in a worker process (CPU-heavy corpora). segment / total_segments select one
+    shard of a parallel scan. After max_runtime_seconds (default BATCH_MAX_RUNTIME_SECONDS, 0 = no
+    limit) no new documents are started; started ones are finished.
     """
-    processed = 0
-    next_token = None
-    while True:
-        docs, next_token = metadata_store.list_by_status(
-            ProcessingStatus.PENDING, limit=limit, next_token=next_token
+    settings = get_settings()
+    workers = max(1, workers or settings.batch_workers)
+    executor = executor or settings.batch_executor
+    if executor not in ("thread", "process"):
+        raise ValueError(f"Unknown batch executor: {executor}")
+    if max_runtime_seconds is None:
+        max_runtime_seconds = settings.batch_max_runtime_seconds
+    deadline = time.monotonic() + max_runtime_seconds if max_runtime_seconds > 0 else None
+    report = BatchReport()
+    lock = threading.Lock()
+
+    def record(started: float, error: Exception | str | None) -> None:
+        latency = time.monotonic() - started
+        with lock:
+            report.latencies.append(latency)
+            if error is None:
+                report.processed += 1
+            else:
+                report.failed += 1
+        metrics.histogram("batch.document_seconds", unit="s").record(latency)
+
+    pending: queue.Queue = queue.Queue(maxsize=workers * PREFETCH_PER_WORKER)
+    stop = threading.Event()
+    scanner = threading.Thread(
+        target=_scan,
+        args=(pending, stop, limit, segment, total_segments),
+        name="batch-scan",
+        daemon=True,
+    )
+    start = time.monotonic()
+    writer = vectors_storage.open_writer() if executor == "thread" else None
+    pool: Executor = (
+        ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch")
+        if executor == "thread"
+        else _process_pool(workers)
+    )
+    in_flight = set()
+    scanner.start()
+    try:
+        while True:
+            if deadline is not None and time.monotonic() >= deadline:
+                report.stopped_early = True
+                break
+            try:
+                item = pending.get(timeout=1.0)
+            except queue.Empty:
+                continue
+            if isinstance(item, BaseException):
+                raise item
+            if item is None:
+                break
+            while len(in_flight) >= workers:
+                _, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            owner_id, filename = item
+            started = time.monotonic()
+            if writer is not None:
+                in_flight.add(
+                    pool.submit(_process_shared, owner_id, filename, writer, started, record)
+                )
+            else:
+                try:
+                    future = pool.submit(_process_isolated, owner_id, filename)
+                except BrokenProcessPool:
+                    # A worker process died; the pool cannot be used again.
+                    pool.shutdown(wait=False)
+                    pool = _process_pool(workers)
+                    future = pool.submit(_process_isolated, owner_id, filename)
+                future.add_done_callback(
+                    lambda f, started=started, key=item: record(started, _isolated_outcome(f, key))
+                )
+                in_flight.add(future)
+        wait(in_flight)
+    finally:
+        stop.set()
+        pool.shutdown(wait=True, cancel_futures=True)
+        if writer is not None:
+            writer.close()  # remaining coalesced batches; finishes their documents
+    report.elapsed_seconds = time.monotonic() - start
+    get_logger().info(
+        "Batch run finished",
+        segment=segment,
+        total_segments=total_segments,
+        workers=workers,
+        executor=executor,
+        **report.summary(),
+    )
+    return report
+
+
+def _scan(
+    pending: queue.Queue,
+    stop: threading.Event,
+    limit: int,
+    segment: int | None,
+    total_segments: int | None,
+) -> None:
+    """Scanner thread: page through pending documents into the queue; None marks the end and an
+    exception is handed to the consumer."""
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                pending.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    try:
+        next_token = None
+        while not stop.is_set():
+            docs, next_token = metadata_store.list_by_status(
+                ProcessingStatus.PENDING,
+                limit=limit,
+                next_token=next_token,
+                segment=segment,
+                total_segments=total_segments,
+            )
+            for doc in docs:
+                if not put((doc.owner_id, doc.filename)):
+                    return
+            if not next_token:
+                break
+        put(None)
+    except Exception as e:
+        put(e)
+
+
+def _process_shared(owner_id: str, filename: str, writer, started: float, record) -> None:
+    """Thread worker: process with the run's shared writer; record() runs once the document is
+    finished (possibly later, when its coalesced vectors are written)."""
+    # Failures are already marked on the document and reported through on_complete.
+    with contextlib.suppress(Exception):
+        process_service.process_document(
+            owner_id, filename, writer=writer, on_complete=lambda error: record(started, error)
         )
-        for doc in docs:
-            process_service.process_document(doc.owner_id, doc.filename)
-            processed += 1
-        if not next_token:
-            break
-    return processed
 
 
-if __name__ == "__main__":
+def _process_pool(workers: int) -> ProcessPoolExecutor:
+    # spawn: never fork this (threaded) process.
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def _isolated_outcome(future: Future, key: tuple[str, str]) -> str | None:
+    """Error of a _process_isolated future. When the worker process itself failed (e.g. it was
+    killed, BrokenProcessPool) the document is marked failed here instead."""
+    try:
+        return future.result()
+    except Exception as e:
+        owner_id, filename = key
+        error = f"Processing worker failed: {e!r}"
+        get_logger().warning(
+            "Processing worker failed", owner_id=owner_id, filename=filename, error=error
+        )
+        with contextlib.suppress(Exception):
+            metadata_store.update_status(
+                owner_id, filename, ProcessingStatus.FAILED, processing_error=error
+            )
+        return error
+
+
+def _process_isolated(owner_id: str, filename: str) -> str | None:
+    """Process worker: process one document with its own writer; returns the error, if any."""
+    outcome: list[Exception | None] = []
+    try:
+        process_service.process_document(owner_id, filename, on_complete=outcome.append)
+    except Exception as e:
+        return str(e)
+    error = outcome[0] if outcome else None
+    return str(error) if error is not None else None
+
+
+def main(argv: list[str] | None = None) -> None:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Process pending (upload_and_queue) documents.")
+    parser.add_argument("--workers", type=int, default=settings.batch_workers)
+    parser.add_argument(
+        "--executor", choices=("thread", "process"), default=settings.batch_executor
+    )
+    parser.add_argument("--segment", type=int, default=None, help="Parallel scan shard (0-based)")
+    parser.add_argument("--total-segments", type=int, default=None, help="Parallel scan shards")
+    parser.add_argument(
+        "--max-runtime",
+        type=float,
+        default=settings.batch_max_runtime_seconds,
+        help="Stop starting documents after this many seconds (0 = no limit)",
+    )
+    parser.add_argument("--page-size", type=int, default=500, help="Scan page size (Limit)")
+    parser.add_argument(
+        "--backfill-status-index",
+        action="store_true",
+        help="Set status_shard on items written before the status index existed, then exit",
+    )
+    args = parser.parse_args(argv)
+    if args.total_segments and not 0 <= (args.segment or 0) < args.total_segments:
+        parser.error("--segment must be in [0, --total-segments)")
     configure_logging()
-    run_pending_batch()
+    if args.backfill_status_index:
+        updated = metadata_store.backfill_status_index()
+        get_logger().info("Status index backfilled", items_updated=updated)
+        return
+    run_pending_batch(
+        limit=args.page_size,
+        workers=args.workers,
+        executor=args.executor,
+        segment=args.segment,
+        total_segments=args.total_segments,
+        max_runtime_seconds=args.max_runtime,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+"""Chunking engine: split streamed document text into embedding-sized chunks.
+
+Strategies are pluggable per (strategy name, DocumentFormat) via register_chunker; CHUNKING_STRATEGY
+selects one. "structured" (default) packs whole Markdown sections/paragraphs or PDF paragraphs up to
+CHUNK_TOKEN_BUDGET estimated tokens and only splits a segment that is larger than the budget (at
+sentence, then word boundaries). "fixed" is the original 4000-character window with 200 characters
+of overlap. All chunkers consume text pieces incrementally (see extract_service.iter_text).
+"""
+
+import re
+from collections.abc import Callable, Iterable, Iterator
+from typing import Protocol
+
+from src.api.config import get_settings
+from src.models.document import DocumentFormat
+
+# Fixed-window strategy (Titan accepts up to 8192 tokens; ~4000 chars is safe per chunk).
+CHUNK_SIZE = 4000
+CHUNK_OVERLAP = 200
+
+# Word-or-punctuation pieces: a whitespace-insensitive token estimate.
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+_PARAGRAPH_BREAK_RE = re.compile(r"\n[ \t]*\n")
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?;:])\s+")
+_MD_HEADING_RE = re.compile(r"^ {0,3}(#{1,6})\s")
+_MD_FENCE_RE = re.compile(r"^ {0,3}(```|~~~)", re.MULTILINE)
+# A segment without a paragraph break is force-split once the buffer reaches this many budgets.
+_MAX_BUFFERED_BUDGETS = 4
+
+
+def _force_cut(text: str, limit: int) -> int:
+    """Where to cut text that has no paragraph break within limit characters: after its last
+    line break, else sentence end, else space before limit (limit itself when there is none)."""
+    cut = text.rfind("\n", 0, limit)
+    if cut <= 0:
+        ends = [m.end() for m in _SENTENCE_END_RE.finditer(text, 0, limit)]
+        cut = ends[-1] if ends else text.rfind(" ", 0, limit)
+    return cut if cut > 0 else limit
+
+
+class Chunker(Protocol):
+    """Turns a stream of text pieces into chunks (pieces may split anywhere)."""
+
+    def chunks(self, pieces: Iterable[str]) -> Iterator[str]: ...
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimated model tokens for text (words and punctuation; whitespace is free)."""
+    return len(_TOKEN_RE.findall(text))
+
+
+class FixedWindowChunker:
+    """CHUNK_SIZE-character windows with CHUNK_OVERLAP overlap over the stripped text."""
+
+    def chunks(self, pieces: Iterable[str]) -> Iterator[str]:
+        buf = ""
+        for piece in pieces:
+            if not buf:
+                piece = piece.lstrip()
+                if not piece:
+                    continue
+            buf += piece
+            # A window is final only once non-whitespace text follows it (trailing whitespace is
+            # stripped, so it may not count towards the text length).
+            while len(buf) > CHUNK_SIZE and not buf[CHUNK_SIZE:].isspace():
+                chunk = buf[:CHUNK_SIZE]
+                if chunk.strip():
+                    yield chunk
+                buf = buf[CHUNK_SIZE - CHUNK_OVERLAP :]
+        text = buf.rstrip()
+        start = 0
+        while start < len(text):
+            end = min(start + CHUNK_SIZE, len(text))
+            chunk = text[start:end]
+            if chunk.strip():
+                yield chunk
+            start = end - CHUNK_OVERLAP if end < len(text) else len(text)
+
+
+class _PackingChunker:
+    """Greedy packer: segments are joined with a blank line until the token budget is reached.
+    Subclasses define segmentation and preferred break points."""
+
+    def __init__(self, token_budget: int):
+        self.token_budget = max(1, token_budget)
+
+    def chunks(self, pieces: Iterable[str]) -> Iterator[str]:
+        parts: list[str] = []
+        tokens = 0
+        for segment in self._segments(pieces):
+            seg_tokens = estimate_tokens(segment)
+            if seg_tokens > self.token_budget:
+                if parts:
+                    yield "\n\n".join(parts)
+                    parts, tokens = [], 0
+                yield from self._split_oversized(segment)
+                continue
+            if parts and (
+                tokens + seg_tokens > self.token_budget
+                or (self._prefers_break(segment) and tokens >= self.token_budget // 2)
+            ):
+                yield "\n\n".join(parts)
+                parts, tokens = [], 0
+            parts.append(segment)
+            tokens += seg_tokens
+        if parts:
+            yield "\n\n".join(parts)
+
+    def _segments(self, pieces: Iterable[str]) -> Iterator[str]:
+        """Yield normalized, non-empty paragraphs as soon as their closing break has arrived."""
+        buf = ""
+        limit = self.token_budget * _MAX_BUFFERED_BUDGETS * 8  # generous chars per token
+        for piece in pieces:
+            buf += piece
+            *complete, buf = self._split_paragraphs(buf)
+            for paragraph in complete:
+                yield from self._normalize(paragraph)
+            if len(buf) > limit:
+                cut = _force_cut(buf, limit)
+                yield from self._normalize(buf[:cut])
+                buf = buf[cut:]
+        yield from self._normalize(buf)
+
+    def _split_paragraphs(self, text: str) -> list[str]:
+        return _PARAGRAPH_BREAK_RE.split(text)
+
+    def _normalize(self, paragraph: str) -> Iterator[str]:
+        paragraph = paragraph.strip()
+        if paragraph:
+            yield paragraph
+
+    def _prefers_break(self, segment: str) -> bool:
+        return False
+
+    def _split_oversized(self, segment: str) -> Iterator[str]:
+        """Pack sentences up to the budget; hard-split sentences that alone exceed it by words."""
+        parts: list[str] = []
+        tokens = 0
+        for sentence in _SENTENCE_END_RE.split(segment):
+            for piece in self._split_words(sentence):
+                piece_tokens = estimate_tokens(piece)
+                if parts and tokens + piece_tokens > self.token_budget:
+                    yield " ".join(parts)
+                    parts, tokens = [], 0
+                parts.append(piece)
+                tokens += piece_tokens
+        if parts:
+            yield " ".join(parts)
+
+    def _split_words(self, sentence: str) -> Iterator[str]:
+        if estimate_tokens(sentence) <= self.token_budget:
+            yield sentence
+            return
+        words = sentence.split()
+        start = 0
+        while start < len(words):
+            end, tokens = start, 0
+            while end < len(words):
+                word_tokens = estimate_tokens(words[end])
+                if end > start and tokens + word_tokens > self.token_budget:
+                    break
+                tokens += word_tokens
+                end += 1
+            yield " ".join(words[start:end])
+            start = end
+
+
+class MarkdownChunker(_PackingChunker):
+    """Paragraph packing that keeps fenced code blocks whole and prefers to start chunks at
+    headings (a heading begins a new chunk once the current one is at least half full)."""
+
+    def _split_paragraphs(self, text: str) -> list[str]:
+        # Blank lines inside an open code fence are not paragraph breaks.
+        out: list[str] = []
+        for block in _PARAGRAPH_BREAK_RE.split(text):
+            if out and len(_MD_FENCE_RE.findall(out[-1])) % 2 == 1:
+                out[-1] += "\n\n" + block
+            else:
+                out.append(block)
+        return out
+
+    def _segments(self, pieces: Iterable[str]) -> Iterator[str]:
+        """Attach heading-only paragraphs to the paragraph that follows them."""
+        heading = None
+        for segment in super()._segments(pieces):
+            if heading is not None:
+                segment = f"{heading}\n\n{segment}"
+                heading = None
+            if all(_MD_HEADING_RE.match(line) for line in segment.split("\n") if line):
+                heading = segment
+                continue
+            yield segment
+        if heading is not None:
+            yield heading
+
+    def _normalize(self, paragraph: str) -> Iterator[str]:
+        paragraph = paragraph.strip("\n").rstrip()
+        if paragraph.strip():
+            yield paragraph
+
+    def _prefers_break(self, segment: str) -> bool:
+        return bool(_MD_HEADING_RE.match(segment))
+
+
+class PdfChunker(_PackingChunker):
+    """Paragraph packing for extracted PDF text: collapses runs of spaces and blank lines that
+    pypdf emits, and packs paragraphs across page boundaries."""
+
+    _SPACES_RE = re.compile(r"[ \t\f\v\u00a0]+")
+
+    def _normalize(self, paragraph: str) -> Iterator[str]:
+        lines = (self._SPACES_RE.sub(" ", line).strip() for line in paragraph.splitlines())
+        paragraph = "\n".join(line for line in lines if line)
+        if paragraph:
+            yield paragraph
+
+
+_REGISTRY: dict[tuple[str, DocumentFormat], Callable[[], Chunker]] = {}
+
+
+def register_chunker(strategy: str, format: DocumentFormat, factory: Callable[[], Chunker]) -> None:
+    """Register (or replace) the chunker factory for a strategy name and document format."""
+    _REGISTRY[(strategy, DocumentFormat(format))] = factory
+
+
+def get_chunker(format: DocumentFormat, strategy: str | None = None) -> Chunker:
+    """Chunker for format under strategy (default CHUNKING_STRATEGY). Raises ValueError if unknown."""
+    settings = get_settings()
+    name = strategy or settings.chunking_strategy
+    factory = _REGISTRY.get((name, DocumentFormat(format)))
+    if factory is None:
+        raise ValueError(f"No chunker registered for strategy {name!r} and format {format}")
+    return factory()
+
+
+def chunk_report(chunks: Iterable[str]) -> dict[str, float]:
+    """Chunk count, total/mean/max UTF-8 bytes per chunk and estimated tokens for a chunk stream."""
+    count = total = largest = tokens = 0
+    for chunk in chunks:
+        size = len(chunk.encode("utf-8"))
+        count += 1
+        total += size
+        largest = max(largest, size)
+        tokens += estimate_tokens(chunk)
+    return {
+        "chunks": count,
+        "total_bytes": total,
+        "mean_bytes_per_chunk": total / count if count else 0.0,
+        "max_bytes_per_chunk": largest,
+        "estimated_tokens": tokens,
+    }
+
+
+for _fmt in DocumentFormat:
+    register_chunker("fixed", _fmt, FixedWindowChunker)
+register_chunker(
+    "structured",
+    DocumentFormat.MARKDOWN,
+    lambda: MarkdownChunker(get_settings().chunk_token_budget),
+)
+register_chunker(
+    "structured",
+    DocumentFormat.PDF,
+    lambda: PdfChunker(get_settings().chunk_token_budget),
+)
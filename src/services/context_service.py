@@ -0,0 +1,129 @@
+"""RAG context assembly: merge adjacent chunks, drop repeated overlap, pack into a token budget.
+
+Retrieved chunks of one document with consecutive chunk indices are merged into one passage and
+text repeated at their boundary (the fixed chunker's CHUNK_OVERLAP) is kept once. Passages are
+ordered by relevance (their best chunk score) and added while they fit RAG_CONTEXT_TOKEN_BUDGET
+estimated tokens (chunk_service.estimate_tokens); a merged passage that does not fit is retried
+chunk by chunk. The most relevant chunk is always included.
+"""
+
+from dataclasses import dataclass, field
+
+from src.services.chunk_service import CHUNK_OVERLAP, estimate_tokens
+from src.storage.vectors import RetrievedChunk
+
+# Passages are joined with this separator in the prompt.
+SEPARATOR = "\n\n---\n\n"
+# Shorter common prefix/suffix runs are not treated as overlap (coincidental matches).
+MIN_OVERLAP = 16
+
+
+@dataclass(frozen=True)
+class PackedContext:
+    """Prompt context built from retrieved chunks, with what went into it."""
+
+    text: str
+    source_document_ids: list[str]
+    tokens: int
+    chunks_retrieved: int
+    chunks_used: int
+    passages: int
+
+
+@dataclass
+class _Passage:
+    """Consecutive chunks of one document (ordered by chunk_index)."""
+
+    document_filename: str
+    chunks: list[RetrievedChunk] = field(default_factory=list)
+
+    @property
+    def score(self) -> float:
+        return max(c.score for c in self.chunks)
+
+    @property
+    def text(self) -> str:
+        text = self.chunks[0].text
+        for chunk in self.chunks[1:]:
+            rest = strip_overlap(text, chunk.text)
+            text += rest if len(rest) < len(chunk.text) else f"\n\n{chunk.text}"
+        return text.strip()
+
+
+def strip_overlap(previous: str, following: str, max_overlap: int = CHUNK_OVERLAP) -> str:
+    """following without its longest prefix (MIN_OVERLAP..max_overlap characters) that repeats
+    the end of previous; following itself when there is none."""
+    for size in range(min(max_overlap, len(previous), len(following)), MIN_OVERLAP - 1, -1):
+        if previous.endswith(following[:size]):
+            return following[size:]
+    return following
+
+
+def pack_context(chunks: list[RetrievedChunk], token_budget: int) -> PackedContext:
+    """Build the prompt context from chunks (any order) within token_budget estimated tokens
+    (0 = unlimited). source_document_ids lists the documents whose text was included."""
+    passages = _passages(chunks)
+    budget = token_budget if token_budget > 0 else None
+    separator_tokens = estimate_tokens(SEPARATOR)
+    parts: list[tuple[str, _Passage]] = []
+    tokens = 0
+    for passage in passages:
+        candidates = [passage]
+        if len(passage.chunks) > 1:
+            ordered = sorted(passage.chunks, key=lambda c: c.score, reverse=True)
+            candidates += [_Passage(passage.document_filename, [c]) for c in ordered]
+        for candidate in candidates:
+            text = candidate.text
+            cost = estimate_tokens(text) + (separator_tokens if parts else 0)
+            # Only the most relevant chunk on its own may exceed the budget.
+            over = budget is not None and tokens + cost > budget
+            if over and (parts or len(candidate.chunks) > 1):
+                continue
+            parts.append((text, candidate))
+            tokens += cost
+            if candidate is passage:
+                break
+    sources = sorted({p.document_filename for _, p in parts if p.document_filename})
+    return PackedContext(
+        text=SEPARATOR.join(text for text, _ in parts),
+        source_document_ids=sources,
+        tokens=tokens,
+        chunks_retrieved=len(chunks),
+        chunks_used=sum(len(p.chunks) for _, p in parts),
+        passages=len(parts),
+    )
+
+
+def _passages(chunks: list[RetrievedChunk]) -> list[_Passage]:
+    """Unique non-empty chunks grouped into runs of consecutive chunk indices per document,
+    most relevant first."""
+    unique: dict[tuple, RetrievedChunk] = {}
+    for chunk in chunks:
+        if not chunk.text.strip():
+            continue
+        key = (
+            chunk.document_filename,
+            chunk.chunk_index if chunk.chunk_index is not None else chunk.text,
+        )
+        if key not in unique or chunk.score > unique[key].score:
+            unique[key] = chunk
+    passages: list[_Passage] = []
+    indexed = sorted(
+        (c for c in unique.values() if c.chunk_index is not None),
+        key=lambda c: (c.document_filename, c.chunk_index),
+    )
+    for chunk in indexed:
+        last = passages[-1] if passages else None
+        if (
+            last is not None
+            and last.document_filename == chunk.document_filename
+            and last.chunks[-1].chunk_index == chunk.chunk_index - 1
+        ):
+            last.chunks.append(chunk)
+        else:
+            passages.append(_Passage(chunk.document_filename, [chunk]))
+    passages += [
+        _Passage(c.document_filename, [c]) for c in unique.values() if c.chunk_index is None
+    ]
+    passages.sort(key=lambda p: p.score, reverse=True)
+    return passages
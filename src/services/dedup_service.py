@@ -0,0 +1,64 @@
+"""Near-duplicate chunk detection (SimHash over word 3-shingles) against the owner's fingerprint index.
+
+Legal corpora repeat boilerplate (definitions, signature blocks, standard clauses) across an owner's
+documents. Chunks whose fingerprint is within DEDUP_MAX_HAMMING bits of an already stored chunk
+reuse that chunk's embedding instead of calling Bedrock.
+"""
+
+import hashlib
+import re
+
+from src.api.config import get_settings
+from src.storage.fingerprints import FingerprintMatch, get_fingerprint_index
+
+_WORD_RE = re.compile(r"\w+")
+SHINGLE_WORDS = 3
+
+
+def _feature_hash(feature: str) -> int:
+    return int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def simhash(text: str) -> int:
+    """64-bit SimHash of text: each bit is set when most distinct word 3-shingles have it set."""
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < SHINGLE_WORDS:
+        shingles = {" ".join(words)}
+    else:
+        shingles = {
+            " ".join(words[i : i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)
+        }
+    # Bit-sliced counters: counters[k] holds bit k of the 64 per-position counts, so adding a
+    # feature hash costs O(log n) big-int operations instead of 64 per-bit increments.
+    counters: list[int] = []
+    for feature in shingles:
+        carry = _feature_hash(feature)
+        for k in range(len(counters)):
+            counters[k], carry = counters[k] ^ carry, counters[k] & carry
+            if not carry:
+                break
+        if carry:
+            counters.append(carry)
+    half = len(shingles) // 2
+    fingerprint = 0
+    for bit in range(64):
+        count = sum(((c >> bit) & 1) << k for k, c in enumerate(counters))
+        if count > half:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def find_near_duplicates(
+    owner_id: str, texts: list[str]
+) -> tuple[list[int], list[FingerprintMatch | None]]:
+    """
+    Fingerprint texts and look each one up in the owner's index.
+    Returns (fingerprints, matches); matches[i] is None when text i has no near-duplicate or dedup
+    is disabled (DEDUP_ENABLED / FINGERPRINT_INDEX_PATH).
+    """
+    fingerprints = [simhash(t) for t in texts]
+    index = get_fingerprint_index()
+    if index is None:
+        return fingerprints, [None] * len(texts)
+    max_distance = get_settings().dedup_max_hamming
+    return fingerprints, [index.find(owner_id, fp, max_distance) for fp in fingerprints]
@@ -1,27 +1,51 @@
-"""Bedrock embedding invocation: Titan Text Embeddings for document chunks."""
+"""Bedrock embedding invocation: Titan Text Embeddings for document chunks.
+
+Embeddings are packed float32 arrays (array("f"), 4 bytes per dimension) from the Bedrock response
+through the cache and vector storage; Python float lists are only built for the boto3 payload.
+"""
 
 import json
+import random
+import time
+from array import array
+from collections.abc import Callable
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+
+from botocore.exceptions import ClientError
 
 from src.api.config import get_settings
-from src.storage.vectors import get_bedrock_client
+from src.storage import clients
+from src.storage.embedding_cache import cache_key, get_embedding_cache
+from src.storage.rag_cache import get_question_cache, normalize_question
 
 # Default Titan Text Embeddings V2 model; config can override via BEDROCK_MODEL_ID.
 DEFAULT_EMBEDDING_MODEL = "amazon.titan-embed-text-v2:0"
 # Dimension must match the vector index; 1024 is Titan V2 default.
 DEFAULT_DIMENSIONS = 1024
 
+# Bedrock error codes worth retrying (throttling / transient capacity); anything else fails fast.
+RETRYABLE_ERROR_CODES = frozenset(
+    {
+        "ThrottlingException",
+        "TooManyRequestsException",
+        "ServiceUnavailableException",
+        "ModelNotReadyException",
+    }
+)
+EMBED_MAX_ATTEMPTS = 6
+EMBED_BACKOFF_BASE_SECONDS = 0.25
+EMBED_BACKOFF_MAX_SECONDS = 8.0
 
-def embed_text(text: str) -> list[float]:
-    """
-    Invoke Bedrock to embed a single text string. Returns a list of floats (dimension from model).
-    Uses Titan Text Embeddings V2 by default; request body: inputText; optional dimensions.
-    """
-    if not text or not text.strip():
-        raise ValueError("Text to embed must be non-empty")
-    settings = get_settings()
-    model_id = settings.bedrock_model_id or DEFAULT_EMBEDDING_MODEL
-    client = get_bedrock_client()
-    body = json.dumps({"inputText": text.strip(), "dimensions": DEFAULT_DIMENSIONS})
+
+def get_bedrock_client():
+    """Shared Bedrock runtime client for embeddings: without botocore retries, so the attempts of
+    _invoke_with_retry are the only ones."""
+    return clients.get_client(clients.BEDROCK_EMBEDDINGS)
+
+
+def _invoke_embedding(client, model_id: str, text: str) -> array:
+    """Single InvokeModel call for one (already stripped) text."""
+    body = json.dumps({"inputText": text, "dimensions": DEFAULT_DIMENSIONS})
     response = client.invoke_model(
         modelId=model_id,
         contentType="application/json",
@@ -32,4 +56,151 @@ def embed_text(text: str) -> list[float]:
     embedding = response_body.get("embedding")
     if not embedding:
         raise ValueError("Bedrock response missing 'embedding' field")
-    return list(embedding)
+    return array("f", embedding)
+
+
+def _invoke_with_retry(client, model_id: str, text: str) -> array:
+    """Invoke embedding; retry throttling errors with exponential backoff and full jitter."""
+    attempt = 0
+    while True:
+        try:
+            return _invoke_embedding(client, model_id, text)
+        except ClientError as e:
+            code = e.response.get("Error", {}).get("Code", "")
+            attempt += 1
+            if code not in RETRYABLE_ERROR_CODES or attempt >= EMBED_MAX_ATTEMPTS:
+                raise
+            cap = min(EMBED_BACKOFF_MAX_SECONDS, EMBED_BACKOFF_BASE_SECONDS * 2 ** (attempt - 1))
+            time.sleep(random.uniform(0, cap))
+
+
+def _model_id() -> str:
+    return get_settings().bedrock_model_id or DEFAULT_EMBEDDING_MODEL
+
+
+def embed_text(text: str) -> array:
+    """
+    Invoke Bedrock to embed a single text string. Returns a float32 array (dimension from model).
+    Uses Titan Text Embeddings V2 by default; request body: inputText; optional dimensions.
+    Throttling errors are retried with jittered backoff; results are served from the embedding
+    cache when the same (model, dimensions, text) was embedded before.
+    """
+    if not text or not text.strip():
+        raise ValueError("Text to embed must be non-empty")
+    model_id = _model_id()
+    text = text.strip()
+    cache = get_embedding_cache()
+    key = cache_key(model_id, DEFAULT_DIMENSIONS, text)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+    embedding = _invoke_with_retry(get_bedrock_client(), model_id, text)
+    cache.put(key, embedding)
+    return embedding
+
+
+def embed_question(question: str) -> array:
+    """
+    Embed a RAG question in its normalized form (normalize_question), served from the question
+    cache so rephrasings that differ only in case or whitespace share one Bedrock call. Questions
+    bypass the chunk embedding cache (and its unbounded disk tier): the bounded question cache is
+    their only copy.
+    """
+    normalized = normalize_question(question)
+    if not normalized:
+        raise ValueError("Text to embed must be non-empty")
+    model_id = _model_id()
+    cache = get_question_cache()
+    key = cache_key(model_id, DEFAULT_DIMENSIONS, normalized)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+    embedding = _invoke_with_retry(get_bedrock_client(), model_id, normalized)
+    cache.put(key, embedding)
+    return embedding
+
+
+def embed_texts(
+    texts: list[str],
+    max_concurrency: int | None = None,
+    on_embedded: Callable[[list[tuple[int, array]]], None] | None = None,
+) -> list[array]:
+    """
+    Embed many texts with at most max_concurrency Bedrock calls in flight (default from
+    EMBEDDING_MAX_CONCURRENCY). Results are returned in input order. All-or-nothing: the first
+    failure (after throttling retries) cancels the remaining work and is raised, so callers never
+    see a partial result. Cached embeddings are reused and only misses are sent to Bedrock.
+    on_embedded((index, embedding) pairs) receives the embeddings that were obtained, also when
+    the call then fails, so callers can checkpoint partial progress; the cache keeps them too.
+    """
+    if any(not t or not t.strip() for t in texts):
+        raise ValueError("Text to embed must be non-empty")
+    if not texts:
+        return []
+    concurrency = max_concurrency or get_settings().embedding_max_concurrency
+    model_id = _model_id()
+    cache = get_embedding_cache()
+    stripped = [t.strip() for t in texts]
+    keys = [cache_key(model_id, DEFAULT_DIMENSIONS, t) for t in stripped]
+    results: dict[str, array] = {}
+    # Identical chunks within a document are embedded once.
+    pending: dict[str, str] = {}
+    for key, text in zip(keys, stripped, strict=True):
+        if key in results or key in pending:
+            continue
+        cached = cache.get(key)
+        if cached is not None:
+            results[key] = cached
+        else:
+            pending[key] = text
+    try:
+        if pending:
+            client = get_bedrock_client()  # boto3 clients are thread-safe; share one across workers
+            embeddings = _embed_uncached(client, model_id, list(pending.values()), concurrency)
+            for key, embedding in zip(pending, embeddings, strict=True):
+                cache.put(key, embedding)
+                results[key] = embedding
+    except _PartialEmbeddingError as e:
+        for key, embedding in zip(pending, e.embeddings, strict=True):
+            if embedding is not None:
+                cache.put(key, embedding)
+                results[key] = embedding
+        raise e.__cause__ from None
+    finally:
+        if on_embedded is not None:
+            on_embedded([(i, results[key]) for i, key in enumerate(keys) if key in results])
+    return [results[key] for key in keys]
+
+
+class _PartialEmbeddingError(Exception):
+    """_embed_uncached failed; embeddings holds the ones that succeeded (None elsewhere)."""
+
+    def __init__(self, embeddings: list[array | None]):
+        super().__init__()
+        self.embeddings = embeddings
+
+
+def _embed_uncached(client, model_id: str, texts: list[str], concurrency: int) -> list[array]:
+    """Invoke Bedrock for each text with bounded concurrency; ordered. On the first failure the
+    remaining work is dropped and _PartialEmbeddingError (caused by the failure) is raised."""
+    if concurrency <= 1 or len(texts) == 1:
+        done: list[array | None] = []
+        for t in texts:
+            try:
+                done.append(_invoke_with_retry(client, model_id, t))
+            except Exception as e:
+                raise _PartialEmbeddingError(done + [None] * (len(texts) - len(done))) from e
+        return done
+    pool = ThreadPoolExecutor(max_workers=min(concurrency, len(texts)), thread_name_prefix="embed")
+    try:
+        futures = [pool.submit(_invoke_with_retry, client, model_id, t) for t in texts]
+        wait(futures, return_when=FIRST_EXCEPTION)
+    finally:
+        # On failure, drop queued chunks; calls already running still finish and are kept.
+        pool.shutdown(wait=True, cancel_futures=True)
+    failed = next((f for f in futures if not f.cancelled() and f.exception() is not None), None)
+    if failed is not None:
+        raise _PartialEmbeddingError(
+            [None if f.cancelled() or f.exception() else f.result() for f in futures]
+        ) from failed.exception()
+    return [f.result() for f in futures]
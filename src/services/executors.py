@@ -0,0 +1,103 @@
+"""Bounded executors that keep blocking AWS calls off the API event loop.
+
+The service layer is synchronous (boto3). Route handlers are async, so they run service calls
+through run() / iterate() on a dedicated thread pool per backend instead of calling them inline:
+BEDROCK for RAG answers (embedding, retrieval and Claude generation) and STORAGE for document
+uploads, listings and deletes (S3, DynamoDB, vector store, job queue). Pools are sized
+independently (API_BEDROCK_WORKERS, API_STORAGE_WORKERS), so slow answers cannot starve uploads
+and neither can occupy the event loop; a size of 0 runs calls inline on the loop (the previous,
+blocking behaviour). Queue wait is recorded as executors.queue_seconds and busy workers are
+exported as the executors.in_flight gauge, both by backend.
+"""
+
+import asyncio
+import contextvars
+import functools
+import threading
+import time
+from collections.abc import AsyncIterator, Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from src.api.config import get_settings
+from src.observability import metrics
+
+BEDROCK = "bedrock"
+STORAGE = "storage"
+
+_pools: dict[str, ThreadPoolExecutor | None] = {}
+_in_flight: dict[str, int] = {}
+_lock = threading.Lock()
+_gauge = None
+
+
+def _workers(backend: str) -> int:
+    settings = get_settings()
+    if backend == BEDROCK:
+        return settings.api_bedrock_workers
+    if backend == STORAGE:
+        return settings.api_storage_workers
+    raise ValueError(f"Unknown executor backend: {backend}")
+
+
+def get_executor(backend: str) -> ThreadPoolExecutor | None:
+    """Process-wide pool for backend (BEDROCK | STORAGE); None when its size is 0 (inline)."""
+    global _gauge
+    if backend not in _pools:
+        with _lock:
+            if backend not in _pools:
+                workers = _workers(backend)
+                _pools[backend] = (
+                    ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"api-{backend}")
+                    if workers > 0
+                    else None
+                )
+                _in_flight[backend] = 0
+                if _gauge is None:
+                    _gauge = metrics.observable_gauge(
+                        "executors.in_flight",
+                        lambda: [(n, {"backend": b}) for b, n in list(_in_flight.items())],
+                    )
+    return _pools[backend]
+
+
+async def run(backend: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Await fn(*args, **kwargs) on backend's pool (context variables are carried over)."""
+    pool = get_executor(backend)
+    call = functools.partial(contextvars.copy_context().run, fn, *args, **kwargs)
+    if pool is None:
+        return call()
+    queued = time.perf_counter()
+
+    def tracked() -> Any:
+        metrics.histogram("executors.queue_seconds", unit="s").record(
+            time.perf_counter() - queued, {"backend": backend}
+        )
+        with _lock:
+            _in_flight[backend] += 1
+        try:
+            return call()
+        finally:
+            with _lock:
+                _in_flight[backend] -= 1
+
+    return await asyncio.get_running_loop().run_in_executor(pool, tracked)
+
+
+async def iterate(backend: str, iterator: Iterator) -> AsyncIterator:
+    """Async iteration over a blocking iterator, each next() on backend's pool."""
+    done = object()
+    while True:
+        item = await run(backend, next, iterator, done)
+        if item is done:
+            return
+        yield item
+
+
+def shutdown() -> None:
+    """Stop the pools after running calls finish (API shutdown); they are recreated on demand."""
+    with _lock:
+        pools = [p for p in _pools.values() if p is not None]
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown(wait=True)
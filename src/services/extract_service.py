@@ -1,11 +1,38 @@
-"""Text extraction from PDF and Markdown for embedding. PDF via pypdf, Markdown as UTF-8 text."""
+"""Text extraction from PDF and Markdown for embedding. PDF via pypdf, Markdown as UTF-8 text.
 
+iter_text streams text piece by piece (one PDF page or one Markdown read block at a time) so the
+pipeline never holds the whole extracted text; extract_text is the joined, in-memory form.
+
+PDFs backed by a file on disk are extracted in a per-document process pool (EXTRACT_POOL_SIZE
+workers, pages split into PAGES_PER_TASK ranges, reassembled in order) so CPU-bound pypdf work
+never runs in the API process. Workers run under an address-space ceiling
+(EXTRACT_MEMORY_LIMIT_MB) and the document fails with TimeoutError once waiting on workers exceeds
+EXTRACT_TIMEOUT_SECONDS; the pool is then terminated, killing any wedged worker.
+"""
+
+import codecs
+import multiprocessing
+import multiprocessing.pool
+import os
+import time
+from collections import deque
+from collections.abc import Iterator
+from functools import lru_cache
 from io import BytesIO
+from typing import BinaryIO
 
 from pypdf import PdfReader
 
+from src.api.config import get_settings
 from src.models.document import DocumentFormat
 
+# Bytes read per step when streaming Markdown.
+MARKDOWN_READ_SIZE = 64 * 1024
+# Separator between non-empty PDF pages (matches the historical joined output).
+PAGE_SEPARATOR = "\n\n"
+# Pages extracted per worker task when a PDF is split across the pool.
+PAGES_PER_TASK = 16
+
 
 def extract_text(content: bytes, format: DocumentFormat) -> str:
     """
@@ -13,24 +40,141 @@ def extract_text(content: bytes, format: DocumentFormat) -> str:
     PDF: uses pypdf to extract text from each page.
     Markdown: decoded as UTF-8 (raw text; embedding model accepts it).
     """
+    return "".join(iter_text(BytesIO(content), format))
+
+
+def iter_text(source: BinaryIO, format: DocumentFormat) -> Iterator[str]:
+    """
+    Yield the document's text in order; "".join() of the pieces equals extract_text().
+    source must be seekable for PDF (e.g. a spooled temporary file).
+    """
     if format == DocumentFormat.PDF:
-        return _extract_pdf(content)
+        return _iter_pdf(source)
     if format == DocumentFormat.MARKDOWN:
-        return _extract_markdown(content)
+        return _iter_markdown(source)
     raise ValueError(f"Unsupported format for extraction: {format}")
 
 
-def _extract_pdf(content: bytes) -> str:
-    """Extract text from PDF bytes using pypdf."""
-    reader = PdfReader(BytesIO(content))
-    parts = []
-    for page in reader.pages:
-        text = page.extract_text()
-        if text:
-            parts.append(text)
-    return "\n\n".join(parts) if parts else ""
+def _iter_pdf(source: BinaryIO) -> Iterator[str]:
+    """Use the process pool when enabled and source is a file on disk; else extract in-process."""
+    path = getattr(source, "name", None)
+    if get_settings().extract_pool_size > 0 and isinstance(path, str) and os.path.isfile(path):
+        source.flush()
+        return _iter_pdf_pooled(path)
+    return _join_pages(_iter_pdf_pages(PdfReader(source), 0, None))
+
+
+def _iter_pdf_pages(reader: PdfReader, start: int, stop: int | None) -> Iterator[str]:
+    """Yield the text of pages[start:stop] (empty string for pages without text)."""
+    pages = reader.pages
+    for i in range(start, len(pages) if stop is None else stop):
+        text = pages[i].extract_text() or ""
+        # Drop pypdf's parsed-object cache so memory stays per page instead of per document.
+        reader.resolved_objects.clear()
+        yield text
+
+
+def _join_pages(pages: Iterator[str]) -> Iterator[str]:
+    """Skip empty pages and put PAGE_SEPARATOR between the rest."""
+    first = True
+    for text in pages:
+        if not text:
+            continue
+        if not first:
+            yield PAGE_SEPARATOR
+        first = False
+        yield text
+
 
+def _iter_pdf_pooled(path: str) -> Iterator[str]:
+    """Extract page ranges in worker processes, at most two tasks in flight per worker, and yield
+    them in page order. The timeout budget is spent only while waiting on workers."""
+    settings = get_settings()
+    budget = settings.extract_timeout_seconds
+    pool = _mp_context().Pool(
+        settings.extract_pool_size,
+        initializer=_init_worker,
+        initargs=(settings.extract_memory_limit_mb,),
+    )
 
-def _extract_markdown(content: bytes) -> str:
-    """Decode Markdown as UTF-8 text. No markdown-to-HTML conversion; raw text for embedding."""
-    return content.decode("utf-8", errors="replace")
+    def wait(result: multiprocessing.pool.AsyncResult):
+        nonlocal budget
+        started = time.monotonic()
+        try:
+            return result.get(timeout=max(budget, 0))
+        except multiprocessing.TimeoutError:
+            raise TimeoutError(
+                f"PDF extraction exceeded {settings.extract_timeout_seconds}s"
+            ) from None
+        except MemoryError:
+            raise MemoryError(
+                f"PDF extraction exceeded {settings.extract_memory_limit_mb} MB memory limit"
+            ) from None
+        finally:
+            budget -= time.monotonic() - started
+
+    def pages() -> Iterator[str]:
+        page_count = wait(pool.apply_async(_count_pages, (path,)))
+        ranges = deque(
+            (path, start, min(start + PAGES_PER_TASK, page_count))
+            for start in range(0, page_count, PAGES_PER_TASK)
+        )
+        in_flight: deque[multiprocessing.pool.AsyncResult] = deque()
+        while ranges or in_flight:
+            while ranges and len(in_flight) < 2 * settings.extract_pool_size:
+                in_flight.append(pool.apply_async(_extract_page_range, ranges.popleft()))
+            yield from wait(in_flight.popleft())
+
+    try:
+        yield from _join_pages(pages())
+    finally:
+        # Normal completion leaves workers idle; on timeout/error this kills wedged workers.
+        pool.terminate()
+        pool.join()
+
+
+@lru_cache
+def _mp_context() -> multiprocessing.context.BaseContext:
+    """forkserver where available (fast, safe to start from a threaded server), else spawn."""
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        ctx = multiprocessing.get_context("forkserver")
+        ctx.set_forkserver_preload(["src.services.extract_service"])
+        return ctx
+    return multiprocessing.get_context("spawn")
+
+
+def _init_worker(memory_limit_mb: int) -> None:
+    """Worker initializer: cap the address space so a hostile PDF fails with MemoryError."""
+    if memory_limit_mb <= 0:
+        return
+    try:
+        import resource
+    except ImportError:  # not available on Windows
+        return
+    limit = memory_limit_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _count_pages(path: str) -> int:
+    """Worker task: number of pages in the PDF at path."""
+    return len(PdfReader(path).pages)
+
+
+def _extract_page_range(path: str, start: int, stop: int) -> list[str]:
+    """Worker task: text of pages[start:stop] of the PDF at path."""
+    return list(_iter_pdf_pages(PdfReader(path), start, stop))
+
+
+def _iter_markdown(source: BinaryIO) -> Iterator[str]:
+    """Decode Markdown as UTF-8 in blocks. No markdown-to-HTML conversion; raw text for embedding."""
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    while True:
+        block = source.read(MARKDOWN_READ_SIZE)
+        if not block:
+            break
+        text = decoder.decode(block)
+        if text:
+            yield text
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
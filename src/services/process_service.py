@@ -1,84 +1,456 @@
 """Processing pipeline: extract text → chunk → embed → store in S3 Vectors → update status → schedule S3 delete."""
 
+import contextlib
+import hashlib
+import tempfile
+import time
+from array import array
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass, field
 from datetime import UTC, datetime
 
+from src.api.config import get_settings
 from src.models.document import DocumentFormat, ProcessingStatus
-from src.services import embedding_service, extract_service
+from src.observability import metrics
+from src.observability.logging import get_logger
+from src.services import chunk_service, dedup_service, embedding_service, extract_service
 from src.storage import metadata as metadata_store
 from src.storage import s3 as s3_storage
 from src.storage import vectors as vectors_storage
+from src.storage.checkpoints import Checkpoint, content_key, get_checkpoint_store
+from src.storage.fingerprints import MAX_SOURCE_DOCUMENTS, get_fingerprint_index
+from src.storage.lexical_index import get_lexical_index
+from src.storage.vector_writer import Completion, VectorWriter
 
-# Chunk size for embedding (Titan accepts up to 8192 tokens; ~4000 chars is safe per chunk).
-CHUNK_SIZE = 4000
-CHUNK_OVERLAP = 200
+# Chunks are embedded and written in batches of this many (bounds memory per document).
+STORE_BATCH_SIZE = 64
+# Timed pipeline stages (processing.stage_seconds); "extract" also covers chunking and dedup.
+STAGES = ("download", "extract", "embed", "store")
 
 
-def _chunk_text(text: str) -> list[str]:
-    """Split text into overlapping chunks for embedding."""
-    if not text or not text.strip():
-        return []
-    text = text.strip()
-    chunks = []
-    start = 0
-    while start < len(text):
-        end = min(start + CHUNK_SIZE, len(text))
-        chunk = text[start:end]
-        if chunk.strip():
-            chunks.append(chunk)
-        start = end - CHUNK_OVERLAP if end < len(text) else len(text)
-    return chunks
+def chunk_hash(chunk: str) -> str:
+    """Content hash recorded per chunk (metadata chunk_hashes) to detect changed chunks."""
+    return hashlib.sha256(chunk.strip().encode("utf-8")).hexdigest()[:32]
 
 
-def process_document(owner_id: str, filename: str) -> None:
+@dataclass
+class _Run:
+    """One processing run of a document; kept until its vectors are written."""
+
+    owner_id: str
+    filename: str
+    previous: list[str]
+    # Vector manifest before this run (keys 0..n-1 of previous_generation may exist); None =
+    # unknown (legacy document).
+    previous_count: int | None = None
+    previous_generation: int = 0
+    # Key generation the run writes; queries read it once _record_processed switches to it.
+    generation: int = 0
+    hashes: list[str] = field(default_factory=list)
+    written: set[int] = field(default_factory=set)
+    deduplicated: int = 0
+    # Chunks whose hash the previous version recorded reuse its stored embedding (index by hash).
+    previous_index: dict[str, int] = field(init=False)
+    reused: int = 0
+    # Resume state: the document's checkpoint, chunks whose embedding came from it, and whether
+    # the chunk list did (extraction skipped).
+    checkpoint: Checkpoint | None = None
+    resumed: int = 0
+    extraction_resumed: bool = False
+    error: Exception | None = None
+    on_complete: Completion | None = None
+    # Seconds per stage; the writer wait after seal is added to "store" when the run finishes.
+    stage_seconds: dict[str, float] = field(default_factory=lambda: dict.fromkeys(STAGES, 0.0))
+    sealed_at: float | None = None
+
+    def __post_init__(self) -> None:
+        self.previous_index = {h: j for j, h in enumerate(self.previous) if h}
+
+    @property
+    def key(self) -> tuple[str, str]:
+        return (self.owner_id, self.filename)
+
+
+def _new_generation(previous: int) -> int:
+    """Key generation for a run: unique per run (milliseconds, above the committed generation),
+    so keys left behind by a run that died are never read or overwritten."""
+    return max(previous + 1, time.time_ns() // 1_000_000)
+
+
+@contextlib.contextmanager
+def _timed(run: _Run, stage: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        run.stage_seconds[stage] += time.perf_counter() - started
+
+
+def process_document(
+    owner_id: str,
+    filename: str,
+    writer: VectorWriter | None = None,
+    on_complete: Completion | None = None,
+) -> None:
     """
-    Run the full pipeline for one document: read from S3, extract text, chunk, embed, store vectors,
-    update metadata to processed, then delete the S3 object (schedule for deletion per FR-005).
-    On any failure: set status to failed, set processing_error, do not store partial embeddings,
-    do not delete S3 object (T031).
+    Run the full pipeline for one document: read it from S3, extract text, chunk, embed, store the
+    vectors, mark it processed and delete the S3 object (FR-005). The object is streamed to a
+    temporary file, extracted page by page and chunked incrementally, and vectors are written
+    every STORE_BATCH_SIZE chunks, so peak memory does not grow with document size.
+
+    All-or-nothing: vectors and lexical rows are written under a new key generation that queries
+    ignore until _record_processed switches the document's manifest to it. On failure the staged
+    vectors are deleted, the status becomes failed (S3 object kept) and the previous version
+    stays searchable.
+
+    Only new text is embedded: chunks the previous version had reuse its stored vector,
+    near-duplicates (SimHash) the matched chunk's, and a retry resumes from the document's
+    checkpoint. With a shared writer (batch runs) the document is finished once its vectors are
+    written, and a write failure marks it failed instead of raising. on_complete(error) is called
+    exactly once when the document is finished: None when processed, else the failure.
     """
-    doc = metadata_store.get_metadata(owner_id, filename)
-    if not doc:
-        _set_failed(owner_id, filename, "Document not found in metadata")
+    try:
+        doc = metadata_store.get_metadata(owner_id, filename)
+        if doc is None:
+            _set_failed(owner_id, filename, "Document not found in metadata")
+        elif doc.processing_status != ProcessingStatus.PROCESSED:
+            metadata_store.update_status(
+                owner_id, filename, ProcessingStatus.PROCESSING, clear_processing_error=True
+            )
+            lexical = get_lexical_index()
+            if lexical is not None:
+                lexical.discard_staged(owner_id, filename)
+    except Exception as e:
+        _notify(on_complete, e)
+        raise
+    if doc is None:
+        _notify(on_complete, ValueError("Document not found in metadata"))
         return
     if doc.processing_status == ProcessingStatus.PROCESSED:
+        _notify(on_complete, None)
         return
-    metadata_store.update_status(
-        owner_id, filename, ProcessingStatus.PROCESSING, clear_processing_error=True
+    previous_count = (
+        doc.chunk_count if doc.vector_key_scheme == vectors_storage.VECTOR_KEY_SCHEME else None
     )
+    previous_generation = doc.vector_generation or 0
+    run = _Run(
+        owner_id,
+        filename,
+        doc.chunk_hashes or [],
+        previous_count,
+        previous_generation,
+        _new_generation(previous_generation),
+        on_complete=on_complete,
+    )
+    own_writer = writer is None
+    if own_writer:
+        writer = vectors_storage.open_writer()
     try:
-        content = s3_storage.get_document(owner_id, filename)
-        if not content:
-            _set_failed(owner_id, filename, "Document not found in S3")
+        try:
+            started = time.perf_counter()
+            failure = _write_chunks(run, DocumentFormat(doc.format), writer)
+            # Extraction is interleaved with the other stages: it gets the remainder.
+            run.stage_seconds["extract"] = (time.perf_counter() - started) - sum(
+                run.stage_seconds.values()
+            )
+        except Exception as e:
+            writer.discard(run.key)
+            _fail(run, e)
+            raise
+        if failure is not None:
+            _set_failed(owner_id, filename, failure)
+            _notify(on_complete, ValueError(failure))
             return
-        text = extract_service.extract_text(content, DocumentFormat(doc.format))
-        chunks = _chunk_text(text)
-        if not chunks:
-            _set_failed(owner_id, filename, "No text extracted from document")
+        run.sealed_at = time.perf_counter()
+        writer.seal(run.key, lambda error: _finish(run, error))
+    finally:
+        if own_writer:
+            writer.close()
+    if own_writer and run.error is not None:
+        raise run.error
+
+
+def _write_chunks(run: _Run, fmt: DocumentFormat, writer: VectorWriter) -> str | None:
+    """Download, extract and chunk the document and queue changed chunks on writer. Returns the
+    failure message when the document has no object in S3 or no text, else None. A checkpoint
+    with the complete chunk list of this content replaces download and extraction."""
+    store = get_checkpoint_store()
+    if store is not None:
+        head = s3_storage.head_document(run.owner_id, run.filename)
+        if head is None:
+            return "Document not found in S3"
+        run.checkpoint = store.open(run.owner_id, run.filename, _content_key(head, fmt))
+    if run.checkpoint is not None and run.checkpoint.complete:
+        run.extraction_resumed = True
+        _queue_chunks(run, run.checkpoint.chunks(), writer)
+    else:
+        # A named file so PDF extraction workers can open it by path.
+        with tempfile.NamedTemporaryFile(prefix="document-") as source:
+            with _timed(run, "download"):
+                found = s3_storage.download_document(run.owner_id, run.filename, source)
+            if not found:
+                return "Document not found in S3"
+            source.seek(0)
+            pieces = extract_service.iter_text(source, fmt)
+            # closing(): stop extraction workers promptly if embedding or storing fails.
+            with contextlib.closing(pieces):
+                _queue_chunks(run, chunk_service.get_chunker(fmt).chunks(pieces), writer)
+        if run.checkpoint is not None:
+            run.checkpoint.mark_complete(len(run.hashes))
+    if not run.hashes:
+        return "No text extracted from document"
+    return None
+
+
+def _content_key(head: dict, fmt: DocumentFormat) -> str:
+    """Checkpoint key: object version plus every setting that changes its chunks or embeddings."""
+    settings = get_settings()
+    return content_key(
+        head["etag"],
+        head["size"],
+        fmt.value,
+        settings.chunking_strategy,
+        settings.chunk_token_budget,
+        settings.bedrock_model_id or embedding_service.DEFAULT_EMBEDDING_MODEL,
+        embedding_service.DEFAULT_DIMENSIONS,
+    )
+
+
+def _queue_chunks(run: _Run, chunks: Iterable[str], writer: VectorWriter) -> None:
+    """Hash every chunk, record new chunk texts in the checkpoint and store the chunks in batches
+    of STORE_BATCH_SIZE."""
+    record = run.checkpoint is not None and not run.checkpoint.complete
+    batch: list[tuple[int, str]] = []
+    for index, chunk in enumerate(chunks):
+        run.hashes.append(chunk_hash(chunk))
+        batch.append((index, chunk))
+        if len(batch) >= STORE_BATCH_SIZE:
+            if record:
+                run.checkpoint.add_chunks(batch)
+            _store_batch(run, batch, writer)
+            batch = []
+    if record and batch:
+        run.checkpoint.add_chunks(batch)
+    _store_batch(run, batch, writer)
+
+
+def _finish(run: _Run, error: Exception | None) -> None:
+    """Writer callback once every vector of the run is written (error is None) or failed."""
+    if run.sealed_at is not None:
+        run.stage_seconds["store"] += time.perf_counter() - run.sealed_at
+    if error is None:
+        try:
+            _record_processed(run)
+        except Exception as e:
+            error = e
+        else:
+            _notify(run.on_complete, None)
             return
-        vectors_with_text: list[tuple[list[float], str]] = []
-        for chunk in chunks:
-            emb = embedding_service.embed_text(chunk)
-            vectors_with_text.append((emb, chunk))
-        vectors_storage.store_vectors(owner_id, filename, vectors_with_text)
-        now = datetime.now(UTC)
-        metadata_store.update_status(
-            owner_id,
-            filename,
-            ProcessingStatus.PROCESSED,
-            processed_at=now,
-            clear_processing_error=True,
+    run.error = error
+    get_logger().warning(
+        "Document processing failed", owner_id=run.owner_id, filename=run.filename, error=str(error)
+    )
+    _fail(run, error)
+
+
+def _record_processed(run: _Run) -> None:
+    """Switch the document to the run's vectors: mark it processed with the new hashes and vector
+    manifest, after which queries read the new generation, and bump the owner's corpus version
+    (cached RAG answers) in the same transaction. The rest (lexical rows, S3 object, previous
+    generation, checkpoint) follows the switch and is logged rather than raised when it fails:
+    the document is processed either way."""
+    owner_id, filename = run.key
+    metadata_store.update_status(
+        owner_id,
+        filename,
+        ProcessingStatus.PROCESSED,
+        processed_at=datetime.now(UTC),
+        clear_processing_error=True,
+        chunk_hashes=run.hashes,
+        chunk_count=len(run.hashes),
+        vector_key_scheme=vectors_storage.VECTOR_KEY_SCHEME,
+        vector_generation=run.generation,
+        bump_corpus=True,
+    )
+    lexical = get_lexical_index()
+    if lexical is not None:
+        # Answers cached between the switch and here may have seen the old lexical rows.
+        _after_switch(run, "lexical_index", lexical.commit_staged, owner_id, filename)
+        _after_switch(run, "corpus_version", metadata_store.bump_corpus_version, owner_id)
+    _after_switch(run, "s3_delete", s3_storage.delete_document, owner_id, filename)
+    _after_switch(run, "previous_vectors", _retire_previous, run)
+    if run.checkpoint is not None:
+        _after_switch(run, "checkpoint", run.checkpoint.delete)
+    changed = sum(
+        1 for i, h in enumerate(run.hashes) if i >= len(run.previous) or run.previous[i] != h
+    )
+    removed = max(len(run.previous), run.previous_count or 0) - len(run.hashes)
+    dedup_ratio = run.deduplicated / changed if changed else 0.0
+    metrics.histogram("processing.dedup_ratio").record(dedup_ratio)
+    metrics.counter("processing.chunks_resumed").add(run.resumed)
+    metrics.counter("processing.chunks_reused").add(run.reused)
+    for stage, seconds in run.stage_seconds.items():
+        metrics.histogram("processing.stage_seconds", unit="s").record(seconds, {"stage": stage})
+    get_logger().info(
+        "Document processed",
+        owner_id=owner_id,
+        filename=filename,
+        chunks=len(run.hashes),
+        chunks_changed=changed,
+        chunks_removed=max(removed, 0),
+        chunks_deduplicated=run.deduplicated,
+        chunks_resumed=run.resumed,
+        chunks_reused=run.reused,
+        extraction_resumed=run.extraction_resumed,
+        dedup_ratio=dedup_ratio,
+        **{f"{stage}_seconds": round(s, 3) for stage, s in run.stage_seconds.items()},
+    )
+
+
+def _after_switch(run: _Run, step: str, action: Callable, *args) -> None:
+    try:
+        action(*args)
+    except Exception as e:
+        get_logger().warning(
+            "Step after processing failed",
+            owner_id=run.owner_id,
+            filename=run.filename,
+            step=step,
+            error=str(e),
+        )
+
+
+def _retire_previous(run: _Run) -> None:
+    """Delete the previous generation's vectors (listed when the manifest did not cover them)
+    and the fingerprints of chunks that no longer exist."""
+    owner_id, filename = run.key
+    if run.previous_count is None:
+        vectors_storage.delete_stale_vectors(owner_id, filename, run.generation)
+    else:
+        vectors_storage.delete_chunk_vectors(
+            owner_id, filename, list(range(run.previous_count)), run.previous_generation
+        )
+    removed = list(range(len(run.hashes), max(len(run.previous), run.previous_count or 0)))
+    _forget_fingerprints(owner_id, filename, removed)
+
+
+def _fail(run: _Run, error: Exception) -> None:
+    """Discard what the run staged and mark the document failed. Queries never read the run's
+    generation, so nothing visible changed and the corpus version stays."""
+    try:
+        _discard(run)
+        _set_failed(run.owner_id, run.filename, str(error))
+    finally:
+        _notify(run.on_complete, error)
+
+
+def _notify(on_complete: Completion | None, error: Exception | None) -> None:
+    if on_complete is not None:
+        on_complete(error)
+
+
+def _store_batch(run: _Run, batch: list[tuple[int, str]], writer: VectorWriter) -> None:
+    """Embed one batch of (chunk_index, chunk) and queue it on writer under the run's generation;
+    indices are added to run.written first so a failed write is still discarded. Chunks of the
+    previous version reuse their stored embedding and near-duplicates the matched chunk's."""
+    if not batch:
+        return
+    owner_id, filename = run.key
+    indices = [i for i, _ in batch]
+    texts = [c for _, c in batch]
+    checkpoint = run.checkpoint
+    resumed = checkpoint.embeddings(batch) if checkpoint is not None else {}
+    reused = _reuse_embeddings(run, batch, resumed)
+    known = resumed | reused
+    fingerprints, matches = dedup_service.find_near_duplicates(owner_id, texts)
+    missing = [i for i, m in enumerate(matches) if m is None and indices[i] not in known]
+
+    def save(done: list[tuple[int, array]]) -> None:
+        checkpoint.add_embeddings([(indices[missing[j]], texts[missing[j]], e) for j, e in done])
+
+    with _timed(run, "embed"):
+        fresh = iter(
+            embedding_service.embed_texts(
+                [texts[i] for i in missing], on_embedded=save if checkpoint is not None else None
+            )
+        )
+    embeddings = [
+        known[indices[i]] if indices[i] in known else next(fresh) if m is None else m.embedding
+        for i, m in enumerate(matches)
+    ]
+    sources = [
+        [filename] + [d for d in (m.source_documents if m else []) if d != filename]
+        for m in matches
+    ]
+    sources = [s[:MAX_SOURCE_DOCUMENTS] for s in sources]
+    run.written.update(indices)
+    run.resumed += len(resumed)
+    run.reused += len(reused)
+    run.deduplicated += len(batch) - len(missing) - len(known)
+    with _timed(run, "store"):
+        writer.add(
+            run.key,
+            vectors_storage.vector_entries(
+                owner_id,
+                filename,
+                list(zip(embeddings, texts, strict=True)),
+                chunk_indices=indices,
+                source_documents=sources,
+                generation=run.generation,
+            ),
+        )
+    index = get_fingerprint_index()
+    if index is not None:
+        index.add_many(
+            owner_id, filename, list(zip(indices, fingerprints, embeddings, sources, strict=True))
         )
-        s3_storage.delete_document(owner_id, filename)
+    lexical = get_lexical_index()
+    if lexical is not None:
+        lexical.stage(owner_id, filename, batch)
+
+
+def _reuse_embeddings(
+    run: _Run, batch: list[tuple[int, str]], skip: dict[int, array]
+) -> dict[int, array]:
+    """Stored embeddings for chunks of batch (other than skip) whose hash the previous version
+    recorded, read from its generation's keys."""
+    wanted = {
+        i: run.previous_index[run.hashes[i]]
+        for i, _ in batch
+        if i not in skip and run.hashes[i] in run.previous_index
+    }
+    stored = vectors_storage.get_chunk_embeddings(
+        run.owner_id, run.filename, sorted(set(wanted.values())), run.previous_generation
+    )
+    return {i: stored[j] for i, j in wanted.items() if j in stored}
+
+
+def _forget_fingerprints(owner_id: str, filename: str, chunk_indices: list[int]) -> None:
+    """Drop fingerprint rows of chunks whose vectors are gone."""
+    index = get_fingerprint_index()
+    if index is not None and chunk_indices:
+        index.delete_chunks(owner_id, filename, chunk_indices)
+
+
+def _discard(run: _Run) -> None:
+    """Best-effort delete of what a failed run staged: its vectors (a later run writes another
+    generation, so leftovers are never read), fingerprints and lexical rows."""
+    owner_id, filename = run.key
+    written = sorted(run.written)
+    try:
+        vectors_storage.delete_chunk_vectors(owner_id, filename, written, run.generation)
+        _forget_fingerprints(owner_id, filename, written)
+        lexical = get_lexical_index()
+        if lexical is not None:
+            lexical.discard_staged(owner_id, filename)
     except Exception as e:
-        _set_failed(owner_id, filename, str(e))
-        raise
+        get_logger().warning(
+            "Discarding staged vectors failed", owner_id=owner_id, filename=filename, error=str(e)
+        )
 
 
 def _set_failed(owner_id: str, filename: str, message: str) -> None:
     """Set document status to failed with error message; do not store partial embeddings or delete S3."""
     metadata_store.update_status(
-        owner_id,
-        filename,
-        ProcessingStatus.FAILED,
-        processing_error=message,
+        owner_id, filename, ProcessingStatus.FAILED, processing_error=message
     )
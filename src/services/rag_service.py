@@ -1,10 +1,18 @@
-"""RAG service: retrieve chunks from S3 Vectors, build context, invoke Bedrock for grounded answer."""
+"""RAG service: retrieve chunks from S3 Vectors, build context, invoke Bedrock for grounded answer
+(whole, or streamed token by token)."""
 
 import json
+import time
+from collections.abc import Iterator
+from typing import NamedTuple
 
 from src.api.config import get_settings
-from src.services import embedding_service, retrieval_service
-from src.storage.vectors import get_bedrock_client
+from src.observability import metrics
+from src.observability.logging import get_logger
+from src.services import context_service, embedding_service, retrieval_service
+from src.storage import metadata as metadata_store
+from src.storage.rag_cache import CachedAnswer, get_answer_cache, normalize_question
+from src.storage.vectors import RetrievedChunk, get_bedrock_client
 
 # When no relevant content: return this message and empty source_document_ids (T035; do not fabricate).
 NO_KNOWLEDGE_MESSAGE = (
@@ -16,44 +24,183 @@ RAG_TOP_K = 10
 RAG_MAX_TOKENS = 1024
 
 
+class RagEvent(NamedTuple):
+    """One streamed RAG event: kind "token" with data = answer text as generated, then one "done"
+    with data = source_document_ids."""
+
+    kind: str
+    data: str | list[str]
+
+
 def rag_query(owner_id: str, question: str) -> tuple[str, list[str]]:
     """
     Answer question using the user's processed documents. Returns (answer, source_document_ids).
     source_document_ids are filenames of documents that contributed chunks (for attribution).
     If vector store is empty or no relevant chunks: return clear no-knowledge message and [] (T035).
+    Results are cached per (owner_id, normalized question, corpus version): a repeated question
+    is answered without Bedrock or S3 Vectors calls until the owner's corpus changes.
     """
     question = (question or "").strip()
     if not question:
         return NO_KNOWLEDGE_MESSAGE, []
 
+    normalized, version, cached = _cached(owner_id, question)
+    if cached is not None:
+        return cached.answer, list(cached.source_document_ids)
+    chunks = _retrieve(owner_id, question)
+    if chunks is None:
+        return NO_KNOWLEDGE_MESSAGE, []
+    prompt = _prompt(question, chunks)
+    if prompt is None:
+        answer, source_document_ids = NO_KNOWLEDGE_MESSAGE, []
+    else:
+        packed, body = prompt
+        answer, source_document_ids = _answer(packed, body), packed.source_document_ids
+    _remember(owner_id, normalized, version, answer, source_document_ids, chunks)
+    return answer, source_document_ids
+
+
+def rag_query_stream(owner_id: str, question: str) -> Iterator[RagEvent]:
+    """
+    Streaming rag_query: yields "token" events as Claude generates the answer (Bedrock
+    InvokeModelWithResponseStream), then one "done" event with source_document_ids. Cached and
+    no-knowledge answers arrive as a single token event; a streamed answer is cached like
+    rag_query's once complete. Seconds until the first token are recorded as
+    rag.stream.first_token_seconds. Bedrock errors are raised from the iterator.
+    """
+    started = time.perf_counter()
+    first = True
+    for event in _stream(owner_id, question):
+        if first and event.kind == "token":
+            first = False
+            metrics.histogram("rag.stream.first_token_seconds", unit="s").record(
+                time.perf_counter() - started
+            )
+        yield event
+
+
+def _stream(owner_id: str, question: str) -> Iterator[RagEvent]:
+    question = (question or "").strip()
+    if not question:
+        yield RagEvent("token", NO_KNOWLEDGE_MESSAGE)
+        yield RagEvent("done", [])
+        return
+    normalized, version, cached = _cached(owner_id, question)
+    if cached is not None:
+        yield RagEvent("token", cached.answer)
+        yield RagEvent("done", list(cached.source_document_ids))
+        return
+    chunks = _retrieve(owner_id, question)
+    if chunks is None:
+        yield RagEvent("token", NO_KNOWLEDGE_MESSAGE)
+        yield RagEvent("done", [])
+        return
+    prompt = _prompt(question, chunks)
+    if prompt is None:
+        answer, source_document_ids = NO_KNOWLEDGE_MESSAGE, []
+        yield RagEvent("token", answer)
+    else:
+        packed, body = prompt
+        source_document_ids = packed.source_document_ids
+        response = get_bedrock_client().invoke_model_with_response_stream(
+            modelId=_model_id(),
+            contentType="application/json",
+            accept="application/json",
+            body=body,
+        )
+        parts: list[str] = []
+        usage: dict = {}
+        for event in response["body"]:
+            chunk = event.get("chunk")
+            if not chunk:
+                continue
+            payload = json.loads(chunk["bytes"])
+            kind = payload.get("type")
+            if kind == "content_block_delta" and payload["delta"].get("type") == "text_delta":
+                text = payload["delta"].get("text") or ""
+                if text:
+                    parts.append(text)
+                    yield RagEvent("token", text)
+            elif kind == "message_start":
+                usage.update(payload.get("message", {}).get("usage") or {})
+            elif kind == "message_delta":
+                usage.update(payload.get("usage") or {})
+        answer = "".join(parts).strip()
+        if not answer:
+            answer = NO_KNOWLEDGE_MESSAGE
+            yield RagEvent("token", answer)
+        _record_usage(packed, usage)
+    _remember(owner_id, normalized, version, answer, source_document_ids, chunks)
+    yield RagEvent("done", source_document_ids)
+
+
+def _cached(owner_id: str, question: str) -> tuple[str, int | None, CachedAnswer | None]:
+    """(normalized question, corpus version, cached result). The version is read before
+    retrieving: a result is cached under the corpus it may have seen."""
+    answers = get_answer_cache()
+    normalized = normalize_question(question)
+    version = _corpus_version(owner_id) if answers.max_entries else None
+    cached = answers.get(owner_id, normalized, version) if version is not None else None
+    return normalized, version, cached
+
+
+def _remember(
+    owner_id: str,
+    normalized: str,
+    version: int | None,
+    answer: str,
+    source_document_ids: list[str],
+    chunks: list[RetrievedChunk],
+) -> None:
+    if version is not None:
+        get_answer_cache().put(
+            owner_id,
+            normalized,
+            version,
+            CachedAnswer(answer, tuple(source_document_ids), tuple(chunks)),
+        )
+
+
+def _retrieve(owner_id: str, question: str) -> list[RetrievedChunk] | None:
+    """Chunks for question; None when the question cannot be embedded."""
     try:
-        query_embedding = embedding_service.embed_text(question)
+        query_embedding = embedding_service.embed_question(question)
     except Exception:
-        return NO_KNOWLEDGE_MESSAGE, []
+        return None
+    return retrieval_service.retrieve(
+        owner_id, query_embedding, top_k=RAG_TOP_K, query_text=question
+    )
 
-    chunks = retrieval_service.retrieve(owner_id, query_embedding, top_k=RAG_TOP_K)
-    if not chunks:
-        return NO_KNOWLEDGE_MESSAGE, []
 
-    context_parts = []
-    seen_filenames: set[str] = set()
-    for text, document_filename in chunks:
-        if text:
-            context_parts.append(text)
-        if document_filename:
-            seen_filenames.add(document_filename)
-    context = "\n\n---\n\n".join(context_parts) if context_parts else ""
-    if not context:
-        return NO_KNOWLEDGE_MESSAGE, []
+def _corpus_version(owner_id: str) -> int | None:
+    """Owner's corpus version, or None (answer uncached) when it cannot be read."""
+    try:
+        return metadata_store.get_corpus_version(owner_id)
+    except Exception as e:
+        get_logger().warning("Corpus version unavailable", owner_id=owner_id, error=str(e))
+        return None
+
+
+def _model_id() -> str:
+    return get_settings().bedrock_rag_model_id or DEFAULT_RAG_MODEL
 
-    settings = get_settings()
-    model_id = settings.bedrock_rag_model_id or DEFAULT_RAG_MODEL
-    client = get_bedrock_client()
+
+def _prompt(
+    question: str, chunks: list[RetrievedChunk]
+) -> tuple[context_service.PackedContext, str] | None:
+    """Packed context (context_service, RAG_CONTEXT_TOKEN_BUDGET) and the Claude request body
+    for question; None when the chunks carry no text."""
+    if not chunks:
+        return None
+    packed = context_service.pack_context(chunks, get_settings().rag_context_token_budget)
+    if not packed.text:
+        return None
+    metrics.histogram("rag.context_tokens").record(packed.tokens)
     system = (
         "Answer the user's question using only the following context from their documents. "
         "If the context does not contain relevant information, say so clearly. Do not fabricate or guess."
     )
-    user_content = f"Context:\n{context}\n\nQuestion: {question}"
+    user_content = f"Context:\n{packed.text}\n\nQuestion: {question}"
     body = json.dumps(
         {
             "anthropic_version": "bedrock-2023-05-31",
@@ -62,8 +209,13 @@ def rag_query(owner_id: str, question: str) -> tuple[str, list[str]]:
             "messages": [{"role": "user", "content": user_content}],
         }
     )
-    response = client.invoke_model(
-        modelId=model_id,
+    return packed, body
+
+
+def _answer(packed: context_service.PackedContext, body: str) -> str:
+    """Ask Claude for the answer to a prepared request body."""
+    response = get_bedrock_client().invoke_model(
+        modelId=_model_id(),
         contentType="application/json",
         accept="application/json",
         body=body,
@@ -75,5 +227,22 @@ def rag_query(owner_id: str, question: str) -> tuple[str, list[str]]:
         if block.get("type") == "text" and block.get("text"):
             answer = block["text"].strip()
             break
-    source_document_ids = sorted(seen_filenames)
-    return answer, source_document_ids
+    _record_usage(packed, response_body.get("usage") or {})
+    return answer
+
+
+def _record_usage(packed: context_service.PackedContext, usage: dict) -> None:
+    """Log and record context and model token counts of one answer."""
+    for kind in ("input_tokens", "output_tokens"):
+        if usage.get(kind) is not None:
+            metrics.counter(f"rag.{kind}").add(usage[kind])
+    get_logger().info(
+        "RAG context packed",
+        context_tokens=packed.tokens,
+        token_budget=get_settings().rag_context_token_budget,
+        chunks_retrieved=packed.chunks_retrieved,
+        chunks_used=packed.chunks_used,
+        passages=packed.passages,
+        input_tokens=usage.get("input_tokens"),
+        output_tokens=usage.get("output_tokens"),
+    )
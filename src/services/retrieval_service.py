@@ -1,18 +1,73 @@
-"""Retrieval from S3 Vectors: query by embedding, filter by owner_id. Returns chunks with text and document filename."""
+"""Retrieval for RAG: nearest chunks of owner_id from the vector store (VECTOR_STORE_BACKEND), each
+with text, document filename, chunk index and relevance score. With the lexical index enabled
+(LEXICAL_INDEX_PATH), BM25 results for the question text are fused with the vector results by
+reciprocal rank fusion, so exact terms (section numbers, defined terms, party names) are found
+even when their embedding is not among the nearest."""
 
+import time
+from array import array
+
+from src.api.config import get_settings
+from src.observability import metrics
+from src.observability.logging import get_logger
 from src.storage import vectors as vectors_storage
+from src.storage.lexical_index import get_lexical_index
+from src.storage.vectors import RetrievedChunk
 
 # Default number of chunks to retrieve for RAG context.
 DEFAULT_TOP_K = 10
+# Hybrid retrieval ranks this many times top_k candidates from each retriever before fusion.
+HYBRID_CANDIDATE_FACTOR = 2
 
 
 def retrieve(
     owner_id: str,
-    query_embedding: list[float],
+    query_embedding: array,
     top_k: int = DEFAULT_TOP_K,
-) -> list[tuple[str, str]]:
+    query_text: str | None = None,
+) -> list[RetrievedChunk]:
+    """
+    Query the vector store for nearest neighbors to query_embedding, scoped to owner_id.
+    Returns chunks most relevant first, for building RAG context (context_service).
+    With query_text and the lexical index enabled, the vector and BM25 candidate lists are
+    fused (reciprocal_rank_fusion); a lexical index failure falls back to the vector results.
+    """
+    index = get_lexical_index() if query_text else None
+    if index is None:
+        return vectors_storage.query_vectors(owner_id, query_embedding, top_k=top_k)
+    candidates = top_k * HYBRID_CANDIDATE_FACTOR
+    dense = vectors_storage.query_vectors(owner_id, query_embedding, top_k=candidates)
+    started = time.perf_counter()
+    try:
+        lexical = [
+            RetrievedChunk(m.text, m.document_filename, m.chunk_index, m.score)
+            for m in index.search(owner_id, query_text, candidates)
+        ]
+    except Exception as e:
+        get_logger().warning("Lexical search failed", owner_id=owner_id, error=str(e))
+        return dense[:top_k]
+    metrics.histogram("retrieval.lexical_seconds", unit="s").record(time.perf_counter() - started)
+    return reciprocal_rank_fusion([dense, lexical], top_k, get_settings().hybrid_rrf_k)
+
+
+def reciprocal_rank_fusion(
+    rankings: list[list[RetrievedChunk]], top_k: int, k: int = 60
+) -> list[RetrievedChunk]:
     """
-    Query S3 Vectors for nearest neighbors to query_embedding, scoped to owner_id.
-    Returns list of (chunk_text, document_filename) for building RAG context.
+    Fuse ranked chunk lists: each chunk, identified by (document_filename, chunk_index) or its
+    text when the index is unknown, scores sum(1 / (k + rank)) over the lists it appears in (rank
+    from 1). Returns the top_k with score set to the fused score; ties keep first-seen order.
     """
-    return vectors_storage.query_vectors(owner_id, query_embedding, top_k=top_k)
+    scores: dict[tuple, float] = {}
+    chunks: dict[tuple, RetrievedChunk] = {}
+    for ranking in rankings:
+        for rank, chunk in enumerate(ranking, start=1):
+            key = (
+                (chunk.document_filename, chunk.chunk_index)
+                if chunk.chunk_index is not None
+                else (chunk.document_filename, chunk.text)
+            )
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+            chunks.setdefault(key, chunk)
+    best = sorted(scores, key=scores.__getitem__, reverse=True)[:top_k]
+    return [chunks[key]._replace(score=scores[key]) for key in best]
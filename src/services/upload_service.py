@@ -1,12 +1,34 @@
-"""Upload service: validate 25 MB max, PDF/Markdown only, replace-on-same-filename."""
+"""Upload service: validate 25 MB max, PDF/Markdown only, replace-on-same-filename.
 
-from datetime import UTC, datetime
+Uploads arrive as a file object (upload_document), as a stream of body chunks (StreamingUpload:
+size enforced and content sniffed as bytes arrive, written to S3 part by part) or directly in the
+bucket through a presigned POST (create_upload_url, then complete_upload records the document).
+Many documents at once (plain files or zip/tar archives) go through BulkUpload: S3 writes in
+parallel, metadata in batches. iter_bulk_delete removes many documents (or all of an owner's)
+the same way, batch by batch.
+"""
+
+import tarfile
+import threading
+import zipfile
+import zlib
+from collections.abc import Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import UTC, datetime, timedelta
+from pathlib import PurePosixPath
 from typing import BinaryIO
 
+from src.api.config import get_settings
 from src.models.document import Document, DocumentFormat, ProcessingStatus
+from src.observability.logging import get_logger
 from src.storage import metadata as metadata_store
 from src.storage import s3 as s3_storage
 from src.storage import vectors as vectors_storage
+from src.storage.checkpoints import get_checkpoint_store
+from src.storage.fingerprints import get_fingerprint_index
+from src.storage.job_queue import get_job_queue
+from src.storage.lexical_index import get_lexical_index
+from src.storage.vector_store import DELETE_BATCH_SIZE as VECTOR_DELETE_BATCH_SIZE
 
 MAX_SIZE_BYTES = 25 * 1024 * 1024  # 25 MB
 ALLOWED_CONTENT_TYPES = {
@@ -19,6 +41,14 @@ ALLOWED_EXTENSIONS = {
     ".md": DocumentFormat.MARKDOWN,
     ".markdown": DocumentFormat.MARKDOWN,
 }
+# Leading bytes inspected by content_matches_format (PDF readers accept the %PDF- header anywhere
+# in the first 1024 bytes).
+SNIFF_BYTES = 1024
+# Bulk uploads: files with these extensions are archives, unpacked into their member files.
+ARCHIVE_EXTENSIONS = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tar.xz")
+# Bulk deletes: documents per batch (one DeleteObjects call) and per BatchWriteItem task.
+BULK_DELETE_BATCH = s3_storage.DELETE_OBJECTS_MAX_KEYS
+BULK_DELETE_METADATA_SLICE = 100
 
 
 def _infer_format(filename: str, content_type: str | None) -> DocumentFormat | None:
@@ -44,6 +74,8 @@ def validate_upload(
     """
     if not filename or not filename.strip():
         return None, "Missing or invalid filename"
+    if filename == metadata_store.CORPUS_VERSION_FILENAME:
+        return None, "Reserved filename"
     if size <= 0:
         return None, "Empty file"
     if size > MAX_SIZE_BYTES:
@@ -54,6 +86,15 @@ def validate_upload(
     return fmt, None
 
 
+def content_matches_format(fmt: DocumentFormat, head: bytes) -> bool:
+    """Whether the leading bytes (up to SNIFF_BYTES) look like fmt: a PDF carries the %PDF-
+    header, Markdown is text (no NUL bytes)."""
+    head = head[:SNIFF_BYTES]
+    if fmt == DocumentFormat.PDF:
+        return b"%PDF-" in head
+    return b"\x00" not in head
+
+
 def upload_document(
     owner_id: str,
     filename: str,
@@ -63,20 +104,37 @@ def upload_document(
     mode: str,
 ) -> Document:
     """
-    Upload document: validate, store in S3, create/update metadata.
-    Replace-on-same-filename: overwrite S3 and metadata.
+    Upload document: validate, store in S3, create/update metadata, bump the owner's corpus version.
+    Replace-on-same-filename: overwrite S3 and metadata; chunk_hashes and the vector manifest of
+    the previous version are kept so re-processing only re-embeds changed chunks. A new filename
+    starts with an empty manifest (no vectors).
     Returns Document. processing_status is 'processing' for upload_and_analyze, 'pending' for upload_and_queue.
     """
     fmt, err = validate_upload(filename, content_type, size)
     if err:
         raise ValueError(err)
-    now = datetime.now(UTC)
+    s3_storage.upload_document(owner_id, filename, body, _stored_content_type(fmt, content_type))
+    return _record_upload(owner_id, filename, fmt, size, mode)
+
+
+def _stored_content_type(fmt: DocumentFormat, content_type: str | None) -> str:
+    return content_type or ("application/pdf" if fmt == DocumentFormat.PDF else "text/markdown")
+
+
+def _new_document(
+    owner_id: str,
+    filename: str,
+    fmt: DocumentFormat,
+    size: int,
+    mode: str,
+    previous: Document | None,
+    now: datetime,
+) -> Document:
+    """Metadata for a document just written to S3; the previous version's manifest is kept."""
     status = (
         ProcessingStatus.PROCESSING if mode == "upload_and_analyze" else ProcessingStatus.PENDING
     )
-    ct = content_type or ("application/pdf" if fmt == DocumentFormat.PDF else "text/markdown")
-    s3_storage.upload_document(owner_id, filename, body, ct)
-    doc = Document(
+    return Document(
         filename=filename,
         owner_id=owner_id,
         format=fmt,
@@ -85,11 +143,363 @@ def upload_document(
         processing_status=status,
         processing_error=None,
         processed_at=None,
+        chunk_hashes=previous.chunk_hashes if previous else None,
+        chunk_count=previous.chunk_count if previous else 0,
+        vector_key_scheme=previous.vector_key_scheme
+        if previous
+        else vectors_storage.VECTOR_KEY_SCHEME,
+        vector_generation=previous.vector_generation if previous else None,
     )
+
+
+def _record_upload(
+    owner_id: str, filename: str, fmt: DocumentFormat, size: int, mode: str
+) -> Document:
+    """Metadata for a document just written to S3 (previous manifest kept), corpus version bump."""
+    previous = metadata_store.get_metadata(owner_id, filename)
+    doc = _new_document(owner_id, filename, fmt, size, mode, previous, datetime.now(UTC))
     metadata_store.create_metadata(doc)
+    metadata_store.bump_corpus_version(owner_id)
     return doc
 
 
+class StreamingUpload:
+    """Upload fed chunk by chunk as the request body arrives, holding at most one S3 part.
+
+    write() enforces the 25 MB limit and checks the leading bytes against the declared format,
+    raising ValueError at the first violation. It returns a full part once
+    upload_part_size_bytes are buffered; the caller passes it to upload_part() before writing
+    more. complete() stores the rest and the metadata; abort() discards the upload and leaves
+    the previous version in place. With filename None, call set_filename() before complete().
+    """
+
+    def __init__(self, owner_id: str, filename: str | None, content_type: str | None):
+        self.owner_id = owner_id
+        self.content_type = content_type
+        self.filename: str | None = None
+        self.format: DocumentFormat | None = None
+        self.size = 0
+        self._part_size = max(5 * 1024 * 1024, get_settings().upload_part_size_bytes)
+        self._buffer = bytearray()
+        self._head = bytearray()
+        self._sniffed = False
+        self._upload = s3_storage.DocumentUpload(
+            owner_id, None, content_type or "application/octet-stream"
+        )
+        if filename is not None:
+            self.set_filename(filename)
+
+    def set_filename(self, filename: str) -> None:
+        """Name the document; raises ValueError when its format is invalid or (once the leading
+        bytes arrived) does not match them."""
+        fmt, err = validate_upload(filename, self.content_type, 1)
+        if err:
+            raise ValueError(err)
+        self.filename = filename
+        self.format = fmt
+        self._upload.filename = filename
+        self._upload.content_type = _stored_content_type(fmt, self.content_type)
+        if len(self._head) >= SNIFF_BYTES:
+            self._sniff()
+
+    def write(self, data: bytes) -> bytearray | None:
+        """Buffer data; returns a full part for upload_part(), else None."""
+        self.size += len(data)
+        if self.size > MAX_SIZE_BYTES:
+            raise ValueError(f"File exceeds 25 MB limit (more than {MAX_SIZE_BYTES} bytes)")
+        self._buffer += data
+        if len(self._head) < SNIFF_BYTES:
+            self._head += data[: SNIFF_BYTES - len(self._head)]
+            if len(self._head) >= SNIFF_BYTES and self.format is not None:
+                self._sniff()
+        if len(self._buffer) < self._part_size:
+            return None
+        part, self._buffer = self._buffer, bytearray()
+        return part
+
+    def _sniff(self) -> None:
+        self._sniffed = True
+        if not content_matches_format(self.format, bytes(self._head)):
+            raise ValueError(f"File content does not match its format ({self.format.value})")
+
+    def upload_part(self, part: bytearray) -> None:
+        self._upload.upload_part(part)
+
+    def complete(self, mode: str) -> Document:
+        """Store the buffered rest and the document metadata."""
+        if self.filename is None:
+            raise ValueError("Missing filename (provide file or name)")
+        if self.size <= 0:
+            raise ValueError("Empty file")
+        if not self._sniffed:
+            self._sniff()
+        self._upload.complete(self._buffer)
+        self._buffer = bytearray()
+        return _record_upload(self.owner_id, self.filename, self.format, self.size, mode)
+
+    def abort(self) -> None:
+        self._buffer = bytearray()
+        self._upload.abort()
+
+
+def create_upload_url(owner_id: str, filename: str, content_type: str | None, size: int) -> dict:
+    """
+    Presigned POST for uploading filename (declared size bytes) straight to S3, bypassing the API:
+    {"url", "fields", "content_type", "max_size_bytes", "expires_at"}. The policy pins the key
+    (owner_id/filename), the Content-Type and the size (at most the declared size). Raises
+    ValueError when the filename, format or size is invalid.
+    """
+    fmt, err = validate_upload(filename, content_type, size)
+    if err:
+        raise ValueError(err)
+    ct = _stored_content_type(fmt, content_type)
+    expires = get_settings().upload_url_expires_seconds
+    post = s3_storage.presigned_post(owner_id, filename, ct, size, expires)
+    return {
+        "url": post["url"],
+        "fields": post["fields"],
+        "content_type": ct,
+        "max_size_bytes": size,
+        "expires_at": datetime.now(UTC) + timedelta(seconds=expires),
+    }
+
+
+def complete_upload(owner_id: str, filename: str, mode: str) -> Document | None:
+    """
+    Record a document the client uploaded through create_upload_url: check the stored object's
+    size, format and leading bytes, then create metadata as upload_document does. Returns None
+    when there is no object (not uploaded yet); an invalid object is deleted and ValueError raised.
+    Safe to repeat (the document is recorded again).
+    """
+    head = s3_storage.head_document(owner_id, filename)
+    if head is None:
+        return None
+    fmt, err = validate_upload(filename, head.get("content_type"), head["size"])
+    if err is None and not content_matches_format(
+        fmt, s3_storage.read_document_head(owner_id, filename, SNIFF_BYTES)
+    ):
+        err = f"File content does not match its format ({fmt.value})"
+    if err:
+        s3_storage.delete_document(owner_id, filename)
+        raise ValueError(err)
+    return _record_upload(owner_id, filename, fmt, head["size"], mode)
+
+
+def is_archive(filename: str) -> bool:
+    """Whether a bulk upload entry is an archive (by extension) rather than a document."""
+    return filename.lower().endswith(ARCHIVE_EXTENSIONS)
+
+
+def _member_filename(path: str) -> str | None:
+    """Document filename for an archive member (its base name); None for entries to skip
+    (hidden files, macOS resource forks)."""
+    parts = PurePosixPath(path.replace("\\", "/")).parts
+    if not parts or any(p.startswith(".") or p == "__MACOSX" for p in parts):
+        return None
+    return parts[-1]
+
+
+def _archive_members(
+    fileobj: BinaryIO, archive_name: str
+) -> Iterator[tuple[str, bytes | None, str | None]]:
+    """(filename, data, error) for each regular file in a zip or tar archive. Members declared
+    over 25 MB are not read; others are read up to 1 byte past the limit (validate_upload then
+    rejects them), so a member cannot inflate beyond that. Raises ValueError when the archive
+    cannot be read (members before the damage have been yielded)."""
+    if archive_name.lower().endswith(".zip"):
+        try:
+            archive = zipfile.ZipFile(fileobj)
+        except zipfile.BadZipFile as e:
+            raise ValueError(f"Invalid zip archive: {e}") from e
+        with archive:
+            for info in archive.infolist():
+                name = None if info.is_dir() else _member_filename(info.filename)
+                if name is None:
+                    continue
+                if info.file_size > MAX_SIZE_BYTES:
+                    yield name, None, f"File exceeds 25 MB limit ({info.file_size} bytes)"
+                    continue
+                try:
+                    with archive.open(info) as member:
+                        yield name, member.read(MAX_SIZE_BYTES + 1), None
+                except (zipfile.BadZipFile, zlib.error, OSError, EOFError) as e:
+                    yield name, None, f"Unreadable archive member: {e}"
+        return
+    try:
+        with tarfile.open(fileobj=fileobj, mode="r:*") as archive:
+            for info in archive:
+                name = _member_filename(info.name) if info.isfile() else None
+                if name is None:
+                    continue
+                if info.size > MAX_SIZE_BYTES:
+                    yield name, None, f"File exceeds 25 MB limit ({info.size} bytes)"
+                    continue
+                yield name, archive.extractfile(info).read(MAX_SIZE_BYTES + 1), None
+    except (tarfile.TarError, zlib.error, OSError, EOFError) as e:
+        raise ValueError(f"Invalid or truncated tar archive: {e}") from e
+
+
+class BulkUpload:
+    """Many documents in one request, written to S3 by a pool of bulk_upload_concurrency threads.
+
+    add() validates an entry (each filename once per request) and queues its write, blocking
+    while twice the pool size is waiting so memory stays bounded; add_archive() does the same
+    per file of a zip/tar archive. finish() waits for the writes and records the stored
+    documents in batches with one corpus version bump. mode may be set until finish();
+    discard() deletes the written objects of a request rejected at the end.
+
+    results has one entry per file in request order: {"document_id", "status": "stored" with
+    "document" (Document) once finished | "rejected" | "failed", "error" (unless stored)}.
+    """
+
+    def __init__(self, owner_id: str, mode: str | None = None):
+        settings = get_settings()
+        concurrency = max(1, settings.bulk_upload_concurrency)
+        self.owner_id = owner_id
+        self.mode = mode
+        self.results: list[dict] = []
+        self._max_files = settings.bulk_upload_max_files
+        self._pool = ThreadPoolExecutor(concurrency, thread_name_prefix="bulk-upload")
+        self._slots = threading.Semaphore(2 * concurrency)
+        self._futures: list[Future] = []
+        self._filenames: set[str] = set()
+        self._stored: list[tuple[dict, DocumentFormat, int]] = []
+        self._lock = threading.Lock()
+
+    def add(self, filename: str, content_type: str | None, data: bytes) -> None:
+        """Validate one file and queue its S3 write (blocks while the pool is saturated)."""
+        result = {"document_id": filename}
+        self.results.append(result)
+        fmt, err = validate_upload(filename, content_type, len(data))
+        if len(self.results) > self._max_files:
+            err = f"More than {self._max_files} files in one bulk upload"
+        elif err is None and not content_matches_format(fmt, data[:SNIFF_BYTES]):
+            err = f"File content does not match its format ({fmt.value})"
+        elif err is None and filename in self._filenames:
+            err = "Duplicate filename in this upload"
+        if err:
+            result.update(status="rejected", error=err)
+            return
+        self._filenames.add(filename)
+        self._slots.acquire()
+        ct = _stored_content_type(fmt, content_type)
+        self._futures.append(self._pool.submit(self._store, result, fmt, ct, data))
+
+    def add_archive(self, fileobj: BinaryIO, archive_name: str) -> None:
+        """add() each file of a zip/tar archive; an unreadable archive (or its damaged rest) is
+        rejected as one entry."""
+        try:
+            for filename, data, error in _archive_members(fileobj, archive_name):
+                if error:
+                    self.reject(filename, error)
+                else:
+                    self.add(filename, None, data)
+        except ValueError as e:
+            self.reject(archive_name, str(e))
+
+    def reject(self, filename: str, error: str) -> None:
+        self.results.append({"document_id": filename, "status": "rejected", "error": error})
+
+    def _store(self, result: dict, fmt: DocumentFormat, content_type: str, data: bytes) -> None:
+        try:
+            s3_storage.put_document(self.owner_id, result["document_id"], data, content_type)
+        except Exception as e:
+            get_logger().warning(
+                "Bulk upload: S3 write failed",
+                owner_id=self.owner_id,
+                filename=result["document_id"],
+                error=str(e),
+            )
+            result.update(status="failed", error=f"Storage error: {e}")
+        else:
+            with self._lock:
+                self._stored.append((result, fmt, len(data)))
+        finally:
+            self._slots.release()
+
+    def _wait(self) -> None:
+        for future in self._futures:
+            future.result()
+        self._pool.shutdown()
+
+    def finish(self) -> list[Document]:
+        """Wait for the S3 writes, then record the stored documents; returns them."""
+        if self.mode is None:
+            raise ValueError("mode must be upload_and_analyze or upload_and_queue")
+        self._wait()
+        if not self._stored:
+            return []
+        previous = metadata_store.get_metadata_batch(
+            self.owner_id, [result["document_id"] for result, _, _ in self._stored]
+        )
+        now = datetime.now(UTC)
+        docs = [
+            _new_document(
+                self.owner_id,
+                result["document_id"],
+                fmt,
+                size,
+                self.mode,
+                previous.get(result["document_id"]),
+                now,
+            )
+            for result, fmt, size in self._stored
+        ]
+        metadata_store.create_metadata_batch(docs)
+        metadata_store.bump_corpus_version(self.owner_id)
+        for (result, _, _), doc in zip(self._stored, docs, strict=True):
+            result.update(status="stored", document=doc)
+        return docs
+
+    def discard(self) -> None:
+        """Wait for the S3 writes and delete the objects written, recording nothing."""
+        self._wait()
+        filenames = [result["document_id"] for result, _, _ in self._stored]
+        s3_storage.delete_documents(self.owner_id, filenames)
+
+    def close(self) -> None:
+        """Stop the pool (queued writes are cancelled); safe after finish()."""
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+
+def processing_queue_full() -> bool:
+    """True when JOB_QUEUE_MAX_DEPTH is set and that many jobs are waiting (backpressure)."""
+    max_depth = get_settings().job_queue_max_depth
+    job_queue = get_job_queue()
+    return bool(max_depth and job_queue is not None and job_queue.stats().ready >= max_depth)
+
+
+def enqueue_processing(owner_id: str, filename: str) -> bool:
+    """
+    Queue processing of an upload_and_analyze document for the worker. Returns False when there is
+    no queue (JOB_QUEUE_BACKEND=background; the caller processes in-process). If the enqueue
+    fails the document is set to pending instead, so the scheduled batch job still picks it up.
+    """
+    job_queue = get_job_queue()
+    if job_queue is None:
+        return False
+    try:
+        job_queue.enqueue({"owner_id": owner_id, "filename": filename})
+    except Exception as e:
+        get_logger().warning(
+            "Enqueue failed; left pending for the batch job",
+            owner_id=owner_id,
+            filename=filename,
+            error=str(e),
+        )
+        metadata_store.update_status(owner_id, filename, ProcessingStatus.PENDING)
+    return True
+
+
+def enqueue_processing_many(owner_id: str, filenames: list[str]) -> bool:
+    """enqueue_processing for each document (bulk uploads); False when there is no queue."""
+    if get_job_queue() is None:
+        return False
+    for filename in filenames:
+        enqueue_processing(owner_id, filename)
+    return True
+
+
 def list_documents(
     owner_id: str, limit: int = 100, next_token: str | None = None
 ) -> tuple[list[Document], str | None]:
@@ -104,13 +514,190 @@ def get_document(owner_id: str, filename: str) -> Document | None:
 
 def delete_document(owner_id: str, filename: str) -> bool:
     """
-    Delete document: remove from S3, metadata, and S3 Vectors (when implemented).
-    Returns True if document existed and was deleted, False if not found.
+    Delete document: remove it from S3, the vector store, the local indexes and metadata. Vector
+    keys come from the document's manifest; documents without one fall back to an index scan. The
+    corpus version is bumped before the metadata goes, so a failed bump can be retried. Returns
+    True if the document existed and was deleted, False if not found.
     """
     doc = metadata_store.get_metadata(owner_id, filename)
     if not doc:
         return False
     s3_storage.delete_document(owner_id, filename)
-    vectors_storage.delete_vectors_by_document(owner_id, filename)
+    vectors_storage.delete_document_vectors(
+        owner_id, filename, doc.chunk_count, doc.vector_key_scheme, doc.vector_generation
+    )
+    _delete_local_indexes(owner_id, filename)
+    metadata_store.bump_corpus_version(owner_id)
     metadata_store.delete_metadata(owner_id, filename)
     return True
+
+
+def _delete_local_indexes(owner_id: str, filename: str) -> None:
+    """Drop a document from the fingerprint and lexical indexes and its checkpoints."""
+    fingerprint_index = get_fingerprint_index()
+    if fingerprint_index is not None:
+        fingerprint_index.delete_document(owner_id, filename)
+    lexical_index = get_lexical_index()
+    if lexical_index is not None:
+        lexical_index.delete_document(owner_id, filename)
+    checkpoint_store = get_checkpoint_store()
+    if checkpoint_store is not None:
+        checkpoint_store.delete(owner_id, filename)
+
+
+def iter_bulk_delete(
+    owner_id: str, filenames: list[str] | None = None, prefix: str | None = None
+) -> Iterator[dict]:
+    """
+    Delete many documents of owner_id: the given filenames, those starting with prefix, or (both
+    None) all of them, an owner purge, which also removes stored objects without metadata and
+    every vector under the owner. Works in batches of BULK_DELETE_BATCH documents and yields
+    progress after each ({"matched", "deleted", "failed", "not_found"} so far), then a summary
+    with "done": True, "complete", "orphans_deleted", "not_found_document_ids" and "failures"
+    ([{"document_id", "error"}]).
+
+    Within a batch the S3 objects (DeleteObjects), vectors (keys from the manifests, packed into
+    full DeleteVectors calls; one listing of the owner's keys for documents without a manifest)
+    and metadata (BatchWriteItem) are deleted by BULK_DELETE_CONCURRENCY threads. A document's
+    metadata goes last, only once everything else of it is gone: a failed document stays listed,
+    and running the same request again (every step is idempotent) resumes with exactly the
+    documents that are left.
+    """
+    settings = get_settings()
+    log = get_logger()
+    progress = {"matched": 0, "deleted": 0, "failed": 0, "not_found": 0}
+    not_found: list[str] = []
+    failures: list[dict] = []
+    orphans = 0
+    pool = ThreadPoolExecutor(
+        max(1, settings.bulk_delete_concurrency), thread_name_prefix="bulk-delete"
+    )
+    try:
+        for docs, missing in _bulk_delete_batches(owner_id, filenames, prefix):
+            failed = _delete_batch(owner_id, docs, pool) if docs else {}
+            not_found += missing
+            failures += [{"document_id": f, "error": e} for f, e in failed.items()]
+            progress["matched"] += len(docs)
+            progress["deleted"] += len(docs) - len(failed)
+            progress["failed"] += len(failed)
+            progress["not_found"] += len(missing)
+            log.info("Bulk delete progress", owner_id=owner_id, **progress)
+            yield dict(progress)
+        if filenames is None:
+            orphans = _delete_orphans(owner_id, prefix, {f["document_id"] for f in failures})
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+    log.info("Bulk delete finished", owner_id=owner_id, orphans_deleted=orphans, **progress)
+    yield {
+        **progress,
+        "done": True,
+        "complete": not failures,
+        "orphans_deleted": orphans,
+        "not_found_document_ids": not_found,
+        "failures": failures,
+    }
+
+
+def _bulk_delete_batches(
+    owner_id: str, filenames: list[str] | None, prefix: str | None
+) -> Iterator[tuple[list[Document], list[str]]]:
+    """(documents to delete, requested filenames without a document) per batch. Listings are
+    paged lazily, so each page is read after the previous batch was deleted."""
+    if filenames is not None:
+        unique = list(dict.fromkeys(filenames))
+        for start in range(0, len(unique), BULK_DELETE_BATCH):
+            batch = unique[start : start + BULK_DELETE_BATCH]
+            found = metadata_store.get_metadata_batch(owner_id, batch)
+            yield [found[f] for f in batch if f in found], [f for f in batch if f not in found]
+        return
+    next_token = None
+    while True:
+        docs, next_token = metadata_store.list_by_owner(
+            owner_id, limit=BULK_DELETE_BATCH, next_token=next_token, prefix=prefix
+        )
+        if docs:
+            yield docs, []
+        if not next_token:
+            return
+
+
+def _delete_batch(owner_id: str, docs: list[Document], pool: ThreadPoolExecutor) -> dict[str, str]:
+    """Delete a batch of documents everywhere; returns filename -> error for those that failed
+    (their metadata is kept)."""
+    filenames = [doc.filename for doc in docs]
+    failed: dict[str, str] = {}
+    s3_future = pool.submit(s3_storage.delete_documents, owner_id, filenames)
+    vector_futures: list[tuple[Future, list[str]]] = []
+    group: list[str] = []
+    group_keys: list[str] = []
+    unlisted: set[str] = set()
+    for doc in docs:
+        keys = vectors_storage.manifest_keys(
+            owner_id, doc.filename, doc.chunk_count, doc.vector_key_scheme, doc.vector_generation
+        )
+        if keys is None:
+            unlisted.add(doc.filename)
+            continue
+        if group and len(group_keys) + len(keys) > VECTOR_DELETE_BATCH_SIZE:
+            vector_futures.append((pool.submit(vectors_storage.delete_keys, group_keys), group))
+            group, group_keys = [], []
+        group.append(doc.filename)
+        group_keys += keys
+    if group_keys:
+        vector_futures.append((pool.submit(vectors_storage.delete_keys, group_keys), group))
+    if unlisted:
+        vector_futures.append(
+            (pool.submit(vectors_storage.delete_owner_vectors, owner_id, unlisted), list(unlisted))
+        )
+    try:
+        failed.update(s3_future.result())
+    except Exception as e:
+        failed.update(dict.fromkeys(filenames, f"S3 delete failed: {e}"))
+    for future, affected in vector_futures:
+        try:
+            future.result()
+        except Exception as e:
+            for filename in affected:
+                failed.setdefault(filename, f"Vector delete failed: {e}")
+
+    done = [f for f in filenames if f not in failed]
+    for filename in done:
+        _delete_local_indexes(owner_id, filename)
+    if not done:
+        return failed
+    metadata_store.bump_corpus_version(owner_id)
+    slices = [
+        done[start : start + BULK_DELETE_METADATA_SLICE]
+        for start in range(0, len(done), BULK_DELETE_METADATA_SLICE)
+    ]
+    metadata_futures = [
+        (pool.submit(metadata_store.delete_metadata_batch, owner_id, names), names)
+        for names in slices
+    ]
+    for future, names in metadata_futures:
+        try:
+            future.result()
+        except Exception as e:
+            failed.update(dict.fromkeys(names, f"Metadata delete failed: {e}"))
+    return failed
+
+
+def _delete_orphans(owner_id: str, prefix: str | None, failed: set[str]) -> int:
+    """After a prefix delete or purge: stored objects without metadata (e.g. left by an
+    interrupted bulk upload) and, for a purge, vectors of documents no longer recorded. Uploads
+    write the object before its metadata, so objects younger than
+    BULK_DELETE_ORPHAN_GRACE_SECONDS may belong to one in flight and are kept."""
+    grace = timedelta(seconds=get_settings().bulk_delete_orphan_grace_seconds)
+    listed = [
+        f
+        for f in s3_storage.list_document_filenames(
+            owner_id, prefix or "", modified_before=datetime.now(UTC) - grace
+        )
+        if f not in failed
+    ]
+    recorded = metadata_store.get_metadata_batch(owner_id, listed)
+    orphans = [f for f in listed if f not in recorded]
+    errors = s3_storage.delete_documents(owner_id, orphans) if orphans else {}
+    if prefix is None and not failed:
+        vectors_storage.delete_unrecorded_vectors(owner_id)
+    return len(orphans) - len(errors)
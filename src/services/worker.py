@@ -0,0 +1,227 @@
+"""Processing worker for upload_and_analyze documents, separate from the API process.
+
+Leases jobs from the job queue (JOB_QUEUE_BACKEND sqlite | sqs) and runs process_document for up
+to --concurrency documents at a time. A processed job is acked; a job whose processing raised is
+nacked with exponential backoff and dead-lettered after JOB_MAX_ATTEMPTS leases. Leases of running
+jobs are renewed while they run, so a document slower than JOB_VISIBILITY_TIMEOUT_SECONDS is not
+leased twice; a job whose worker dies is retried once its lease expires. A failed ack or nack is
+logged (the job is then retried when its lease expires). SIGTERM / SIGINT stop leasing and let
+running documents finish.
+
+Metrics: jobs.queue_depth (gauge by state), jobs.oldest_age_seconds (gauge), jobs.age_seconds
+(enqueue to lease), jobs.run_seconds (by outcome) and, from the pipeline, processing.stage_seconds.
+
+Usage: python -m src.services.worker [--concurrency 2] [--drain] [--stats]
+"""
+
+import argparse
+import json
+import signal
+import threading
+import time
+from collections.abc import Iterator
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from dataclasses import asdict
+
+from src.api.config import get_settings
+from src.observability import metrics
+from src.observability.logging import configure_logging, get_logger
+from src.observability.telemetry import setup_telemetry
+from src.services import process_service
+from src.storage import clients
+from src.storage.job_queue import Job, JobQueue, get_job_queue
+
+# Longest wait for a job while idle (SQS long poll); also how often stop is checked.
+POLL_WAIT_SECONDS = 5.0
+RETRY_BACKOFF_BASE_SECONDS = 30.0
+RETRY_BACKOFF_MAX_SECONDS = 900.0
+# Running jobs' leases are renewed this many times per visibility timeout.
+LEASE_RENEWALS_PER_TIMEOUT = 3
+
+
+class _LeaseRenewer:
+    """Background thread extending the lease of every running job by a full visibility timeout,
+    LEASE_RENEWALS_PER_TIMEOUT times per timeout."""
+
+    def __init__(self, job_queue: JobQueue):
+        self._job_queue = job_queue
+        self._jobs: dict[str, Job] = {}
+        # Held while renewing: a job leaves (and is acked) only after an in-progress renewal.
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="lease-renewer", daemon=True)
+        self._thread.start()
+
+    @contextmanager
+    def holding(self, job: Job) -> Iterator[None]:
+        """Keep job leased for the duration of the block."""
+        with self._lock:
+            self._jobs[job.receipt] = job
+        try:
+            yield
+        finally:
+            with self._lock:
+                del self._jobs[job.receipt]
+
+    def _run(self) -> None:
+        timeout = self._job_queue.visibility_timeout_seconds
+        while not self._stop.wait(timeout / LEASE_RENEWALS_PER_TIMEOUT):
+            with self._lock:
+                for job in self._jobs.values():
+                    self._renew(job, timeout)
+
+    def _renew(self, job: Job, timeout: float) -> None:
+        try:
+            held = self._job_queue.extend(job, timeout)
+        except Exception as e:
+            get_logger().warning("Job lease renewal failed", job_id=job.id, error=str(e))
+            return
+        if not held:
+            get_logger().warning("Job lease lost", job_id=job.id, attempts=job.attempts)
+
+    def close(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+def run_worker(
+    concurrency: int | None = None,
+    job_queue: JobQueue | None = None,
+    stop: threading.Event | None = None,
+    drain: bool = False,
+) -> int:
+    """
+    Process queued jobs until stop is set (or, with drain, until the queue has no visible jobs
+    and nothing is running). Returns the number of jobs handled (acked or nacked).
+    concurrency defaults to WORKER_CONCURRENCY; job_queue to get_job_queue().
+    """
+    concurrency = max(1, concurrency or get_settings().worker_concurrency)
+    job_queue = job_queue or get_job_queue()
+    if job_queue is None:
+        raise ValueError("JOB_QUEUE_BACKEND=background has no queue; process in the API instead")
+    stop = stop or threading.Event()
+    handled = 0
+    in_flight: set = set()
+    pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="job")
+    renewer = _LeaseRenewer(job_queue)
+    try:
+        while not stop.is_set():
+            free = concurrency - len(in_flight)
+            if free:
+                idle = not in_flight and not drain
+                jobs = job_queue.lease(free, wait_seconds=POLL_WAIT_SECONDS if idle else 0.0)
+                in_flight.update(pool.submit(_run_job, job_queue, job, renewer) for job in jobs)
+                if drain and not in_flight:
+                    break
+            if in_flight:
+                # With free slots, come back to lease new jobs; otherwise wait for a slot.
+                done, in_flight = wait(
+                    in_flight,
+                    timeout=1.0 if len(in_flight) < concurrency else None,
+                    return_when=FIRST_COMPLETED,
+                )
+                for future in done:
+                    future.result()
+                    handled += 1
+        for future in in_flight:
+            future.result()
+            handled += 1
+    finally:
+        pool.shutdown(wait=True)
+        renewer.close()
+    return handled
+
+
+def _run_job(job_queue: JobQueue, job: Job, renewer: _LeaseRenewer) -> None:
+    """Process one job's document; ack on success, nack with backoff when processing raised."""
+    metrics.histogram("jobs.age_seconds", unit="s").record(job.age_seconds)
+    owner_id, filename = job.payload["owner_id"], job.payload["filename"]
+    started = time.monotonic()
+    try:
+        with renewer.holding(job):
+            process_service.process_document(owner_id, filename)
+    except Exception as e:
+        outcome = "retry"
+        delay = min(RETRY_BACKOFF_MAX_SECONDS, RETRY_BACKOFF_BASE_SECONDS * 2 ** (job.attempts - 1))
+        get_logger().warning(
+            "Job failed",
+            job_id=job.id,
+            owner_id=owner_id,
+            filename=filename,
+            attempts=job.attempts,
+            retry_in_seconds=delay,
+            error=str(e),
+        )
+        _settle(job_queue.nack, job, delay)
+    else:
+        # Includes documents marked failed without raising (no text, missing object): not retried.
+        outcome = "done"
+        _settle(job_queue.ack, job)
+    metrics.histogram("jobs.run_seconds", unit="s").record(
+        time.monotonic() - started, {"outcome": outcome}
+    )
+
+
+def _settle(operation, job: Job, *args) -> None:
+    """ack or nack job; a failure is logged, not raised, so the worker keeps running (the job is
+    leased again once its lease expires)."""
+    try:
+        operation(job, *args)
+    except Exception as e:
+        get_logger().warning(
+            "Job settle failed",
+            operation=operation.__name__,
+            job_id=job.id,
+            attempts=job.attempts,
+            error=str(e),
+        )
+
+
+def _queue_depth(job_queue: JobQueue) -> list[tuple[float, dict]]:
+    stats = job_queue.stats()
+    return [
+        (stats.ready, {"state": "ready"}),
+        (stats.leased, {"state": "leased"}),
+        (stats.dead, {"state": "dead"}),
+    ]
+
+
+def _oldest_age(job_queue: JobQueue) -> list[tuple[float, dict]]:
+    age = job_queue.stats().oldest_age_seconds
+    return [] if age is None else [(age, {})]
+
+
+def main(argv: list[str] | None = None) -> None:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Process queued upload_and_analyze documents.")
+    parser.add_argument("--concurrency", type=int, default=settings.worker_concurrency)
+    parser.add_argument("--drain", action="store_true", help="Exit once the queue is empty")
+    parser.add_argument("--stats", action="store_true", help="Print queue depth and exit")
+    args = parser.parse_args(argv)
+    configure_logging()
+    job_queue = get_job_queue()
+    if job_queue is None:
+        parser.error("JOB_QUEUE_BACKEND=background: there is no queue to work on")
+    if args.stats:
+        print(json.dumps(asdict(job_queue.stats())))
+        return
+    setup_telemetry(
+        service_name=f"{settings.otel_service_name}-worker",
+        otlp_endpoint=settings.otel_exporter_otlp_endpoint,
+    )
+    clients.warm_up()
+    metrics.observable_gauge("jobs.queue_depth", lambda: _queue_depth(job_queue))
+    metrics.observable_gauge("jobs.oldest_age_seconds", lambda: _oldest_age(job_queue), unit="s")
+    stop = threading.Event()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *_: stop.set())
+    get_logger().info(
+        "Worker started", backend=settings.job_queue_backend, concurrency=args.concurrency
+    )
+    handled = run_worker(args.concurrency, job_queue, stop, drain=args.drain)
+    get_logger().info("Worker stopped", jobs=handled)
+
+
+if __name__ == "__main__":
+    main()
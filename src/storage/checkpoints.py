@@ -0,0 +1,218 @@
+"""Processing checkpoints (local SQLite scratch area) so a failed run resumes instead of restarting.
+
+One checkpoint per document, tagged with a content key (S3 ETag and size of the object plus the
+chunking and embedding settings). It holds the chunk texts produced so far (complete once the
+whole document was extracted) and the float32 embedding of every chunk embedded so far. A retry
+of the same content skips extraction when the chunk list is complete and embeds only chunks
+without a stored embedding. Opening a checkpoint for different content replaces the old one;
+process_service deletes it once the document is processed, and stale ones are pruned by age.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from collections.abc import Iterator
+
+from src.api.config import get_settings
+
+
+def content_key(*parts: object) -> str:
+    """Hex digest of the values that determine a document's chunks and embeddings."""
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(str(part).encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+class Checkpoint:
+    """Checkpoint of one document's content (a handle into CheckpointStore)."""
+
+    def __init__(
+        self, store: "CheckpointStore", owner_id: str, filename: str, chunk_count: int | None
+    ):
+        self._store = store
+        self.owner_id = owner_id
+        self.filename = filename
+        # Chunks of the whole document are recorded (extraction can be skipped).
+        self.complete = chunk_count is not None
+
+    def chunks(self) -> Iterator[str]:
+        """Recorded chunk texts in chunk_index order."""
+        return self._store._chunks(self.owner_id, self.filename)
+
+    def add_chunks(self, rows: list[tuple[int, str]]) -> None:
+        """Record (chunk_index, text); an index whose text changed loses its embedding."""
+        self._store._add_chunks(self.owner_id, self.filename, rows)
+
+    def mark_complete(self, chunk_count: int) -> None:
+        self._store._mark_complete(self.owner_id, self.filename, chunk_count)
+        self.complete = True
+
+    def delete(self) -> None:
+        """Drop the checkpoint (the document is processed)."""
+        self._store.delete(self.owner_id, self.filename)
+
+    def embeddings(self, batch: list[tuple[int, str]]) -> dict[int, array]:
+        """Stored embeddings for (chunk_index, text) whose recorded text is the same."""
+        return self._store._embeddings(self.owner_id, self.filename, batch)
+
+    def add_embeddings(self, rows: list[tuple[int, str, array]]) -> None:
+        """Record (chunk_index, text, embedding)."""
+        self._store._add_embeddings(self.owner_id, self.filename, rows)
+
+
+class CheckpointStore:
+    """SQLite-backed checkpoint store. Thread-safe (one connection guarded by a lock)."""
+
+    def __init__(self, path: str):
+        if path != ":memory:":
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS checkpoints ("
+            " owner_id TEXT NOT NULL, filename TEXT NOT NULL, content_key TEXT NOT NULL,"
+            " chunk_count INTEGER, updated_at REAL NOT NULL, PRIMARY KEY (owner_id, filename))"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS checkpoint_chunks ("
+            " owner_id TEXT NOT NULL, filename TEXT NOT NULL, chunk_index INTEGER NOT NULL,"
+            " text TEXT NOT NULL, embedding BLOB, PRIMARY KEY (owner_id, filename, chunk_index))"
+        )
+
+    def open(self, owner_id: str, filename: str, key: str) -> Checkpoint:
+        """Checkpoint for this content of the document; one for other content is dropped."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT content_key, chunk_count FROM checkpoints WHERE owner_id = ? AND filename = ?",
+                (owner_id, filename),
+            ).fetchone()
+            if row is not None and row[0] == key:
+                self._touch(owner_id, filename)
+                return Checkpoint(self, owner_id, filename, row[1])
+            self._delete(owner_id, filename)
+            self._db.execute(
+                "INSERT INTO checkpoints VALUES (?, ?, ?, NULL, ?)",
+                (owner_id, filename, key, time.time()),
+            )
+        return Checkpoint(self, owner_id, filename, None)
+
+    def delete(self, owner_id: str, filename: str) -> None:
+        """Remove the document's checkpoint (processed or deleted)."""
+        with self._lock:
+            self._delete(owner_id, filename)
+
+    def prune(self, max_age_seconds: float) -> int:
+        """Remove checkpoints not used for max_age_seconds; returns how many."""
+        cutoff = time.time() - max_age_seconds
+        with self._lock:
+            stale = self._db.execute(
+                "SELECT owner_id, filename FROM checkpoints WHERE updated_at < ?", (cutoff,)
+            ).fetchall()
+            for owner_id, filename in stale:
+                self._delete(owner_id, filename)
+        return len(stale)
+
+    def _delete(self, owner_id: str, filename: str) -> None:
+        for table in ("checkpoints", "checkpoint_chunks"):
+            self._db.execute(
+                f"DELETE FROM {table} WHERE owner_id = ? AND filename = ?", (owner_id, filename)
+            )
+
+    def _touch(self, owner_id: str, filename: str) -> None:
+        self._db.execute(
+            "UPDATE checkpoints SET updated_at = ? WHERE owner_id = ? AND filename = ?",
+            (time.time(), owner_id, filename),
+        )
+
+    def _chunks(self, owner_id: str, filename: str) -> Iterator[str]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT text FROM checkpoint_chunks WHERE owner_id = ? AND filename = ?"
+                " ORDER BY chunk_index",
+                (owner_id, filename),
+            ).fetchall()
+        return (text for (text,) in rows)
+
+    def _add_chunks(self, owner_id: str, filename: str, rows: list[tuple[int, str]]) -> None:
+        with self._lock:
+            self._db.executemany(
+                "INSERT INTO checkpoint_chunks (owner_id, filename, chunk_index, text)"
+                " VALUES (?, ?, ?, ?) ON CONFLICT (owner_id, filename, chunk_index) DO UPDATE"
+                " SET text = excluded.text,"
+                " embedding = CASE WHEN text = excluded.text THEN embedding END",
+                [(owner_id, filename, index, text) for index, text in rows],
+            )
+            self._touch(owner_id, filename)
+
+    def _mark_complete(self, owner_id: str, filename: str, chunk_count: int) -> None:
+        with self._lock:
+            self._db.execute(
+                "DELETE FROM checkpoint_chunks"
+                " WHERE owner_id = ? AND filename = ? AND chunk_index >= ?",
+                (owner_id, filename, chunk_count),
+            )
+            self._db.execute(
+                "UPDATE checkpoints SET chunk_count = ? WHERE owner_id = ? AND filename = ?",
+                (chunk_count, owner_id, filename),
+            )
+
+    def _embeddings(
+        self, owner_id: str, filename: str, batch: list[tuple[int, str]]
+    ) -> dict[int, array]:
+        if not batch:
+            return {}
+        texts = dict(batch)
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT chunk_index, text, embedding FROM checkpoint_chunks"
+                " WHERE owner_id = ? AND filename = ? AND chunk_index BETWEEN ? AND ?"
+                " AND embedding IS NOT NULL",
+                (owner_id, filename, min(texts), max(texts)),
+            ).fetchall()
+        found = {}
+        for index, text, blob in rows:
+            if texts.get(index) == text:
+                vec = array("f")
+                vec.frombytes(blob)
+                found[index] = vec
+        return found
+
+    def _add_embeddings(
+        self, owner_id: str, filename: str, rows: list[tuple[int, str, array]]
+    ) -> None:
+        with self._lock:
+            self._db.executemany(
+                "INSERT INTO checkpoint_chunks VALUES (?, ?, ?, ?, ?)"
+                " ON CONFLICT (owner_id, filename, chunk_index) DO UPDATE"
+                " SET text = excluded.text, embedding = excluded.embedding",
+                [(owner_id, filename, i, text, vec.tobytes()) for i, text, vec in rows],
+            )
+
+
+_store: CheckpointStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_checkpoint_store() -> CheckpointStore | None:
+    """Process-wide store from CHECKPOINT_PATH (None when empty). Checkpoints older than
+    CHECKPOINT_MAX_AGE_SECONDS are pruned when the store is opened."""
+    global _store
+    settings = get_settings()
+    path = (settings.checkpoint_path or "").strip()
+    if not path:
+        return None
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = CheckpointStore(path)
+                _store.prune(settings.checkpoint_max_age_seconds)
+    return _store
@@ -0,0 +1,165 @@
+"""Process-wide AWS clients: one pooled, long-lived boto3 client per service.
+
+Building a boto3 client loads the service model, resolves credentials and starts with an empty
+connection pool, so creating one per call adds that cost (and a fresh TCP/TLS handshake) to every
+S3 read, metadata lookup and Bedrock call. get_client() instead returns a shared client per
+service, created once under a lock from one boto3 session; boto3 clients are thread-safe and reuse
+kept-alive connections from a pool of AWS_<SERVICE>_MAX_POOL_CONNECTIONS. DynamoDB goes through
+the low-level client too (metadata serializes items itself): boto3 resources are not thread-safe,
+and one per thread would build a client per thread, including every short-lived pool thread.
+AWS_ENDPOINT_URL (LocalStack) applies to every service but Bedrock. Embeddings get a Bedrock
+runtime client of their own without botocore retries: embedding_service retries throttling itself,
+and the two would multiply the attempts per text.
+
+warm_up() builds the clients the process will use and resolves credentials up front (API
+lifespan, worker start); reset() drops them, e.g. after changing settings.
+"""
+
+import os
+import threading
+import time
+
+import boto3
+from botocore.config import Config
+
+from src.api.config import get_settings
+from src.observability.logging import get_logger
+
+S3 = "s3"
+DYNAMODB = "dynamodb"
+S3VECTORS = "s3vectors"
+BEDROCK_RUNTIME = "bedrock-runtime"
+# Bedrock runtime client for embedding calls: single attempt (the caller retries).
+BEDROCK_EMBEDDINGS = "bedrock-runtime:embeddings"
+SQS = "sqs"
+
+_session: boto3.session.Session | None = None
+_clients: dict[str, object] = {}
+# Process that built the clients: a forked child must not share its parent's connections.
+_pid = os.getpid()
+_lock = threading.Lock()
+
+
+def _pool_size(service: str) -> int:
+    settings = get_settings()
+    sizes = {
+        S3: settings.aws_s3_max_pool_connections,
+        DYNAMODB: settings.aws_dynamodb_max_pool_connections,
+        S3VECTORS: settings.aws_s3vectors_max_pool_connections,
+        BEDROCK_RUNTIME: settings.aws_bedrock_max_pool_connections,
+        BEDROCK_EMBEDDINGS: settings.aws_bedrock_max_pool_connections,
+        SQS: settings.aws_sqs_max_pool_connections,
+    }
+    if service not in sizes:
+        raise ValueError(f"Unknown AWS service: {service}")
+    return sizes[service]
+
+
+def _service_name(service: str) -> str:
+    """boto3 service name of a client registry key (BEDROCK_EMBEDDINGS is a bedrock-runtime)."""
+    return service.split(":", 1)[0]
+
+
+def client_config(service: str) -> Config:
+    """botocore Config for service: pool size, keep-alive, retries and timeouts from settings."""
+    settings = get_settings()
+    bedrock = _service_name(service) == BEDROCK_RUNTIME
+    read_timeout = (
+        settings.aws_bedrock_read_timeout_seconds if bedrock else settings.aws_read_timeout_seconds
+    )
+    max_attempts = 1 if service == BEDROCK_EMBEDDINGS else settings.aws_max_attempts
+    return Config(
+        max_pool_connections=_pool_size(service),
+        tcp_keepalive=settings.aws_tcp_keepalive,
+        retries={"mode": settings.aws_retry_mode, "total_max_attempts": max_attempts},
+        connect_timeout=settings.aws_connect_timeout_seconds,
+        read_timeout=read_timeout,
+    )
+
+
+def _kwargs(service: str) -> dict:
+    settings = get_settings()
+    kwargs = {"region_name": settings.aws_region, "config": client_config(service)}
+    endpoint = (settings.aws_endpoint_url or "").strip()
+    if endpoint and _service_name(service) != BEDROCK_RUNTIME:
+        kwargs["endpoint_url"] = endpoint
+    return kwargs
+
+
+def _get_session() -> boto3.session.Session:
+    """Shared session (call with _lock held): boto3 sessions are not thread-safe."""
+    global _session
+    if _session is None:
+        _session = boto3.session.Session()
+    return _session
+
+
+def _log_created(service: str, kwargs: dict) -> None:
+    config = kwargs["config"]
+    get_logger().debug(
+        "AWS client created",
+        service=service,
+        aws_region=kwargs["region_name"],
+        aws_endpoint_url=kwargs.get("endpoint_url"),
+        max_pool_connections=config.max_pool_connections,
+        retry_mode=config.retries["mode"],
+    )
+
+
+def get_client(service: str):
+    """Shared boto3 client for service (S3 | DYNAMODB | S3VECTORS | BEDROCK_RUNTIME |
+    BEDROCK_EMBEDDINGS | SQS)."""
+    if _pid != os.getpid():
+        reset()
+    client = _clients.get(service)
+    if client is None:
+        with _lock:
+            client = _clients.get(service)
+            if client is None:
+                kwargs = _kwargs(service)
+                client = _get_session().client(_service_name(service), **kwargs)
+                _clients[service] = client
+                _log_created(service, kwargs)
+    return client
+
+
+def _services() -> list[str]:
+    """Services this process uses with the current settings."""
+    settings = get_settings()
+    services = [S3, DYNAMODB, BEDROCK_RUNTIME, BEDROCK_EMBEDDINGS]
+    if settings.vector_store_backend == "s3vectors":
+        services.append(S3VECTORS)
+    if settings.job_queue_backend == "sqs":
+        services.append(SQS)
+    return services
+
+
+def warm_up(services: list[str] | None = None) -> None:
+    """Create clients for services (default: those the settings use) and resolve credentials, so
+    the first requests skip that work. Failures are logged, not raised: the calls that need AWS
+    report them."""
+    start = time.perf_counter()
+    services = services if services is not None else _services()
+    try:
+        for service in services:
+            get_client(service)
+        with _lock:
+            credentials = _get_session().get_credentials()
+    except Exception as e:
+        get_logger().warning("AWS client warm-up failed", error=str(e))
+        return
+    get_logger().info(
+        "AWS clients warmed up",
+        services=services,
+        credentials=credentials is not None,
+        seconds=round(time.perf_counter() - start, 3),
+    )
+
+
+def reset() -> None:
+    """Drop cached clients; the next calls build new ones from current settings."""
+    global _session, _pid
+    with _lock:
+        _clients.clear()
+        _session = None
+        _pid = os.getpid()
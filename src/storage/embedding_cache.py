@@ -0,0 +1,139 @@
+"""Content-addressed embedding cache: bounded in-process LRU backed by a local SQLite tier.
+
+Key = sha256(model_id, dimensions, stripped text), so a cached vector is valid for exactly the
+request that produced it. Values are stored as packed float32 (4 bytes per dimension).
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+from array import array
+from collections import OrderedDict
+
+from src.api.config import get_settings
+from src.observability import metrics
+
+
+def cache_key(model_id: str, dimensions: int, text: str) -> str:
+    """Hex digest identifying an embedding request (model, dimension count, stripped text)."""
+    h = hashlib.sha256()
+    h.update(model_id.encode("utf-8"))
+    h.update(b"\x00")
+    h.update(str(dimensions).encode("ascii"))
+    h.update(b"\x00")
+    h.update(text.encode("utf-8"))
+    return h.hexdigest()
+
+
+class EmbeddingCache:
+    """Two-tier embedding cache. Thread-safe; the SQLite tier is optional (path=None disables it).
+
+    Counters (hits split by tier, misses, evictions from the memory tier) are kept locally for
+    stats() and mirrored to OpenTelemetry as <metric_prefix>.* counters (embedding_cache.*).
+    """
+
+    def __init__(
+        self, max_entries: int, path: str | None = None, metric_prefix: str = "embedding_cache"
+    ):
+        self.max_entries = max(0, max_entries)
+        self.metric_prefix = metric_prefix
+        self._lru: OrderedDict[str, array] = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: sqlite3.Connection | None = None
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+            )
+
+    def get(self, key: str) -> array | None:
+        """Return a copy of the cached embedding for key, or None. Disk hits are promoted to memory."""
+        with self._lock:
+            vec = self._lru.get(key)
+            if vec is not None:
+                self._lru.move_to_end(key)
+                self.memory_hits += 1
+                metrics.counter(f"{self.metric_prefix}.hits").add(1, {"tier": "memory"})
+                return vec[:]
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT vector FROM embeddings WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    vec = array("f")
+                    vec.frombytes(row[0])
+                    self._remember(key, vec)
+                    self.disk_hits += 1
+                    metrics.counter(f"{self.metric_prefix}.hits").add(1, {"tier": "disk"})
+                    return vec[:]
+            self.misses += 1
+            metrics.counter(f"{self.metric_prefix}.misses").add(1)
+            return None
+
+    def put(self, key: str, embedding: array) -> None:
+        """Store a float32 embedding in both tiers (replaces any existing value for key)."""
+        vec = embedding[:]
+        with self._lock:
+            self._remember(key, vec)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                    (key, vec.tobytes()),
+                )
+
+    def _remember(self, key: str, vec: array) -> None:
+        """Insert into the LRU tier, evicting least-recently-used entries. Caller holds the lock."""
+        if self.max_entries == 0:
+            return
+        self._lru[key] = vec
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+            self.evictions += 1
+            metrics.counter(f"{self.metric_prefix}.evictions").add(1)
+
+    def stats(self) -> dict[str, int]:
+        """Counters since process start plus current memory-tier size."""
+        with self._lock:
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "memory_entries": len(self._lru),
+            }
+
+    def close(self) -> None:
+        """Close the SQLite tier (memory tier stays usable)."""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+_cache: EmbeddingCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Process-wide cache configured from EMBEDDING_CACHE_MAX_ENTRIES / EMBEDDING_CACHE_PATH."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                s = get_settings()
+                _cache = EmbeddingCache(
+                    max_entries=s.embedding_cache_max_entries,
+                    path=(s.embedding_cache_path or "").strip() or None,
+                )
+    return _cache
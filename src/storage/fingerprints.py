@@ -0,0 +1,150 @@
+"""Per-owner chunk fingerprint index (SimHash, local SQLite) for near-duplicate suppression.
+
+Each row is one stored chunk: (owner_id, document_filename, chunk_index) -> 64-bit SimHash, the
+embedding that was stored for it and the documents known to contain that text. Lookups use the
+pigeonhole trick: fingerprints within Hamming distance < 4 share at least one 16-bit band, so only
+rows matching a band are compared.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from array import array
+from dataclasses import dataclass
+
+from src.api.config import get_settings
+
+BANDS = 4
+BAND_BITS = 16
+# Source documents recorded per fingerprint (and per vector) are capped to keep metadata small.
+MAX_SOURCE_DOCUMENTS = 16
+
+
+@dataclass(frozen=True)
+class FingerprintMatch:
+    """Closest stored chunk for a fingerprint."""
+
+    document_filename: str
+    chunk_index: int
+    distance: int
+    embedding: array
+    source_documents: list[str]
+
+
+def _signed(value: int) -> int:
+    """Map an unsigned 64-bit fingerprint onto SQLite's signed INTEGER range."""
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def _bands(fingerprint: int) -> list[int]:
+    mask = (1 << BAND_BITS) - 1
+    return [(fingerprint >> (i * BAND_BITS)) & mask for i in range(BANDS)]
+
+
+class FingerprintIndex:
+    """SQLite-backed fingerprint index. Thread-safe (one connection guarded by a lock)."""
+
+    def __init__(self, path: str):
+        if path != ":memory:":
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS fingerprints ("
+            " owner_id TEXT NOT NULL, document_filename TEXT NOT NULL, chunk_index INTEGER NOT NULL,"
+            " fingerprint INTEGER NOT NULL, b0 INTEGER, b1 INTEGER, b2 INTEGER, b3 INTEGER,"
+            " embedding BLOB NOT NULL, sources TEXT NOT NULL,"
+            " PRIMARY KEY (owner_id, document_filename, chunk_index))"
+        )
+        for band in range(BANDS):
+            self._db.execute(
+                f"CREATE INDEX IF NOT EXISTS fingerprints_b{band} ON fingerprints (owner_id, b{band})"
+            )
+
+    def find(self, owner_id: str, fingerprint: int, max_distance: int) -> FingerprintMatch | None:
+        """Closest row of owner_id within max_distance bits (< BANDS), or None."""
+        b = _bands(fingerprint)
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT document_filename, chunk_index, fingerprint, embedding, sources"
+                " FROM fingerprints WHERE owner_id = ?"
+                " AND (b0 = ? OR b1 = ? OR b2 = ? OR b3 = ?)",
+                (owner_id, *b),
+            ).fetchall()
+        best = None
+        for filename, index, stored, blob, sources in rows:
+            distance = ((stored & ((1 << 64) - 1)) ^ fingerprint).bit_count()
+            if distance <= max_distance and (best is None or distance < best[0]):
+                best = (distance, filename, index, blob, sources)
+        if best is None:
+            return None
+        distance, filename, index, blob, sources = best
+        vec = array("f")
+        vec.frombytes(blob)
+        return FingerprintMatch(filename, index, distance, vec, json.loads(sources))
+
+    def add_many(
+        self,
+        owner_id: str,
+        document_filename: str,
+        rows: list[tuple[int, int, array, list[str]]],
+    ) -> None:
+        """Insert or replace (chunk_index, fingerprint, embedding, source_documents) rows."""
+        params = [
+            (
+                owner_id,
+                document_filename,
+                index,
+                _signed(fingerprint),
+                *_bands(fingerprint),
+                embedding.tobytes(),
+                json.dumps(sources[:MAX_SOURCE_DOCUMENTS]),
+            )
+            for index, fingerprint, embedding, sources in rows
+        ]
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO fingerprints VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", params
+            )
+
+    def delete_chunks(
+        self, owner_id: str, document_filename: str, chunk_indices: list[int]
+    ) -> None:
+        """Remove rows for specific chunks of a document."""
+        with self._lock:
+            self._db.executemany(
+                "DELETE FROM fingerprints"
+                " WHERE owner_id = ? AND document_filename = ? AND chunk_index = ?",
+                [(owner_id, document_filename, i) for i in chunk_indices],
+            )
+
+    def delete_document(self, owner_id: str, document_filename: str) -> None:
+        """Remove every row of a document."""
+        with self._lock:
+            self._db.execute(
+                "DELETE FROM fingerprints WHERE owner_id = ? AND document_filename = ?",
+                (owner_id, document_filename),
+            )
+
+
+_index: FingerprintIndex | None = None
+_index_lock = threading.Lock()
+
+
+def get_fingerprint_index() -> FingerprintIndex | None:
+    """Process-wide index from FINGERPRINT_INDEX_PATH; None when dedup is disabled or path empty."""
+    global _index
+    settings = get_settings()
+    path = (settings.fingerprint_index_path or "").strip()
+    if not settings.dedup_enabled or not path:
+        return None
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = FingerprintIndex(path)
+    return _index
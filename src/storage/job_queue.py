@@ -0,0 +1,298 @@
+"""Durable processing job queue: enqueue / lease / ack / nack.
+
+A leased job is invisible to other consumers until its lease (visibility timeout) expires; extend
+renews the lease of a job still being worked on, ack removes it, nack makes it visible again after
+a delay. A job leased max_attempts times without
+an ack is dead-lettered (SQLite: kept with state 'dead'; SQS: the queue's redrive policy).
+
+Backends (JOB_QUEUE_BACKEND): "background" (default; no queue: the API processes in-process with
+FastAPI BackgroundTasks), "sqlite" (local file shared by the API and worker processes on one host)
+and "sqs" (JOB_QUEUE_URL, standard or FIFO queue). The queue backends need a worker running.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Protocol
+
+from src.api.config import get_settings
+from src.observability.logging import get_logger
+from src.storage import clients
+
+# SQS ReceiveMessage returns at most 10 messages per call.
+SQS_MAX_RECEIVE = 10
+
+
+@dataclass(frozen=True)
+class Job:
+    """A leased job. receipt identifies this lease for ack/nack."""
+
+    id: str
+    payload: dict
+    enqueued_at: float
+    attempts: int
+    receipt: str
+
+    @property
+    def age_seconds(self) -> float:
+        return max(0.0, time.time() - self.enqueued_at)
+
+
+@dataclass(frozen=True)
+class QueueStats:
+    """Queue depth by state: ready (visible), leased (in flight, or waiting out a retry delay) and
+    dead; oldest_age_seconds is the wait of the oldest ready job (None when unknown or empty)."""
+
+    ready: int
+    leased: int
+    dead: int = 0
+    oldest_age_seconds: float | None = None
+
+
+class JobQueue(Protocol):
+    visibility_timeout_seconds: float
+
+    def enqueue(self, payload: dict) -> str:
+        """Add a job; returns its id."""
+        ...
+
+    def lease(self, max_jobs: int = 1, wait_seconds: float = 0.0) -> list[Job]:
+        """Take up to max_jobs visible jobs, waiting up to wait_seconds for the first one."""
+        ...
+
+    def extend(self, job: Job, seconds: float) -> bool:
+        """Keep the job leased for seconds from now; False when this lease is no longer held."""
+        ...
+
+    def ack(self, job: Job) -> None:
+        """The job is done; remove it."""
+        ...
+
+    def nack(self, job: Job, delay_seconds: float = 0.0) -> None:
+        """Release the lease; the job is retried after delay_seconds (or dead-lettered)."""
+        ...
+
+    def stats(self) -> QueueStats: ...
+
+
+class SQLiteJobQueue:
+    """Job queue in a local SQLite file (WAL), safe across threads and processes on one host."""
+
+    def __init__(self, path: str, visibility_timeout_seconds: float, max_attempts: int = 3):
+        if path != ":memory:":
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        self.visibility_timeout_seconds = visibility_timeout_seconds
+        self.max_attempts = max(1, max_attempts)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None, timeout=30.0
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY, payload TEXT NOT NULL, enqueued_at REAL NOT NULL,"
+            " visible_at REAL NOT NULL, attempts INTEGER NOT NULL DEFAULT 0,"
+            " receipt TEXT, state TEXT NOT NULL DEFAULT 'ready')"
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS jobs_visible ON jobs (state, visible_at, enqueued_at)"
+        )
+
+    def enqueue(self, payload: dict) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO jobs (id, payload, enqueued_at, visible_at) VALUES (?, ?, ?, ?)",
+                (job_id, json.dumps(payload), now, now),
+            )
+        return job_id
+
+    def lease(self, max_jobs: int = 1, wait_seconds: float = 0.0) -> list[Job]:
+        deadline = time.monotonic() + wait_seconds
+        while True:
+            jobs = self._lease_now(max_jobs)
+            if jobs or time.monotonic() >= deadline:
+                return jobs
+            time.sleep(min(0.5, max(0.0, deadline - time.monotonic())))
+
+    def _lease_now(self, max_jobs: int) -> list[Job]:
+        now = time.time()
+        jobs, dead = [], []
+        with self._lock:
+            # BEGIN IMMEDIATE: take the write lock first so two workers never lease the same row.
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._db.execute(
+                    "SELECT id, payload, enqueued_at, attempts FROM jobs"
+                    " WHERE state = 'ready' AND visible_at <= ? ORDER BY enqueued_at LIMIT ?",
+                    (now, max_jobs),
+                ).fetchall()
+                for job_id, payload, enqueued_at, attempts in rows:
+                    if attempts >= self.max_attempts:  # lease expired max_attempts times
+                        dead.append(job_id)
+                        continue
+                    receipt = uuid.uuid4().hex
+                    self._db.execute(
+                        "UPDATE jobs SET visible_at = ?, attempts = ?, receipt = ? WHERE id = ?",
+                        (now + self.visibility_timeout_seconds, attempts + 1, receipt, job_id),
+                    )
+                    jobs.append(
+                        Job(job_id, json.loads(payload), enqueued_at, attempts + 1, receipt)
+                    )
+                self._db.executemany(
+                    "UPDATE jobs SET state = 'dead', receipt = NULL WHERE id = ?",
+                    [(job_id,) for job_id in dead],
+                )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        for job_id in dead:
+            get_logger().warning("Job dead-lettered", job_id=job_id, reason="lease expired")
+        return jobs
+
+    def extend(self, job: Job, seconds: float) -> bool:
+        with self._lock:
+            cursor = self._db.execute(
+                "UPDATE jobs SET visible_at = ? WHERE id = ? AND receipt = ? AND state = 'ready'",
+                (time.time() + seconds, job.id, job.receipt),
+            )
+        return cursor.rowcount == 1
+
+    def ack(self, job: Job) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM jobs WHERE id = ? AND receipt = ?", (job.id, job.receipt))
+
+    def nack(self, job: Job, delay_seconds: float = 0.0) -> None:
+        state = "dead" if job.attempts >= self.max_attempts else "ready"
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET state = ?, visible_at = ?, receipt = NULL"
+                " WHERE id = ? AND receipt = ?",
+                (state, time.time() + delay_seconds, job.id, job.receipt),
+            )
+        if state == "dead":
+            get_logger().warning("Job dead-lettered", job_id=job.id, attempts=job.attempts)
+
+    def stats(self) -> QueueStats:
+        now = time.time()
+        with self._lock:
+            ready, leased, dead, oldest = self._db.execute(
+                "SELECT"
+                " COALESCE(SUM(state = 'ready' AND visible_at <= ?), 0),"
+                " COALESCE(SUM(state = 'ready' AND visible_at > ?), 0),"
+                " COALESCE(SUM(state = 'dead'), 0),"
+                " MIN(CASE WHEN state = 'ready' AND visible_at <= ? THEN enqueued_at END)"
+                " FROM jobs",
+                (now, now, now),
+            ).fetchone()
+        return QueueStats(ready, leased, dead, None if oldest is None else max(0.0, now - oldest))
+
+
+class SQSJobQueue:
+    """Job queue on Amazon SQS (or a compatible endpoint). Dead-lettering is the queue's redrive
+    policy (maxReceiveCount); the visibility timeout is set per receive."""
+
+    def __init__(self, client, queue_url: str, visibility_timeout_seconds: float):
+        self.client = client
+        self.queue_url = queue_url
+        self.visibility_timeout_seconds = visibility_timeout_seconds
+        self.fifo = queue_url.endswith(".fifo")
+
+    def enqueue(self, payload: dict) -> str:
+        params = {"QueueUrl": self.queue_url, "MessageBody": json.dumps(payload)}
+        if self.fifo:
+            params["MessageGroupId"] = str(payload.get("owner_id", "default"))
+            params["MessageDeduplicationId"] = uuid.uuid4().hex
+        return self.client.send_message(**params)["MessageId"]
+
+    def lease(self, max_jobs: int = 1, wait_seconds: float = 0.0) -> list[Job]:
+        resp = self.client.receive_message(
+            QueueUrl=self.queue_url,
+            MaxNumberOfMessages=max(1, min(max_jobs, SQS_MAX_RECEIVE)),
+            WaitTimeSeconds=int(min(20, wait_seconds)),
+            VisibilityTimeout=int(self.visibility_timeout_seconds),
+            MessageSystemAttributeNames=["SentTimestamp", "ApproximateReceiveCount"],
+        )
+        return [
+            Job(
+                m["MessageId"],
+                json.loads(m["Body"]),
+                int(m.get("Attributes", {}).get("SentTimestamp", 0)) / 1000 or time.time(),
+                int(m.get("Attributes", {}).get("ApproximateReceiveCount", 1)),
+                m["ReceiptHandle"],
+            )
+            for m in resp.get("Messages", [])
+        ]
+
+    def extend(self, job: Job, seconds: float) -> bool:
+        # A lost lease surfaces as a ClientError (e.g. MessageNotInflight, ReceiptHandleIsInvalid).
+        self.client.change_message_visibility(
+            QueueUrl=self.queue_url, ReceiptHandle=job.receipt, VisibilityTimeout=int(seconds)
+        )
+        return True
+
+    def ack(self, job: Job) -> None:
+        self.client.delete_message(QueueUrl=self.queue_url, ReceiptHandle=job.receipt)
+
+    def nack(self, job: Job, delay_seconds: float = 0.0) -> None:
+        self.client.change_message_visibility(
+            QueueUrl=self.queue_url, ReceiptHandle=job.receipt, VisibilityTimeout=int(delay_seconds)
+        )
+
+    def stats(self) -> QueueStats:
+        attrs = self.client.get_queue_attributes(
+            QueueUrl=self.queue_url,
+            AttributeNames=["ApproximateNumberOfMessages", "ApproximateNumberOfMessagesNotVisible"],
+        )["Attributes"]
+        # Oldest-message age is only available as the CloudWatch metric ApproximateAgeOfOldestMessage.
+        return QueueStats(
+            int(attrs.get("ApproximateNumberOfMessages", 0)),
+            int(attrs.get("ApproximateNumberOfMessagesNotVisible", 0)),
+        )
+
+
+def get_sqs_client():
+    """Return the shared SQS client; uses AWS_ENDPOINT_URL for LocalStack."""
+    return clients.get_client(clients.SQS)
+
+
+_queue: JobQueue | None = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue | None:
+    """Process-wide queue from JOB_QUEUE_BACKEND; None for "background" (no queue)."""
+    global _queue
+    settings = get_settings()
+    backend = settings.job_queue_backend
+    if backend == "background":
+        return None
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                if backend == "sqlite":
+                    _queue = SQLiteJobQueue(
+                        settings.job_queue_path,
+                        settings.job_visibility_timeout_seconds,
+                        settings.job_max_attempts,
+                    )
+                elif backend == "sqs":
+                    if not settings.job_queue_url:
+                        raise ValueError("JOB_QUEUE_URL must be set for JOB_QUEUE_BACKEND=sqs")
+                    _queue = SQSJobQueue(
+                        get_sqs_client(),
+                        settings.job_queue_url,
+                        settings.job_visibility_timeout_seconds,
+                    )
+                else:
+                    raise ValueError(f"Unknown job queue backend: {backend}")
+    return _queue
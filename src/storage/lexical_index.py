@@ -0,0 +1,476 @@
+"""Per-owner inverted index over chunk text (local SQLite) with BM25 scoring, for hybrid retrieval.
+
+Chunks get a per-owner integer id in insertion order. Each (owner_id, term) row holds its postings
+as one BLOB of LEB128 varint pairs (id delta, term frequency): ids only grow, so appending a
+document's postings is a concatenation encoded from the row's last id, and a posting costs two or
+three bytes instead of a row. Replaced and deleted chunks are tombstoned (their chunk row is removed
+and the id is skipped at query time); an owner's postings are rewritten without dead ids once they
+outnumber the live ones. A processing run stages its document's rows (not searchable) and swaps them
+in for the document's indexed rows in one transaction when it commits. Queries decode postings with
+numpy and score with BM25 (k1=1.2, b=0.75) against per-owner chunk lengths cached until the owner's
+index version changes.
+"""
+
+import math
+import os
+import re
+import sqlite3
+import threading
+from collections import Counter
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+import numpy as np
+
+from src.api.config import get_settings
+
+K1 = 1.2
+B = 0.75
+# Postings are compacted once dead ids exceed the live ones and at least this many.
+COMPACT_MIN_DEAD = 1000
+# Terms / chunk ids per SQL IN (...) list (below SQLite's host parameter limit).
+SQL_BATCH_SIZE = 500
+
+_TOKEN = re.compile(r"\w+(?:[.\-/]\w+)*")
+_SPLIT = re.compile(r"[\-/]")
+STOPWORDS = frozenset(
+    [
+        "a",
+        "about",
+        "an",
+        "and",
+        "are",
+        "as",
+        "at",
+        "be",
+        "but",
+        "by",
+        "do",
+        "does",
+        "for",
+        "from",
+        "has",
+        "have",
+        "how",
+        "if",
+        "in",
+        "into",
+        "is",
+        "it",
+        "its",
+        "not",
+        "of",
+        "on",
+        "or",
+        "such",
+        "that",
+        "the",
+        "their",
+        "then",
+        "there",
+        "these",
+        "they",
+        "this",
+        "to",
+        "was",
+        "were",
+        "what",
+        "when",
+        "where",
+        "which",
+        "who",
+        "will",
+        "with",
+    ]
+)
+
+
+def tokenize(text: str) -> list[str]:
+    """Index terms of text: case-folded words without stopwords (incl. question words). Dotted,
+    hyphenated and slashed tokens ("12.3(b)" -> "12.3", "b"; "non-compete") are kept whole, and
+    hyphen / slash compounds also yield their parts."""
+    terms = []
+    for token in _TOKEN.findall(text.casefold()):
+        if token not in STOPWORDS:
+            terms.append(token)
+        if "-" in token or "/" in token:
+            terms.extend(p for p in _SPLIT.split(token) if p and p not in STOPWORDS)
+    return terms
+
+
+def encode_postings(postings: Iterable[tuple[int, int]], last_id: int = 0) -> bytes:
+    """Varint-encode ascending (chunk_id, tf) pairs as (id - previous id, tf) from last_id."""
+    out = bytearray()
+    previous = last_id
+    for chunk_id, tf in postings:
+        for value in (chunk_id - previous, tf):
+            while value >= 0x80:
+                out.append((value & 0x7F) | 0x80)
+                value >>= 7
+            out.append(value)
+        previous = chunk_id
+    return bytes(out)
+
+
+def decode_postings(data: bytes) -> tuple[np.ndarray, np.ndarray]:
+    """(chunk ids, term frequencies) of an encoded postings BLOB, vectorized."""
+    raw = np.frombuffer(data, dtype=np.uint8)
+    if raw.size == 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty
+    ends = np.flatnonzero(raw < 0x80)
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    position = np.arange(raw.size) - np.repeat(starts, ends - starts + 1)
+    values = np.add.reduceat((raw & 0x7F).astype(np.int64) << (7 * position), starts)
+    return np.cumsum(values[0::2]), values[1::2]
+
+
+@dataclass(frozen=True)
+class LexicalMatch:
+    """One BM25 result."""
+
+    document_filename: str
+    chunk_index: int
+    score: float
+    text: str
+
+
+@dataclass
+class _Stats:
+    """Cached per-owner chunk lengths (index = chunk id, 0 = dead or unused) for one version."""
+
+    version: int
+    lengths: np.ndarray
+    live: int
+    average_length: float
+
+
+class LexicalIndex:
+    """SQLite-backed BM25 index. Thread-safe (one connection guarded by a lock)."""
+
+    def __init__(self, path: str):
+        if path != ":memory:":
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._stats: dict[str, _Stats] = {}
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS owners ("
+            " owner_id TEXT PRIMARY KEY, next_id INTEGER NOT NULL, version INTEGER NOT NULL,"
+            " dead INTEGER NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS chunks ("
+            " owner_id TEXT NOT NULL, chunk_id INTEGER NOT NULL, document_filename TEXT NOT NULL,"
+            " chunk_index INTEGER NOT NULL, length INTEGER NOT NULL, text TEXT NOT NULL,"
+            " PRIMARY KEY (owner_id, chunk_id))"
+        )
+        self._db.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS chunks_document"
+            " ON chunks (owner_id, document_filename, chunk_index)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS postings ("
+            " owner_id TEXT NOT NULL, term TEXT NOT NULL, last_id INTEGER NOT NULL,"
+            " data BLOB NOT NULL, PRIMARY KEY (owner_id, term))"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS staged ("
+            " owner_id TEXT NOT NULL, document_filename TEXT NOT NULL,"
+            " chunk_index INTEGER NOT NULL, text TEXT NOT NULL,"
+            " PRIMARY KEY (owner_id, document_filename, chunk_index))"
+        )
+
+    def add_many(self, owner_id: str, document_filename: str, rows: list[tuple[int, str]]) -> None:
+        """Index (chunk_index, text) rows of a document, replacing those chunks if indexed."""
+        if not rows:
+            return
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._insert(owner_id, document_filename, rows, [i for i, _ in rows])
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def stage(self, owner_id: str, document_filename: str, rows: list[tuple[int, str]]) -> None:
+        """Record (chunk_index, text) rows of a document's next version without indexing them."""
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO staged VALUES (?, ?, ?, ?)",
+                [(owner_id, document_filename, index, text) for index, text in rows],
+            )
+
+    def commit_staged(self, owner_id: str, document_filename: str) -> None:
+        """Replace every indexed chunk of the document with its staged rows, atomically."""
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._db.execute(
+                    "SELECT chunk_index, text FROM staged WHERE owner_id = ?"
+                    " AND document_filename = ? ORDER BY chunk_index",
+                    (owner_id, document_filename),
+                ).fetchall()
+                self._insert(owner_id, document_filename, rows, None)
+                self._discard_staged(owner_id, document_filename)
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def discard_staged(self, owner_id: str, document_filename: str) -> None:
+        """Drop the document's staged rows (failed or abandoned run)."""
+        with self._lock:
+            self._discard_staged(owner_id, document_filename)
+
+    def delete_chunks(
+        self, owner_id: str, document_filename: str, chunk_indices: list[int]
+    ) -> None:
+        """Remove specific chunks of a document."""
+        if chunk_indices:
+            self._delete(owner_id, document_filename, chunk_indices)
+
+    def delete_document(self, owner_id: str, document_filename: str) -> None:
+        """Remove every chunk of a document, staged ones included."""
+        self._delete(owner_id, document_filename, None)
+        self.discard_staged(owner_id, document_filename)
+
+    def has_document(self, owner_id: str, document_filename: str) -> bool:
+        with self._lock:
+            return (
+                self._db.execute(
+                    "SELECT 1 FROM chunks WHERE owner_id = ? AND document_filename = ? LIMIT 1",
+                    (owner_id, document_filename),
+                ).fetchone()
+                is not None
+            )
+
+    def search(self, owner_id: str, query: str, top_k: int) -> list[LexicalMatch]:
+        """Top_k chunks of owner_id by BM25 score for the query terms, best first."""
+        terms = sorted(set(tokenize(query)))
+        if not terms or top_k <= 0:
+            return []
+        with self._lock:
+            stats = self._owner_stats(owner_id)
+            if stats is None or stats.live == 0:
+                return []
+            blobs = []
+            for start in range(0, len(terms), SQL_BATCH_SIZE):
+                part = terms[start : start + SQL_BATCH_SIZE]
+                blobs += self._db.execute(
+                    "SELECT data FROM postings WHERE owner_id = ?"
+                    f" AND term IN ({', '.join('?' * len(part))})",
+                    (owner_id, *part),
+                ).fetchall()
+            lengths = stats.lengths
+            scores = np.zeros(lengths.size, dtype=np.float64)
+            for (data,) in blobs:
+                ids, tfs = decode_postings(data)
+                live = ids < lengths.size
+                ids, tfs = ids[live], tfs[live]
+                live = lengths[ids] > 0
+                ids, tfs = ids[live], tfs[live].astype(np.float64)
+                if ids.size == 0:
+                    continue
+                df = ids.size
+                idf = math.log(1 + (stats.live - df + 0.5) / (df + 0.5))
+                norm = K1 * (1 - B + B * lengths[ids] / stats.average_length)
+                scores[ids] += idf * tfs * (K1 + 1) / (tfs + norm)
+            hits = np.flatnonzero(scores)
+            if hits.size > top_k:
+                hits = hits[np.argpartition(-scores[hits], top_k - 1)[:top_k]]
+            hits = hits[np.argsort(-scores[hits], kind="stable")]
+            ids = [int(i) for i in hits]
+            rows = {}
+            for start in range(0, len(ids), SQL_BATCH_SIZE):
+                part = ids[start : start + SQL_BATCH_SIZE]
+                for chunk_id, filename, index, text in self._db.execute(
+                    "SELECT chunk_id, document_filename, chunk_index, text FROM chunks"
+                    f" WHERE owner_id = ? AND chunk_id IN ({', '.join('?' * len(part))})",
+                    (owner_id, *part),
+                ):
+                    rows[chunk_id] = (filename, index, text)
+        return [
+            LexicalMatch(rows[i][0], rows[i][1], float(scores[i]), rows[i][2])
+            for i in ids
+            if i in rows
+        ]
+
+    def _delete(self, owner_id: str, document_filename: str, chunk_indices: list[int] | None):
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                dead = self._remove(owner_id, document_filename, chunk_indices)
+                if dead:
+                    self._db.execute(
+                        "UPDATE owners SET version = version + 1, dead = dead + ?"
+                        " WHERE owner_id = ?",
+                        (dead, owner_id),
+                    )
+                    self._compact_if_sparse(owner_id)
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def _insert(
+        self,
+        owner_id: str,
+        document_filename: str,
+        rows: list[tuple[int, str]],
+        replace: list[int] | None,
+    ) -> None:
+        """Index rows after removing the document's chunks at replace (all when None). Caller holds
+        the lock in a transaction."""
+        dead = self._remove(owner_id, document_filename, replace)
+        row = self._db.execute(
+            "SELECT next_id FROM owners WHERE owner_id = ?", (owner_id,)
+        ).fetchone()
+        next_id = row[0] if row else 1
+        chunks = []
+        postings: dict[str, list[tuple[int, int]]] = {}
+        for chunk_id, (index, text) in enumerate(rows, start=next_id):
+            terms = tokenize(text)
+            chunks.append((owner_id, chunk_id, document_filename, index, len(terms), text))
+            for term, tf in Counter(terms).items():
+                postings.setdefault(term, []).append((chunk_id, tf))
+        self._db.executemany("INSERT INTO chunks VALUES (?, ?, ?, ?, ?, ?)", chunks)
+        self._append_postings(owner_id, postings)
+        self._db.execute(
+            "INSERT INTO owners VALUES (?, ?, 1, ?) ON CONFLICT (owner_id) DO UPDATE SET"
+            " next_id = excluded.next_id, version = version + 1, dead = dead + ?",
+            (owner_id, next_id + len(rows), dead, dead),
+        )
+        if dead:
+            self._compact_if_sparse(owner_id)
+
+    def _discard_staged(self, owner_id: str, document_filename: str) -> None:
+        self._db.execute(
+            "DELETE FROM staged WHERE owner_id = ? AND document_filename = ?",
+            (owner_id, document_filename),
+        )
+
+    def _remove(
+        self, owner_id: str, document_filename: str, chunk_indices: list[int] | None
+    ) -> int:
+        """Delete chunk rows (all of the document when chunk_indices is None); their ids become
+        dead postings. Returns the number removed. Caller holds the lock in a transaction."""
+        if chunk_indices is None:
+            return self._db.execute(
+                "DELETE FROM chunks WHERE owner_id = ? AND document_filename = ?",
+                (owner_id, document_filename),
+            ).rowcount
+        removed = 0
+        for start in range(0, len(chunk_indices), SQL_BATCH_SIZE):
+            part = chunk_indices[start : start + SQL_BATCH_SIZE]
+            removed += self._db.execute(
+                "DELETE FROM chunks WHERE owner_id = ? AND document_filename = ?"
+                f" AND chunk_index IN ({', '.join('?' * len(part))})",
+                (owner_id, document_filename, *part),
+            ).rowcount
+        return removed
+
+    def _append_postings(self, owner_id: str, postings: dict[str, list[tuple[int, int]]]) -> None:
+        terms = list(postings)
+        last_ids: dict[str, int] = {}
+        for start in range(0, len(terms), SQL_BATCH_SIZE):
+            part = terms[start : start + SQL_BATCH_SIZE]
+            last_ids.update(
+                self._db.execute(
+                    "SELECT term, last_id FROM postings WHERE owner_id = ?"
+                    f" AND term IN ({', '.join('?' * len(part))})",
+                    (owner_id, *part),
+                ).fetchall()
+            )
+        self._db.executemany(
+            "INSERT INTO postings VALUES (?, ?, ?, ?) ON CONFLICT (owner_id, term) DO UPDATE SET"
+            " last_id = excluded.last_id, data = CAST(data || excluded.data AS BLOB)",
+            [
+                (owner_id, term, pairs[-1][0], encode_postings(pairs, last_ids.get(term, 0)))
+                for term, pairs in postings.items()
+            ],
+        )
+
+    def _compact_if_sparse(self, owner_id: str) -> None:
+        """Rewrite the owner's postings without dead ids when they outnumber the live ones."""
+        dead, live = self._db.execute(
+            "SELECT dead, (SELECT COUNT(*) FROM chunks WHERE owner_id = ?)"
+            " FROM owners WHERE owner_id = ?",
+            (owner_id, owner_id),
+        ).fetchone()
+        if dead < COMPACT_MIN_DEAD or dead <= live:
+            return
+        alive = np.array(
+            [
+                r[0]
+                for r in self._db.execute(
+                    "SELECT chunk_id FROM chunks WHERE owner_id = ?", (owner_id,)
+                )
+            ],
+            dtype=np.int64,
+        )
+        rewritten, emptied = [], []
+        for term, data in self._db.execute(
+            "SELECT term, data FROM postings WHERE owner_id = ?", (owner_id,)
+        ).fetchall():
+            ids, tfs = decode_postings(data)
+            keep = np.isin(ids, alive)
+            if not keep.any():
+                emptied.append((owner_id, term))
+            elif not keep.all():
+                ids, tfs = ids[keep].tolist(), tfs[keep].tolist()
+                rewritten.append(
+                    (ids[-1], encode_postings(zip(ids, tfs, strict=True)), owner_id, term)
+                )
+        self._db.executemany("DELETE FROM postings WHERE owner_id = ? AND term = ?", emptied)
+        self._db.executemany(
+            "UPDATE postings SET last_id = ?, data = ? WHERE owner_id = ? AND term = ?", rewritten
+        )
+        self._db.execute("UPDATE owners SET dead = 0 WHERE owner_id = ?", (owner_id,))
+
+    def _owner_stats(self, owner_id: str) -> _Stats | None:
+        """Chunk lengths of owner_id, reloaded when its version changed. Caller holds the lock."""
+        row = self._db.execute(
+            "SELECT next_id, version FROM owners WHERE owner_id = ?", (owner_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        next_id, version = row
+        stats = self._stats.get(owner_id)
+        if stats is not None and stats.version == version:
+            return stats
+        lengths = np.zeros(next_id, dtype=np.float64)
+        rows = self._db.execute(
+            "SELECT chunk_id, length FROM chunks WHERE owner_id = ?", (owner_id,)
+        ).fetchall()
+        if rows:
+            ids, values = zip(*rows, strict=True)
+            # At least 1, so 0 marks dead and unused ids (chunks without terms have no postings).
+            lengths[list(ids)] = np.maximum(values, 1)
+        live = len(rows)
+        average = float(lengths.sum()) / live if live else 1.0
+        stats = _Stats(version, lengths, live, average)
+        self._stats[owner_id] = stats
+        return stats
+
+
+_index: LexicalIndex | None = None
+_index_lock = threading.Lock()
+
+
+def get_lexical_index() -> LexicalIndex | None:
+    """Process-wide index from LEXICAL_INDEX_PATH; None when the path is empty (vectors only)."""
+    global _index
+    path = (get_settings().lexical_index_path or "").strip()
+    if not path:
+        return None
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = LexicalIndex(path)
+    return _index
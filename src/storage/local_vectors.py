@@ -0,0 +1,530 @@
+"""Local vector store: per-owner float32 matrices in memory-mapped files, exact or HNSW search.
+
+Each owner's vectors are the rows of one float32 file under the store directory (numpy.memmap,
+grown by doubling); keys, row numbers and metadata live in a SQLite table next to it. Rows are
+L2-normalized on write, so cosine distance is 1 - dot product. Owners with up to hnsw_threshold
+live vectors are searched exactly (one matrix-vector product); larger owners through an HNSW
+graph, built in the background on the first query (exact search meanwhile) and extended as rows
+are added. The graph lives in memory: each process builds its own.
+
+Replacing or deleting a key only marks its row dead; an owner whose dead rows outnumber its live
+ones is compacted into a new file. Writes take the SQLite write lock (BEGIN IMMEDIATE) and bump a
+per-owner version, so several processes (API, worker, batch job) can share the directory: a
+process whose cached view of an owner is older than the version reloads it before searching.
+"""
+
+import hashlib
+import heapq
+import json
+import math
+import os
+import random
+import sqlite3
+import threading
+import time
+from array import array
+from collections.abc import Callable, Iterator
+
+import numpy as np
+
+from src.api.config import get_settings
+from src.observability.logging import get_logger
+from src.storage.vector_store import VectorEntry, VectorMatch
+
+INITIAL_ROWS = 1024
+# Dead rows an owner must have (and outnumber its live rows by) before it is compacted.
+COMPACT_MIN_DEAD_ROWS = 1024
+# SQLite bound-parameter batch for key lookups.
+_KEY_BATCH = 500
+HNSW_M = 16
+HNSW_EF_CONSTRUCTION = 64
+
+
+def _normalized(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
+
+
+class HNSWIndex:
+    """Hierarchical navigable small world graph (Malkov & Yashunin) over rows of a normalized
+    float32 matrix. vectors() returns the current matrix (it is remapped when the file grows).
+    Neighbours are chosen with the paper's diversity heuristic (a candidate is linked only if it is
+    closer to the node than to every neighbour already chosen)."""
+
+    def __init__(
+        self,
+        vectors: Callable[[], np.ndarray],
+        m: int = HNSW_M,
+        ef_construction: int = HNSW_EF_CONSTRUCTION,
+        seed: int = 0,
+    ):
+        self._vectors = vectors
+        self.m = m
+        self.ef_construction = ef_construction
+        self._level_mult = 1 / math.log(m)
+        self._layers: list[dict[int, list[int]]] = []
+        self._entry: int | None = None
+        self._rng = random.Random(seed)
+
+    def __len__(self) -> int:
+        return len(self._layers[0]) if self._layers else 0
+
+    def add(self, row: int) -> None:
+        vecs = self._vectors()
+        q = vecs[row]
+        level = int(-math.log(1.0 - self._rng.random()) * self._level_mult)
+        top = len(self._layers) - 1
+        while len(self._layers) <= level:
+            self._layers.append({})
+        if self._entry is None:
+            for layer in range(level + 1):
+                self._layers[layer][row] = []
+            self._entry = row
+            return
+        entry = [self._entry]
+        for layer in range(top, level, -1):
+            entry = [self._search_layer(vecs, q, entry, 1, layer)[0][1]]
+        for layer in range(min(level, top), -1, -1):
+            found = self._search_layer(vecs, q, entry, self.ef_construction, layer)
+            neighbours = self._select(vecs, found, self.m)
+            graph = self._layers[layer]
+            graph[row] = neighbours
+            cap = 2 * self.m if layer == 0 else self.m
+            for n in neighbours:
+                links = graph[n]
+                links.append(row)
+                if len(links) > cap:
+                    dists = (1.0 - vecs[links] @ vecs[n]).tolist()
+                    graph[n] = self._select(vecs, sorted(zip(dists, links, strict=True)), cap)
+            entry = [r for _, r in found]
+        for layer in range(top + 1, level + 1):
+            self._layers[layer][row] = []
+        if level > top:
+            self._entry = row
+
+    @staticmethod
+    def _select(vecs: np.ndarray, candidates: list[tuple[float, int]], m: int) -> list[int]:
+        """Up to m rows of (distance, row) candidates sorted by distance, skipping candidates
+        closer to an already selected row than to the node."""
+        rows = [row for _, row in candidates]
+        similarity = (vecs[rows] @ vecs[rows].T).tolist()
+        selected: list[int] = []
+        for i, (dist, _) in enumerate(candidates):
+            if len(selected) >= m:
+                break
+            if all(1.0 - similarity[i][j] > dist for j in selected):
+                selected.append(i)
+        return [rows[i] for i in selected]
+
+    def search(self, q: np.ndarray, k: int, ef: int, live: np.ndarray) -> list[tuple[float, int]]:
+        """Up to k (distance, row) of live rows, closest first."""
+        if self._entry is None:
+            return []
+        vecs = self._vectors()
+        entry = [self._entry]
+        for layer in range(len(self._layers) - 1, 0, -1):
+            entry = [self._search_layer(vecs, q, entry, 1, layer)[0][1]]
+        found = self._search_layer(vecs, q, entry, max(ef, k), 0)
+        return [(d, r) for d, r in found if live[r]][:k]
+
+    def _search_layer(
+        self, vecs: np.ndarray, q: np.ndarray, entry: list[int], ef: int, layer: int
+    ) -> list[tuple[float, int]]:
+        """Greedy best-first search of one layer; the ef closest (distance, row), sorted."""
+        graph = self._layers[layer]
+        visited = set(entry)
+        start = (1.0 - vecs[entry] @ q).tolist()
+        candidates = list(zip(start, entry, strict=True))
+        heapq.heapify(candidates)
+        results = [(-d, r) for d, r in candidates]
+        heapq.heapify(results)
+        while candidates:
+            dist, row = heapq.heappop(candidates)
+            if dist > -results[0][0] and len(results) >= ef:
+                break
+            fresh = [n for n in graph[row] if n not in visited]
+            if not fresh:
+                continue
+            visited.update(fresh)
+            for n, d in zip(fresh, (1.0 - vecs[fresh] @ q).tolist(), strict=True):
+                if len(results) < ef or d < -results[0][0]:
+                    heapq.heappush(candidates, (d, n))
+                    heapq.heappush(results, (-d, n))
+                    if len(results) > ef:
+                        heapq.heappop(results)
+        return sorted((-d, r) for d, r in results)
+
+
+class _Owner:
+    """Cached view of one owner's rows: memory-mapped matrix, key per row, live mask."""
+
+    def __init__(self, path: str, filename: str, dimensions: int):
+        self.path = path
+        self.filename = filename
+        self.dimensions = dimensions
+        self.version: int | None = None
+        self.count = 0
+        self.keys: list[str | None] = []
+        self.live = np.zeros(0, dtype=bool)
+        self.live_count = 0
+        self.matrix = np.zeros((0, dimensions), dtype=np.float32)
+        self.graph: HNSWIndex | None = None
+        self.building = False
+
+    def remap(self, rows: int) -> None:
+        """Map the file with room for at least rows rows (growing it by doubling)."""
+        row_bytes = 4 * self.dimensions
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        if size < rows * row_bytes:
+            size = max(rows, 2 * (size // row_bytes), INITIAL_ROWS) * row_bytes
+            with open(self.path, "ab") as f:
+                f.truncate(size)
+        if self.matrix.shape[0] != size // row_bytes:
+            self.matrix = np.memmap(
+                self.path, dtype=np.float32, mode="r+", shape=(size // row_bytes, self.dimensions)
+            )
+
+    def load(self, count: int, rows: list[tuple[str, int]]) -> None:
+        """Replace the view with count rows of which rows (key, row) are live; rows appended since
+        the previous view are added to the graph."""
+        previous = self.count
+        self.remap(count)
+        self.count = count
+        self.keys = [None] * count
+        self.live = np.zeros(count, dtype=bool)
+        for key, row in rows:
+            self.keys[row] = key
+            self.live[row] = True
+        self.live_count = len(rows)
+        if self.graph is not None:
+            for row in range(previous, count):
+                if self.live[row]:
+                    self.graph.add(row)
+
+    def append(self, keys: list[str]) -> None:
+        """Rows count.. count+len(keys) were written for keys (already in the matrix)."""
+        start = self.count
+        self.count += len(keys)
+        self.keys.extend(keys)
+        self.live = np.concatenate([self.live, np.ones(len(keys), dtype=bool)])
+        self.live_count += len(keys)
+        if self.graph is not None:
+            for row in range(start, self.count):
+                self.graph.add(row)
+
+    def kill(self, rows: list[int]) -> None:
+        for row in rows:
+            if row < self.count and self.live[row]:
+                self.live[row] = False
+                self.keys[row] = None
+                self.live_count -= 1
+
+
+class LocalVectorStore:
+    """VectorStore in a local directory (vectors.sqlite3 plus one .f32 file per owner).
+    Thread-safe (one connection guarded by a lock); safe across processes on one host."""
+
+    def __init__(
+        self,
+        path: str,
+        hnsw_threshold: int = 20000,
+        ef_search: int = 64,
+    ):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.hnsw_threshold = hnsw_threshold
+        self.ef_search = ef_search
+        self._owners: dict[str, _Owner] = {}
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            os.path.join(path, "vectors.sqlite3"),
+            check_same_thread=False,
+            isolation_level=None,
+            timeout=30.0,
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS owners ("
+            " owner_id TEXT PRIMARY KEY, file TEXT NOT NULL, dimensions INTEGER NOT NULL,"
+            " next_row INTEGER NOT NULL, version INTEGER NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS vectors ("
+            " key TEXT PRIMARY KEY, owner_id TEXT NOT NULL, document_filename TEXT NOT NULL,"
+            " row INTEGER NOT NULL, metadata TEXT NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS vectors_document ON vectors (owner_id, document_filename)"
+        )
+
+    def put(self, entries: list[VectorEntry]) -> None:
+        by_owner: dict[str, list[VectorEntry]] = {}
+        for entry in entries:
+            by_owner.setdefault(entry.metadata["owner_id"], []).append(entry)
+        with self._lock:
+            for owner_id, owned in by_owner.items():
+                self._write(self._put_owner, owner_id, owned)
+
+    def get(self, keys: list[str]) -> dict[str, array]:
+        """Embeddings as stored: normalized to unit length."""
+        out = {}
+        with self._lock:
+            for owner_id, key, row in self._select(keys, "owner_id, key, row"):
+                state = self._load(owner_id)
+                if state is not None and row < state.count:
+                    out[key] = array("f", state.matrix[row].tobytes())
+        return out
+
+    def query(self, owner_id: str, query_vector: array, top_k: int) -> list[VectorMatch]:
+        with self._lock:
+            state = self._load(owner_id)
+            if state is None or not state.live_count or top_k <= 0:
+                return []
+            q = _normalized(np.frombuffer(query_vector, dtype=np.float32))
+            if len(q) != state.dimensions:
+                raise ValueError(f"Query has {len(q)} dimensions, index has {state.dimensions}")
+            graph = None
+            if state.live_count > self.hnsw_threshold:
+                graph = state.graph
+                if graph is None and not state.building:
+                    state.building = True
+                    threading.Thread(
+                        target=self.build_graph, args=(owner_id,), name="hnsw-build", daemon=True
+                    ).start()
+            if graph is None:
+                found = self._exact(state, q, top_k)
+            else:
+                found = graph.search(q, top_k, self.ef_search, state.live)
+            keys = [state.keys[row] for _, row in found]
+            metadata = dict(self._select(keys, "key, metadata"))
+        return [
+            VectorMatch(key, float(d), json.loads(metadata[key]))
+            for (d, _), key in zip(found, keys, strict=True)
+            if key in metadata
+        ]
+
+    def build_graph(self, owner_id: str) -> None:
+        """Build the owner's HNSW graph (queries of a large owner start this in the background
+        and search exactly until it is ready). The lock is only held to snapshot the rows and
+        to catch up with rows written meanwhile."""
+        with self._lock:
+            state = self._load(owner_id)
+            if state is None or state.graph is not None:
+                return
+            state.building = True
+            rows, built = np.flatnonzero(state.live).tolist(), state.count
+        started = time.perf_counter()
+        graph = HNSWIndex(lambda: state.matrix)
+        try:
+            # Rows below built never change in this file (compaction writes a new one).
+            for row in rows:
+                graph.add(row)
+        finally:
+            with self._lock:
+                state.building = False
+        with self._lock:
+            if self._owners.get(owner_id) is not state:
+                return
+            for row in range(built, state.count):
+                if state.live[row]:
+                    graph.add(row)
+            state.graph = graph
+        get_logger().info(
+            "HNSW graph built",
+            owner_id=owner_id,
+            vectors=len(graph),
+            seconds=round(time.perf_counter() - started, 2),
+        )
+
+    def delete(self, keys: list[str]) -> None:
+        with self._lock:
+            rows = self._select(keys, "owner_id, key, row")
+            by_owner: dict[str, list[tuple[str, int]]] = {}
+            for owner_id, key, row in rows:
+                by_owner.setdefault(owner_id, []).append((key, row))
+            for owner_id, owned in by_owner.items():
+                self._write(self._delete_rows, owner_id, owned)
+
+    def delete_by_document(self, owner_id: str, document_filename: str) -> None:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT key, row FROM vectors WHERE owner_id = ? AND document_filename = ?",
+                (owner_id, document_filename),
+            ).fetchall()
+            if rows:
+                self._write(self._delete_rows, owner_id, rows)
+
+    def _write(self, apply: Callable, owner_id: str, items: list) -> None:
+        """Run apply(owner_id, items) in a write transaction; the owner's view is dropped when
+        it fails (its rows may be half written). Caller holds the lock."""
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            apply(owner_id, items)
+            self._db.execute("COMMIT")
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            self._owners.pop(owner_id, None)
+            raise
+
+    def _put_owner(self, owner_id: str, entries: list[VectorEntry]) -> None:
+        dimensions = len(entries[0].embedding)
+        state = self._load(owner_id, create_dimensions=dimensions)
+        block = np.empty((len(entries), state.dimensions), dtype=np.float32)
+        for i, entry in enumerate(entries):
+            if len(entry.embedding) != state.dimensions:
+                raise ValueError(
+                    f"Vector has {len(entry.embedding)} dimensions, index has {state.dimensions}"
+                )
+            block[i] = np.frombuffer(entry.embedding, dtype=np.float32)
+        start = state.count
+        state.remap(start + len(entries))
+        state.matrix[start : start + len(entries)] = _normalized(block)
+        state.matrix.flush()  # data before the rows that point at it
+        keys = [e.key for e in entries]
+        replaced = [row for _, _, row in self._select(keys, "owner_id, key, row")]
+        rows = {e.key: (start + i, e) for i, e in enumerate(entries)}  # last wins in a batch
+        replaced += [start + i for i, e in enumerate(entries) if rows[e.key][0] != start + i]
+        self._db.executemany(
+            "INSERT OR REPLACE INTO vectors VALUES (?, ?, ?, ?, ?)",
+            [
+                (
+                    key,
+                    owner_id,
+                    e.metadata.get("document_filename", ""),
+                    row,
+                    json.dumps(e.metadata),
+                )
+                for key, (row, e) in rows.items()
+            ],
+        )
+        self._bump(owner_id, start + len(entries), state)
+        state.append(keys)
+        state.kill(replaced)
+
+    def _delete_rows(self, owner_id: str, rows: list[tuple[str, int]]) -> None:
+        state = self._load(owner_id)
+        self._db.executemany("DELETE FROM vectors WHERE key = ?", [(key,) for key, _ in rows])
+        if state is None:
+            return
+        self._bump(owner_id, state.count, state)
+        state.kill([row for _, row in rows])
+        dead = state.count - state.live_count
+        if dead >= COMPACT_MIN_DEAD_ROWS and dead > state.live_count:
+            self._compact(owner_id, state)
+
+    def _compact(self, owner_id: str, state: _Owner) -> None:
+        """Copy live rows into a new file and renumber them. The replaced file is kept until the
+        next compaction, so processes reading the previous version can still map it; older
+        generations are removed. Caller holds the write transaction."""
+        live = np.flatnonzero(state.live)
+        stem = self._file_stem(owner_id)
+        filename = f"{stem}-{state.version + 1}.f32"
+        for name in os.listdir(self.path):
+            if name.startswith(f"{stem}-") and name not in (filename, state.filename):
+                os.remove(os.path.join(self.path, name))
+        compacted = _Owner(os.path.join(self.path, filename), filename, state.dimensions)
+        compacted.version = state.version
+        compacted.remap(len(live))
+        compacted.matrix[: len(live)] = state.matrix[live]
+        compacted.matrix.flush()
+        self._db.executemany(
+            "UPDATE vectors SET row = ? WHERE key = ?",
+            [(new, state.keys[old]) for new, old in enumerate(live.tolist())],
+        )
+        self._db.execute("UPDATE owners SET file = ? WHERE owner_id = ?", (filename, owner_id))
+        self._bump(owner_id, len(live), compacted)
+        compacted.append([state.keys[row] for row in live.tolist()])
+        self._owners[owner_id] = compacted
+
+    def _bump(self, owner_id: str, next_row: int, state: _Owner) -> None:
+        self._db.execute(
+            "UPDATE owners SET next_row = ?, version = version + 1 WHERE owner_id = ?",
+            (next_row, owner_id),
+        )
+        state.version = (state.version or 0) + 1
+
+    def _load(self, owner_id: str, create_dimensions: int | None = None) -> _Owner | None:
+        """The owner's view, reloaded when another writer changed it since. With
+        create_dimensions (inside a write transaction) an unknown owner is created."""
+        if self._db.in_transaction:
+            return self._load_snapshot(owner_id, create_dimensions)
+        # One read transaction: the owner row and its vector rows come from the same snapshot.
+        self._db.execute("BEGIN")
+        try:
+            return self._load_snapshot(owner_id, None)
+        finally:
+            self._db.execute("COMMIT")
+
+    def _load_snapshot(self, owner_id: str, create_dimensions: int | None) -> _Owner | None:
+        row = self._db.execute(
+            "SELECT file, dimensions, next_row, version FROM owners WHERE owner_id = ?",
+            (owner_id,),
+        ).fetchone()
+        if row is None:
+            if create_dimensions is None:
+                return None
+            row = (f"{self._file_stem(owner_id)}-0.f32", create_dimensions, 0, 0)
+            self._db.execute("INSERT INTO owners VALUES (?, ?, ?, ?, ?)", (owner_id, *row))
+        filename, dimensions, next_row, version = row
+        state = self._owners.get(owner_id)
+        if state is None or state.filename != filename:
+            state = _Owner(os.path.join(self.path, filename), filename, dimensions)
+            self._owners[owner_id] = state
+        if state.version != version:
+            rows = self._db.execute(
+                "SELECT key, row FROM vectors WHERE owner_id = ?", (owner_id,)
+            ).fetchall()
+            state.load(next_row, rows)
+            state.version = version
+        return state
+
+    def _select(self, keys: list, columns: str) -> list[tuple]:
+        out = []
+        for start in range(0, len(keys), _KEY_BATCH):
+            batch = keys[start : start + _KEY_BATCH]
+            out += self._db.execute(
+                f"SELECT {columns} FROM vectors WHERE key IN ({','.join('?' * len(batch))})",
+                batch,
+            ).fetchall()
+        return out
+
+    @staticmethod
+    def _file_stem(owner_id: str) -> str:
+        return hashlib.sha256(owner_id.encode("utf-8")).hexdigest()[:32]
+
+    @staticmethod
+    def _exact(state: _Owner, q: np.ndarray, k: int) -> list[tuple[float, int]]:
+        scores = state.matrix[: state.count] @ q
+        scores[~state.live] = -np.inf
+        k = min(k, state.live_count)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(1.0 - float(scores[row]), int(row)) for row in top]
+
+    def list(self, prefix: str = "") -> Iterator[str]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT key FROM vectors WHERE key >= ? AND key < ? ORDER BY key",
+                (prefix, prefix + "\U0010ffff"),
+            ).fetchall()
+        return (key for (key,) in rows)
+
+
+_store: LocalVectorStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_local_vector_store() -> LocalVectorStore:
+    """Process-wide store from LOCAL_VECTOR_STORE_PATH / LOCAL_VECTOR_HNSW_* settings."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                settings = get_settings()
+                _store = LocalVectorStore(
+                    settings.local_vector_store_path,
+                    hnsw_threshold=settings.local_vector_hnsw_threshold,
+                    ef_search=settings.local_vector_hnsw_ef_search,
+                )
+    return _store
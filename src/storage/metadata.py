@@ -1,33 +1,125 @@
-"""Document metadata store (DynamoDB): create, list by owner_id, get, update status, delete."""
+"""Document metadata store (DynamoDB): create, list by owner_id, get, update status, delete,
+per-owner corpus version. Bulk uploads read and write many items per call (BatchGetItem,
+BatchWriteItem)."""
 
 import contextlib
+import hashlib
+import time
 from datetime import datetime
+from functools import partialmethod
 
-import boto3
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
 from botocore.exceptions import ClientError
 
 from src.api.config import get_settings
 from src.models.document import Document, DocumentFormat, ProcessingStatus
 from src.observability.logging import get_logger
+from src.storage import clients
 
+# Statuses kept in the sparse status index (attribute status_shard); processed documents, the bulk
+# of the table, are not indexed.
+INDEXED_STATUSES = frozenset(
+    {
+        ProcessingStatus.PENDING.value,
+        ProcessingStatus.PROCESSING.value,
+        ProcessingStatus.FAILED.value,
+    }
+)
+STATUS_INDEX_SHARDS = 16
+# Per-owner sentinel item holding corpus_version (bumped whenever the owner's searchable corpus may
+# change; RAG caches key on it). Not a document: excluded from listings, reserved as a filename.
+CORPUS_VERSION_FILENAME = "#corpus-version"
+# DynamoDB limits on keys per BatchGetItem call and requests per BatchWriteItem call.
+BATCH_GET_KEYS = 100
+BATCH_WRITE_ITEMS = 25
+# Backoff before sending unprocessed batch items / keys again (doubling up to the max).
+BATCH_RETRY_BASE_SECONDS = 0.05
+BATCH_RETRY_MAX_SECONDS = 2.0
+
+_serializer = TypeSerializer()
+_deserializer = TypeDeserializer()
+
+
+def _dump(values: dict) -> dict:
+    return {k: _serializer.serialize(v) for k, v in values.items()}
+
+
+def _load(item: dict) -> dict:
+    return {k: _deserializer.deserialize(v) for k, v in item.items()}
+
+
+class _Table:
+    """Table-style calls with plain Python values on the shared, thread-safe DynamoDB client
+    (boto3 Table resources are not thread-safe, and each one would build its own client and
+    connection pool)."""
 
-def _get_table():
-    """DynamoDB table: single place where the DynamoDB client/resource is created.
-    Uses get_settings(); for LocalStack set AWS_ENDPOINT_URL=http://localhost:4566
+    def __init__(self, client, name: str):
+        self.client = client
+        self.name = name
+
+    def _call(self, operation: str, **params) -> dict:
+        for field in ("Key", "Item", "ExclusiveStartKey", "ExpressionAttributeValues"):
+            if field in params:
+                params[field] = _dump(params[field])
+        resp = getattr(self.client, operation)(TableName=self.name, **params)
+        for field in ("Item", "Attributes", "LastEvaluatedKey"):
+            if field in resp:
+                resp[field] = _load(resp[field])
+        if "Items" in resp:
+            resp["Items"] = [_load(item) for item in resp["Items"]]
+        return resp
+
+    get_item = partialmethod(_call, "get_item")
+    put_item = partialmethod(_call, "put_item")
+    update_item = partialmethod(_call, "update_item")
+    delete_item = partialmethod(_call, "delete_item")
+    query = partialmethod(_call, "query")
+    scan = partialmethod(_call, "scan")
+
+
+def _get_table() -> _Table:
+    """DynamoDB table: single place where the DynamoDB client is obtained (the process-wide one
+    from the shared client registry). For LocalStack set AWS_ENDPOINT_URL=http://localhost:4566
     and DYNAMODB_TABLE_METADATA=<table-name> in .env, then restart the app."""
-    settings = get_settings()
-    kwargs = {"region_name": settings.aws_region}
-    endpoint = (settings.aws_endpoint_url or "").strip()
-    if endpoint:
-        kwargs["endpoint_url"] = endpoint
-    get_logger().debug(
-        "DynamoDB client config",
-        aws_region=settings.aws_region,
-        aws_endpoint_url=settings.aws_endpoint_url or None,
-        dynamodb_table_metadata=settings.dynamodb_table_metadata,
-    )
-    dynamodb = boto3.resource("dynamodb", **kwargs)
-    return dynamodb.Table(settings.dynamodb_table_metadata)
+    return _Table(clients.get_client(clients.DYNAMODB), get_settings().dynamodb_table_metadata)
+
+
+def _retry_delay(attempt: int) -> float:
+    return min(BATCH_RETRY_MAX_SECONDS, BATCH_RETRY_BASE_SECONDS * 2**attempt)
+
+
+def _batch_write(requests: list[dict]) -> None:
+    """BatchWriteItem for PutRequest / DeleteRequest dicts (plain values), BATCH_WRITE_ITEMS per
+    call. A later request for the same owner_id + filename replaces an earlier one (a call may not
+    name a key twice); unprocessed items are sent again after a backoff."""
+    table = _get_table()
+    latest: dict[tuple[str, str], dict] = {}
+    for request in requests:
+        ((kind, body),) = request.items()
+        values = body["Item"] if kind == "PutRequest" else body["Key"]
+        field = "Item" if kind == "PutRequest" else "Key"
+        latest[(values["owner_id"], values["filename"])] = {kind: {field: _dump(values)}}
+    pending = list(latest.values())
+    for start in range(0, len(pending), BATCH_WRITE_ITEMS):
+        request_items = {table.name: pending[start : start + BATCH_WRITE_ITEMS]}
+        attempt = 0
+        while request_items:
+            resp = table.client.batch_write_item(RequestItems=request_items)
+            request_items = resp.get("UnprocessedItems") or None
+            if request_items:
+                time.sleep(_retry_delay(attempt))
+                attempt += 1
+
+
+def _status_shard_key(status: str, shard: int) -> str:
+    return f"{status}#{shard}"
+
+
+def _status_shard(owner_id: str, filename: str, status: str) -> str:
+    """status_shard value: the status plus a stable shard of the document key (spreads writes
+    across index partitions and lets parallel batch tasks split the shards)."""
+    digest = hashlib.blake2b(f"{owner_id}/{filename}".encode(), digest_size=4).digest()
+    return _status_shard_key(status, int.from_bytes(digest, "big") % STATUS_INDEX_SHARDS)
 
 
 def _doc_to_item(doc: Document) -> dict:
@@ -45,6 +137,15 @@ def _doc_to_item(doc: Document) -> dict:
         item["processing_error"] = doc.processing_error
     if doc.processed_at is not None:
         item["processed_at"] = doc.processed_at.isoformat()
+    if doc.chunk_hashes is not None:
+        item["chunk_hashes"] = list(doc.chunk_hashes)
+    if item["processing_status"] in INDEXED_STATUSES:
+        item["status_shard"] = _status_shard(doc.owner_id, doc.filename, item["processing_status"])
+    if doc.chunk_count is not None:
+        item["chunk_count"] = doc.chunk_count
+        item["vector_key_scheme"] = doc.vector_key_scheme
+    if doc.vector_generation is not None:
+        item["vector_generation"] = doc.vector_generation
     return item
 
 
@@ -65,6 +166,10 @@ def _item_to_doc(item: dict) -> Document:
         processing_status=ProcessingStatus(item["processing_status"]),
         processing_error=item.get("processing_error"),
         processed_at=_parse_dt(item["processed_at"]) if item.get("processed_at") else None,
+        chunk_hashes=list(item["chunk_hashes"]) if "chunk_hashes" in item else None,
+        chunk_count=int(item["chunk_count"]) if "chunk_count" in item else None,
+        vector_key_scheme=item.get("vector_key_scheme"),
+        vector_generation=int(item["vector_generation"]) if "vector_generation" in item else None,
     )
 
 
@@ -74,42 +179,174 @@ def create_metadata(doc: Document) -> None:
     table.put_item(Item=_doc_to_item(doc))
 
 
+def create_metadata_batch(docs: list[Document]) -> None:
+    """Create or replace many records with BatchWriteItem (25 items per call; unprocessed items
+    are sent again)."""
+    _batch_write([{"PutRequest": {"Item": _doc_to_item(doc)}} for doc in docs])
+
+
+def delete_metadata_batch(owner_id: str, filenames: list[str]) -> None:
+    """Delete many records with BatchWriteItem (25 per call; idempotent, unprocessed items are
+    sent again)."""
+    _batch_write(
+        [{"DeleteRequest": {"Key": {"owner_id": owner_id, "filename": f}}} for f in filenames]
+    )
+
+
+def get_metadata_batch(owner_id: str, filenames: list[str]) -> dict[str, Document]:
+    """Existing documents among filenames (filename -> Document), with BatchGetItem (100 keys per
+    call; unprocessed keys are requested again after a backoff)."""
+    docs = (_item_to_doc(item) for item in _batch_get(owner_id, filenames))
+    return {doc.filename: doc for doc in docs}
+
+
+def get_vector_generations(owner_id: str, filenames: list[str]) -> dict[str, int]:
+    """Committed vector generation of each existing document among filenames (0 for documents
+    whose keys carry none); reads only that attribute."""
+    return {
+        item["filename"]: int(item.get("vector_generation", 0))
+        for item in _batch_get(owner_id, filenames, "filename, vector_generation")
+    }
+
+
+def _batch_get(owner_id: str, filenames: list[str], projection: str | None = None) -> list[dict]:
+    table = _get_table()
+    wanted = list(dict.fromkeys(f for f in filenames if f != CORPUS_VERSION_FILENAME))
+    found: list[dict] = []
+    for start in range(0, len(wanted), BATCH_GET_KEYS):
+        keys = [
+            _dump({"owner_id": owner_id, "filename": f})
+            for f in wanted[start : start + BATCH_GET_KEYS]
+        ]
+        request = {table.name: {"Keys": keys}}
+        if projection:
+            request[table.name]["ProjectionExpression"] = projection
+        attempt = 0
+        while request:
+            resp = table.client.batch_get_item(RequestItems=request)
+            found += [_load(item) for item in resp.get("Responses", {}).get(table.name, [])]
+            request = resp.get("UnprocessedKeys") or None
+            if request:
+                time.sleep(_retry_delay(attempt))
+                attempt += 1
+    return found
+
+
 def list_by_owner(
     owner_id: str,
     limit: int = 100,
     next_token: str | None = None,
+    prefix: str | None = None,
 ) -> tuple[list[Document], str | None]:
-    """List documents by owner_id. Returns (documents, next_token)."""
+    """List documents by owner_id (optionally only filenames starting with prefix). Returns
+    (documents, next_token). The corpus version sentinel shares the owner's partition: the page
+    it was dropped from is topped up with one more query, so full pages have limit documents."""
     table = _get_table()
     params = {
         "KeyConditionExpression": "owner_id = :oid",
         "ExpressionAttributeValues": {":oid": owner_id},
-        "Limit": limit,
     }
-    if next_token:
-        params["ExclusiveStartKey"] = {"owner_id": owner_id, "filename": next_token}
-    resp = table.query(**params)
-    items = resp.get("Items", [])
-    docs = [_item_to_doc(i) for i in items]
-    last_key = resp.get("LastEvaluatedKey")
-    next_tok = last_key.get("filename") if last_key else None
-    return docs, next_tok
+    if prefix:
+        params["KeyConditionExpression"] += " AND begins_with(filename, :prefix)"
+        params["ExpressionAttributeValues"][":prefix"] = prefix
+    docs: list[Document] = []
+    while True:
+        if next_token:
+            params["ExclusiveStartKey"] = {"owner_id": owner_id, "filename": next_token}
+        resp = table.query(**params, Limit=limit - len(docs))
+        items = resp.get("Items", [])
+        docs += [_item_to_doc(i) for i in items if i["filename"] != CORPUS_VERSION_FILENAME]
+        last_key = resp.get("LastEvaluatedKey")
+        next_token = last_key.get("filename") if last_key else None
+        if next_token is None or len(docs) >= limit:
+            return docs, next_token
 
 
 def list_by_status(
     status: ProcessingStatus,
     limit: int = 100,
     next_token: dict | None = None,
+    segment: int | None = None,
+    total_segments: int | None = None,
+) -> tuple[list[Document], dict | None]:
+    """List documents by processing_status. For batch job. Returns (documents, next_token).
+    Statuses in INDEXED_STATUSES are read from the sparse status index (DYNAMODB_STATUS_INDEX), so
+    the cost is O(matching documents); other statuses, or a table without the index, fall back to
+    a filtered scan. With segment/total_segments only that share of the index shards (or that
+    segment of a DynamoDB parallel scan) is read."""
+    value = status.value if hasattr(status, "value") else status
+    index = get_settings().dynamodb_status_index
+    if index and value in INDEXED_STATUSES and (next_token is None or "shard" in next_token):
+        try:
+            return _query_status_index(index, value, limit, next_token, segment, total_segments)
+        except ClientError as e:
+            if (
+                next_token is not None
+                or e.response.get("Error", {}).get("Code") != "ValidationException"
+            ):
+                raise
+            get_logger().warning("Status index unavailable; scanning", index=index, error=str(e))
+    return _scan_by_status(value, limit, next_token, segment, total_segments)
+
+
+def _query_status_index(
+    index: str,
+    status: str,
+    limit: int,
+    next_token: dict | None,
+    segment: int | None,
+    total_segments: int | None,
+) -> tuple[list[Document], dict | None]:
+    """Query the status index shard by shard (oldest upload first within a shard).
+    next_token = {"shard": n, "start": LastEvaluatedKey or None}."""
+    shards = [
+        n
+        for n in range(STATUS_INDEX_SHARDS)
+        if not total_segments or total_segments <= 1 or n % total_segments == (segment or 0)
+    ]
+    table = _get_table()
+    shard = next_token["shard"] if next_token else shards[0] if shards else None
+    start = next_token.get("start") if next_token else None
+    while shard is not None:
+        params = {
+            "IndexName": index,
+            "KeyConditionExpression": "status_shard = :k",
+            "ExpressionAttributeValues": {":k": _status_shard_key(status, shard)},
+            "Limit": limit,
+        }
+        if start:
+            params["ExclusiveStartKey"] = start
+        resp = table.query(**params)
+        docs = [_item_to_doc(i) for i in resp.get("Items", [])]
+        last_key = resp.get("LastEvaluatedKey")
+        if last_key:
+            return docs, {"shard": shard, "start": last_key}
+        later = [n for n in shards if n > shard]
+        shard, start = (later[0] if later else None), None
+        if docs:
+            return docs, {"shard": shard, "start": None} if shard is not None else None
+    return [], None
+
+
+def _scan_by_status(
+    status: str,
+    limit: int,
+    next_token: dict | None,
+    segment: int | None,
+    total_segments: int | None,
 ) -> tuple[list[Document], dict | None]:
-    """List documents by processing_status (scan with filter). For batch job. Returns (documents, next_token)."""
+    """Full-table scan with a status filter (fallback; Limit applies before the filter)."""
     table = _get_table()
     params = {
         "FilterExpression": "processing_status = :s",
-        "ExpressionAttributeValues": {":s": status.value if hasattr(status, "value") else status},
+        "ExpressionAttributeValues": {":s": status},
         "Limit": limit,
     }
     if next_token:
         params["ExclusiveStartKey"] = next_token
+    if total_segments is not None and total_segments > 1:
+        params["Segment"] = segment or 0
+        params["TotalSegments"] = total_segments
     resp = table.scan(**params)
     items = resp.get("Items", [])
     docs = [_item_to_doc(i) for i in items]
@@ -117,8 +354,34 @@ def list_by_status(
     return docs, last_key
 
 
+def backfill_status_index() -> int:
+    """Set status_shard on items written before the status index existed (one full scan).
+    Returns the number of items updated."""
+    table = _get_table()
+    updated = 0
+    params: dict = {"ProjectionExpression": "owner_id, filename, processing_status, status_shard"}
+    while True:
+        resp = table.scan(**params)
+        for item in resp.get("Items", []):
+            status = item.get("processing_status")
+            if status in INDEXED_STATUSES and "status_shard" not in item:
+                table.update_item(
+                    Key={"owner_id": item["owner_id"], "filename": item["filename"]},
+                    UpdateExpression="SET status_shard = :k",
+                    ExpressionAttributeValues={
+                        ":k": _status_shard(item["owner_id"], item["filename"], status)
+                    },
+                )
+                updated += 1
+        if not resp.get("LastEvaluatedKey"):
+            return updated
+        params["ExclusiveStartKey"] = resp["LastEvaluatedKey"]
+
+
 def get_metadata(owner_id: str, filename: str) -> Document | None:
     """Get document by owner_id + filename."""
+    if filename == CORPUS_VERSION_FILENAME:
+        return None
     table = _get_table()
     try:
         resp = table.get_item(Key={"owner_id": owner_id, "filename": filename})
@@ -137,24 +400,65 @@ def update_status(
     processing_error: str | None = None,
     processed_at: datetime | None = None,
     clear_processing_error: bool = False,
+    chunk_hashes: list[str] | None = None,
+    chunk_count: int | None = None,
+    vector_key_scheme: str | None = None,
+    vector_generation: int | None = None,
+    bump_corpus: bool = False,
 ) -> None:
-    """Update processing status (and optional processing_error, processed_at).
-    Set clear_processing_error=True to REMOVE processing_error (e.g. when starting or on success)."""
+    """Update processing status (and optional processing_error, processed_at, chunk_hashes, vector
+    manifest chunk_count + vector_key_scheme + vector_generation).
+    Set clear_processing_error=True to REMOVE processing_error (e.g. when starting or on success).
+    bump_corpus=True also increments the owner's corpus version in the same transaction
+    (TransactWriteItems), which then requires the document to exist: cached RAG answers are
+    invalidated exactly when the update becomes visible."""
     table = _get_table()
+    value = status.value if hasattr(status, "value") else status
     expr = "SET processing_status = :s"
-    values = {":s": status.value if hasattr(status, "value") else status}
+    values = {":s": value}
+    removes = []
+    if value in INDEXED_STATUSES:
+        expr += ", status_shard = :shard"
+        values[":shard"] = _status_shard(owner_id, filename, value)
+    else:
+        removes.append("status_shard")
     if processing_error is not None:
         expr += ", processing_error = :e"
         values[":e"] = processing_error
     if processed_at is not None:
         expr += ", processed_at = :p"
         values[":p"] = processed_at.isoformat()
+    if chunk_hashes is not None:
+        expr += ", chunk_hashes = :h"
+        values[":h"] = list(chunk_hashes)
+    if chunk_count is not None:
+        expr += ", chunk_count = :c, vector_key_scheme = :scheme"
+        values[":c"] = chunk_count
+        values[":scheme"] = vector_key_scheme
+    if vector_generation is not None:
+        expr += ", vector_generation = :g"
+        values[":g"] = vector_generation
     if clear_processing_error:
-        expr += " REMOVE processing_error"
-    table.update_item(
-        Key={"owner_id": owner_id, "filename": filename},
-        UpdateExpression=expr,
-        ExpressionAttributeValues=values,
+        removes.append("processing_error")
+    if removes:
+        expr += " REMOVE " + ", ".join(removes)
+    key = {"owner_id": owner_id, "filename": filename}
+    if not bump_corpus:
+        table.update_item(Key=key, UpdateExpression=expr, ExpressionAttributeValues=values)
+        return
+    table.client.transact_write_items(
+        TransactItems=[
+            {
+                "Update": {
+                    "TableName": table.name,
+                    "Key": _dump(key),
+                    "UpdateExpression": expr,
+                    "ExpressionAttributeValues": _dump(values),
+                    "ConditionExpression": "attribute_exists(owner_id)",
+                }
+            },
+            {"Update": {"TableName": table.name, **_corpus_version_update(owner_id)}},
+        ]
     )
 
 
@@ -163,3 +467,32 @@ def delete_metadata(owner_id: str, filename: str) -> None:
     table = _get_table()
     with contextlib.suppress(ClientError):
         table.delete_item(Key={"owner_id": owner_id, "filename": filename})
+
+
+def get_corpus_version(owner_id: str) -> int:
+    """Current corpus version of owner_id (0 before the first bump); strongly consistent read."""
+    table = _get_table()
+    resp = table.get_item(
+        Key={"owner_id": owner_id, "filename": CORPUS_VERSION_FILENAME},
+        ProjectionExpression="corpus_version",
+        ConsistentRead=True,
+    )
+    return int(resp.get("Item", {}).get("corpus_version", 0))
+
+
+def bump_corpus_version(owner_id: str) -> int:
+    """Atomically increment owner_id's corpus version (upload, process, delete); returns it."""
+    table = _get_table()
+    resp = table.client.update_item(
+        TableName=table.name, **_corpus_version_update(owner_id), ReturnValues="UPDATED_NEW"
+    )
+    return int(_load(resp["Attributes"])["corpus_version"])
+
+
+def _corpus_version_update(owner_id: str) -> dict:
+    """Low-level UpdateItem / TransactWriteItems parameters incrementing the corpus version."""
+    return {
+        "Key": _dump({"owner_id": owner_id, "filename": CORPUS_VERSION_FILENAME}),
+        "UpdateExpression": "ADD corpus_version :one",
+        "ExpressionAttributeValues": _dump({":one": 1}),
+    }
@@ -0,0 +1,107 @@
+"""RAG caches: normalized question -> query embedding, and (owner_id, question, corpus version) ->
+retrieved chunks and answer.
+
+Answers are keyed on the owner's corpus version (metadata.get_corpus_version), which upload,
+processing and delete bump, so a cached answer is served only while the corpus it was computed
+from is unchanged; entries of older versions are never read again and age out of the LRU.
+Both caches are in-process and bounded; hit rates are exported as rag_cache.* counters.
+"""
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from src.api.config import get_settings
+from src.observability import metrics
+from src.storage.embedding_cache import EmbeddingCache
+from src.storage.vectors import RetrievedChunk
+
+
+def normalize_question(question: str) -> str:
+    """Cache form of a question: case-folded, whitespace collapsed."""
+    return " ".join(question.casefold().split())
+
+
+@dataclass(frozen=True)
+class CachedAnswer:
+    """A RAG result: answer, source document filenames and the retrieved chunks."""
+
+    answer: str
+    source_document_ids: tuple[str, ...]
+    chunks: tuple[RetrievedChunk, ...]
+
+
+class AnswerCache:
+    """Bounded LRU of RAG results keyed by (owner_id, normalized question, corpus version).
+    Thread-safe; max_entries=0 disables it."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max(0, max_entries)
+        self._lru: OrderedDict[tuple[str, str, int], CachedAnswer] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, owner_id: str, question: str, version: int) -> CachedAnswer | None:
+        key = (owner_id, question, version)
+        with self._lock:
+            entry = self._lru.get(key)
+            if entry is not None:
+                self._lru.move_to_end(key)
+                self.hits += 1
+                metrics.counter("rag_cache.answer.hits").add(1)
+                return entry
+            self.misses += 1
+            metrics.counter("rag_cache.answer.misses").add(1)
+            return None
+
+    def put(self, owner_id: str, question: str, version: int, entry: CachedAnswer) -> None:
+        if self.max_entries == 0:
+            return
+        key = (owner_id, question, version)
+        with self._lock:
+            self._lru[key] = entry
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.max_entries:
+                self._lru.popitem(last=False)
+                self.evictions += 1
+                metrics.counter("rag_cache.answer.evictions").add(1)
+
+    def stats(self) -> dict[str, int]:
+        """Counters since process start plus current size."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._lru),
+            }
+
+
+_question_cache: EmbeddingCache | None = None
+_answer_cache: AnswerCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_question_cache() -> EmbeddingCache:
+    """Process-wide question embedding cache (RAG_QUESTION_CACHE_MAX_ENTRIES, memory only)."""
+    global _question_cache
+    if _question_cache is None:
+        with _cache_lock:
+            if _question_cache is None:
+                _question_cache = EmbeddingCache(
+                    get_settings().rag_question_cache_max_entries,
+                    metric_prefix="rag_cache.question",
+                )
+    return _question_cache
+
+
+def get_answer_cache() -> AnswerCache:
+    """Process-wide answer cache (RAG_ANSWER_CACHE_MAX_ENTRIES)."""
+    global _answer_cache
+    if _answer_cache is None:
+        with _cache_lock:
+            if _answer_cache is None:
+                _answer_cache = AnswerCache(get_settings().rag_answer_cache_max_entries)
+    return _answer_cache
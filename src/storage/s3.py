@@ -1,29 +1,26 @@
 """S3 client and document bucket access. Key by owner_id + filename."""
 
 import contextlib
+import uuid
+from collections.abc import Iterator
+from datetime import datetime
 from typing import BinaryIO
 
-import boto3
 from botocore.exceptions import ClientError
 
 from src.api.config import get_settings
-from src.observability.logging import get_logger
+from src.storage import clients
+
+# S3 DeleteObjects accepts at most this many keys per call.
+DELETE_OBJECTS_MAX_KEYS = 1000
+# Uploads whose filename is not known yet write their parts under this prefix (outside every
+# owner's documents) and are moved to owner_id/filename on completion.
+STAGING_PREFIX = "_staging/"
 
 
 def get_s3_client():
-    """Return S3 client; uses AWS_ENDPOINT_URL for LocalStack."""
-    settings = get_settings()
-    kwargs = {"region_name": settings.aws_region}
-    endpoint = (settings.aws_endpoint_url or "").strip()
-    if endpoint:
-        kwargs["endpoint_url"] = endpoint
-    get_logger().debug(
-        "S3 client config",
-        aws_region=settings.aws_region,
-        aws_endpoint_url=settings.aws_endpoint_url or None,
-        s3_bucket_documents=settings.s3_bucket_documents or None,
-    )
-    return boto3.client("s3", **kwargs)
+    """Return the shared S3 client; uses AWS_ENDPOINT_URL for LocalStack."""
+    return clients.get_client(clients.S3)
 
 
 def document_key(owner_id: str, filename: str) -> str:
@@ -49,6 +46,104 @@ def upload_document(
     )
 
 
+def put_document(owner_id: str, filename: str, data: bytes, content_type: str) -> None:
+    """Write an in-memory document with a single PutObject (no transfer manager: cheaper than
+    upload_document for many small files); key = owner_id/filename."""
+    get_s3_client().put_object(
+        Bucket=get_settings().s3_bucket_documents,
+        Key=document_key(owner_id, filename),
+        Body=data,
+        ContentType=content_type,
+    )
+
+
+class DocumentUpload:
+    """Incremental upload of one document to owner_id/filename, part by part.
+
+    The first upload_part() starts a multipart upload; a document smaller than one part is
+    written by complete() with a single PutObject. Parts must be at least 5 MiB, except the
+    last. The previous object stays untouched until complete(); abort() discards the parts.
+    If filename is still None when the upload starts, parts go to a STAGING_PREFIX key that
+    complete() copies to owner_id/filename and then deletes (also when the copy fails).
+    """
+
+    def __init__(self, owner_id: str, filename: str | None, content_type: str):
+        self.bucket = get_settings().s3_bucket_documents
+        self.owner_id = owner_id
+        self.filename = filename
+        self.content_type = content_type
+        self._key: str | None = None  # of the multipart upload
+        self._upload_id: str | None = None
+        self._parts: list[dict] = []
+
+    @property
+    def key(self) -> str:
+        if self.filename is None:
+            raise ValueError("Document filename not set")
+        return document_key(self.owner_id, self.filename)
+
+    def upload_part(self, data: bytes) -> None:
+        client = get_s3_client()
+        if self._upload_id is None:
+            self._key = self.key if self.filename is not None else STAGING_PREFIX + uuid.uuid4().hex
+            resp = client.create_multipart_upload(
+                Bucket=self.bucket, Key=self._key, ContentType=self.content_type
+            )
+            self._upload_id = resp["UploadId"]
+        number = len(self._parts) + 1
+        resp = client.upload_part(
+            Bucket=self.bucket,
+            Key=self._key,
+            UploadId=self._upload_id,
+            PartNumber=number,
+            Body=data,
+        )
+        self._parts.append({"PartNumber": number, "ETag": resp["ETag"]})
+
+    def complete(self, data: bytes) -> None:
+        """Write the final (possibly only) data and make the object visible."""
+        client = get_s3_client()
+        if self._upload_id is None:
+            client.put_object(
+                Bucket=self.bucket, Key=self.key, Body=data, ContentType=self.content_type
+            )
+            return
+        if data:
+            self.upload_part(data)
+        client.complete_multipart_upload(
+            Bucket=self.bucket,
+            Key=self._key,
+            UploadId=self._upload_id,
+            MultipartUpload={"Parts": self._parts},
+        )
+        self._upload_id = None
+        if not self._key.startswith(STAGING_PREFIX):
+            return
+        try:
+            # Documents are at most 25 MB: one CopyObject (limit 5 GB).
+            client.copy_object(
+                Bucket=self.bucket,
+                Key=self.key,
+                CopySource={"Bucket": self.bucket, "Key": self._key},
+                ContentType=self.content_type,
+                MetadataDirective="REPLACE",
+            )
+        finally:
+            # Best effort, also when the copy failed: the bucket lifecycle rule expires leftovers.
+            with contextlib.suppress(ClientError):
+                client.delete_object(Bucket=self.bucket, Key=self._key)
+
+    def abort(self) -> None:
+        """Discard uploaded parts (best effort; a bucket lifecycle rule should expire leftovers)."""
+        if self._upload_id is None:
+            return
+        with contextlib.suppress(ClientError):
+            get_s3_client().abort_multipart_upload(
+                Bucket=self.bucket, Key=self._key, UploadId=self._upload_id
+            )
+        self._upload_id = None
+
+
 def get_document(owner_id: str, filename: str) -> bytes | None:
     """Get object bytes; return None if not found."""
     client = get_s3_client()
@@ -63,6 +158,73 @@ def get_document(owner_id: str, filename: str) -> bytes | None:
         raise
 
 
+def head_document(owner_id: str, filename: str) -> dict | None:
+    """Object ETag, size and content type ({"etag", "size", "content_type"}) without reading the
+    body; None if not found."""
+    client = get_s3_client()
+    bucket = get_settings().s3_bucket_documents
+    key = document_key(owner_id, filename)
+    try:
+        resp = client.head_object(Bucket=bucket, Key=key)
+    except ClientError as e:
+        if e.response["Error"]["Code"] in ("NoSuchKey", "404"):
+            return None
+        raise
+    return {
+        "etag": resp["ETag"].strip('"'),
+        "size": resp["ContentLength"],
+        "content_type": resp.get("ContentType"),
+    }
+
+
+def read_document_head(owner_id: str, filename: str, length: int) -> bytes:
+    """First length bytes of the object (ranged GET); b"" if not found."""
+    client = get_s3_client()
+    bucket = get_settings().s3_bucket_documents
+    key = document_key(owner_id, filename)
+    try:
+        resp = client.get_object(Bucket=bucket, Key=key, Range=f"bytes=0-{length - 1}")
+    except ClientError as e:
+        if e.response["Error"]["Code"] in ("NoSuchKey", "404"):
+            return b""
+        raise
+    return resp["Body"].read()
+
+
+def presigned_post(
+    owner_id: str, filename: str, content_type: str, max_size: int, expires_seconds: int
+) -> dict:
+    """Presigned POST ({"url", "fields"}) that lets the client upload owner_id/filename directly:
+    exactly that key, that Content-Type and 1..max_size bytes, until expires_seconds from now."""
+    key = document_key(owner_id, filename)
+    return get_s3_client().generate_presigned_post(
+        Bucket=get_settings().s3_bucket_documents,
+        Key=key,
+        Fields={"Content-Type": content_type},
+        Conditions=[
+            {"key": key},
+            {"Content-Type": content_type},
+            ["content-length-range", 1, max_size],
+        ],
+        ExpiresIn=expires_seconds,
+    )
+
+
+def download_document(owner_id: str, filename: str, fileobj: BinaryIO) -> bool:
+    """Stream object into fileobj (multipart ranged GETs, never the whole body in memory).
+    Returns False if the object does not exist."""
+    client = get_s3_client()
+    bucket = get_settings().s3_bucket_documents
+    key = document_key(owner_id, filename)
+    try:
+        client.download_fileobj(bucket, key, fileobj)
+    except ClientError as e:
+        if e.response["Error"]["Code"] in ("NoSuchKey", "404"):
+            return False
+        raise
+    return True
+
+
 def delete_document(owner_id: str, filename: str) -> None:
     """Delete object from S3 (idempotent; no error if key missing)."""
     client = get_s3_client()
@@ -70,3 +232,35 @@ def delete_document(owner_id: str, filename: str) -> None:
     key = document_key(owner_id, filename)
     with contextlib.suppress(ClientError):
         client.delete_object(Bucket=bucket, Key=key)
+
+
+def delete_documents(owner_id: str, filenames: list[str]) -> dict[str, str]:
+    """Delete many objects with DeleteObjects (DELETE_OBJECTS_MAX_KEYS per call; missing keys are
+    not errors). Returns filename -> error message for the objects S3 could not delete."""
+    client = get_s3_client()
+    bucket = get_settings().s3_bucket_documents
+    errors: dict[str, str] = {}
+    prefix_len = len(document_key(owner_id, ""))
+    for start in range(0, len(filenames), DELETE_OBJECTS_MAX_KEYS):
+        batch = filenames[start : start + DELETE_OBJECTS_MAX_KEYS]
+        resp = client.delete_objects(
+            Bucket=bucket,
+            Delete={"Objects": [{"Key": document_key(owner_id, f)} for f in batch], "Quiet": True},
+        )
+        for error in resp.get("Errors", []):
+            errors[error["Key"][prefix_len:]] = error.get("Message") or error.get("Code", "")
+    return errors
+
+
+def list_document_filenames(
+    owner_id: str, prefix: str = "", modified_before: datetime | None = None
+) -> Iterator[str]:
+    """Filenames of owner_id's stored objects starting with prefix (ListObjectsV2 pages); only
+    objects last modified before modified_before when given."""
+    paginator = get_s3_client().get_paginator("list_objects_v2")
+    key_prefix = document_key(owner_id, prefix)
+    prefix_len = len(document_key(owner_id, ""))
+    for page in paginator.paginate(Bucket=get_settings().s3_bucket_documents, Prefix=key_prefix):
+        for obj in page.get("Contents", []):
+            if modified_before is None or obj["LastModified"] < modified_before:
+                yield obj["Key"][prefix_len:]
@@ -0,0 +1,155 @@
+"""Vector store interface (put / get / query / delete / delete_by_document / list) and the S3
+Vectors backend.
+
+Keys are owner_id/document_filename/chunk_index[.generation] (vectors.VECTOR_KEY_SCHEME); metadata
+carries owner_id, document_filename, text and optionally source_documents. Queries are scoped to
+one owner and return the top_k nearest vectors by cosine distance. Backends (VECTOR_STORE_BACKEND):
+"s3vectors" (S3VectorsStore) and "local" (local_vectors.LocalVectorStore).
+"""
+
+from array import array
+from collections.abc import Iterator
+from typing import NamedTuple, Protocol
+
+# S3 Vectors DeleteVectors accepts at most this many keys per call.
+DELETE_BATCH_SIZE = 500
+# S3 Vectors GetVectors accepts at most this many keys per call.
+GET_BATCH_SIZE = 100
+# S3 Vectors ListVectors page size (maximum).
+LIST_PAGE_SIZE = 500
+
+
+class VectorEntry(NamedTuple):
+    """One vector to write: key, float32 embedding and metadata."""
+
+    key: str
+    embedding: array
+    metadata: dict
+
+
+class VectorMatch(NamedTuple):
+    """One query result: key, cosine distance (0 = same direction) and metadata."""
+
+    key: str
+    distance: float
+    metadata: dict
+
+
+class VectorStore(Protocol):
+    def put(self, entries: list[VectorEntry]) -> None:
+        """Insert or replace entries by key (one call; callers batch, see VectorWriter)."""
+        ...
+
+    def get(self, keys: list[str]) -> dict[str, array]:
+        """Stored embeddings by key; unknown keys are left out."""
+        ...
+
+    def query(self, owner_id: str, query_vector: array, top_k: int) -> list[VectorMatch]:
+        """Nearest owner_id vectors to query_vector, closest first."""
+        ...
+
+    def delete(self, keys: list[str]) -> None:
+        """Delete vectors by exact key; unknown keys are ignored."""
+        ...
+
+    def delete_by_document(self, owner_id: str, document_filename: str) -> None:
+        """Delete every vector of a document without knowing its keys."""
+        ...
+
+    def list(self, prefix: str = "") -> Iterator[str]:
+        """Keys starting with prefix."""
+        ...
+
+
+class S3VectorsStore:
+    """VectorStore on one S3 Vectors index. With bucket or index unset, queries return nothing,
+    deletes are no-ops and puts raise ValueError."""
+
+    def __init__(self, client, bucket: str | None, index: str | None):
+        self.client = client
+        self.bucket = bucket
+        self.index = index
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.bucket and self.index)
+
+    def put(self, entries: list[VectorEntry]) -> None:
+        if not self.configured:
+            raise ValueError("S3_VECTORS_BUCKET_OR_INDEX and index must be set to store vectors")
+        # The request is serialized as JSON: the only place embeddings become Python floats.
+        payload = [
+            {"key": e.key, "data": {"float32": e.embedding.tolist()}, "metadata": e.metadata}
+            for e in entries
+        ]
+        self.client.put_vectors(vectorBucketName=self.bucket, indexName=self.index, vectors=payload)
+
+    def get(self, keys: list[str]) -> dict[str, array]:
+        if not self.configured:
+            return {}
+        out = {}
+        for start in range(0, len(keys), GET_BATCH_SIZE):
+            resp = self.client.get_vectors(
+                vectorBucketName=self.bucket,
+                indexName=self.index,
+                keys=keys[start : start + GET_BATCH_SIZE],
+                returnData=True,
+                returnMetadata=False,
+            )
+            for v in resp.get("vectors", []):
+                out[v["key"]] = array("f", v["data"]["float32"])
+        return out
+
+    def query(self, owner_id: str, query_vector: array, top_k: int) -> list[VectorMatch]:
+        if not self.configured:
+            return []
+        resp = self.client.query_vectors(
+            vectorBucketName=self.bucket,
+            indexName=self.index,
+            topK=top_k,
+            queryVector={"float32": query_vector.tolist()},
+            filter={"owner_id": {"$eq": owner_id}},
+            returnMetadata=True,
+            returnDistance=True,
+        )
+        return [
+            VectorMatch(v.get("key", ""), float(v.get("distance", 0.0)), v.get("metadata") or {})
+            for v in resp.get("vectors", [])
+        ]
+
+    def delete(self, keys: list[str]) -> None:
+        if not self.configured or not keys:
+            return
+        for start in range(0, len(keys), DELETE_BATCH_SIZE):
+            self.client.delete_vectors(
+                vectorBucketName=self.bucket,
+                indexName=self.index,
+                keys=keys[start : start + DELETE_BATCH_SIZE],
+            )
+
+    def delete_by_document(self, owner_id: str, document_filename: str) -> None:
+        """Lists the whole index (no server-side prefix filter): cost grows with the index."""
+        self.delete(list(self.list(f"{owner_id}/{document_filename}/")))
+
+    def list(self, prefix: str = "") -> Iterator[str]:
+        if not self.configured:
+            return
+        next_token = None
+        while True:
+            kwargs = {
+                "vectorBucketName": self.bucket,
+                "indexName": self.index,
+                "maxResults": LIST_PAGE_SIZE,
+                "returnData": False,
+                "returnMetadata": False,
+            }
+            if next_token:
+                kwargs["nextToken"] = next_token
+            resp = self.client.list_vectors(**kwargs)
+            for v in resp.get("vectors", []):
+                key = v.get("key", "")
+                if key.startswith(prefix):
+                    yield key
+            next_token = resp.get("nextToken")
+            if not next_token:
+                return
@@ -0,0 +1,259 @@
+"""Batched, parallel vector writer.
+
+Entries are queued per document and sent to a VectorStore as put batches bounded by
+MAX_PUT_VECTORS vectors and MAX_PUT_BYTES of estimated (S3 Vectors PutVectors) payload, with up
+to max_concurrency calls in flight. Entries of different documents share batches, so a batch run
+over many small documents makes full calls. Throttling / transient errors are retried per batch
+with jittered backoff; a batch rejected otherwise is put again document by document, so one bad
+document does not fail the others.
+
+A document is sealed once all of its entries have been added; its completion callback runs with
+None or the first error of its batches as soon as every entry is written or failed. Callbacks run
+in the thread that calls add/seal/discard/flush/close, never on the writer's worker threads.
+"""
+
+import random
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable, Hashable
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+
+from botocore.exceptions import ClientError
+
+from src.observability import metrics
+from src.storage.vector_store import VectorEntry, VectorStore
+
+# S3 Vectors PutVectors limits: 500 vectors per call; request payload headroom below 20 MiB.
+MAX_PUT_VECTORS = 500
+MAX_PUT_BYTES = 16 * 1024 * 1024
+# Upper bound of JSON characters per float32 value (digits, sign, exponent, separator).
+_BYTES_PER_DIMENSION = 22
+
+# PutVectors error codes worth retrying (throttling / transient); anything else fails the batch.
+RETRYABLE_ERROR_CODES = frozenset(
+    {
+        "ThrottlingException",
+        "TooManyRequestsException",
+        "ServiceUnavailableException",
+        "InternalServerException",
+        "SlowDown",
+        "RequestTimeout",
+    }
+)
+PUT_MAX_ATTEMPTS = 5
+PUT_BACKOFF_BASE_SECONDS = 0.2
+PUT_BACKOFF_MAX_SECONDS = 5.0
+
+Completion = Callable[[Exception | None], None]
+
+
+def entry_size(entry: VectorEntry) -> int:
+    """Estimated PutVectors payload bytes of one entry."""
+    meta = sum(len(k) + len(str(v).encode("utf-8")) + 8 for k, v in entry.metadata.items())
+    return len(entry.key) + _BYTES_PER_DIMENSION * len(entry.embedding) + meta + 64
+
+
+@dataclass
+class _Document:
+    outstanding: int = 0
+    error: Exception | None = None
+    on_complete: Completion | None = None
+
+
+@dataclass
+class _Batch:
+    documents: Counter
+    future: Future  # -> errors by document
+
+
+class VectorWriter:
+    """Coalescing writer for one vector store. Thread-safe; use as a context manager (or call
+    close()) so queued entries are sent and pending callbacks run."""
+
+    def __init__(
+        self,
+        store: VectorStore,
+        max_concurrency: int = 4,
+        max_batch_vectors: int = MAX_PUT_VECTORS,
+        max_batch_bytes: int = MAX_PUT_BYTES,
+    ):
+        self.store = store
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_batch_vectors = max(1, min(max_batch_vectors, MAX_PUT_VECTORS))
+        self.max_batch_bytes = max_batch_bytes
+        self.put_calls = 0
+        self.vectors_written = 0
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()  # workers never take _lock (flush waits holding it)
+        self._pool = ThreadPoolExecutor(
+            max_workers=self.max_concurrency, thread_name_prefix="vector-put"
+        )
+        self._pending: list[tuple[Hashable, VectorEntry]] = []
+        self._pending_bytes = 0
+        self._in_flight: list[_Batch] = []
+        self._documents: dict[Hashable, _Document] = {}
+        self._ready: list[tuple[Completion, Exception | None]] = []
+
+    def __enter__(self) -> "VectorWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def add(self, document: Hashable, entries: list[VectorEntry]) -> None:
+        """Queue entries of document; full batches are dispatched immediately. Blocks while
+        max_concurrency batches are in flight, so queued memory stays bounded."""
+        with self._lock:
+            state = self._documents.setdefault(document, _Document())
+            for entry in entries:
+                size = entry_size(entry)
+                if self._pending and self._pending_bytes + size > self.max_batch_bytes:
+                    self._dispatch()
+                self._pending.append((document, entry))
+                self._pending_bytes += size
+                state.outstanding += 1
+                if len(self._pending) >= self.max_batch_vectors:
+                    self._dispatch()
+            self._reap()
+        self._run_callbacks()
+
+    def seal(self, document: Hashable, on_complete: Completion) -> None:
+        """No more entries for document: on_complete(error) runs once all of them are settled
+        (immediately when none are outstanding)."""
+        with self._lock:
+            state = self._documents.setdefault(document, _Document())
+            state.on_complete = on_complete
+            self._reap()
+            self._settle_document(document)
+        self._run_callbacks()
+
+    def discard(self, document: Hashable) -> None:
+        """Drop document's queued entries and wait for its in-flight batches without running its
+        callback (the caller is rolling the document back)."""
+        with self._lock:
+            self._pending = [(d, e) for d, e in self._pending if d != document]
+            self._pending_bytes = sum(entry_size(e) for _, e in self._pending)
+            wait([b.future for b in self._in_flight if document in b.documents])
+            self._reap()
+            self._documents.pop(document, None)
+        self._run_callbacks()
+
+    def flush(self) -> None:
+        """Send every queued entry, wait for all batches and run the resulting callbacks."""
+        with self._lock:
+            if self._pending:
+                self._dispatch()
+            wait([b.future for b in self._in_flight])
+            self._reap()
+        self._run_callbacks()
+
+    def write(self, entries: list[VectorEntry]) -> None:
+        """Write entries now (split into bounded, parallel batches); raise the first failure."""
+        outcome: list[Exception | None] = []
+        document = object()
+        self.add(document, entries)
+        self.seal(document, outcome.append)
+        self.flush()
+        if outcome and outcome[0] is not None:
+            raise outcome[0]
+
+    def close(self) -> None:
+        """Flush, then stop the worker threads."""
+        try:
+            self.flush()
+        finally:
+            self._pool.shutdown(wait=True)
+
+    def _dispatch(self) -> None:
+        """Submit the pending entries as one batch. Caller holds the lock."""
+        while len(self._in_flight) >= self.max_concurrency:
+            wait([b.future for b in self._in_flight], return_when=FIRST_COMPLETED)
+            self._reap()
+        items = self._pending
+        self._pending = []
+        self._pending_bytes = 0
+        future = self._pool.submit(self._put_batch, items)
+        self._in_flight.append(_Batch(Counter(d for d, _ in items), future))
+
+    def _reap(self) -> None:
+        """Account finished batches to their documents. Caller holds the lock."""
+        finished = [b for b in self._in_flight if b.future.done()]
+        if not finished:
+            return
+        self._in_flight = [b for b in self._in_flight if not b.future.done()]
+        for batch in finished:
+            errors = batch.future.result()
+            for document, count in batch.documents.items():
+                state = self._documents.get(document)
+                if state is None:  # discarded
+                    continue
+                state.outstanding -= count
+                if document in errors and state.error is None:
+                    state.error = errors[document]
+                self._settle_document(document)
+
+    def _settle_document(self, document: Hashable) -> None:
+        state = self._documents.get(document)
+        if state is None or state.on_complete is None or state.outstanding:
+            return
+        del self._documents[document]
+        self._ready.append((state.on_complete, state.error))
+
+    def _run_callbacks(self) -> None:
+        with self._lock:
+            ready, self._ready = self._ready, []
+        for on_complete, error in ready:
+            on_complete(error)
+
+    def _put_batch(self, items: list[tuple[Hashable, VectorEntry]]) -> dict[Hashable, Exception]:
+        """Put one batch; returns the errors by document. When a batch of several documents fails
+        with a non-retryable error, each document's entries are put again on their own, so only
+        the documents whose entries are rejected fail."""
+        groups: dict[Hashable, list[VectorEntry]] = {}
+        for document, entry in items:
+            groups.setdefault(document, []).append(entry)
+        try:
+            self._put_with_retry([e for _, e in items])
+            return {}
+        except Exception as e:
+            if len(groups) == 1 or _retryable(e):
+                return dict.fromkeys(groups, e)
+        metrics.counter("vectors.put_batch_splits").add(1)
+        errors: dict[Hashable, Exception] = {}
+        for document, entries in groups.items():
+            try:
+                self._put_with_retry(entries)
+            except Exception as e:
+                errors[document] = e
+        return errors
+
+    def _put_with_retry(self, entries: list[VectorEntry]) -> None:
+        """Put one batch; retry throttling/transient errors with full-jitter backoff."""
+        attempt = 0
+        while True:
+            with self._stats_lock:
+                self.put_calls += 1
+            try:
+                self.store.put(entries)
+                break
+            except ClientError as e:
+                attempt += 1
+                metrics.counter("vectors.put_errors").add(1, {"code": _error_code(e)})
+                if not _retryable(e) or attempt >= PUT_MAX_ATTEMPTS:
+                    raise
+                cap = min(PUT_BACKOFF_MAX_SECONDS, PUT_BACKOFF_BASE_SECONDS * 2 ** (attempt - 1))
+                time.sleep(random.uniform(0, cap))
+        with self._stats_lock:
+            self.vectors_written += len(entries)
+        metrics.histogram("vectors.put_batch_size").record(len(entries))
+
+
+def _error_code(error: ClientError) -> str:
+    return error.response.get("Error", {}).get("Code", "")
+
+
+def _retryable(error: Exception) -> bool:
+    """Throttling / transient errors: the same batch may succeed later."""
+    return isinstance(error, ClientError) and _error_code(error) in RETRYABLE_ERROR_CODES
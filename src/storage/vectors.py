@@ -1,157 +1,291 @@
-"""S3 Vectors and Bedrock clients; store/delete vectors by owner_id and document filename."""
+"""Vector store selection (VECTOR_STORE_BACKEND) and Bedrock client; store/query/delete vectors
+by owner_id and document filename."""
 
-import boto3
+import time
+from array import array
+from typing import NamedTuple
 
 from src.api.config import get_settings
+from src.observability import metrics
 from src.observability.logging import get_logger
+from src.storage import clients
+from src.storage import metadata as metadata_store
+from src.storage.local_vectors import get_local_vector_store
+from src.storage.vector_store import S3VectorsStore, VectorEntry, VectorStore
+from src.storage.vector_writer import VectorWriter
 
+# Key format recorded in the document's vector manifest (metadata vector_key_scheme); keys of
+# generation g > 0 end in ".g" (processing writes a new generation, then switches the manifest).
+VECTOR_KEY_SCHEME = "owner_id/filename/chunk_index"
+# Queries fetch this many times top_k: during a run a chunk can match in two generations.
+QUERY_OVERFETCH = 2
 
-# Vector key format for delete-by-document: owner_id/filename/chunk_index
-def _vector_key(owner_id: str, document_filename: str, chunk_index: int) -> str:
-    return f"{owner_id}/{document_filename}/{chunk_index}"
+
+class RetrievedChunk(NamedTuple):
+    """One retrieval result: chunk text, document filename, chunk_index (None when the key does
+    not carry one) and relevance score (higher is more relevant; 1 - cosine distance for vector
+    results)."""
+
+    text: str
+    document_filename: str
+    chunk_index: int | None
+    score: float
+
+
+# Vector key format for delete-by-document: owner_id/filename/chunk_index[.generation]
+def _vector_key(
+    owner_id: str, document_filename: str, chunk_index: int, generation: int = 0
+) -> str:
+    suffix = f".{generation}" if generation else ""
+    return f"{owner_id}/{document_filename}/{chunk_index}{suffix}"
+
+
+def _chunk_index(key: str) -> int | None:
+    """chunk_index of an owner_id/filename/chunk_index[.generation] key."""
+    index = key.rsplit("/", 1)[-1].split(".", 1)[0]
+    return int(index) if index.isdigit() else None
+
+
+def _generation(key: str) -> int | None:
+    """Generation of an owner_id/filename/chunk_index[.generation] key (0 without a suffix)."""
+    _, _, generation = key.rsplit("/", 1)[-1].partition(".")
+    if not generation:
+        return 0
+    return int(generation) if generation.isdigit() else None
 
 
 def get_vectors_client():
-    """Return S3 Vectors client for put_vectors, delete_vectors, list_vectors, query_vectors."""
+    """Return the shared S3 Vectors client for put_vectors, delete_vectors, list_vectors,
+    query_vectors."""
+    return clients.get_client(clients.S3VECTORS)
+
+
+def get_vector_store() -> VectorStore:
+    """Vector store from VECTOR_STORE_BACKEND: "s3vectors" (S3_VECTORS_BUCKET_OR_INDEX /
+    S3_VECTORS_INDEX) or "local" (LOCAL_VECTOR_STORE_PATH)."""
     settings = get_settings()
-    kwargs = {"region_name": settings.aws_region}
-    endpoint = (settings.aws_endpoint_url or "").strip()
-    if endpoint:
-        kwargs["endpoint_url"] = endpoint
-    get_logger().debug(
-        "S3 Vectors client config",
-        aws_region=settings.aws_region,
-        s3_vectors_bucket=settings.s3_vectors_bucket_or_index,
-        s3_vectors_index=settings.s3_vectors_index,
+    backend = settings.vector_store_backend
+    if backend == "local":
+        return get_local_vector_store()
+    if backend != "s3vectors":
+        raise ValueError(f"Unknown vector store backend: {backend}")
+    return S3VectorsStore(
+        get_vectors_client(), settings.s3_vectors_bucket_or_index, settings.s3_vectors_index
     )
-    return boto3.client("s3vectors", **kwargs)
 
 
 def get_bedrock_client():
-    """Return Bedrock runtime client for InvokeModel (embeddings and RAG)."""
+    """Return the shared Bedrock runtime client for InvokeModel (RAG answers; embeddings use
+    embedding_service.get_bedrock_client)."""
+    return clients.get_client(clients.BEDROCK_RUNTIME)
+
+
+def vector_entries(
+    owner_id: str,
+    document_filename: str,
+    vectors: list[tuple[array, str]],
+    chunk_indices: list[int] | None = None,
+    source_documents: list[list[str]] | None = None,
+    generation: int = 0,
+) -> list[VectorEntry]:
+    """
+    Build write entries for (float32 embedding, text) items of a document.
+    Key format: owner_id/document_filename/chunk_index[.generation]. Metadata: owner_id,
+    document_filename, text.
+    chunk_indices gives the chunk_index of each item (default 0..n-1), so callers can rewrite
+    only some chunks of a document. source_documents[i], when it names more than this document,
+    is stored as metadata source_documents (near-duplicate text found in several documents).
+    """
+    if chunk_indices is None:
+        chunk_indices = list(range(len(vectors)))
+    if source_documents is None:
+        source_documents = [[document_filename]] * len(vectors)
+    entries = []
+    for i, (embedding, text), sources in zip(chunk_indices, vectors, source_documents, strict=True):
+        metadata = {
+            "owner_id": owner_id,
+            "document_filename": document_filename,
+            "text": text[: 64 * 1024],  # metadata size limit; truncate if needed
+        }
+        if len(sources) > 1:
+            metadata["source_documents"] = list(sources)
+        entries.append(
+            VectorEntry(
+                _vector_key(owner_id, document_filename, i, generation), embedding, metadata
+            )
+        )
+    return entries
+
+
+def open_writer() -> VectorWriter:
+    """New VectorWriter for the configured store (VECTOR_WRITE_BATCH_SIZE vectors per call,
+    VECTOR_WRITE_CONCURRENCY calls in flight). Close it (or use it as a context manager) to send
+    queued entries."""
     settings = get_settings()
-    get_logger().debug(
-        "Bedrock client config",
-        aws_region=settings.aws_region,
-        bedrock_model_id=settings.bedrock_model_id,
-        s3_vectors_bucket_or_index=settings.s3_vectors_bucket_or_index,
+    return VectorWriter(
+        get_vector_store(),
+        max_concurrency=settings.vector_write_concurrency,
+        max_batch_vectors=settings.vector_write_batch_size,
     )
-    return boto3.client("bedrock-runtime", region_name=settings.aws_region)
 
 
 def store_vectors(
     owner_id: str,
     document_filename: str,
-    vectors: list[tuple[list[float], str]],
+    vectors: list[tuple[array, str]],
+    chunk_indices: list[int] | None = None,
+    source_documents: list[list[str]] | None = None,
 ) -> None:
     """
-    Store vectors in S3 Vectors index. Each item is (embedding, text).
-    Key format: owner_id/document_filename/chunk_index. Metadata: owner_id, document_filename, text.
+    Store vectors in the vector store. Each item is (float32 embedding, text); see vector_entries.
+    Large documents are split into PutVectors-sized batches sent in parallel; only failed batches
+    are retried.
     """
-    settings = get_settings()
-    bucket = settings.s3_vectors_bucket_or_index
-    index = settings.s3_vectors_index
-    if not bucket or not index:
-        raise ValueError("S3_VECTORS_BUCKET_OR_INDEX and index must be set to store vectors")
-    client = get_vectors_client()
-    payload = []
-    for i, (embedding, text) in enumerate(vectors):
-        key = _vector_key(owner_id, document_filename, i)
-        # S3 Vectors requires float32
-        float32_list = [float(x) for x in embedding]
-        payload.append(
-            {
-                "key": key,
-                "data": {"float32": float32_list},
-                "metadata": {
-                    "owner_id": owner_id,
-                    "document_filename": document_filename,
-                    "text": text[: 64 * 1024],  # metadata size limit; truncate if needed
-                },
-            }
-        )
-    if not payload:
+    entries = vector_entries(owner_id, document_filename, vectors, chunk_indices, source_documents)
+    if not entries:
         return
-    client.put_vectors(
-        vectorBucketName=bucket,
-        indexName=index,
-        vectors=payload,
-    )
+    with open_writer() as writer:
+        writer.write(entries)
 
 
 def query_vectors(
     owner_id: str,
-    query_vector: list[float],
+    query_vector: array,
     top_k: int = 10,
-) -> list[tuple[str, str]]:
+) -> list[RetrievedChunk]:
     """
-    Query S3 Vectors for nearest neighbors to query_vector, filtered by owner_id.
-    Returns list of (text, document_filename) from metadata. Empty if bucket/index not set.
+    Query the vector store for nearest neighbors to query_vector, filtered by owner_id.
+    Returns chunks (text and document_filename from metadata, chunk_index from the key, score
+    1 - distance), closest first. Only keys of each document's committed vector_generation count,
+    so a run being written (or rolled back) and documents without metadata are never returned.
+    Empty if bucket/index not set or the query fails. Latency is recorded as
+    vectors.query_seconds by backend.
     """
-    settings = get_settings()
-    bucket = settings.s3_vectors_bucket_or_index
-    index = settings.s3_vectors_index
-    if not bucket or not index:
-        return []
-    client = get_vectors_client()
-    float32_list = [float(x) for x in query_vector]
+    store = get_vector_store()
+    started = time.perf_counter()
     try:
-        resp = client.query_vectors(
-            vectorBucketName=bucket,
-            indexName=index,
-            topK=top_k,
-            queryVector={"float32": float32_list},
-            filter={"owner_id": {"$eq": owner_id}},
-            returnMetadata=True,
-            returnDistance=True,
-        )
-    except Exception:
+        matches = store.query(owner_id, query_vector, top_k * QUERY_OVERFETCH)
+        filenames = [m.metadata.get("document_filename") or "" for m in matches]
+        generations = metadata_store.get_vector_generations(owner_id, [f for f in filenames if f])
+    except Exception as e:
+        get_logger().warning("Vector query failed", owner_id=owner_id, error=str(e))
         return []
+    metrics.histogram("vectors.query_seconds", unit="s").record(
+        time.perf_counter() - started, {"backend": get_settings().vector_store_backend}
+    )
     out = []
-    for v in resp.get("vectors", []):
-        meta = v.get("metadata") or {}
-        text = meta.get("text") or ""
-        doc_fn = meta.get("document_filename") or ""
-        if text or doc_fn:
-            out.append((text, doc_fn))
-    return out
+    for match, doc_fn in zip(matches, filenames, strict=True):
+        if doc_fn not in generations or _generation(match.key) != generations[doc_fn]:
+            continue
+        text = match.metadata.get("text") or ""
+        out.append(RetrievedChunk(text, doc_fn, _chunk_index(match.key), 1.0 - match.distance))
+    return out[:top_k]
+
+
+def get_chunk_embeddings(
+    owner_id: str, document_filename: str, chunk_indices: list[int], generation: int = 0
+) -> dict[int, array]:
+    """Stored embeddings of a document's chunks (of one key generation) by chunk_index; chunks
+    without a vector are left out."""
+    if not chunk_indices:
+        return {}
+    keys = {_vector_key(owner_id, document_filename, i, generation): i for i in chunk_indices}
+    return {keys[key]: e for key, e in get_vector_store().get(list(keys)).items()}
+
+
+def delete_chunk_vectors(
+    owner_id: str, document_filename: str, chunk_indices: list[int], generation: int = 0
+) -> None:
+    """Delete the vectors for specific chunk indices of a document (no index scan)."""
+    keys = [_vector_key(owner_id, document_filename, i, generation) for i in chunk_indices]
+    delete_keys(keys)
+
+
+def delete_keys(keys: list[str]) -> None:
+    """Delete vectors by key (batched by the store). No-op if bucket/index not set."""
+    if keys:
+        get_vector_store().delete(keys)
+
+
+def manifest_keys(
+    owner_id: str,
+    document_filename: str,
+    chunk_count: int | None,
+    key_scheme: str | None,
+    generation: int | None = None,
+) -> list[str] | None:
+    """A document's vector keys from its manifest; None without one (the keys must be listed)."""
+    if chunk_count is None or key_scheme != VECTOR_KEY_SCHEME:
+        return None
+    return [
+        _vector_key(owner_id, document_filename, i, generation or 0) for i in range(chunk_count)
+    ]
+
+
+def delete_document_vectors(
+    owner_id: str,
+    document_filename: str,
+    chunk_count: int | None,
+    key_scheme: str | None,
+    generation: int | None = None,
+) -> None:
+    """
+    Delete all vectors for a document. With a vector manifest (chunk_count and generation under
+    the current VECTOR_KEY_SCHEME) the keys are computed and deleted in batches; otherwise
+    (documents processed before manifests were recorded) fall back to scanning the index.
+    """
+    keys = manifest_keys(owner_id, document_filename, chunk_count, key_scheme, generation)
+    if keys is None:
+        delete_vectors_by_document(owner_id, document_filename)
+    else:
+        delete_keys(keys)
 
 
 def delete_vectors_by_document(owner_id: str, document_filename: str) -> None:
     """
-    Delete all vectors for a document (owner_id + filename). Lists vectors by key prefix and deletes.
+    Delete all vectors for a document (owner_id + filename) without knowing its keys. On S3 Vectors
+    this lists the whole index; prefer delete_document_vectors when a manifest is known.
     """
-    settings = get_settings()
-    bucket = settings.s3_vectors_bucket_or_index
-    index = settings.s3_vectors_index
-    if not bucket or not index:
-        return
+    get_vector_store().delete_by_document(owner_id, document_filename)
+
+
+def delete_stale_vectors(owner_id: str, document_filename: str, generation: int) -> int:
+    """Delete a document's vectors of every generation but the given one, listing its keys (for
+    documents whose previous keys are unknown). Returns the number of keys deleted."""
     prefix = f"{owner_id}/{document_filename}/"
-    client = get_vectors_client()
-    keys_to_delete = []
-    next_token = None
-    while True:
-        kwargs = {
-            "vectorBucketName": bucket,
-            "indexName": index,
-            "maxResults": 500,
-            "returnData": False,
-            "returnMetadata": False,
-        }
-        if next_token:
-            kwargs["nextToken"] = next_token
-        resp = client.list_vectors(**kwargs)
-        for v in resp.get("vectors", []):
-            k = v.get("key", "")
-            if k.startswith(prefix):
-                keys_to_delete.append(k)
-        next_token = resp.get("nextToken")
-        if not next_token:
-            break
-    if not keys_to_delete:
-        return
-    client.delete_vectors(
-        vectorBucketName=bucket,
-        indexName=index,
-        keys=keys_to_delete,
-    )
+    keys = [
+        key
+        for key in get_vector_store().list(prefix)
+        if "/" not in key[len(prefix) :] and _generation(key) != generation
+    ]
+    delete_keys(keys)
+    return len(keys)
+
+
+def delete_unrecorded_vectors(owner_id: str) -> int:
+    """Delete owner_id's vectors of documents without metadata (left by failed deletes), with
+    one listing of the owner's keys. Returns the number of keys deleted."""
+    owner_prefix = f"{owner_id}/"
+    by_document: dict[str, list[str]] = {}
+    for key in get_vector_store().list(owner_prefix):
+        by_document.setdefault(key[len(owner_prefix) :].rsplit("/", 1)[0], []).append(key)
+    recorded = metadata_store.get_vector_generations(owner_id, list(by_document))
+    keys = [key for f, doc_keys in by_document.items() if f not in recorded for key in doc_keys]
+    delete_keys(keys)
+    return len(keys)
+
+
+def delete_owner_vectors(owner_id: str, filenames: set[str] | None = None) -> int:
+    """
+    Delete owner_id's vectors of the given documents (all of the owner's when filenames is None)
+    with one listing of the owner's keys, however many documents: the fallback for documents
+    without a manifest in bulk deletes. Returns the number of keys deleted.
+    """
+    owner_prefix = f"{owner_id}/"
+    keys = [
+        key
+        for key in get_vector_store().list(owner_prefix)
+        if filenames is None or key[len(owner_prefix) :].rsplit("/", 1)[0] in filenames
+    ]
+    delete_keys(keys)
+    return len(keys)
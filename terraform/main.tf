@@ -42,6 +42,27 @@ module "s3_documents" {
     }
   }
 
+  # Uploads without a filename yet stage under _staging/ (moved on completion); expire what a
+  # crashed request left there, and abort multipart uploads that were never completed.
+  lifecycle_rule = [
+    {
+      id      = "expire-staged-uploads"
+      enabled = true
+      filter = {
+        prefix = "_staging/"
+      }
+      expiration = {
+        days = 1
+      }
+    },
+    {
+      id                                     = "abort-incomplete-multipart-uploads"
+      enabled                                = true
+      filter                                 = {}
+      abort_incomplete_multipart_upload_days = 1
+    }
+  ]
+
   # Block public access
   block_public_acls       = true
   block_public_policy     = true
@@ -66,7 +87,20 @@ module "dynamodb_metadata" {
 
   attributes = [
     { name = "owner_id", type = "S" },
-    { name = "filename", type = "S" }
+    { name = "filename", type = "S" },
+    { name = "status_shard", type = "S" },
+    { name = "uploaded_at", type = "S" }
+  ]
+
+  # Sparse index: only pending/processing/failed items carry status_shard ("<status>#<0-15>"), so
+  # the batch job queries O(pending) items instead of scanning the table.
+  global_secondary_indexes = [
+    {
+      name            = "status-index"
+      hash_key        = "status_shard"
+      range_key       = "uploaded_at"
+      projection_type = "ALL"
+    }
   ]
 
   tags = {
@@ -13,6 +13,11 @@ output "dynamodb_table_name" {
   value       = module.dynamodb_metadata.dynamodb_table_id
 }
 
+output "dynamodb_status_index_name" {
+  description = "Sparse status GSI for the batch job (set DYNAMODB_STATUS_INDEX once backfilled)"
+  value       = "status-index"
+}
+
 output "s3_vectors_bucket_name" {
   description = "S3 Vectors bucket name for embeddings (set S3_VECTORS_BUCKET_OR_INDEX in app .env)"
   value       = aws_s3vectors_vector_bucket.embeddings.vector_bucket_name
@@ -0,0 +1,62 @@
+"""Unit tests for src.services.batch_process: every scanned document ends up in the report."""
+
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from datetime import UTC, datetime
+
+from src.models.document import Document, DocumentFormat, ProcessingStatus
+from src.services import batch_process
+from src.storage.vector_writer import VectorWriter
+
+
+class NullStore:
+    def put(self, entries) -> None:
+        pass
+
+
+def _pending(filename: str) -> Document:
+    return Document(
+        filename=filename,
+        owner_id="owner-1",
+        format=DocumentFormat.MARKDOWN,
+        size_bytes=10,
+        uploaded_at=datetime.now(UTC),
+    )
+
+
+def test_document_whose_status_update_fails_is_reported_failed(monkeypatch):
+    metadata = batch_process.metadata_store
+    docs = {f: _pending(f) for f in ("a.md", "b.md")}
+    monkeypatch.setattr(
+        metadata, "list_by_status", lambda status, **kwargs: (list(docs.values()), None)
+    )
+    monkeypatch.setattr(metadata, "get_metadata", lambda owner_id, filename: docs[filename])
+
+    def update_status(owner_id, filename, status, **fields):
+        raise RuntimeError("DynamoDB unavailable")
+
+    monkeypatch.setattr(metadata, "update_status", update_status)
+    monkeypatch.setattr(
+        batch_process.vectors_storage, "open_writer", lambda: VectorWriter(NullStore())
+    )
+
+    report = batch_process.run_pending_batch(workers=2, executor="thread")
+
+    assert (report.processed, report.failed) == (0, 2)
+    assert len(report.latencies) == 2
+
+
+def test_crashed_worker_process_is_recorded_and_marked_failed(monkeypatch):
+    updates: list[tuple] = []
+    monkeypatch.setattr(
+        batch_process.metadata_store,
+        "update_status",
+        lambda owner_id, filename, status, **fields: updates.append((filename, status, fields)),
+    )
+    future: Future = Future()
+    future.set_exception(BrokenProcessPool("worker exited"))
+
+    error = batch_process._isolated_outcome(future, ("owner-1", "a.md"))
+
+    assert error is not None and "worker exited" in error
+    assert updates == [("a.md", ProcessingStatus.FAILED, {"processing_error": error})]
@@ -0,0 +1,38 @@
+"""Unit tests for src.storage.checkpoints: content keys, chunk texts and stored embeddings."""
+
+from array import array
+
+from src.storage.checkpoints import CheckpointStore
+
+
+def test_checkpoint_survives_reopening_for_the_same_content_only():
+    store = CheckpointStore(":memory:")
+    checkpoint = store.open("owner-1", "a.md", "etag-1")
+    checkpoint.add_chunks([(0, "alpha"), (1, "beta")])
+    checkpoint.mark_complete(2)
+
+    again = store.open("owner-1", "a.md", "etag-1")
+    assert again.complete and list(again.chunks()) == ["alpha", "beta"]
+    changed = store.open("owner-1", "a.md", "etag-2")
+
+    assert not changed.complete and list(changed.chunks()) == []
+
+
+def test_embeddings_are_returned_only_for_unchanged_chunk_text():
+    checkpoint = CheckpointStore(":memory:").open("owner-1", "a.md", "etag-1")
+    checkpoint.add_chunks([(0, "alpha"), (1, "beta")])
+    checkpoint.add_embeddings([(0, "alpha", array("f", [1.0])), (1, "beta", array("f", [2.0]))])
+
+    checkpoint.add_chunks([(1, "beta, revised")])
+    found = checkpoint.embeddings([(0, "alpha"), (1, "beta, revised")])
+
+    assert {i: list(e) for i, e in found.items()} == {0: [1.0]}
+
+
+def test_prune_drops_checkpoints_unused_for_the_given_age():
+    store = CheckpointStore(":memory:")
+    store.open("owner-1", "a.md", "etag-1").add_chunks([(0, "alpha")])
+
+    assert store.prune(max_age_seconds=3600) == 0
+    assert store.prune(max_age_seconds=-1) == 1
+    assert list(store.open("owner-1", "a.md", "etag-1").chunks()) == []
@@ -0,0 +1,66 @@
+"""Unit tests for src.services.chunk_service fixed and structured chunkers."""
+
+import pytest
+from src.models.document import DocumentFormat
+from src.services import chunk_service
+from src.services.chunk_service import (
+    FixedWindowChunker,
+    MarkdownChunker,
+    PdfChunker,
+    estimate_tokens,
+)
+
+
+def _pieces(text: str, size: int) -> list[str]:
+    return [text[i : i + size] for i in range(0, len(text), size)]
+
+
+def test_fixed_windows_overlap_and_do_not_depend_on_piece_boundaries():
+    text = "".join(f"word{i} " for i in range(2000)).strip()
+
+    whole = list(FixedWindowChunker().chunks([text]))
+    streamed = list(FixedWindowChunker().chunks(_pieces(text, 333)))
+
+    assert whole == streamed
+    assert all(len(c) == chunk_service.CHUNK_SIZE for c in whole[:-1])
+    assert whole[0][-chunk_service.CHUNK_OVERLAP :] == whole[1][: chunk_service.CHUNK_OVERLAP]
+    assert whole[-1].endswith("word1999")
+
+
+def test_markdown_keeps_code_fences_whole_and_headings_with_their_text():
+    text = (
+        "# Setup\n\nInstall the package first.\n\n"
+        "```python\nimport os\n\n\nprint(os.getcwd())\n```\n\n"
+        "## Usage\n\nCall the function."
+    )
+
+    chunks = list(MarkdownChunker(token_budget=20).chunks(_pieces(text, 5)))
+
+    assert chunks[0].startswith("# Setup\n\nInstall the package first.")
+    assert any("import os\n\n\nprint(os.getcwd())\n```" in c for c in chunks)
+    assert chunks[-1] == "## Usage\n\nCall the function."
+
+
+def test_oversized_paragraph_is_split_at_sentences_within_the_budget():
+    paragraph = " ".join(f"Sentence number {i} ends here." for i in range(40))
+
+    chunks = list(MarkdownChunker(token_budget=30).chunks([paragraph]))
+
+    assert len(chunks) > 1
+    assert all(estimate_tokens(c) <= 30 for c in chunks)
+    assert all(c.endswith("ends here.") for c in chunks)
+    assert " ".join(chunks) == paragraph
+
+
+def test_pdf_chunker_collapses_extraction_whitespace_and_packs_across_pages():
+    pages = ["Clause  1.  The   tenant pays.\n\n\n", "  \n\nClause 2. \tRent is due."]
+
+    assert list(PdfChunker(token_budget=100).chunks(pages)) == [
+        "Clause 1. The tenant pays.\n\nClause 2. Rent is due."
+    ]
+
+
+def test_unknown_strategy_is_rejected():
+    assert isinstance(chunk_service.get_chunker(DocumentFormat.PDF, "fixed"), FixedWindowChunker)
+    with pytest.raises(ValueError, match="semantic"):
+        chunk_service.get_chunker(DocumentFormat.PDF, "semantic")
@@ -0,0 +1,56 @@
+"""Unit tests for src.services.context_service: merging, overlap stripping and the token budget."""
+
+from src.services.chunk_service import estimate_tokens
+from src.services.context_service import SEPARATOR, pack_context, strip_overlap
+from src.storage.vectors import RetrievedChunk
+
+OVERLAP = "the notice period is ninety days"
+
+
+def _chunk(text: str, filename: str, index: int | None, score: float) -> RetrievedChunk:
+    return RetrievedChunk(text, filename, index, score)
+
+
+def test_strip_overlap_removes_only_a_real_repeated_boundary():
+    assert strip_overlap(f"Clause 4: {OVERLAP}", f"{OVERLAP} from notice.") == " from notice."
+    assert strip_overlap("ends with the", "the start") == "the start"
+
+
+def test_adjacent_chunks_are_merged_with_their_overlap_kept_once():
+    chunks = [
+        _chunk(f"{OVERLAP} from notice.", "a.md", 1, 0.9),
+        _chunk(f"Clause 4: {OVERLAP}", "a.md", 0, 0.5),
+        _chunk("Rent is due monthly.", "b.md", 3, 0.7),
+        _chunk("Rent is due monthly.", "b.md", 3, 0.2),
+    ]
+
+    packed = pack_context(chunks, token_budget=0)
+
+    assert packed.text == SEPARATOR.join(
+        [f"Clause 4: {OVERLAP} from notice.", "Rent is due monthly."]
+    )
+    assert packed.source_document_ids == ["a.md", "b.md"]
+    assert (packed.chunks_retrieved, packed.chunks_used, packed.passages) == (4, 3, 2)
+
+
+def test_passage_over_budget_falls_back_to_its_best_chunks():
+    best = _chunk("Termination requires written notice.", "a.md", 5, 0.9)
+    long_neighbour = _chunk(" ".join(["filler"] * 200), "a.md", 6, 0.1)
+    other = _chunk("Deposit equals two months of rent.", "b.md", 0, 0.5)
+    budget = estimate_tokens(best.text) + estimate_tokens(SEPARATOR) + estimate_tokens(other.text)
+
+    packed = pack_context([best, long_neighbour, other], token_budget=budget)
+
+    assert packed.text == SEPARATOR.join([best.text, other.text])
+    assert packed.tokens <= budget
+    assert packed.chunks_used == 2
+
+
+def test_most_relevant_chunk_is_included_even_over_budget():
+    top = _chunk(" ".join(["clause"] * 50), "a.md", 0, 0.9)
+    neighbour = _chunk("Next clause.", "a.md", 1, 0.2)
+
+    packed = pack_context([top, neighbour, _chunk("Short.", "b.md", 0, 0.1)], token_budget=10)
+
+    assert packed.text == top.text
+    assert packed.source_document_ids == ["a.md"]
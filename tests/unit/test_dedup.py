@@ -0,0 +1,60 @@
+"""Unit tests for src.services.dedup_service SimHash and src.storage.fingerprints lookups."""
+
+import random
+from array import array
+
+from src.services import dedup_service
+from src.storage.fingerprints import FingerprintIndex
+
+CLAUSE = (
+    "The receiving party shall hold the confidential information in strict confidence and "
+    "shall not disclose it to any third party without the prior written consent of the "
+    "disclosing party, except as required by law."
+)
+
+
+def _reference_simhash(text: str) -> int:
+    words = dedup_service._WORD_RE.findall(text.lower())
+    n = dedup_service.SHINGLE_WORDS
+    shingles = {" ".join(words[i : i + n]) for i in range(max(1, len(words) - n + 1))}
+    counts = [0] * 64
+    for shingle in shingles:
+        h = dedup_service._feature_hash(shingle)
+        for bit in range(64):
+            counts[bit] += (h >> bit) & 1
+    return sum(1 << bit for bit in range(64) if counts[bit] > len(shingles) // 2)
+
+
+def test_bit_sliced_simhash_matches_per_bit_counting():
+    rng = random.Random(5)
+    words = CLAUSE.split()
+    for _ in range(20):
+        text = " ".join(rng.choice(words) for _ in range(rng.randint(1, 80)))
+        assert dedup_service.simhash(text) == _reference_simhash(text)
+
+
+def test_near_duplicates_are_close_and_unrelated_text_is_not():
+    fingerprint = dedup_service.simhash(CLAUSE)
+    reformatted = dedup_service.simhash(CLAUSE.upper().replace("third party", "third-party"))
+    edited = dedup_service.simhash(CLAUSE.replace("The receiving", "Each receiving"))
+    unrelated = dedup_service.simhash("Rent is payable monthly in advance to the landlord.")
+
+    assert reformatted == fingerprint
+    assert (fingerprint ^ edited).bit_count() <= 3
+    assert (fingerprint ^ unrelated).bit_count() > 16
+
+
+def test_index_finds_fingerprints_within_the_band_bound_per_owner():
+    index = FingerprintIndex(":memory:")
+    fingerprint = (1 << 63) | 0x0123_4567_89AB_CDEF  # stored as a negative SQLite INTEGER
+    index.add_many("owner-1", "nda.md", [(4, fingerprint, array("f", [0.5]), ["nda.md"])])
+    three_bits = fingerprint ^ (1 << 1) ^ (1 << 20) ^ (1 << 40)
+
+    match = index.find("owner-1", three_bits, max_distance=3)
+
+    assert (match.document_filename, match.chunk_index, match.distance) == ("nda.md", 4, 3)
+    assert list(match.embedding) == [0.5] and match.source_documents == ["nda.md"]
+    assert index.find("owner-1", three_bits, max_distance=2) is None
+    assert index.find("owner-2", fingerprint, max_distance=3) is None
+    index.delete_document("owner-1", "nda.md")
+    assert index.find("owner-1", fingerprint, max_distance=3) is None
@@ -0,0 +1,40 @@
+"""Unit tests for src.storage.embedding_cache: keys, LRU eviction and the SQLite tier."""
+
+from array import array
+
+from src.storage.embedding_cache import EmbeddingCache, cache_key
+
+
+def test_key_covers_model_dimensions_and_text():
+    key = cache_key("titan-v2", 1024, "rent is due")
+
+    assert key == cache_key("titan-v2", 1024, "rent is due")
+    assert len({key, cache_key("titan-v1", 1024, "rent is due")}) == 2
+    assert len({key, cache_key("titan-v2", 512, "rent is due")}) == 2
+    assert len({key, cache_key("titan-v2", 1024, "rent is due.")}) == 2
+
+
+def test_least_recently_used_entry_is_evicted_from_memory():
+    cache = EmbeddingCache(max_entries=2)
+    cache.put("a", array("f", [1.0]))
+    cache.put("b", array("f", [2.0]))
+    cache.get("a")
+    cache.put("c", array("f", [3.0]))
+
+    assert cache.get("b") is None
+    assert list(cache.get("a")) == [1.0] and list(cache.get("c")) == [3.0]
+    assert cache.stats()["evictions"] == 1
+
+
+def test_disk_tier_survives_a_restart_and_returns_copies(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite3")
+    first = EmbeddingCache(max_entries=1, path=path)
+    first.put("a", array("f", [0.5, 0.25]))
+    first.close()
+
+    cache = EmbeddingCache(max_entries=1, path=path)
+    vector = cache.get("a")
+    vector[0] = 9.0
+
+    assert list(cache.get("a")) == [0.5, 0.25]
+    assert (cache.stats()["disk_hits"], cache.stats()["memory_hits"]) == (1, 1)
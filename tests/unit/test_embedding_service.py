@@ -0,0 +1,109 @@
+"""Unit tests for src.services.embedding_service concurrency, question embeddings and retries."""
+
+import io
+import json
+import threading
+import time
+
+import pytest
+from botocore.exceptions import ClientError
+from src.services import embedding_service
+from src.storage import clients
+from src.storage.embedding_cache import EmbeddingCache
+
+
+class StubBedrock:
+    def __init__(self, throttled: int = 0):
+        self.texts: list[str] = []
+        self.throttled = throttled
+
+    def invoke_model(self, body: str, **kwargs) -> dict:
+        self.texts.append(json.loads(body)["inputText"])
+        if len(self.texts) <= self.throttled:
+            raise ClientError({"Error": {"Code": "ThrottlingException"}}, "InvokeModel")
+        return {"body": io.BytesIO(json.dumps({"embedding": [0.5, 0.25]}).encode())}
+
+
+def test_embed_question_uses_only_the_question_cache(monkeypatch):
+    bedrock = StubBedrock()
+    chunk_cache = EmbeddingCache(max_entries=16)
+    question_cache = EmbeddingCache(max_entries=16)
+    monkeypatch.setattr(embedding_service, "get_bedrock_client", lambda: bedrock)
+    monkeypatch.setattr(embedding_service, "get_embedding_cache", lambda: chunk_cache)
+    monkeypatch.setattr(embedding_service, "get_question_cache", lambda: question_cache)
+
+    first = embedding_service.embed_question("What is the  Notice Period?")
+    second = embedding_service.embed_question("what is the notice period?")
+
+    assert list(first) == list(second) == [0.5, 0.25]
+    assert bedrock.texts == ["what is the notice period?"]
+    assert question_cache.stats()["memory_entries"] == 1
+    assert chunk_cache.stats()["memory_entries"] == 0
+
+
+def test_embedding_client_leaves_retries_to_the_service(monkeypatch):
+    monkeypatch.setattr(embedding_service.time, "sleep", lambda seconds: None)
+    bedrock = StubBedrock(throttled=embedding_service.EMBED_MAX_ATTEMPTS)
+
+    with pytest.raises(ClientError):
+        embedding_service._invoke_with_retry(bedrock, "model", "text")
+
+    assert len(bedrock.texts) == embedding_service.EMBED_MAX_ATTEMPTS
+    assert clients.client_config(clients.BEDROCK_EMBEDDINGS).retries["total_max_attempts"] == 1
+
+
+class ConcurrentBedrock:
+    """Embeds "<n>" as [n]; records the peak number of calls in flight; fails on "fail"."""
+
+    def __init__(self):
+        self.calls: list[str] = []
+        self.in_flight = self.peak = 0
+        self._lock = threading.Lock()
+
+    def invoke_model(self, body: str, **kwargs) -> dict:
+        text = json.loads(body)["inputText"]
+        with self._lock:
+            self.calls.append(text)
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        time.sleep(0.01)
+        with self._lock:
+            self.in_flight -= 1
+        if text == "fail":
+            raise ClientError({"Error": {"Code": "ValidationException"}}, "InvokeModel")
+        return {"body": io.BytesIO(json.dumps({"embedding": [float(text)]}).encode())}
+
+
+@pytest.fixture
+def concurrent_bedrock(monkeypatch) -> ConcurrentBedrock:
+    bedrock = ConcurrentBedrock()
+    monkeypatch.setattr(embedding_service, "get_bedrock_client", lambda: bedrock)
+    monkeypatch.setattr(
+        embedding_service, "get_embedding_cache", lambda: EmbeddingCache(max_entries=64)
+    )
+    return bedrock
+
+
+def test_embed_texts_is_ordered_bounded_and_embeds_duplicates_once(concurrent_bedrock):
+    texts = [str(i % 12) for i in range(16)]
+
+    embeddings = embedding_service.embed_texts(texts, max_concurrency=4)
+
+    assert [e.typecode for e in embeddings] == ["f"] * 16
+    assert [e[0] for e in embeddings] == [float(t) for t in texts]
+    assert sorted(concurrent_bedrock.calls, key=int) == [str(i) for i in range(12)]
+    assert 1 < concurrent_bedrock.peak <= 4
+
+
+def test_embed_texts_failure_reports_what_was_embedded(concurrent_bedrock):
+    received: list[tuple[int, float]] = []
+
+    with pytest.raises(ClientError):
+        embedding_service.embed_texts(
+            ["1", "fail", "3"],
+            max_concurrency=1,
+            on_embedded=lambda pairs: received.extend((i, e[0]) for i, e in pairs),
+        )
+
+    assert received == [(0, 1.0)]
+    assert concurrent_bedrock.calls == ["1", "fail"]
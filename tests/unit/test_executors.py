@@ -0,0 +1,69 @@
+"""Unit tests for src.services.executors: blocking calls leave the event loop, per backend."""
+
+import asyncio
+import contextvars
+import threading
+
+import pytest
+from src.api.config import get_settings
+from src.services import executors
+
+request_id: contextvars.ContextVar[str] = contextvars.ContextVar("request_id", default="")
+
+
+@pytest.fixture
+def pools(monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "api_bedrock_workers", 1)
+    monkeypatch.setattr(settings, "api_storage_workers", 2)
+    executors.shutdown()
+    yield
+    executors.shutdown()
+
+
+def test_calls_run_off_the_loop_with_the_callers_context(pools):
+    async def main():
+        request_id.set("req-1")
+        return threading.get_ident(), await executors.run(
+            executors.STORAGE, lambda: (threading.get_ident(), request_id.get())
+        )
+
+    loop_thread, (worker_thread, seen) = asyncio.run(main())
+
+    assert worker_thread != loop_thread
+    assert seen == "req-1"
+
+
+def test_busy_bedrock_pool_does_not_delay_storage_calls(pools):
+    release = threading.Event()
+
+    async def main():
+        slow = asyncio.ensure_future(executors.run(executors.BEDROCK, release.wait, 5))
+        await asyncio.sleep(0)
+        listed = await asyncio.wait_for(executors.run(executors.STORAGE, lambda: "listed"), 1)
+        finished_early = slow.done()
+        release.set()
+        await slow
+        return listed, finished_early
+
+    assert asyncio.run(main()) == ("listed", False)
+
+
+def test_iterate_yields_every_item_of_a_blocking_iterator(pools):
+    async def main():
+        return [item async for item in executors.iterate(executors.BEDROCK, iter("abc"))]
+
+    assert asyncio.run(main()) == ["a", "b", "c"]
+
+
+def test_zero_workers_runs_inline(monkeypatch):
+    monkeypatch.setattr(get_settings(), "api_storage_workers", 0)
+    executors.shutdown()
+
+    async def main():
+        return threading.get_ident(), await executors.run(executors.STORAGE, threading.get_ident)
+
+    loop_thread, call_thread = asyncio.run(main())
+    executors.shutdown()
+
+    assert call_thread == loop_thread
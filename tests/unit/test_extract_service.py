@@ -0,0 +1,74 @@
+"""Unit tests for src.services.extract_service: pooled PDF extraction matches in-process output."""
+
+from io import BytesIO
+
+import pytest
+from src.api.config import get_settings
+from src.models.document import DocumentFormat
+from src.services import extract_service
+
+PAGES = ["one", "", "three", "four", "", "six", "seven"]
+
+
+def _pdf(pages: list[str]) -> bytes:
+    """Minimal PDF with one line of Helvetica text per page ("" for a page without text)."""
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "",
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids = []
+    for text in pages:
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(
+            "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>"
+        )
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode()
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\n".encode()
+    out += f"startxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
+
+
+@pytest.fixture
+def pdf_file(tmp_path):
+    path = tmp_path / "document.pdf"
+    path.write_bytes(_pdf(PAGES))
+    with open(path, "rb") as f:
+        yield f
+
+
+def test_pooled_extraction_reassembles_page_ranges_in_order(pdf_file, monkeypatch):
+    monkeypatch.setattr(get_settings(), "extract_pool_size", 2)
+    monkeypatch.setattr(extract_service, "PAGES_PER_TASK", 2)
+
+    pooled = "".join(extract_service.iter_text(pdf_file, DocumentFormat.PDF))
+
+    assert pooled == extract_service.extract_text(_pdf(PAGES), DocumentFormat.PDF)
+    assert pooled == "one\n\nthree\n\nfour\n\nsix\n\nseven"
+
+
+def test_in_memory_source_is_extracted_in_process(monkeypatch):
+    monkeypatch.setattr(extract_service, "_iter_pdf_pooled", None)
+
+    text = "".join(extract_service.iter_text(BytesIO(_pdf(["alpha"])), DocumentFormat.PDF))
+
+    assert text == "alpha"
+
+
+def test_extraction_fails_once_the_timeout_budget_is_spent(pdf_file, monkeypatch):
+    monkeypatch.setattr(get_settings(), "extract_pool_size", 1)
+    monkeypatch.setattr(get_settings(), "extract_timeout_seconds", 0.0)
+
+    with pytest.raises(TimeoutError, match="PDF extraction exceeded"):
+        "".join(extract_service.iter_text(pdf_file, DocumentFormat.PDF))
@@ -0,0 +1,70 @@
+"""Unit tests for src.storage.job_queue SQLite leases, retries and dead-lettering."""
+
+import threading
+import time
+
+from src.storage.job_queue import QueueStats, SQLiteJobQueue
+
+
+def test_concurrent_consumers_never_lease_the_same_job(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    producer = SQLiteJobQueue(path, 60.0)
+    ids = {producer.enqueue({"n": i}) for i in range(200)}
+    consumers = [SQLiteJobQueue(path, 60.0) for _ in range(4)]
+    leased: list[list[str]] = [[] for _ in consumers]
+
+    def consume(queue: SQLiteJobQueue, out: list[str]) -> None:
+        while jobs := queue.lease(3):
+            out.extend(job.id for job in jobs)
+
+    threads = [
+        threading.Thread(target=consume, args=(q, out))
+        for q, out in zip(consumers, leased, strict=True)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    every = [job_id for out in leased for job_id in out]
+    assert len(every) == len(set(every)) and set(every) == ids
+
+
+def test_nacked_job_comes_back_after_its_delay_and_ack_removes_it():
+    queue = SQLiteJobQueue(":memory:", 60.0)
+    queue.enqueue({"filename": "a.md"})
+    [first] = queue.lease()
+
+    queue.nack(first, delay_seconds=0.2)
+
+    assert queue.lease() == []
+    [second] = queue.lease(wait_seconds=1.0)
+    assert (second.id, second.attempts) == (first.id, 2)
+    queue.ack(first)  # stale receipt: no effect
+    assert queue.stats().leased == 1
+    queue.ack(second)
+    assert queue.stats() == QueueStats(ready=0, leased=0)
+
+
+def test_job_is_dead_lettered_after_max_attempts():
+    queue = SQLiteJobQueue(":memory:", 0.05, max_attempts=2)
+    queue.enqueue({"filename": "a.md"})
+
+    queue.lease()  # lease expires
+    time.sleep(0.1)
+    [job] = queue.lease()
+    queue.nack(job)
+
+    assert queue.lease() == []
+    assert queue.stats().dead == 1
+
+
+def test_expired_lease_taken_by_another_consumer_cannot_be_extended():
+    queue = SQLiteJobQueue(":memory:", 0.05)
+    queue.enqueue({"filename": "a.md"})
+    [lost] = queue.lease()
+    time.sleep(0.1)
+    [current] = queue.lease()
+
+    assert queue.extend(lost, 60.0) is False
+    assert queue.extend(current, 60.0) is True
@@ -0,0 +1,112 @@
+"""Unit tests for src.storage.lexical_index BM25 search and src.services.retrieval_service fusion."""
+
+from array import array
+
+from src.services import retrieval_service
+from src.storage import lexical_index
+from src.storage.lexical_index import LexicalIndex, decode_postings, encode_postings, tokenize
+from src.storage.vectors import RetrievedChunk
+
+OWNER = "owner-1"
+
+
+def test_tokenize_keeps_section_numbers_and_compounds_whole():
+    assert tokenize("What is Section 12.3(b) of the non-compete?") == [
+        "section",
+        "12.3",
+        "b",
+        "non-compete",
+        "non",
+        "compete",
+    ]
+
+
+def test_postings_round_trip_through_varint_deltas():
+    postings = [(3, 1), (130, 2), (20_000, 300), (2**31, 1)]
+
+    ids, tfs = decode_postings(encode_postings(postings))
+
+    assert list(zip(ids.tolist(), tfs.tolist(), strict=True)) == postings
+
+
+def test_rare_terms_outrank_common_ones_and_owners_are_separate():
+    index = LexicalIndex(":memory:")
+    index.add_many(
+        OWNER,
+        "lease.md",
+        [
+            (0, "The tenant pays rent monthly."),
+            (1, "Rent increases follow the indexation clause."),
+            (2, "The tenant keeps the premises clean."),
+        ],
+    )
+    index.add_many("owner-2", "other.md", [(0, "indexation indexation indexation")])
+
+    matches = index.search(OWNER, "tenant indexation", 10)
+
+    assert [(m.document_filename, m.chunk_index) for m in matches][0] == ("lease.md", 1)
+    assert {m.chunk_index for m in matches} == {0, 1, 2}
+    assert index.search(OWNER, "premises", 10)[0].text == "The tenant keeps the premises clean."
+
+
+def test_replaced_deleted_and_compacted_chunks_leave_the_results(monkeypatch):
+    monkeypatch.setattr(lexical_index, "COMPACT_MIN_DEAD", 2)
+    index = LexicalIndex(":memory:")
+    index.add_many(OWNER, "a.md", [(0, "alpha clause"), (1, "beta clause"), (2, "gamma clause")])
+    index.add_many(OWNER, "b.md", [(0, "alpha appendix")])
+
+    index.add_many(OWNER, "a.md", [(0, "delta clause")])
+    index.delete_document(OWNER, "a.md")
+
+    assert [(m.document_filename, m.text) for m in index.search(OWNER, "alpha clause", 10)] == [
+        ("b.md", "alpha appendix")
+    ]
+    assert not index.has_document(OWNER, "a.md")
+    # Four dead chunk ids outnumbered the one live chunk: postings were rewritten without them.
+    assert index._db.execute("SELECT dead FROM owners").fetchone() == (0,)
+
+
+def test_staged_rows_replace_the_document_only_when_committed():
+    index = LexicalIndex(":memory:")
+    index.add_many(OWNER, "a.md", [(0, "old wording"), (1, "old annex")])
+
+    index.stage(OWNER, "a.md", [(0, "new wording")])
+    assert [m.text for m in index.search(OWNER, "wording", 10)] == ["old wording"]
+    index.commit_staged(OWNER, "a.md")
+
+    assert [m.text for m in index.search(OWNER, "wording annex", 10)] == ["new wording"]
+
+
+def _chunk(filename: str, index: int) -> RetrievedChunk:
+    return RetrievedChunk(f"{filename} {index}", filename, index, 0.0)
+
+
+def test_reciprocal_rank_fusion_favours_chunks_found_by_both_retrievers():
+    dense = [_chunk("a.md", 0), _chunk("a.md", 1), _chunk("b.md", 0)]
+    lexical = [_chunk("c.md", 4), _chunk("b.md", 0)]
+
+    fused = retrieval_service.reciprocal_rank_fusion([dense, lexical], top_k=3, k=60)
+
+    assert [(c.document_filename, c.chunk_index) for c in fused] == [
+        ("b.md", 0),
+        ("a.md", 0),
+        ("c.md", 4),
+    ]
+    assert fused[0].score == 1 / 63 + 1 / 62
+
+
+def test_lexical_failure_falls_back_to_vector_results(monkeypatch):
+    dense = [_chunk("a.md", i) for i in range(4)]
+
+    class BrokenIndex:
+        def search(self, owner_id, query, top_k):
+            raise RuntimeError("database is locked")
+
+    monkeypatch.setattr(retrieval_service, "get_lexical_index", lambda: BrokenIndex())
+    monkeypatch.setattr(
+        retrieval_service.vectors_storage, "query_vectors", lambda o, q, top_k: dense[:top_k]
+    )
+
+    chunks = retrieval_service.retrieve(OWNER, array("f", [1.0]), top_k=2, query_text="rent")
+
+    assert chunks == dense[:2]
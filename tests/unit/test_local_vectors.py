@@ -0,0 +1,89 @@
+"""Unit tests for src.storage.local_vectors: exact and HNSW search, replacement and compaction."""
+
+from array import array
+
+import numpy as np
+from src.storage import local_vectors
+from src.storage.local_vectors import LocalVectorStore
+from src.storage.vector_store import VectorEntry
+
+OWNER = "owner-1"
+
+
+def _entries(vectors: np.ndarray, document: str = "doc.md", owner_id: str = OWNER):
+    return [
+        VectorEntry(
+            f"{owner_id}/{document}/{i}",
+            array("f", v.astype(np.float32).tobytes()),
+            {"owner_id": owner_id, "document_filename": document, "chunk_index": i},
+        )
+        for i, v in enumerate(vectors)
+    ]
+
+
+def _exact_top(vectors: np.ndarray, q: np.ndarray, k: int) -> list[int]:
+    unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    return np.argsort(-(unit @ (q / np.linalg.norm(q))))[:k].tolist()
+
+
+def test_exact_search_ranks_by_cosine_distance_within_the_owner(tmp_path):
+    store = LocalVectorStore(str(tmp_path))
+    store.put(_entries(np.array([[1.0, 0.0], [0.6, 0.8], [0.0, 1.0]])))
+    store.put(_entries(np.array([[1.0, 0.0]]), owner_id="owner-2"))
+
+    matches = store.query(OWNER, array("f", [2.0, 0.1]), top_k=2)
+
+    assert [m.key for m in matches] == [f"{OWNER}/doc.md/0", f"{OWNER}/doc.md/1"]
+    assert matches[0].distance < matches[1].distance
+    assert matches[0].metadata["chunk_index"] == 0
+
+
+def test_replaced_and_deleted_keys_are_not_returned(tmp_path):
+    store = LocalVectorStore(str(tmp_path))
+    store.put(_entries(np.array([[1.0, 0.0], [0.0, 1.0]])))
+    store.put(_entries(np.array([[0.0, 1.0]])))  # key 0 now points the other way
+    store.put(_entries(np.array([[1.0, 0.0]]), document="other.md"))
+
+    store.delete_by_document(OWNER, "other.md")
+    matches = store.query(OWNER, array("f", [1.0, 0.0]), top_k=5)
+
+    assert sorted(m.key for m in matches) == [f"{OWNER}/doc.md/0", f"{OWNER}/doc.md/1"]
+    assert all(m.distance > 0.99 for m in matches)
+
+
+def test_hnsw_search_of_a_large_owner_agrees_with_exact_search(tmp_path):
+    rng = np.random.default_rng(7)
+    vectors = rng.normal(size=(2000, 16))
+    store = LocalVectorStore(str(tmp_path), hnsw_threshold=100, ef_search=64)
+    store.put(_entries(vectors))
+    store.build_graph(OWNER)
+
+    recall = []
+    for q in rng.normal(size=(20, 16)):
+        found = store.query(OWNER, array("f", q.astype(np.float32).tobytes()), top_k=10)
+        expected = {f"{OWNER}/doc.md/{i}" for i in _exact_top(vectors, q, 10)}
+        recall.append(len(expected & {m.key for m in found}) / 10)
+
+    assert store._owners[OWNER].graph is not None
+    assert np.mean(recall) >= 0.9
+
+
+def test_compaction_keeps_live_rows_and_other_processes_reload_them(tmp_path, monkeypatch):
+    monkeypatch.setattr(local_vectors, "COMPACT_MIN_DEAD_ROWS", 8)
+    rng = np.random.default_rng(3)
+    vectors = rng.normal(size=(30, 4))
+    store = LocalVectorStore(str(tmp_path))
+    reader = LocalVectorStore(str(tmp_path))
+    store.put(_entries(vectors))
+    reader.query(OWNER, array("f", [1.0, 0.0, 0.0, 0.0]), top_k=1)
+    before = store._owners[OWNER].filename
+
+    store.delete([f"{OWNER}/doc.md/{i}" for i in range(20)])
+
+    state = store._owners[OWNER]
+    assert state.filename != before and state.count == state.live_count == 10
+    q = vectors[25].astype(np.float32)
+    for view in (store, reader):
+        [match] = view.query(OWNER, array("f", q.tobytes()), top_k=1)
+        assert match.key == f"{OWNER}/doc.md/25"
+    assert set(reader.get([f"{OWNER}/doc.md/25"])) == {f"{OWNER}/doc.md/25"}
@@ -0,0 +1,169 @@
+"""Unit tests for src.storage.metadata update expressions."""
+
+from src.models.document import ProcessingStatus
+from src.storage import metadata
+
+
+class RecordingTable:
+    def __init__(self):
+        self.calls: list[dict] = []
+
+    def update_item(self, **kwargs) -> dict:
+        self.calls.append(kwargs)
+        return {}
+
+
+def _apply_set(call: dict) -> dict:
+    """Attribute -> value assigned by the SET clause of an update_item call."""
+    set_clause = call["UpdateExpression"].split(" REMOVE ")[0].removeprefix("SET ")
+    values = call["ExpressionAttributeValues"]
+    return {
+        name.strip(): values[placeholder.strip()]
+        for name, placeholder in (part.split("=") for part in set_clause.split(","))
+    }
+
+
+def test_update_status_failed_with_manifest_keeps_status_shard(monkeypatch):
+    table = RecordingTable()
+    monkeypatch.setattr(metadata, "_get_table", lambda: table)
+
+    metadata.update_status(
+        "owner-1",
+        "contract.pdf",
+        ProcessingStatus.FAILED,
+        processing_error="boom",
+        chunk_count=12,
+        vector_key_scheme="owner_id/filename/chunk_index",
+    )
+
+    assigned = _apply_set(table.calls[0])
+    assert assigned["status_shard"] == metadata._status_shard("owner-1", "contract.pdf", "failed")
+    assert assigned["status_shard"].startswith("failed#")
+    assert assigned["vector_key_scheme"] == "owner_id/filename/chunk_index"
+    assert assigned["chunk_count"] == 12
+
+
+def test_update_status_processed_removes_status_shard(monkeypatch):
+    table = RecordingTable()
+    monkeypatch.setattr(metadata, "_get_table", lambda: table)
+
+    metadata.update_status(
+        "owner-1",
+        "contract.pdf",
+        ProcessingStatus.PROCESSED,
+        chunk_count=3,
+        vector_key_scheme="owner_id/filename/chunk_index",
+    )
+
+    call = table.calls[0]
+    assert "status_shard" not in _apply_set(call)
+    assert "REMOVE status_shard" in call["UpdateExpression"]
+
+
+class RecordingClient:
+    def __init__(self):
+        self.transactions: list[list[dict]] = []
+
+    def transact_write_items(self, **params) -> dict:
+        self.transactions.append(params["TransactItems"])
+        return {}
+
+
+def test_update_status_with_corpus_bump_is_one_transaction(monkeypatch):
+    table = RecordingTable()
+    table.client = RecordingClient()
+    table.name = "documents"
+    monkeypatch.setattr(metadata, "_get_table", lambda: table)
+
+    metadata.update_status(
+        "owner-1",
+        "contract.pdf",
+        ProcessingStatus.PROCESSED,
+        chunk_count=3,
+        vector_key_scheme="owner_id/filename/chunk_index",
+        vector_generation=7,
+        bump_corpus=True,
+    )
+
+    assert table.calls == []
+    [(document, corpus)] = table.client.transactions
+    assert document["Update"]["ConditionExpression"] == "attribute_exists(owner_id)"
+    assert "vector_generation = :g" in document["Update"]["UpdateExpression"]
+    assert document["Update"]["ExpressionAttributeValues"][":g"] == {"N": "7"}
+    assert corpus["Update"]["Key"]["filename"] == {"S": metadata.CORPUS_VERSION_FILENAME}
+    assert corpus["Update"]["UpdateExpression"] == "ADD corpus_version :one"
+
+
+class ScanTable(RecordingTable):
+    def __init__(self, pages: list[list[dict]]):
+        super().__init__()
+        self.pages = pages
+
+    def scan(self, **params) -> dict:
+        page = int(params.get("ExclusiveStartKey", {}).get("page", 0))
+        resp: dict = {"Items": self.pages[page]}
+        if page + 1 < len(self.pages):
+            resp["LastEvaluatedKey"] = {"page": page + 1}
+        return resp
+
+
+def test_backfill_status_index_shards_only_unindexed_pending_and_failed_items(monkeypatch):
+    def item(filename: str, status: str, **extra) -> dict:
+        return {"owner_id": "owner-1", "filename": filename, "processing_status": status, **extra}
+
+    table = ScanTable(
+        [
+            [item("a.pdf", "pending"), item("b.pdf", "processed")],
+            [item("c.pdf", "failed"), item("d.pdf", "failed", status_shard="failed#3")],
+        ]
+    )
+    monkeypatch.setattr(metadata, "_get_table", lambda: table)
+
+    assert metadata.backfill_status_index() == 2
+    assert [call["Key"]["filename"] for call in table.calls] == ["a.pdf", "c.pdf"]
+    assert table.calls[1]["ExpressionAttributeValues"][":k"] == metadata._status_shard(
+        "owner-1", "c.pdf", "failed"
+    )
+
+
+class QueryTable:
+    """Owner partition in sort-key order; query honours Limit and ExclusiveStartKey."""
+
+    def __init__(self, filenames: list[str]):
+        self.filenames = sorted(filenames)
+        self.limits: list[int] = []
+
+    def query(self, **params) -> dict:
+        start = params.get("ExclusiveStartKey", {}).get("filename")
+        remaining = [f for f in self.filenames if start is None or f > start]
+        page = remaining[: params["Limit"]]
+        self.limits.append(params["Limit"])
+        resp: dict = {
+            "Items": [
+                {
+                    "owner_id": "owner-1",
+                    "filename": f,
+                    "format": "pdf",
+                    "size_bytes": 1,
+                    "uploaded_at": "2025-01-01T00:00:00+00:00",
+                    "processing_status": "processed",
+                }
+                for f in page
+            ]
+        }
+        if len(page) < len(remaining):
+            resp["LastEvaluatedKey"] = {"owner_id": "owner-1", "filename": page[-1]}
+        return resp
+
+
+def test_list_by_owner_fills_the_page_the_corpus_version_sentinel_was_dropped_from(monkeypatch):
+    table = QueryTable([metadata.CORPUS_VERSION_FILENAME, "a.pdf", "b.pdf", "c.pdf", "d.pdf"])
+    monkeypatch.setattr(metadata, "_get_table", lambda: table)
+
+    first, token = metadata.list_by_owner("owner-1", limit=2)
+    second, end = metadata.list_by_owner("owner-1", limit=2, next_token=token)
+
+    assert [d.filename for d in first] == ["a.pdf", "b.pdf"]
+    assert [d.filename for d in second] == ["c.pdf", "d.pdf"]
+    assert end is None
+    assert table.limits == [2, 1, 2]
@@ -0,0 +1,101 @@
+"""Unit tests for src.api.multipart.StreamingForm over bodies split into small chunks."""
+
+import asyncio
+
+import pytest
+from src.api.multipart import MAX_FIELD_BYTES, MultipartError, StreamingForm
+from starlette.requests import Request
+
+BOUNDARY = "form-boundary"
+
+
+def _body(*parts: tuple[str, str | None, bytes]) -> bytes:
+    out = b""
+    for name, filename, data in parts:
+        disposition = f'form-data; name="{name}"'
+        if filename is not None:
+            disposition += f'; filename="{filename}"\r\nContent-Type: application/pdf'
+        out += f"--{BOUNDARY}\r\nContent-Disposition: {disposition}\r\n\r\n".encode()
+        out += data + b"\r\n"
+    return out + f"--{BOUNDARY}--\r\n".encode()
+
+
+def _request(body: bytes, chunk_size: int = 7) -> Request:
+    chunks = [body[i : i + chunk_size] for i in range(0, len(body), chunk_size)]
+
+    async def receive() -> dict:
+        chunk = chunks.pop(0) if chunks else b""
+        return {"type": "http.request", "body": chunk, "more_body": bool(chunks)}
+
+    headers = [
+        (b"content-type", f"multipart/form-data; boundary={BOUNDARY}".encode()),
+        (b"content-length", str(len(body)).encode()),
+    ]
+    return Request({"type": "http", "method": "POST", "headers": headers}, receive)
+
+
+async def _files(form: StreamingForm) -> list[tuple[str, str | None, bytes]]:
+    files = []
+    while (part := await form.next_file()) is not None:
+        data = b""
+        while chunk := await form.read():
+            data += chunk
+        files.append((part.filename, part.content_type, data))
+    return files
+
+
+def test_fields_and_files_are_read_in_order_across_chunk_boundaries():
+    payload = b"%PDF-1.7\r\n" + bytes(range(256)) * 4
+    body = _body(
+        ("mode", None, b"upload_and_queue"),
+        ("file", "a.pdf", payload),
+        ("file", "b.pdf", b"%PDF-1.4 short"),
+        ("note", None, b"after the files"),
+    )
+    form = StreamingForm(_request(body), max_bytes=len(body))
+
+    files = asyncio.run(_files(form))
+
+    assert files == [
+        ("a.pdf", "application/pdf", payload),
+        ("b.pdf", "application/pdf", b"%PDF-1.4 short"),
+    ]
+    assert form.fields == {"mode": "upload_and_queue", "note": "after the files"}
+
+
+def test_unread_file_data_is_skipped_by_next_file():
+    body = _body(("file", "a.pdf", b"x" * 100), ("file", "b.pdf", b"y"))
+    form = StreamingForm(_request(body), max_bytes=len(body))
+
+    async def names() -> list[str]:
+        first = await form.next_file()
+        await form.read()
+        second = await form.next_file()
+        return [first.filename, second.filename]
+
+    assert asyncio.run(names()) == ["a.pdf", "b.pdf"]
+
+
+def test_body_over_the_limit_is_refused_while_streaming():
+    body = _body(("file", "a.pdf", b"x" * 1000))
+    request = _request(body)
+    request.scope["headers"] = request.scope["headers"][:1]  # no Content-Length
+    form = StreamingForm(Request(request.scope, request.receive), max_bytes=500)
+
+    with pytest.raises(MultipartError, match="exceeds 500 bytes"):
+        asyncio.run(_files(form))
+
+
+def test_declared_length_over_the_limit_is_refused_up_front():
+    body = _body(("file", "a.pdf", b"x" * 1000))
+
+    with pytest.raises(MultipartError, match="exceeds"):
+        StreamingForm(_request(body), max_bytes=500)
+
+
+def test_oversized_field_is_rejected():
+    body = _body(("mode", None, b"x" * (MAX_FIELD_BYTES + 1)))
+    form = StreamingForm(_request(body, chunk_size=4096), max_bytes=len(body))
+
+    with pytest.raises(MultipartError, match="mode"):
+        asyncio.run(form.read_rest())
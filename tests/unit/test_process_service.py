@@ -0,0 +1,267 @@
+"""Unit tests for src.services.process_service: runs are written under a new key generation and
+become visible all at once."""
+
+from array import array
+from datetime import UTC, datetime
+
+import pytest
+from src.models.document import Document, DocumentFormat, ProcessingStatus
+from src.services import dedup_service, process_service
+from src.storage import vectors as vectors_storage
+from src.storage.checkpoints import CheckpointStore
+from src.storage.lexical_index import LexicalIndex
+from src.storage.vector_store import VectorMatch
+
+OWNER = "owner-1"
+FILENAME = "contract.md"
+
+
+class DictStore:
+    """VectorStore over a dict; query ranks by the first embedding component."""
+
+    def __init__(self):
+        self.vectors: dict[str, tuple[array, dict]] = {}
+        self.puts_left: int | None = None
+
+    def put(self, entries) -> None:
+        if self.puts_left is not None:
+            if self.puts_left == 0:
+                raise RuntimeError("PutVectors failed")
+            self.puts_left -= 1
+        for entry in entries:
+            self.vectors[entry.key] = (entry.embedding, entry.metadata)
+
+    def get(self, keys):
+        return {k: self.vectors[k][0] for k in keys if k in self.vectors}
+
+    def query(self, owner_id, query_vector, top_k):
+        ranked = sorted(
+            (abs(e[0] - query_vector[0]), k, m)
+            for k, (e, m) in self.vectors.items()
+            if m["owner_id"] == owner_id
+        )
+        return [VectorMatch(k, d, m) for d, k, m in ranked[:top_k]]
+
+    def delete(self, keys) -> None:
+        for key in keys:
+            self.vectors.pop(key, None)
+
+    def delete_by_document(self, owner_id, document_filename) -> None:
+        self.delete(list(self.list(f"{owner_id}/{document_filename}/")))
+
+    def list(self, prefix=""):
+        return [k for k in list(self.vectors) if k.startswith(prefix)]
+
+
+class Pipeline:
+    def __init__(self, monkeypatch):
+        self.store = DictStore()
+        self.lexical = LexicalIndex(":memory:")
+        self.documents: dict[str, Document] = {}
+        self.objects: dict[str, bytes] = {}
+        self.corpus_version = 0
+        self.embedded: list[str] = []
+        self.fail_after: int | None = None
+        metadata = process_service.metadata_store
+        monkeypatch.setattr(metadata, "get_metadata", lambda o, f: self.documents.get(f))
+        monkeypatch.setattr(metadata, "update_status", self.update_status)
+        monkeypatch.setattr(metadata, "bump_corpus_version", self.bump_corpus_version)
+        monkeypatch.setattr(
+            metadata,
+            "get_vector_generations",
+            lambda o, names: {
+                f: self.documents[f].vector_generation or 0 for f in names if f in self.documents
+            },
+        )
+        monkeypatch.setattr(vectors_storage, "get_vector_store", lambda: self.store)
+        monkeypatch.setattr(process_service, "get_checkpoint_store", lambda: None)
+        monkeypatch.setattr(process_service, "get_fingerprint_index", lambda: None)
+        monkeypatch.setattr(dedup_service, "get_fingerprint_index", lambda: None)
+        monkeypatch.setattr(process_service, "get_lexical_index", lambda: self.lexical)
+        monkeypatch.setattr(process_service.s3_storage, "download_document", self.download)
+        monkeypatch.setattr(
+            process_service.s3_storage, "delete_document", lambda o, f: self.objects.pop(f)
+        )
+        monkeypatch.setattr(process_service.embedding_service, "embed_texts", self.embed)
+        monkeypatch.setattr(process_service.chunk_service, "get_chunker", lambda fmt: Paragraphs())
+        monkeypatch.setattr(process_service, "STORE_BATCH_SIZE", 2)
+
+    def upload(self, paragraphs: list[str]) -> None:
+        self.objects[FILENAME] = "\n\n".join(paragraphs).encode()
+        previous = self.documents.get(FILENAME)
+        self.documents[FILENAME] = Document(
+            filename=FILENAME,
+            owner_id=OWNER,
+            format=DocumentFormat.MARKDOWN,
+            size_bytes=len(self.objects[FILENAME]),
+            uploaded_at=datetime.now(UTC),
+            chunk_hashes=previous.chunk_hashes if previous else None,
+            chunk_count=previous.chunk_count if previous else 0,
+            vector_key_scheme=vectors_storage.VECTOR_KEY_SCHEME,
+            vector_generation=previous.vector_generation if previous else None,
+        )
+
+    def update_status(self, owner_id, filename, status, **fields) -> None:
+        doc = self.documents[filename]
+        doc.processing_status = status
+        if fields.pop("bump_corpus", False):
+            self.bump_corpus_version(owner_id)
+        if fields.pop("clear_processing_error", False):
+            doc.processing_error = None
+        for name, value in fields.items():
+            if value is not None:
+                setattr(doc, name, value)
+
+    def bump_corpus_version(self, owner_id) -> int:
+        self.corpus_version += 1
+        return self.corpus_version
+
+    def download(self, owner_id, filename, fileobj) -> bool:
+        fileobj.write(self.objects[filename])
+        return True
+
+    def embed(self, texts, on_embedded=None):
+        if self.fail_after is not None and len(self.embedded) + len(texts) > self.fail_after:
+            raise RuntimeError("Bedrock unavailable")
+        self.embedded += texts
+        embeddings = [
+            array("f", [float(len(self.embedded) - len(texts) + i), 1.0]) for i in range(len(texts))
+        ]
+        if on_embedded is not None:
+            on_embedded(list(enumerate(embeddings)))
+        return embeddings
+
+    def searchable(self) -> list[str]:
+        chunks = vectors_storage.query_vectors(OWNER, array("f", [0.0, 1.0]), top_k=100)
+        return sorted(c.text for c in chunks)
+
+
+class Paragraphs:
+    def chunks(self, pieces):
+        return [p for p in "".join(pieces).split("\n\n") if p.strip()]
+
+
+@pytest.fixture
+def pipeline(monkeypatch) -> Pipeline:
+    return Pipeline(monkeypatch)
+
+
+def test_reprocessing_switches_to_a_new_generation_and_embeds_only_new_text(pipeline):
+    pipeline.upload(["alpha", "beta", "gamma"])
+    process_service.process_document(OWNER, FILENAME)
+    first = pipeline.documents[FILENAME].vector_generation
+
+    pipeline.upload(["intro", "alpha", "beta", "gamma"])
+    process_service.process_document(OWNER, FILENAME)
+
+    doc = pipeline.documents[FILENAME]
+    assert doc.processing_status == ProcessingStatus.PROCESSED
+    assert doc.vector_generation > first
+    assert doc.chunk_count == 4
+    assert pipeline.embedded == ["alpha", "beta", "gamma", "intro"]
+    assert sorted(pipeline.store.vectors) == [
+        f"{OWNER}/{FILENAME}/{i}.{doc.vector_generation}" for i in range(4)
+    ]
+    assert pipeline.searchable() == ["alpha", "beta", "gamma", "intro"]
+    # Switch with vectors, then lexical rows: once per change visible to queries.
+    assert pipeline.corpus_version == 4
+    assert [m.text for m in pipeline.lexical.search(OWNER, "intro alpha", 10)] == ["intro", "alpha"]
+
+
+def test_failed_run_leaves_the_previous_version_untouched(pipeline):
+    pipeline.upload(["alpha", "beta"])
+    process_service.process_document(OWNER, FILENAME)
+    committed = pipeline.documents[FILENAME].model_copy()
+    keys = sorted(pipeline.store.vectors)
+    version = pipeline.corpus_version
+
+    pipeline.upload(["one", "two", "three", "four", "five"])
+    pipeline.fail_after = len(pipeline.embedded) + 2
+    with pytest.raises(RuntimeError, match="Bedrock unavailable"):
+        process_service.process_document(OWNER, FILENAME)
+
+    doc = pipeline.documents[FILENAME]
+    assert doc.processing_status == ProcessingStatus.FAILED
+    assert doc.processing_error == "Bedrock unavailable"
+    assert doc.chunk_hashes == committed.chunk_hashes
+    assert doc.vector_generation == committed.vector_generation
+    assert sorted(pipeline.store.vectors) == keys
+    assert pipeline.searchable() == ["alpha", "beta"]
+    assert pipeline.lexical.search(OWNER, "one", 10) == []
+    assert pipeline.corpus_version == version
+    assert FILENAME in pipeline.objects
+
+
+def test_failed_vector_write_stores_no_partial_embeddings(pipeline, monkeypatch):
+    monkeypatch.setattr(
+        process_service.vectors_storage,
+        "open_writer",
+        lambda: process_service.VectorWriter(pipeline.store, max_batch_vectors=2),
+    )
+    pipeline.upload(["alpha", "beta"])
+    process_service.process_document(OWNER, FILENAME)
+    keys = sorted(pipeline.store.vectors)
+
+    pipeline.upload(["alpha", "beta", "gamma", "delta", "epsilon"])
+    pipeline.store.puts_left = 1
+    with pytest.raises(RuntimeError, match="PutVectors failed"):
+        process_service.process_document(OWNER, FILENAME)
+
+    assert pipeline.documents[FILENAME].processing_status == ProcessingStatus.FAILED
+    assert sorted(pipeline.store.vectors) == keys
+    assert pipeline.searchable() == ["alpha", "beta"]
+
+
+def test_legacy_keys_are_replaced_once_the_new_generation_is_committed(pipeline):
+    pipeline.upload(["alpha", "beta"])
+    doc = pipeline.documents[FILENAME]
+    doc.chunk_count = doc.vector_key_scheme = None
+    pipeline.store.put(
+        vectors_storage.vector_entries(
+            OWNER, FILENAME, [(array("f", [5.0, 1.0]), "old"), (array("f", [6.0, 1.0]), "older")]
+        )
+    )
+
+    process_service.process_document(OWNER, FILENAME)
+
+    generation = pipeline.documents[FILENAME].vector_generation
+    assert sorted(pipeline.store.vectors) == [
+        f"{OWNER}/{FILENAME}/0.{generation}",
+        f"{OWNER}/{FILENAME}/1.{generation}",
+    ]
+
+
+def test_query_skips_keys_outside_the_committed_generation(pipeline):
+    pipeline.upload(["alpha"])
+    pipeline.documents[FILENAME].vector_generation = 7
+    entries = [(array("f", [0.0, 1.0]), "committed")]
+    staged = [(array("f", [0.0, 1.0]), "staged")]
+    pipeline.store.put(vectors_storage.vector_entries(OWNER, FILENAME, entries, generation=7))
+    pipeline.store.put(vectors_storage.vector_entries(OWNER, FILENAME, staged, generation=8))
+    pipeline.store.put(vectors_storage.vector_entries(OWNER, "deleted.md", staged))
+
+    chunks = vectors_storage.query_vectors(OWNER, array("f", [0.0, 1.0]), top_k=1)
+
+    assert [(c.text, c.chunk_index) for c in chunks] == [("committed", 0)]
+
+
+def test_retry_resumes_from_the_checkpoint_without_re_embedding(pipeline, monkeypatch):
+    checkpoints = CheckpointStore(":memory:")
+    monkeypatch.setattr(process_service, "get_checkpoint_store", lambda: checkpoints)
+    monkeypatch.setattr(
+        process_service.s3_storage,
+        "head_document",
+        lambda o, f: {"etag": "etag-1", "size": len(pipeline.objects[f])},
+    )
+    pipeline.upload(["one", "two", "three", "four", "five"])
+    pipeline.fail_after = 2
+    with pytest.raises(RuntimeError, match="Bedrock unavailable"):
+        process_service.process_document(OWNER, FILENAME)
+
+    pipeline.fail_after = None
+    process_service.process_document(OWNER, FILENAME)
+
+    assert pipeline.embedded == ["one", "two", "three", "four", "five"]
+    assert pipeline.documents[FILENAME].processing_status == ProcessingStatus.PROCESSED
+    assert pipeline.searchable() == ["five", "four", "one", "three", "two"]
+    assert list(checkpoints.open(OWNER, FILENAME, "etag-1").chunks()) == []
@@ -0,0 +1,106 @@
+"""Unit tests for src.services.rag_service: answer caching per corpus version and streamed
+answers."""
+
+import io
+import json
+from array import array
+
+import pytest
+from src.services import rag_service
+from src.storage.rag_cache import AnswerCache
+from src.storage.vectors import RetrievedChunk
+
+OWNER = "owner-1"
+
+
+class Claude:
+    def __init__(self):
+        self.requests: list[dict] = []
+
+    def invoke_model(self, body: str, **kwargs) -> dict:
+        self.requests.append(json.loads(body))
+        answer = {"content": [{"type": "text", "text": " Ninety days. "}], "usage": {}}
+        return {"body": io.BytesIO(json.dumps(answer).encode())}
+
+    def invoke_model_with_response_stream(self, body: str, **kwargs) -> dict:
+        self.requests.append(json.loads(body))
+        payloads = [{"type": "message_start", "message": {"usage": {"input_tokens": 12}}}]
+        payloads += [
+            {"type": "content_block_delta", "delta": {"type": "text_delta", "text": text}}
+            for text in (" Ninety", " days. ")
+        ]
+        payloads.append({"type": "message_delta", "usage": {"output_tokens": 3}})
+        return {"body": [{"chunk": {"bytes": json.dumps(p).encode()}} for p in payloads]}
+
+
+class Rag:
+    def __init__(self, monkeypatch):
+        self.claude = Claude()
+        self.version = 1
+        self.retrievals = 0
+        self.cache = AnswerCache(max_entries=8)
+        monkeypatch.setattr(rag_service, "get_bedrock_client", lambda: self.claude)
+        monkeypatch.setattr(rag_service, "get_answer_cache", lambda: self.cache)
+        monkeypatch.setattr(
+            rag_service.metadata_store, "get_corpus_version", lambda owner_id: self.version
+        )
+        monkeypatch.setattr(
+            rag_service.embedding_service, "embed_question", lambda q: array("f", [1.0])
+        )
+        monkeypatch.setattr(rag_service.retrieval_service, "retrieve", self.retrieve)
+
+    def retrieve(self, owner_id, query_embedding, top_k, query_text):
+        self.retrievals += 1
+        return [RetrievedChunk("The notice period is ninety days.", "lease.md", 0, 0.9)]
+
+
+@pytest.fixture
+def rag(monkeypatch) -> Rag:
+    return Rag(monkeypatch)
+
+
+def test_repeated_question_is_served_from_cache_until_the_corpus_changes(rag):
+    first = rag_service.rag_query(OWNER, "What is the notice period?")
+    second = rag_service.rag_query(OWNER, "  what is the NOTICE period? ")
+    rag.version += 1
+    third = rag_service.rag_query(OWNER, "What is the notice period?")
+
+    assert first == second == third == ("Ninety days.", ["lease.md"])
+    assert (len(rag.claude.requests), rag.retrievals) == (2, 2)
+
+
+def test_answers_are_not_cached_when_the_corpus_version_is_unavailable(rag, monkeypatch):
+    def unavailable(owner_id):
+        raise RuntimeError("DynamoDB unavailable")
+
+    monkeypatch.setattr(rag_service.metadata_store, "get_corpus_version", unavailable)
+
+    rag_service.rag_query(OWNER, "What is the notice period?")
+    rag_service.rag_query(OWNER, "What is the notice period?")
+
+    assert len(rag.claude.requests) == 2
+    assert rag.cache.stats()["entries"] == 0
+
+
+def test_streamed_answer_arrives_as_tokens_then_done_and_is_cached(rag):
+    events = list(rag_service.rag_query_stream(OWNER, "What is the notice period?"))
+
+    assert events == [
+        ("token", " Ninety"),
+        ("token", " days. "),
+        ("done", ["lease.md"]),
+    ]
+    assert rag_service.rag_query(OWNER, "What is the notice period?") == (
+        "Ninety days.",
+        ["lease.md"],
+    )
+    assert len(rag.claude.requests) == 1
+
+
+def test_cached_answer_is_streamed_as_a_single_token(rag):
+    rag_service.rag_query(OWNER, "What is the notice period?")
+
+    events = list(rag_service.rag_query_stream(OWNER, "what is the notice period?"))
+
+    assert events == [("token", "Ninety days."), ("done", ["lease.md"])]
+    assert len(rag.claude.requests) == 1
@@ -0,0 +1,32 @@
+"""Unit tests for src.api.rate_limit request costs and windows."""
+
+from src.api.config import get_settings
+from src.api.rate_limit import InMemoryRateLimiter, request_cost
+from starlette.requests import Request
+
+
+def _request(method: str, path: str, content_length: int | None = None) -> Request:
+    headers = [] if content_length is None else [(b"content-length", str(content_length).encode())]
+    return Request({"type": "http", "method": method, "path": path, "headers": headers})
+
+
+def test_bulk_uploads_cost_one_unit_per_started_block_up_to_the_window(monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "rate_limit_bulk_unit_bytes", 1000)
+    monkeypatch.setattr(settings, "rate_limit_requests", 50)
+
+    assert request_cost(_request("POST", "/documents/bulk", 2500)) == 3
+    assert request_cost(_request("POST", "/documents/bulk/", 0)) == 1
+    assert request_cost(_request("POST", "/documents/bulk", 10**9)) == 50
+    assert request_cost(_request("POST", "/documents", 10**9)) == 1
+    assert request_cost(_request("GET", "/documents/bulk")) == 1
+
+
+def test_costly_request_that_does_not_fit_is_refused_without_using_the_window():
+    limiter = InMemoryRateLimiter(requests=10, window_seconds=60)
+
+    assert limiter.is_allowed("owner-1", cost=8)
+    assert not limiter.is_allowed("owner-1", cost=3)
+    assert limiter.is_allowed("owner-1", cost=2)
+    assert not limiter.is_allowed("owner-1")
+    assert limiter.is_allowed("owner-2", cost=10)
@@ -0,0 +1,61 @@
+"""Unit tests for src.storage.s3 uploads whose filename is set after they started."""
+
+import pytest
+from botocore.exceptions import ClientError
+from src.storage import s3
+
+
+class MultipartClient:
+    def __init__(self, copy_error: str | None = None):
+        self.copy_error = copy_error
+        self.deleted: list[str] = []
+        self.copied: list[tuple[str, str]] = []
+
+    def create_multipart_upload(self, **params) -> dict:
+        return {"UploadId": "upload-1"}
+
+    def upload_part(self, **params) -> dict:
+        return {"ETag": f'"{params["PartNumber"]}"'}
+
+    def complete_multipart_upload(self, **params) -> dict:
+        return {}
+
+    def copy_object(self, **params) -> dict:
+        if self.copy_error:
+            raise ClientError({"Error": {"Code": self.copy_error}}, "CopyObject")
+        self.copied.append((params["CopySource"]["Key"], params["Key"]))
+        return {}
+
+    def delete_object(self, **params) -> dict:
+        self.deleted.append(params["Key"])
+        return {}
+
+
+def _staged_upload(monkeypatch, client: MultipartClient) -> s3.DocumentUpload:
+    monkeypatch.setattr(s3, "get_s3_client", lambda: client)
+    upload = s3.DocumentUpload("owner-1", None, "application/pdf")
+    upload.upload_part(b"x")
+    upload.filename = "contract.pdf"
+    return upload
+
+
+def test_staged_object_is_moved_to_the_document_key(monkeypatch):
+    client = MultipartClient()
+    upload = _staged_upload(monkeypatch, client)
+
+    upload.complete(b"y")
+
+    [(source, target)] = client.copied
+    assert source.startswith(s3.STAGING_PREFIX) and target == "owner-1/contract.pdf"
+    assert client.deleted == [source]
+
+
+def test_staged_object_is_deleted_when_the_copy_fails(monkeypatch):
+    client = MultipartClient(copy_error="InternalError")
+    upload = _staged_upload(monkeypatch, client)
+
+    with pytest.raises(ClientError):
+        upload.complete(b"")
+
+    [staged] = client.deleted
+    assert staged.startswith(s3.STAGING_PREFIX)
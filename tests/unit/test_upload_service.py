@@ -0,0 +1,209 @@
+"""Unit tests for src.services.upload_service streaming and presigned uploads and bulk deletes."""
+
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from src.models.document import Document, DocumentFormat
+from src.services import upload_service
+
+
+class RecordingUpload:
+    def __init__(self, owner_id, filename, content_type):
+        self.filename = filename
+        self.content_type = content_type
+        self.completed: bytes | None = None
+
+    def complete(self, data: bytes) -> None:
+        self.completed = bytes(data)
+
+
+@pytest.fixture
+def recording(monkeypatch):
+    monkeypatch.setattr(upload_service.s3_storage, "DocumentUpload", RecordingUpload)
+    monkeypatch.setattr(upload_service, "_record_upload", lambda *args: args)
+
+
+def test_filename_set_after_the_data_names_the_document(recording):
+    upload = upload_service.StreamingUpload("owner-1", None, None)
+    upload.write(b"%PDF-1.7\n" + b"x" * upload_service.SNIFF_BYTES)
+    upload.set_filename("contract.pdf")
+
+    recorded = upload.complete("upload_and_queue")
+
+    assert upload._upload.filename == "contract.pdf"
+    assert upload._upload.content_type == "application/pdf"
+    assert recorded[1:3] == ("contract.pdf", DocumentFormat.PDF)
+
+
+def test_late_filename_is_checked_against_the_leading_bytes(recording):
+    upload = upload_service.StreamingUpload("owner-1", None, None)
+    upload.write(b"# Notes\n" + b"x" * upload_service.SNIFF_BYTES)
+
+    with pytest.raises(ValueError, match="does not match"):
+        upload.set_filename("notes.pdf")
+
+
+class ListingClient:
+    def __init__(self, objects: dict[str, datetime]):
+        self.objects = objects
+
+    def get_paginator(self, operation: str):
+        return self
+
+    def paginate(self, Bucket: str, Prefix: str):  # noqa: N803
+        contents = [
+            {"Key": key, "LastModified": modified}
+            for key, modified in self.objects.items()
+            if key.startswith(Prefix)
+        ]
+        return [{"Contents": contents}]
+
+
+def test_purge_keeps_recent_objects_without_metadata(monkeypatch):
+    now = datetime.now(UTC)
+    client = ListingClient(
+        {
+            "owner-1/stale.pdf": now - timedelta(hours=1),
+            "owner-1/in-flight.pdf": now - timedelta(seconds=5),
+            "owner-1/recorded.pdf": now - timedelta(hours=1),
+        }
+    )
+    deleted: list[str] = []
+    monkeypatch.setattr(upload_service.s3_storage, "get_s3_client", lambda: client)
+    monkeypatch.setattr(
+        upload_service.s3_storage,
+        "delete_documents",
+        lambda owner_id, names: deleted.extend(names) or {},
+    )
+    monkeypatch.setattr(
+        upload_service.metadata_store,
+        "get_metadata_batch",
+        lambda owner_id, names: {f: object() for f in names if f == "recorded.pdf"},
+    )
+    monkeypatch.setattr(
+        upload_service.vectors_storage, "delete_unrecorded_vectors", lambda owner_id: 0
+    )
+
+    assert upload_service._delete_orphans("owner-1", None, set()) == 1
+    assert deleted == ["stale.pdf"]
+
+
+def _recorded(filename: str) -> Document:
+    return Document(
+        filename=filename,
+        owner_id="owner-1",
+        format=DocumentFormat.PDF,
+        size_bytes=10,
+        uploaded_at=datetime.now(UTC),
+        chunk_count=2,
+        vector_key_scheme=upload_service.vectors_storage.VECTOR_KEY_SCHEME,
+        vector_generation=7,
+    )
+
+
+def test_bulk_delete_keeps_metadata_of_documents_whose_vectors_remain(monkeypatch):
+    docs = {f: _recorded(f) for f in ("a.pdf", "bad.pdf", "c.pdf")}
+    removed: list[str] = []
+    vector_calls: list[list[str]] = []
+
+    def delete_keys(keys):
+        vector_calls.append(keys)
+        if any("/bad.pdf/" in k for k in keys):
+            raise RuntimeError("DeleteVectors throttled")
+
+    metadata = upload_service.metadata_store
+    monkeypatch.setattr(
+        metadata, "get_metadata_batch", lambda o, names: {f: docs[f] for f in names if f in docs}
+    )
+    monkeypatch.setattr(metadata, "delete_metadata_batch", lambda o, names: removed.extend(names))
+    monkeypatch.setattr(metadata, "bump_corpus_version", lambda o: 1)
+    monkeypatch.setattr(upload_service.s3_storage, "delete_documents", lambda o, names: {})
+    monkeypatch.setattr(upload_service.vectors_storage, "delete_keys", delete_keys)
+    monkeypatch.setattr(upload_service, "_delete_local_indexes", lambda o, f: None)
+    # One document per DeleteVectors call: a failed call only fails its own document.
+    monkeypatch.setattr(upload_service, "VECTOR_DELETE_BATCH_SIZE", 2)
+
+    *_, summary = upload_service.iter_bulk_delete(
+        "owner-1", filenames=["a.pdf", "bad.pdf", "c.pdf", "gone.pdf", "a.pdf"]
+    )
+
+    assert sorted(removed) == ["a.pdf", "c.pdf"]
+    assert (summary["deleted"], summary["failed"], summary["complete"]) == (2, 1, False)
+    assert summary["not_found_document_ids"] == ["gone.pdf"]
+    assert [f["document_id"] for f in summary["failures"]] == ["bad.pdf"]
+    assert vector_calls[0] == ["owner-1/a.pdf/0.7", "owner-1/a.pdf/1.7"]
+
+
+class PresignedObjects:
+    """S3 stand-in for the presigned flow: objects the client uploaded directly."""
+
+    def __init__(self, monkeypatch):
+        self.objects: dict[str, tuple[bytes, str]] = {}
+        self.posts: list[tuple] = []
+        self.recorded: list[tuple] = []
+        s3 = upload_service.s3_storage
+        monkeypatch.setattr(s3, "presigned_post", self.presigned_post)
+        monkeypatch.setattr(s3, "head_document", self.head)
+        monkeypatch.setattr(s3, "read_document_head", lambda o, f, n: self.objects[f][0][:n])
+        monkeypatch.setattr(s3, "delete_document", lambda o, f: self.objects.pop(f) and True)
+        monkeypatch.setattr(upload_service, "_record_upload", self.record)
+
+    def presigned_post(self, owner_id, filename, content_type, max_size, expires_seconds):
+        self.posts.append((owner_id, filename, content_type, max_size))
+        return {
+            "url": "https://bucket.s3.amazonaws.com",
+            "fields": {"key": f"{owner_id}/{filename}"},
+        }
+
+    def head(self, owner_id, filename):
+        if filename not in self.objects:
+            return None
+        data, content_type = self.objects[filename]
+        return {"etag": "e", "size": len(data), "content_type": content_type}
+
+    def record(self, owner_id, filename, fmt, size, mode):
+        self.recorded.append((filename, fmt, size, mode))
+        return filename
+
+
+@pytest.fixture
+def presigned(monkeypatch) -> PresignedObjects:
+    return PresignedObjects(monkeypatch)
+
+
+def test_upload_url_pins_the_declared_size_and_stored_content_type(presigned):
+    result = upload_service.create_upload_url("owner-1", "notes.md", None, 1234)
+
+    assert presigned.posts == [("owner-1", "notes.md", "text/markdown", 1234)]
+    assert (result["content_type"], result["max_size_bytes"]) == ("text/markdown", 1234)
+    assert result["expires_at"] > datetime.now(UTC)
+
+
+def test_upload_url_is_refused_for_invalid_files(presigned):
+    with pytest.raises(ValueError, match="25 MB"):
+        upload_service.create_upload_url("owner-1", "big.pdf", None, 26 * 1024 * 1024)
+    with pytest.raises(ValueError, match="Invalid format"):
+        upload_service.create_upload_url("owner-1", "image.png", "image/png", 10)
+
+    assert presigned.posts == []
+
+
+def test_complete_upload_records_a_valid_object_once_it_exists(presigned):
+    assert upload_service.complete_upload("owner-1", "contract.pdf", "upload_only") is None
+
+    presigned.objects["contract.pdf"] = (b"%PDF-1.7\n...", "application/pdf")
+
+    assert upload_service.complete_upload("owner-1", "contract.pdf", "upload_only") == (
+        "contract.pdf"
+    )
+    assert presigned.recorded == [("contract.pdf", DocumentFormat.PDF, 12, "upload_only")]
+
+
+def test_complete_upload_deletes_an_object_that_is_not_its_format(presigned):
+    presigned.objects["contract.pdf"] = (b"<html>not a pdf</html>", "application/pdf")
+
+    with pytest.raises(ValueError, match="does not match"):
+        upload_service.complete_upload("owner-1", "contract.pdf", "upload_only")
+
+    assert presigned.objects == {}
+    assert presigned.recorded == []
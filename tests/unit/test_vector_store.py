@@ -0,0 +1,44 @@
+"""Unit tests for src.storage.vector_store.S3VectorsStore float32 payloads and delete batches."""
+
+from array import array
+
+from src.storage import vector_store
+from src.storage.vector_store import S3VectorsStore, VectorEntry
+
+
+class VectorsClient:
+    def __init__(self):
+        self.stored: dict[str, list[float]] = {}
+        self.deletes: list[list[str]] = []
+
+    def put_vectors(self, vectorBucketName, indexName, vectors):  # noqa: N803
+        for v in vectors:
+            self.stored[v["key"]] = v["data"]["float32"]
+
+    def get_vectors(self, vectorBucketName, indexName, keys, **kwargs):  # noqa: N803
+        return {"vectors": [{"key": k, "data": {"float32": self.stored[k]}} for k in keys]}
+
+    def delete_vectors(self, vectorBucketName, indexName, keys):  # noqa: N803
+        self.deletes.append(keys)
+
+
+def test_float32_embeddings_round_trip_unchanged():
+    client = VectorsClient()
+    store = S3VectorsStore(client, "bucket", "index")
+    embedding = array("f", [0.1, -2.5, 1e-8])
+
+    store.put([VectorEntry("owner-1/a.md/0", embedding, {"owner_id": "owner-1"})])
+    [(key, vector)] = store.get(["owner-1/a.md/0"]).items()
+
+    assert client.stored[key] == embedding.tolist()
+    assert vector.typecode == "f" and vector == embedding
+
+
+def test_deletes_are_sent_in_batches_and_skipped_when_unconfigured(monkeypatch):
+    monkeypatch.setattr(vector_store, "DELETE_BATCH_SIZE", 2)
+    client = VectorsClient()
+
+    S3VectorsStore(client, "bucket", "index").delete(["k1", "k2", "k3"])
+    S3VectorsStore(client, None, "index").delete(["k4"])
+
+    assert client.deletes == [["k1", "k2"], ["k3"]]
@@ -0,0 +1,70 @@
+"""Unit tests for src.storage.vector_writer: coalesced batches and per-document failures."""
+
+from array import array
+
+from botocore.exceptions import ClientError
+from src.storage import vector_writer
+from src.storage.vector_store import VectorEntry
+from src.storage.vector_writer import VectorWriter
+
+
+def _entries(document: str, count: int) -> list[VectorEntry]:
+    return [
+        VectorEntry(f"owner-1/{document}/{i}", array("f", [1.0, 0.0]), {"text": "t"})
+        for i in range(count)
+    ]
+
+
+def _error(code: str) -> ClientError:
+    return ClientError({"Error": {"Code": code, "Message": code}}, "PutVectors")
+
+
+class RecordingStore:
+    def __init__(self, reject: str | None = None, error_code: str = "ValidationException"):
+        self.calls: list[list[str]] = []
+        self.reject = reject
+        self.error_code = error_code
+
+    def put(self, entries: list[VectorEntry]) -> None:
+        keys = [e.key for e in entries]
+        self.calls.append(keys)
+        if self.reject is not None and any(f"/{self.reject}/" in k for k in keys):
+            raise _error(self.error_code)
+
+
+def _run(store: RecordingStore, documents: dict[str, int]) -> dict[str, Exception | None]:
+    outcome: dict[str, Exception | None] = {}
+    with VectorWriter(store, max_concurrency=2, max_batch_vectors=10) as writer:
+        for document, count in documents.items():
+            writer.add(document, _entries(document, count))
+            writer.seal(document, lambda error, d=document: outcome.__setitem__(d, error))
+    return outcome
+
+
+def test_small_documents_share_put_calls():
+    store = RecordingStore()
+
+    outcome = _run(store, {"a.md": 3, "b.md": 4, "c.md": 5})
+
+    assert [len(keys) for keys in store.calls] == [10, 2]
+    assert outcome == {"a.md": None, "b.md": None, "c.md": None}
+
+
+def test_rejected_batch_is_split_by_document():
+    store = RecordingStore(reject="b.md")
+
+    outcome = _run(store, {"a.md": 3, "b.md": 4, "c.md": 3})
+
+    assert outcome["a.md"] is None and outcome["c.md"] is None
+    assert isinstance(outcome["b.md"], ClientError)
+    assert [len(keys) for keys in store.calls] == [10, 3, 4, 3]
+
+
+def test_exhausted_retries_fail_every_document_without_splitting(monkeypatch):
+    monkeypatch.setattr(vector_writer.time, "sleep", lambda seconds: None)
+    store = RecordingStore(reject="b.md", error_code="ThrottlingException")
+
+    outcome = _run(store, {"a.md": 3, "b.md": 4})
+
+    assert all(isinstance(error, ClientError) for error in outcome.values())
+    assert len(store.calls) == vector_writer.PUT_MAX_ATTEMPTS
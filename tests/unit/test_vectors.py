@@ -0,0 +1,63 @@
+"""Unit tests for src.storage.vectors manifests: exact-key deletes and the listing fallback."""
+
+from src.storage import vectors
+
+OWNER = "owner-1"
+
+
+class KeyStore:
+    def __init__(self, keys: list[str]):
+        self.keys = set(keys)
+        self.listed: list[str] = []
+        self.deleted: list[list[str]] = []
+
+    def list(self, prefix=""):
+        self.listed.append(prefix)
+        return [k for k in sorted(self.keys) if k.startswith(prefix)]
+
+    def delete(self, keys) -> None:
+        self.deleted.append(list(keys))
+        self.keys -= set(keys)
+
+    def delete_by_document(self, owner_id, document_filename) -> None:
+        self.delete(self.list(f"{owner_id}/{document_filename}/"))
+
+
+def test_manifest_keys_follow_the_key_scheme_and_generation():
+    scheme = vectors.VECTOR_KEY_SCHEME
+
+    assert vectors.manifest_keys(OWNER, "a.md", 2, scheme) == [f"{OWNER}/a.md/0", f"{OWNER}/a.md/1"]
+    assert vectors.manifest_keys(OWNER, "a.md", 1, scheme, 42) == [f"{OWNER}/a.md/0.42"]
+    assert vectors.manifest_keys(OWNER, "a.md", 0, scheme) == []
+    assert vectors.manifest_keys(OWNER, "a.md", None, scheme) is None
+    assert vectors.manifest_keys(OWNER, "a.md", 2, "legacy") is None
+
+
+def test_document_with_a_manifest_is_deleted_without_listing(monkeypatch):
+    store = KeyStore([f"{OWNER}/a.md/0.7", f"{OWNER}/a.md/1.7", f"{OWNER}/a.md.bak/0"])
+    monkeypatch.setattr(vectors, "get_vector_store", lambda: store)
+
+    vectors.delete_document_vectors(OWNER, "a.md", 2, vectors.VECTOR_KEY_SCHEME, 7)
+
+    assert store.listed == []
+    assert store.keys == {f"{OWNER}/a.md.bak/0"}
+
+
+def test_document_without_a_manifest_falls_back_to_listing(monkeypatch):
+    store = KeyStore([f"{OWNER}/a.md/0", f"{OWNER}/a.md/1.7", f"{OWNER}/b.md/0"])
+    monkeypatch.setattr(vectors, "get_vector_store", lambda: store)
+
+    vectors.delete_document_vectors(OWNER, "a.md", None, None)
+
+    assert store.listed == [f"{OWNER}/a.md/"]
+    assert store.keys == {f"{OWNER}/b.md/0"}
+
+
+def test_stale_generations_are_deleted_and_the_current_one_kept(monkeypatch):
+    store = KeyStore(
+        [f"{OWNER}/a.md/0", f"{OWNER}/a.md/0.5", f"{OWNER}/a.md/0.9", f"{OWNER}/a.md/sub/0"]
+    )
+    monkeypatch.setattr(vectors, "get_vector_store", lambda: store)
+
+    assert vectors.delete_stale_vectors(OWNER, "a.md", 9) == 2
+    assert store.keys == {f"{OWNER}/a.md/0.9", f"{OWNER}/a.md/sub/0"}
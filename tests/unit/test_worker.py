@@ -0,0 +1,45 @@
+"""Unit tests for src.services.worker: lease renewal and ack/nack failures."""
+
+import time
+
+from src.services import worker
+from src.storage.job_queue import QueueStats, SQLiteJobQueue
+
+
+def _queue(visibility_timeout_seconds: float, jobs: int = 1) -> SQLiteJobQueue:
+    queue = SQLiteJobQueue(":memory:", visibility_timeout_seconds)
+    for i in range(jobs):
+        queue.enqueue({"owner_id": "owner-1", "filename": f"doc-{i}.md"})
+    return queue
+
+
+def test_lease_of_a_slow_document_is_renewed_until_it_finishes(monkeypatch):
+    queue = _queue(0.3)
+    stolen = []
+
+    def process_document(owner_id, filename):
+        # Three visibility timeouts: without renewal another worker could lease the job now.
+        time.sleep(0.9)
+        stolen.extend(queue.lease(1))
+
+    monkeypatch.setattr(worker.process_service, "process_document", process_document)
+
+    assert worker.run_worker(1, queue, drain=True) == 1
+    assert stolen == []
+    assert queue.stats() == QueueStats(ready=0, leased=0)
+
+
+def test_failed_ack_is_logged_and_the_worker_goes_on(monkeypatch):
+    queue = _queue(60.0, jobs=2)
+    processed: list[str] = []
+
+    def ack(job):
+        raise RuntimeError("database is locked")
+
+    monkeypatch.setattr(queue, "ack", ack)
+    monkeypatch.setattr(
+        worker.process_service, "process_document", lambda o, f: processed.append(f)
+    )
+
+    assert worker.run_worker(1, queue, drain=True) == 2
+    assert sorted(processed) == ["doc-0.md", "doc-1.md"]